@@ -0,0 +1,45 @@
+"""add indicator time-series index
+
+Revision ID: 20261019_0011
+Revises: 20260216_0010
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0011"
+down_revision = "20260216_0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "indicators" not in set(inspector.get_table_names()):
+        return
+
+    existing_indexes = {ix["name"] for ix in inspector.get_indexes("indicators")}
+    if "ix_indicators_ubs_nome_created" not in existing_indexes:
+        op.create_index(
+            "ix_indicators_ubs_nome_created",
+            "indicators",
+            ["ubs_id", "nome_indicador", "created_at"],
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "indicators" not in set(inspector.get_table_names()):
+        return
+
+    existing_indexes = {ix["name"] for ix in inspector.get_indexes("indicators")}
+    if "ix_indicators_ubs_nome_created" in existing_indexes:
+        op.drop_index("ix_indicators_ubs_nome_created", table_name="indicators")
@@ -0,0 +1,47 @@
+"""add realtime events outbox
+
+Revision ID: 20261019_0012
+Revises: 20261019_0011
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0012"
+down_revision = "20261019_0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "eventos_tempo_real" in set(inspector.get_table_names()):
+        return
+
+    op.create_table(
+        "eventos_tempo_real",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("canal", sa.String(length=100), nullable=False),
+        sa.Column("tipo", sa.String(length=50), nullable=False),
+        sa.Column("payload", postgresql.JSONB().with_variant(sa.JSON(), "sqlite"), nullable=False),
+        sa.Column("origem", sa.String(length=64), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_eventos_tempo_real_canal_id", "eventos_tempo_real", ["canal", "id"])
+    op.create_index("ix_eventos_tempo_real_created_at", "eventos_tempo_real", ["created_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "eventos_tempo_real" in set(inspector.get_table_names()):
+        op.drop_table("eventos_tempo_real")
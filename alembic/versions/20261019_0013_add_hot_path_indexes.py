@@ -0,0 +1,58 @@
+"""add indexes for hot query paths
+
+Revision ID: 20261019_0013
+Revises: 20261019_0012
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0013"
+down_revision = "20261019_0012"
+branch_labels = None
+depends_on = None
+
+
+# (tabela, índice, colunas)
+INDICES = [
+    ("agendamentos", "ix_agendamentos_profissional_data_hora", ["profissional_id", "data_hora"]),
+    ("agendamentos", "ix_agendamentos_paciente_data_hora", ["paciente_id", "data_hora"]),
+    ("bloqueios_agenda", "ix_bloqueios_agenda_profissional_inicio", ["profissional_id", "data_inicio"]),
+    ("login_attempts", "ix_login_attempts_email_created", ["email", "created_at"]),
+    ("cronograma_events", "ix_cronograma_events_ubs_inicio", ["ubs_id", "inicio"]),
+    ("microareas", "ix_microareas_ubs_id", ["ubs_id"]),
+    ("agentes_saude", "ix_agentes_saude_microarea_id", ["microarea_id"]),
+    ("educational_materials", "ix_educational_materials_ubs_created", ["ubs_id", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for table, name, columns in INDICES:
+        if table not in tables:
+            continue
+        existing_indexes = {ix["name"] for ix in inspector.get_indexes(table)}
+        if name not in existing_indexes:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for table, name, _columns in reversed(INDICES):
+        if table not in tables:
+            continue
+        existing_indexes = {ix["name"] for ix in inspector.get_indexes(table)}
+        if name in existing_indexes:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,41 @@
+"""add login_attempts created_at index for retention
+
+Revision ID: 20261019_0014
+Revises: 20261019_0013
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0014"
+down_revision = "20261019_0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "login_attempts" not in set(inspector.get_table_names()):
+        return
+
+    existing_indexes = {ix["name"] for ix in inspector.get_indexes("login_attempts")}
+    if "ix_login_attempts_created_at" not in existing_indexes:
+        op.create_index("ix_login_attempts_created_at", "login_attempts", ["created_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "login_attempts" not in set(inspector.get_table_names()):
+        return
+
+    existing_indexes = {ix["name"] for ix in inspector.get_indexes("login_attempts")}
+    if "ix_login_attempts_created_at" in existing_indexes:
+        op.drop_index("ix_login_attempts_created_at", table_name="login_attempts")
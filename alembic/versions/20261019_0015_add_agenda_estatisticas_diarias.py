@@ -0,0 +1,49 @@
+"""add daily appointment statistics rollup
+
+Revision ID: 20261019_0015
+Revises: 20261019_0014
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0015"
+down_revision = "20261019_0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "agenda_estatisticas_diarias" in set(inspector.get_table_names()):
+        return
+
+    # Preenchimento inicial: python -m services.agenda.estatisticas
+    op.create_table(
+        "agenda_estatisticas_diarias",
+        sa.Column("dia", sa.Date(), primary_key=True),
+        sa.Column("profissional_id", sa.Integer(), sa.ForeignKey("profissionais.id"), primary_key=True),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("agendados", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("reagendados", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("realizados", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cancelados", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("faltas", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("antecedencia_minutos", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "agenda_estatisticas_diarias" in set(inspector.get_table_names()):
+        op.drop_table("agenda_estatisticas_diarias")
@@ -0,0 +1,51 @@
+"""add appointment waitlist
+
+Revision ID: 20261019_0016
+Revises: 20261019_0015
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0016"
+down_revision = "20261019_0015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "lista_espera" in set(inspector.get_table_names()):
+        return
+
+    op.create_table(
+        "lista_espera",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("paciente_id", sa.Integer(), sa.ForeignKey("usuarios.id"), nullable=False),
+        sa.Column("profissional_id", sa.Integer(), sa.ForeignKey("profissionais.id"), nullable=True),
+        sa.Column("cargo", sa.String(length=100), nullable=False),
+        sa.Column("data_inicio", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("data_fim", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("observacoes", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="AGUARDANDO"),
+        sa.Column("agendamento_id", sa.Integer(), sa.ForeignKey("agendamentos.id"), nullable=True),
+        sa.Column("atendido_em", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_lista_espera_status_cargo_created", "lista_espera", ["status", "cargo", "created_at"])
+    op.create_index("ix_lista_espera_paciente_id", "lista_espera", ["paciente_id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "lista_espera" in set(inspector.get_table_names()):
+        op.drop_table("lista_espera")
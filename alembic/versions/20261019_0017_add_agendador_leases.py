@@ -0,0 +1,60 @@
+"""add scheduler leases and pending reminder index
+
+Revision ID: 20261019_0017
+Revises: 20261019_0016
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0017"
+down_revision = "20261019_0016"
+branch_labels = None
+depends_on = None
+
+LEMBRETE_PENDENTE = "confirmacao_enviada IS NULL AND status IN ('AGENDADO', 'REAGENDADO')"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tabelas = set(inspector.get_table_names())
+
+    if "agendador_leases" not in tabelas:
+        op.create_table(
+            "agendador_leases",
+            sa.Column("nome", sa.String(length=100), primary_key=True),
+            sa.Column("dono", sa.String(length=64), nullable=False),
+            sa.Column("expira_em", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+    if "agendamentos" in tabelas:
+        existentes = {idx["name"] for idx in inspector.get_indexes("agendamentos")}
+        if "ix_agendamentos_lembrete_pendente" not in existentes:
+            op.create_index(
+                "ix_agendamentos_lembrete_pendente",
+                "agendamentos",
+                ["data_hora"],
+                postgresql_where=sa.text(LEMBRETE_PENDENTE),
+                sqlite_where=sa.text(LEMBRETE_PENDENTE),
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tabelas = set(inspector.get_table_names())
+    if "agendamentos" in tabelas:
+        existentes = {idx["name"] for idx in inspector.get_indexes("agendamentos")}
+        if "ix_agendamentos_lembrete_pendente" in existentes:
+            op.drop_index("ix_agendamentos_lembrete_pendente", table_name="agendamentos")
+    if "agendador_leases" in tabelas:
+        op.drop_table("agendador_leases")
@@ -0,0 +1,134 @@
+"""add appointment end time, per-cargo durations and working hours
+
+Revision ID: 20261019_0018
+Revises: 20261019_0017
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0018"
+down_revision = "20261019_0017"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Duração assumida para as consultas existentes (o padrão da aplicação)
+DURACAO_LEGADA_MINUTOS = 30
+
+CONSTRAINT_SOBREPOSICAO = "ex_agendamentos_sem_sobreposicao"
+CRIAR_CONSTRAINT_SOBREPOSICAO = f"""
+ALTER TABLE agendamentos ADD CONSTRAINT {CONSTRAINT_SOBREPOSICAO}
+EXCLUDE USING gist (
+    profissional_id WITH =,
+    tstzrange(data_hora, data_hora_fim, '[)') WITH &&
+) WHERE (status IN ('AGENDADO', 'REAGENDADO'))
+"""
+
+
+def _colunas(inspector, tabela: str) -> set[str]:
+    return {coluna["name"] for coluna in inspector.get_columns(tabela)}
+
+
+def _criar_constraint_sobreposicao(bind) -> None:
+    existe = bind.execute(
+        sa.text("SELECT 1 FROM pg_constraint WHERE conname = :nome"), {"nome": CONSTRAINT_SOBREPOSICAO}
+    ).first()
+    if existe:
+        return
+    # Depende da extensão btree_gist e de não haver sobreposições já gravadas;
+    # sem isso a checagem da aplicação continua valendo (ver scripts_banco_incremental.md, seção 15)
+    try:
+        with bind.begin_nested():
+            bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+            bind.execute(sa.text(CRIAR_CONSTRAINT_SOBREPOSICAO))
+    except sa.exc.DBAPIError as exc:
+        logger.warning("Constraint %s não criada: %s", CONSTRAINT_SOBREPOSICAO, exc.orig)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tabelas = set(inspector.get_table_names())
+
+    if "cargos" in tabelas and "duracao_padrao_minutos" not in _colunas(inspector, "cargos"):
+        op.add_column("cargos", sa.Column("duracao_padrao_minutos", sa.Integer(), nullable=True))
+
+    if "jornadas_profissionais" not in tabelas:
+        op.create_table(
+            "jornadas_profissionais",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("profissional_id", sa.Integer(), sa.ForeignKey("profissionais.id"), nullable=False),
+            sa.Column("dia_semana", sa.Integer(), nullable=False),
+            sa.Column("hora_inicio", sa.Time(), nullable=False),
+            sa.Column("hora_fim", sa.Time(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index(
+            "ix_jornadas_profissionais_profissional_dia",
+            "jornadas_profissionais",
+            ["profissional_id", "dia_semana"],
+        )
+
+    if "agendamentos" not in tabelas:
+        return
+
+    if "data_hora_fim" not in _colunas(inspector, "agendamentos"):
+        op.add_column("agendamentos", sa.Column("data_hora_fim", sa.DateTime(timezone=True), nullable=True))
+        if bind.dialect.name == "postgresql":
+            op.execute(
+                "UPDATE agendamentos "
+                f"SET data_hora_fim = data_hora + interval '{DURACAO_LEGADA_MINUTOS} minutes' "
+                "WHERE data_hora_fim IS NULL"
+            )
+            op.alter_column("agendamentos", "data_hora_fim", nullable=False)
+        else:
+            # Mantém as frações de segundo: o SQLite compara as datas como texto
+            op.execute(
+                "UPDATE agendamentos "
+                f"SET data_hora_fim = datetime(data_hora, '+{DURACAO_LEGADA_MINUTOS} minutes') "
+                "|| substr(data_hora, 20) "
+                "WHERE data_hora_fim IS NULL"
+            )
+
+    existentes = {idx["name"] for idx in inspector.get_indexes("agendamentos")}
+    if "ix_agendamentos_profissional_data_hora_fim" not in existentes:
+        op.create_index(
+            "ix_agendamentos_profissional_data_hora_fim",
+            "agendamentos",
+            ["profissional_id", "data_hora_fim"],
+        )
+
+    if bind.dialect.name == "postgresql":
+        _criar_constraint_sobreposicao(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tabelas = set(inspector.get_table_names())
+
+    if "agendamentos" in tabelas:
+        if bind.dialect.name == "postgresql":
+            op.execute(f"ALTER TABLE agendamentos DROP CONSTRAINT IF EXISTS {CONSTRAINT_SOBREPOSICAO}")
+        existentes = {idx["name"] for idx in inspector.get_indexes("agendamentos")}
+        if "ix_agendamentos_profissional_data_hora_fim" in existentes:
+            op.drop_index("ix_agendamentos_profissional_data_hora_fim", table_name="agendamentos")
+        if "data_hora_fim" in _colunas(inspector, "agendamentos"):
+            op.drop_column("agendamentos", "data_hora_fim")
+
+    if "jornadas_profissionais" in tabelas:
+        op.drop_table("jornadas_profissionais")
+
+    if "cargos" in tabelas and "duracao_padrao_minutos" in _colunas(inspector, "cargos"):
+        op.drop_column("cargos", "duracao_padrao_minutos")
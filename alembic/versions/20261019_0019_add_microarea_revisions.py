@@ -0,0 +1,41 @@
+"""add per-UBS microarea revision counter
+
+Revision ID: 20261019_0019
+Revises: 20261019_0018
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0019"
+down_revision = "20261019_0018"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tabelas = set(inspector.get_table_names())
+
+    if "microareas_revisoes" not in tabelas:
+        op.create_table(
+            "microareas_revisoes",
+            sa.Column("ubs_id", sa.Integer(), sa.ForeignKey("ubs.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("revisao", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "microareas_revisoes" in set(inspector.get_table_names()):
+        op.drop_table("microareas_revisoes")
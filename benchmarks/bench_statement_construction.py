@@ -0,0 +1,154 @@
+"""Micro-benchmark: custo de montar as consultas frequentes a cada chamada.
+
+Compara, para as consultas de ``utils/consultas_frequentes.py``, o
+``select()`` montado na hora (como era antes) com o ``lambda_stmt``:
+
+1. construção + chave de cache do statement (o que roda em Python a cada
+   requisição, antes de ir ao banco);
+2. execução completa num SQLite em memória (inclui o cache de compilação);
+3. opcional (``--postgres``): latência com e sem prepared statements do
+   psycopg, mostrando o planejamento economizado no servidor. Use um banco
+   descartável: as tabelas são criadas se não existirem.
+
+Uso:
+    python -m benchmarks.bench_statement_construction
+    python -m benchmarks.bench_statement_construction --postgres postgresql+psycopg://u:s@localhost/bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, select  # noqa: E402
+
+from database import Base  # noqa: E402
+from models.agendamento_models import Agendamento, BloqueioAgenda, StatusAgendamento  # noqa: E402
+from models.auth_models import Usuario  # noqa: E402
+from models.diagnostico_models import UBS  # noqa: E402
+from utils import consultas_frequentes  # noqa: E402
+
+DATA = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+DATA_FIM = DATA + timedelta(minutes=30)
+
+
+def _usuario_select(i: int):
+    return select(Usuario).where(Usuario.id == i)
+
+
+def _ubs_select(i: int):
+    return select(UBS).where(UBS.id == i, UBS.is_deleted.is_(False))
+
+
+def _agendamento_select(i: int):
+    return (
+        select(Agendamento)
+        .where(
+            Agendamento.profissional_id == i,
+            Agendamento.data_hora_fim > DATA,
+            Agendamento.data_hora < DATA_FIM,
+            Agendamento.status.in_([StatusAgendamento.AGENDADO, StatusAgendamento.REAGENDADO]),
+        )
+    )
+
+
+def _bloqueio_select(i: int):
+    return select(BloqueioAgenda).where(
+        BloqueioAgenda.profissional_id == i,
+        BloqueioAgenda.data_inicio < DATA_FIM,
+        BloqueioAgenda.data_fim >= DATA,
+    )
+
+
+CONSULTAS = [
+    ("usuario_por_id", _usuario_select, consultas_frequentes.usuario_por_id),
+    ("ubs_ativa", _ubs_select, consultas_frequentes.ubs_ativa),
+    (
+        "agendamento_no_horario",
+        _agendamento_select,
+        lambda i: consultas_frequentes.agendamento_no_horario(i, DATA, DATA_FIM),
+    ),
+    (
+        "bloqueio_no_horario",
+        _bloqueio_select,
+        lambda i: consultas_frequentes.bloqueio_no_horario(i, DATA, DATA_FIM),
+    ),
+]
+
+
+def _medir(fn, repeticoes: int) -> float:
+    """Mediana de 5 rodadas, em microssegundos por chamada."""
+    rodadas = []
+    for _ in range(5):
+        inicio = time.perf_counter()
+        for i in range(repeticoes):
+            fn(i)
+        rodadas.append((time.perf_counter() - inicio) / repeticoes * 1e6)
+    return statistics.median(rodadas)
+
+
+def bench_construcao(repeticoes: int) -> None:
+    print(f"\n1) Construção + chave de cache ({repeticoes} chamadas, µs/chamada)")
+    print(f"{'consulta':<26}{'select()':>12}{'lambda_stmt':>14}{'economia':>12}")
+    total_antes = total_depois = 0.0
+    for nome, antes, depois in CONSULTAS:
+        t_antes = _medir(lambda i: antes(i)._generate_cache_key(), repeticoes)
+        t_depois = _medir(lambda i: depois(i)._generate_cache_key(), repeticoes)
+        total_antes += t_antes
+        total_depois += t_depois
+        print(f"{nome:<26}{t_antes:>12.1f}{t_depois:>14.1f}{t_antes - t_depois:>12.1f}")
+    print(
+        f"{'total (agendar consulta)':<26}{total_antes:>12.1f}{total_depois:>14.1f}"
+        f"{total_antes - total_depois:>12.1f}"
+    )
+
+
+def bench_execucao(url: str, repeticoes: int, titulo: str, **engine_kwargs) -> None:
+    engine = create_engine(url, **engine_kwargs)
+    Base.metadata.create_all(engine)
+    print(f"\n{titulo} ({repeticoes} execuções, µs/execução)")
+    print(f"{'consulta':<26}{'select()':>12}{'lambda_stmt':>14}{'economia':>12}")
+    with engine.connect() as conn:
+        for nome, antes, depois in CONSULTAS:
+            t_antes = _medir(lambda i: conn.execute(antes(i)).first(), repeticoes)
+            t_depois = _medir(lambda i: conn.execute(depois(i)).first(), repeticoes)
+            print(f"{nome:<26}{t_antes:>12.1f}{t_depois:>14.1f}{t_antes - t_depois:>12.1f}")
+    engine.dispose()
+
+
+def bench_prepared(url: str, repeticoes: int) -> None:
+    print(f"\n3) Postgres: prepared statements do psycopg ({repeticoes} execuções, µs/execução)")
+    print(f"{'consulta':<26}{'sem preparar':>14}{'preparado':>12}{'economia':>12}")
+    resultados = {}
+    for rotulo, threshold in (("sem", None), ("com", 1)):
+        engine = create_engine(url, connect_args={"prepare_threshold": threshold})
+        Base.metadata.create_all(engine)
+        with engine.connect() as conn:
+            for nome, _, depois in CONSULTAS:
+                resultados[(rotulo, nome)] = _medir(lambda i: conn.execute(depois(i)).first(), repeticoes)
+        engine.dispose()
+    for nome, _, _ in CONSULTAS:
+        sem, com = resultados[("sem", nome)], resultados[("com", nome)]
+        print(f"{nome:<26}{sem:>14.1f}{com:>12.1f}{sem - com:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    parser.add_argument("--postgres", help="URL síncrona (postgresql+psycopg://...) de um banco descartável")
+    args = parser.parse_args()
+
+    bench_construcao(args.repeticoes)
+    bench_execucao("sqlite://", args.repeticoes, "2) Execução em SQLite em memória")
+    if args.postgres:
+        bench_prepared(args.postgres, args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""Teste de carga HTTP com o tráfego típico de uma UBS.
+
+Simula sessões concorrentes por papel contra um servidor já em execução,
+usando ``httpx.AsyncClient``:
+
+- paciente: login, lista de profissionais, "meus agendamentos" e tentativa
+  de agendar — metade das vezes num dos poucos horários "populares" (próximo
+  dia útil, início da manhã), o que gera disputa e 409; parte das consultas
+  conseguidas é cancelada em seguida, liberando o horário para a disputa;
+- recepcionista: percorre a agenda semanal de vários profissionais e os
+  bloqueios;
+- profissional: própria agenda, materiais educativos e download de arquivos;
+- gestor: KPIs, diagnóstico completo e exportação do relatório em PDF.
+
+Todas as sessões fazem login dentro da janela ``--rampa`` (o pico da
+abertura da UBS) e depois repetem suas ações com tempo de "pensar" entre
+elas até ``--duracao``. O relatório mostra vazão, taxa de erro e
+percentis de latência por operação; 409 no agendamento conta como disputa,
+não como erro.
+
+Usa as contas de ``creates/generate_synthetic_data.py``: o usuário 0 é o
+gestor, os ``--profissionais`` seguintes são profissionais e o restante,
+pacientes. Recepcionistas e profissionais entram com contas de profissionais
+(percorridas em ciclo) e os pacientes começam logo depois delas, então
+``--profissionais`` precisa ser o total que o gerador criou, já multiplicado
+pela ``--escala`` dele (ex.: ``--escala 0.01`` gera 5). Com outro valor, parte
+das sessões entra silenciosamente com a conta de outro papel: menor, os
+"pacientes" usam contas de profissionais; maior, recepcionistas e
+profissionais usam contas de pacientes. O script avisa quando o valor difere
+dos profissionais ativos listados pelo servidor.
+
+Os limites por IP do login barrariam o pico vindo de uma única máquina, então
+suba o servidor com eles desligados:
+
+Uso:
+    RATE_LIMIT_ENABLED=false DATABASE_URL=sqlite+aiosqlite:///bench.db uvicorn main:app --port 8000
+    python -m benchmarks.loadtest --usuarios-virtuais 100 --duracao 120
+    python -m benchmarks.loadtest --mix paciente=40,recepcionista=30,profissional=25,gestor=5 --saida carga.json
+    python -m benchmarks.loadtest --profissionais 5     # banco gerado com --escala 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+SENHA = "Sintetico123"
+DOMINIO_EMAIL = "sintetico.exemplo.com"
+MIX_PADRAO = "paciente=60,recepcionista=15,profissional=20,gestor=5"
+# Horários da grade do dataset (UTC) usados nos agendamentos
+HORAS_AGENDA = (11, 12, 13, 14, 16, 17, 18, 19)
+HORARIOS_POPULARES = 6
+
+
+def _email(indice: int) -> str:
+    return f"usuario{indice:06d}@{DOMINIO_EMAIL}"
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    indice = min(int(round(p / 100 * (len(ordenados) - 1))), len(ordenados) - 1)
+    return ordenados[indice]
+
+
+def _proximos_dias_uteis(quantidade: int) -> list[datetime]:
+    hoje = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    dias = []
+    dia = hoje
+    while len(dias) < quantidade:
+        dia += timedelta(days=1)
+        if dia.weekday() < 5:
+            dias.append(dia)
+    return dias
+
+
+class Estatisticas:
+    def __init__(self) -> None:
+        self.latencias: dict[str, list[float]] = defaultdict(list)
+        self.erros: dict[str, int] = defaultdict(int)
+        self.disputas: dict[str, int] = defaultdict(int)
+        self.status: dict[int, int] = defaultdict(int)
+        self.inicio = time.perf_counter()
+        self.fim: Optional[float] = None
+
+    def registrar(self, operacao: str, duracao_ms: float, status: Optional[int]) -> None:
+        self.latencias[operacao].append(duracao_ms)
+        self.status[status or 0] += 1
+        if status == 409:
+            self.disputas[operacao] += 1
+        elif status is None or status >= 400:
+            self.erros[operacao] += 1
+
+    def relatorio(self) -> dict:
+        duracao = (self.fim or time.perf_counter()) - self.inicio
+        operacoes = {}
+        for nome, valores in sorted(self.latencias.items()):
+            operacoes[nome] = {
+                "n": len(valores),
+                "rps": round(len(valores) / duracao, 2),
+                "erros": self.erros[nome],
+                "taxa_erro": round(self.erros[nome] / len(valores), 4),
+                "disputas_409": self.disputas[nome],
+                "p50_ms": round(statistics.median(valores), 1),
+                "p95_ms": round(_percentil(valores, 95), 1),
+                "p99_ms": round(_percentil(valores, 99), 1),
+                "max_ms": round(max(valores), 1),
+            }
+        total = sum(len(v) for v in self.latencias.values())
+        erros = sum(self.erros.values())
+        return {
+            "duracao_s": round(duracao, 1),
+            "requisicoes": total,
+            "rps": round(total / duracao, 2) if duracao else 0,
+            "taxa_erro": round(erros / total, 4) if total else 0,
+            "status": {str(k): v for k, v in sorted(self.status.items())},
+            "operacoes": operacoes,
+        }
+
+
+class Cenario:
+    """Dados compartilhados entre as sessões (ids descobertos e horários populares)."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.ubs_id: Optional[int] = None
+        self.profissionais: list[int] = []
+        # 9 dias úteis cabem na janela de duas semanas do agendamento
+        dias = _proximos_dias_uteis(9)
+        self.horarios = [dia.replace(hour=h, minute=m) for dia in dias for h in HORAS_AGENDA for m in (0, 30)]
+        # Poucos horários no início do próximo dia útil, disputados pelos primeiros profissionais
+        self.populares: list[tuple[int, datetime]] = []
+        semana = args.semana or dias[0]
+        self.semana_inicio = semana - timedelta(days=semana.weekday())
+
+
+class Sessao:
+    def __init__(self, papel: str, indice: int, client: httpx.AsyncClient, cenario: Cenario,
+                 stats: Estatisticas, rng: random.Random) -> None:
+        self.papel = papel
+        self.indice = indice
+        self.client = client
+        self.cenario = cenario
+        self.stats = stats
+        self.rng = rng
+        self.headers: dict = {}
+        self.meus_agendamentos: list[int] = []
+
+    async def chamar(self, operacao: str, metodo: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        inicio = time.perf_counter()
+        try:
+            resposta = await self.client.request(metodo, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats.registrar(operacao, (time.perf_counter() - inicio) * 1000, None)
+            return None
+        self.stats.registrar(operacao, (time.perf_counter() - inicio) * 1000, resposta.status_code)
+        return resposta
+
+    async def login(self) -> bool:
+        resposta = await self.chamar(
+            "login", "POST", "/api/auth/login", json={"email": _email(self.indice), "senha": SENHA}
+        )
+        if resposta is None or resposta.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+        await self.chamar("auth_me", "GET", "/api/auth/me")
+        return True
+
+    async def executar(self, ate: float) -> None:
+        acao = getattr(self, f"_acao_{self.papel}")
+        while time.perf_counter() < ate:
+            await acao()
+            await asyncio.sleep(self.rng.uniform(*self.cenario.args.pensar))
+
+    # --- Ações por papel ---
+
+    async def _acao_paciente(self) -> None:
+        c = self.cenario
+        await self.chamar("profissionais", "GET", "/api/agendamentos/profissionais")
+        await self.chamar("meus_agendamentos", "GET", "/api/agendamentos/meus")
+        if c.populares and self.rng.random() < 0.5:
+            profissional_id, data_hora = self.rng.choice(c.populares)
+        else:
+            profissional_id, data_hora = self.rng.choice(c.profissionais), self.rng.choice(c.horarios)
+        resposta = await self.chamar(
+            "agendar", "POST", "/api/agendamentos",
+            json={"profissional_id": profissional_id, "data_hora": data_hora.isoformat()},
+        )
+        if resposta is not None and resposta.status_code == 200:
+            self.meus_agendamentos.append(resposta.json()["id"])
+        if self.meus_agendamentos and self.rng.random() < 0.5:
+            agendamento_id = self.meus_agendamentos.pop(self.rng.randrange(len(self.meus_agendamentos)))
+            await self.chamar(
+                "cancelar", "PATCH", f"/api/agendamentos/{agendamento_id}", json={"status": "CANCELADO"}
+            )
+
+    async def _agenda(self, profissional_id: int, operacao: str) -> None:
+        inicio = self.cenario.semana_inicio
+        await self.chamar(
+            operacao, "GET", f"/api/agenda/profissional/{profissional_id}",
+            params={"start_date": inicio.isoformat(), "end_date": (inicio + timedelta(days=7)).isoformat()},
+        )
+
+    async def _acao_recepcionista(self) -> None:
+        for profissional_id in self.rng.sample(self.cenario.profissionais, min(3, len(self.cenario.profissionais))):
+            await self._agenda(profissional_id, "agenda_semanal")
+        await self.chamar("bloqueios", "GET", "/api/agenda/bloqueios")
+
+    async def _acao_profissional(self) -> None:
+        c = self.cenario
+        # Profissionais do dataset: usuário i corresponde ao i-ésimo profissional
+        await self._agenda(c.profissionais[(self.indice - 1) % len(c.profissionais)], "agenda_propria")
+        if c.ubs_id is None:
+            return
+        resposta = await self.chamar("materiais", "GET", "/api/materiais", params={"ubs_id": c.ubs_id})
+        if resposta is None or resposta.status_code != 200:
+            return
+        arquivos = [f["id"] for m in resposta.json() for f in m.get("files") or []]
+        if arquivos and self.rng.random() < 0.5:
+            await self.chamar("download_material", "GET", f"/api/materiais/files/{self.rng.choice(arquivos)}/download")
+
+    async def _acao_gestor(self) -> None:
+        c = self.cenario
+        await self.chamar("kpis", "GET", "/api/gestao-equipes/kpis", params={"ubs_id": c.ubs_id})
+        if c.ubs_id is None:
+            return
+        await self.chamar("diagnostico", "GET", f"/api/ubs/{c.ubs_id}/diagnosis")
+        if self.rng.random() < c.args.chance_pdf:
+            await self.chamar("exportar_pdf", "GET", f"/api/ubs/{c.ubs_id}/export/pdf")
+
+
+def _parse_mix(texto: str) -> dict[str, float]:
+    mix = {}
+    for parte in texto.split(","):
+        papel, _, peso = parte.partition("=")
+        papel = papel.strip()
+        if papel not in ("paciente", "recepcionista", "profissional", "gestor"):
+            raise argparse.ArgumentTypeError(f"papel desconhecido no --mix: {papel}")
+        mix[papel] = float(peso)
+    return mix
+
+
+def _parse_pensar(texto: str) -> tuple[float, float]:
+    minimo, _, maximo = texto.partition("-")
+    return float(minimo), float(maximo or minimo)
+
+
+async def _descobrir(client: httpx.AsyncClient, cenario: Cenario) -> None:
+    """Usa a conta do gestor para descobrir a UBS e os profissionais do dataset."""
+    resposta = await client.post("/api/auth/login", json={"email": _email(0), "senha": SENHA})
+    if resposta.status_code != 200:
+        raise SystemExit(
+            f"ERRO: login do gestor sintético falhou ({resposta.status_code}). "
+            "O banco foi gerado com creates/generate_synthetic_data.py?"
+        )
+    headers = {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+    profissionais = (await client.get("/api/agendamentos/profissionais", headers=headers)).json()
+    cenario.profissionais = sorted(p["id"] for p in profissionais)
+    if not cenario.profissionais:
+        raise SystemExit("ERRO: nenhum profissional ativo no banco.")
+    ubs = (await client.get("/api/ubs", headers=headers, params={"page_size": 1})).json()
+    itens = ubs.get("items") if isinstance(ubs, dict) else None
+    cenario.ubs_id = itens[0]["id"] if itens else None
+    primeiro_dia = cenario.horarios[0]
+    cenario.populares = [
+        (profissional_id, primeiro_dia + timedelta(minutes=30 * i))
+        for profissional_id in cenario.profissionais[:2]
+        for i in range(HORARIOS_POPULARES // 2)
+    ]
+
+
+async def _sessao(papel: str, indice: int, atraso: float, ate: float, client, cenario, stats, rng) -> None:
+    await asyncio.sleep(atraso)
+    sessao = Sessao(papel, indice, client, cenario, stats, rng)
+    if await sessao.login():
+        await sessao.executar(ate)
+
+
+async def executar(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    limites = httpx.Limits(max_connections=args.usuarios_virtuais, max_keepalive_connections=args.usuarios_virtuais)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limites) as client:
+        cenario = Cenario(args)
+        await _descobrir(client, cenario)
+        if len(cenario.profissionais) != args.profissionais:
+            print(
+                f"AVISO: o servidor lista {len(cenario.profissionais)} profissionais ativos e --profissionais é "
+                f"{args.profissionais}; use o valor do gerador, senão as sessões entram com contas do papel errado."
+            )
+
+        papeis, pesos = zip(*args.mix.items())
+        proximo = {"paciente": args.profissionais + 1, "profissional": 1, "recepcionista": 1}
+        stats = Estatisticas()
+        ate = time.perf_counter() + args.duracao
+        tarefas = []
+        for _ in range(args.usuarios_virtuais):
+            papel = rng.choices(papeis, weights=pesos)[0]
+            if papel == "gestor":
+                indice = 0
+            elif papel == "paciente":
+                indice = proximo["paciente"]
+                proximo["paciente"] += 1
+            else:
+                # Recepcionistas e profissionais usam contas de profissionais (papel com acesso à agenda)
+                indice = (proximo["profissional"] - 1) % args.profissionais + 1
+                proximo["profissional"] += 1
+            tarefas.append(
+                _sessao(papel, indice, rng.uniform(0, args.rampa), ate, client, cenario, stats,
+                        random.Random(rng.random()))
+            )
+        print(
+            f"{args.usuarios_virtuais} sessões por {args.duracao}s contra {args.url} "
+            f"(logins em {args.rampa}s, mix {args.mix})"
+        )
+        await asyncio.gather(*tarefas)
+        stats.fim = time.perf_counter()
+    return stats.relatorio()
+
+
+def _imprimir(relatorio: dict) -> None:
+    print(f"\n{'operação':<20}{'n':>7}{'rps':>8}{'erro%':>7}{'409':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for nome, op in relatorio["operacoes"].items():
+        print(
+            f"{nome:<20}{op['n']:>7}{op['rps']:>8.1f}{op['taxa_erro'] * 100:>7.1f}{op['disputas_409']:>6}"
+            f"{op['p50_ms']:>9.0f}{op['p95_ms']:>9.0f}{op['p99_ms']:>9.0f}{op['max_ms']:>9.0f}"
+        )
+    print(
+        f"\nTotal: {relatorio['requisicoes']} requisições em {relatorio['duracao_s']}s "
+        f"({relatorio['rps']} req/s), erro {relatorio['taxa_erro'] * 100:.2f}%, status {relatorio['status']}"
+    )
+    if relatorio["status"].get("429"):
+        print("AVISO: respostas 429 — suba o servidor com RATE_LIMIT_ENABLED=false.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--usuarios-virtuais", type=int, default=50)
+    parser.add_argument("--duracao", type=float, default=60, help="Segundos de carga")
+    parser.add_argument("--rampa", type=float, default=10, help="Janela em que todas as sessões fazem login")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix(MIX_PADRAO), help=f"Pesos por papel ({MIX_PADRAO})")
+    parser.add_argument("--pensar", type=_parse_pensar, default=(0.5, 2.0), help="Pausa entre ações, ex.: 0.5-2")
+    parser.add_argument(
+        "--semana",
+        type=lambda v: datetime.fromisoformat(v).replace(tzinfo=timezone.utc),
+        help="Data (AAAA-MM-DD) da semana navegada nas agendas; padrão: a próxima (o dataset vai até abr/2026)",
+    )
+    parser.add_argument("--chance-pdf", type=float, default=0.05, help="Probabilidade de o gestor exportar o PDF")
+    parser.add_argument(
+        "--profissionais", type=int, default=500, help="Profissionais criados pelo gerador (já com a --escala dele)"
+    )
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", type=Path, help="Grava o relatório em JSON")
+    args = parser.parse_args()
+
+    relatorio = asyncio.run(executar(args))
+    _imprimir(relatorio)
+    if args.saida:
+        args.saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Relatório gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""Benchmark das rotas mais usadas da API, com detecção de regressão.
+
+Roda a aplicação em processo (``httpx.AsyncClient`` + ASGI, sem rede) contra
+um banco populado por ``creates/generate_synthetic_data.py`` e mede, por
+cenário, a latência (p50/p95/média) e o nº de SQLs por requisição, lido do
+header ``Server-Timing`` que o ``InstrumentacaoMiddleware`` já emite.
+
+Cenários: login, usuário atual (``get_current_user``), agenda semanal,
+agendamento, diagnóstico completo, árvore de problemas, KPIs, estatísticas
+da agenda, lista de materiais e exportação do PDF.
+
+O resultado vai para ``benchmarks/resultados/<banco>-<data>.json``. Com uma
+baseline (``--baseline``, padrão ``benchmarks/baseline_<banco>.json`` se
+existir) o script sai com código 1 quando uma métrica piora além da
+tolerância: latências acima de ``--tolerancia`` (relativa) ou qualquer SQL a
+mais por requisição.
+
+Uso:
+    python creates/generate_synthetic_data.py --database-url sqlite:///bench.db --escala 0.1
+    python -m benchmarks.run_benchmarks --database-url sqlite:///bench.db
+    python -m benchmarks.run_benchmarks --database-url sqlite:///bench.db --atualizar-baseline
+    python -m benchmarks.run_benchmarks --database-url postgresql://u:s@localhost/bench --tolerancia 0.15
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+DIR_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+DIR_BENCHMARKS = Path(__file__).resolve().parent
+
+# Métricas comparadas com a baseline e como cada uma é avaliada
+METRICAS_LATENCIA = ("p50_ms", "p95_ms")
+METRICAS_EXATAS = ("sql_por_requisicao",)
+
+_SQL_HEADER = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+# Mesmos e-mails/senha gerados pelo gerador de dados sintéticos
+EMAIL_GESTOR = "usuario000000@sintetico.exemplo.com"
+EMAIL_PROFISSIONAL = "usuario000001@sintetico.exemplo.com"
+SENHA = "Sintetico123"
+MARCADOR_AGENDAMENTO = "benchmark"
+
+
+def _url_assincrona(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+psycopg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+
+@dataclass
+class Amostra:
+    duracao_ms: float
+    db_ms: float
+    sql: int
+    status: int
+
+
+def _amostra(resposta, duracao_ms: float) -> Amostra:
+    casado = _SQL_HEADER.search(resposta.headers.get("server-timing", ""))
+    db_ms, sql = (float(casado.group(1)), int(casado.group(2))) if casado else (0.0, 0)
+    return Amostra(duracao_ms, db_ms, sql, resposta.status_code)
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    indice = min(int(round(p / 100 * (len(ordenados) - 1))), len(ordenados) - 1)
+    return ordenados[indice]
+
+
+def resumir(amostras: list[Amostra]) -> dict:
+    duracoes = [a.duracao_ms for a in amostras]
+    return {
+        "n": len(amostras),
+        "p50_ms": round(statistics.median(duracoes), 2),
+        "p95_ms": round(_percentil(duracoes, 95), 2),
+        "media_ms": round(statistics.fmean(duracoes), 2),
+        "db_p50_ms": round(statistics.median(a.db_ms for a in amostras), 2),
+        "sql_por_requisicao": max(a.sql for a in amostras),
+        "erros": sum(1 for a in amostras if a.status >= 400),
+    }
+
+
+def comparar(atual: dict, baseline: dict, tolerancia: float) -> list[str]:
+    """Lista as regressões de ``atual`` em relação à ``baseline`` (vazia = ok)."""
+    regressoes = []
+    for nome, base in baseline.get("cenarios", {}).items():
+        medido = atual.get("cenarios", {}).get(nome)
+        if medido is None:
+            continue
+        for metrica in METRICAS_LATENCIA:
+            limite = base[metrica] * (1 + tolerancia)
+            if medido[metrica] > limite:
+                regressoes.append(
+                    f"{nome}: {metrica} {medido[metrica]:.1f} > {limite:.1f} "
+                    f"(baseline {base[metrica]:.1f} + {tolerancia:.0%})"
+                )
+        for metrica in METRICAS_EXATAS:
+            if medido[metrica] > base[metrica]:
+                regressoes.append(f"{nome}: {metrica} {medido[metrica]} > {base[metrica]} (baseline)")
+        if medido["erros"] > base.get("erros", 0):
+            regressoes.append(f"{nome}: {medido['erros']} respostas com erro")
+    return regressoes
+
+
+# --- Cenários ---
+
+
+class Contexto:
+    """Ids e tokens do dataset sintético usados pelos cenários."""
+
+    def __init__(self, client) -> None:
+        self.client = client
+        self.ubs_id = 0
+        self.profissional_id = 0
+        self.cargo = ""
+        self.profissionais: list[int] = []
+        self.inicio_semana = datetime.now(timezone.utc)
+        self.headers_gestor: dict = {}
+        self.headers_profissional: dict = {}
+        self.headers_paciente: dict = {}
+        self._horarios: list[tuple[int, datetime]] = []
+
+    async def preparar(self) -> None:
+        import database
+        from sqlalchemy import func, select
+
+        from models.agendamento_models import Agendamento
+        from models.auth_models import ProfissionalUbs, Usuario
+        from models.diagnostico_models import UBS
+
+        async with database.AsyncSessionLocal() as db:
+            self.ubs_id = await db.scalar(select(func.min(UBS.id)).where(UBS.is_deleted.is_(False)))
+            profissional = await db.execute(
+                select(ProfissionalUbs.id, ProfissionalUbs.cargo).join(Usuario, Usuario.id == ProfissionalUbs.usuario_id)
+                .where(Usuario.email == EMAIL_PROFISSIONAL)
+            )
+            self.profissional_id, self.cargo = profissional.one()
+            self.profissionais = list((await db.scalars(select(ProfissionalUbs.id).order_by(ProfissionalUbs.id))).all())
+            # Uma semana cheia do dataset (ele termina alguns meses após a data de referência)
+            ultima = await db.scalar(
+                select(func.max(Agendamento.data_hora)).where(Agendamento.profissional_id == self.profissional_id)
+            )
+            email_paciente = await db.scalar(
+                select(Usuario.email).where(Usuario.role == "USER").order_by(Usuario.id.desc()).limit(1)
+            )
+        if self.ubs_id is None or ultima is None:
+            raise SystemExit("ERRO: banco sem dados sintéticos. Gere com creates/generate_synthetic_data.py.")
+        referencia = ultima - timedelta(days=30)
+        self.inicio_semana = (referencia - timedelta(days=referencia.weekday())).replace(
+            hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc
+        )
+
+        self.headers_gestor = await self._login(EMAIL_GESTOR)
+        self.headers_profissional = await self._login(EMAIL_PROFISSIONAL)
+        self.headers_paciente = await self._login(email_paciente)
+
+        # Horários livres nas próximas duas semanas (regra do agendamento)
+        hoje = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        for dias in range(1, 14):
+            dia = hoje + timedelta(days=dias)
+            if dia.weekday() >= 5:
+                continue
+            for hora in (11, 12, 13, 14, 16, 17, 18, 19):
+                for profissional_id in self.profissionais:
+                    self._horarios.append((profissional_id, dia.replace(hour=hora, minute=15)))
+
+    async def _login(self, email: str) -> dict:
+        resposta = await self.client.post("/api/auth/login", json={"email": email, "senha": SENHA})
+        if resposta.status_code != 200:
+            raise SystemExit(f"ERRO: login de {email} falhou ({resposta.status_code}): {resposta.text[:200]}")
+        return {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+    def proximo_horario(self) -> tuple[int, datetime]:
+        # A agenda gerada termina 90 dias após DATA_REFERENCIA, antes desta janela de duas
+        # semanas; o minuto 15 ainda a distingue dos horários do dataset
+        return self._horarios.pop(0)
+
+    async def limpar(self) -> None:
+        import database
+        from sqlalchemy import delete, func, select
+
+        from models.agendamento_models import Agendamento
+        from services.agenda import estatisticas
+
+        marcados = Agendamento.observacoes == MARCADOR_AGENDAMENTO
+        async with database.AsyncSessionLocal() as db:
+            primeiro, ultimo = (
+                await db.execute(select(func.min(Agendamento.data_hora), func.max(Agendamento.data_hora)).where(marcados))
+            ).one()
+            if primeiro is None:
+                return
+            await db.execute(delete(Agendamento).where(marcados))
+            await db.commit()
+            # O DELETE em massa não passa pelo rollup; refaz só os dias tocados pelos cenários
+            dias = [(d if d.tzinfo is None else d.astimezone(timezone.utc)).date() for d in (primeiro, ultimo)]
+            await estatisticas.recalcular(db, *dias)
+
+
+def _cenarios(ctx: Contexto) -> dict[str, Callable[[], Awaitable]]:
+    c = ctx.client
+    fim_semana = ctx.inicio_semana + timedelta(days=7)
+
+    async def agendar():
+        profissional_id, data_hora = ctx.proximo_horario()
+        return await c.post(
+            "/api/agendamentos",
+            json={
+                "profissional_id": profissional_id,
+                "data_hora": data_hora.isoformat(),
+                "observacoes": MARCADOR_AGENDAMENTO,
+            },
+            headers=ctx.headers_paciente,
+        )
+
+    return {
+        "login": lambda: c.post("/api/auth/login", json={"email": EMAIL_PROFISSIONAL, "senha": SENHA}),
+        "usuario_atual": lambda: c.get("/api/auth/me", headers=ctx.headers_profissional),
+        "agenda_semanal": lambda: c.get(
+            f"/api/agenda/profissional/{ctx.profissional_id}",
+            params={"start_date": ctx.inicio_semana.isoformat(), "end_date": fim_semana.isoformat()},
+            headers=ctx.headers_profissional,
+        ),
+        "agendamento": agendar,
+        "diagnostico_completo": lambda: c.get(f"/api/ubs/{ctx.ubs_id}/diagnosis", headers=ctx.headers_gestor),
+        "arvore_problemas": lambda: c.get(f"/api/ubs/{ctx.ubs_id}/problems/tree", headers=ctx.headers_gestor),
+        "kpis": lambda: c.get(
+            "/api/gestao-equipes/kpis", params={"ubs_id": ctx.ubs_id}, headers=ctx.headers_gestor
+        ),
+        # Painel da gestão: um ano inteiro, lido só do rollup diário
+        "estatisticas_agenda": lambda: c.get(
+            "/api/agenda/estatisticas",
+            params={
+                "inicio": (ctx.inicio_semana - timedelta(days=358)).date().isoformat(),
+                "fim": fim_semana.date().isoformat(),
+            },
+            headers=ctx.headers_gestor,
+        ),
+        # Busca por especialidade: todos os profissionais do cargo na janela de duas semanas
+        "disponibilidade_cargo": lambda: c.get(
+            "/api/agendamentos/disponibilidade", params={"cargo": ctx.cargo}, headers=ctx.headers_paciente
+        ),
+        "materiais": lambda: c.get("/api/materiais", params={"ubs_id": ctx.ubs_id}, headers=ctx.headers_gestor),
+        "exportar_pdf": lambda: c.get(f"/api/ubs/{ctx.ubs_id}/export/pdf", headers=ctx.headers_gestor),
+    }
+
+
+# O PDF e o login (hash de senha) são ordens de grandeza mais lentos
+_FATOR_REPETICOES = {"exportar_pdf": 0.1, "login": 0.2}
+
+
+async def executar(repeticoes: int, aquecimento: int, somente: Optional[list[str]] = None) -> dict:
+    import httpx
+
+    import database
+    import main
+    from routes import auth_routes
+
+    # Os limites por IP existem para clientes reais; aqui todas as chamadas vêm do mesmo "IP"
+    main.limiter.enabled = False
+    auth_routes.limiter.enabled = False
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        ctx = Contexto(client)
+        await ctx.preparar()
+        cenarios = _cenarios(ctx)
+        resultados = {}
+        try:
+            for nome, chamada in cenarios.items():
+                if somente and nome not in somente:
+                    continue
+                n = max(int(repeticoes * _FATOR_REPETICOES.get(nome, 1)), 3)
+                for _ in range(aquecimento):
+                    await chamada()
+                amostras = []
+                for _ in range(n):
+                    inicio = time.perf_counter()
+                    resposta = await chamada()
+                    amostras.append(_amostra(resposta, (time.perf_counter() - inicio) * 1000))
+                resultados[nome] = resumir(amostras)
+                r = resultados[nome]
+                print(
+                    f"{nome:<22}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['db_p50_ms']:>10.1f}"
+                    f"{r['sql_por_requisicao']:>6}{r['erros']:>7}"
+                )
+        finally:
+            await ctx.limpar()
+            await database.engine.dispose()
+    return {
+        "gerado_em": datetime.now(timezone.utc).isoformat(),
+        "banco": database.engine.dialect.name,
+        "repeticoes": repeticoes,
+        "cenarios": resultados,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Banco com dados sintéticos (padrão: DATABASE_URL)")
+    parser.add_argument("--repeticoes", type=int, default=50)
+    parser.add_argument("--aquecimento", type=int, default=3)
+    parser.add_argument("--cenarios", nargs="*", help="Roda só os cenários indicados")
+    parser.add_argument("--saida", type=Path, help="Arquivo JSON de resultado")
+    parser.add_argument("--baseline", type=Path, help="JSON de referência para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita nas latências")
+    parser.add_argument("--atualizar-baseline", action="store_true", help="Grava o resultado como baseline")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = _url_assincrona(args.database_url)
+    # Sem o log JSON por requisição poluindo a tabela
+    os.environ.setdefault("SLOW_REQUEST_MS", "1e9")
+    import logging
+
+    logging.getLogger("plataforma.requests").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print(f"{'cenário':<22}{'p50 ms':>10}{'p95 ms':>10}{'db ms':>10}{'SQLs':>6}{'erros':>7}")
+    resultado = asyncio.run(executar(args.repeticoes, args.aquecimento, args.cenarios))
+
+    banco = resultado["banco"]
+    saida = args.saida or DIR_RESULTADOS / f"{banco}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultado gravado em {saida}")
+
+    baseline_path = args.baseline or DIR_BENCHMARKS / f"baseline_{banco}.json"
+    if args.atualizar_baseline:
+        baseline_path.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Baseline atualizada em {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print("Sem baseline para comparar (use --atualizar-baseline para criar).")
+        return
+
+    regressoes = comparar(resultado, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerancia)
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) em relação a {baseline_path}:")
+        for linha in regressoes:
+            print(f"  - {linha}")
+        sys.exit(1)
+    print(f"Sem regressões em relação a {baseline_path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ import models.gestao_equipes_models  # noqa: F401
 import models.cronograma_models  # noqa: F401
 import models.materiais_models  # noqa: F401
 import models.suporte_feedback_models  # noqa: F401
+import models.tempo_real_models  # noqa: F401
 from models.diagnostico_models import Service
 
 
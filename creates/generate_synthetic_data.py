@@ -0,0 +1,598 @@
+"""Gera uma massa de dados sintética em volume de produção (carga/benchmarks).
+
+Insere em lote (``executemany`` em lotes; ``COPY`` no PostgreSQL) usuários,
+profissionais, agendamentos (com o rollup diário das estatísticas da agenda),
+bloqueios de agenda, indicadores, problemas, microáreas com GeoJSON e anos
+de eventos do cronograma. Tudo é derivado de
+``random.Random(seed)`` e de ``DATA_REFERENCIA`` (inclusive ``created_at``,
+nunca o ``now()`` do banco): o mesmo seed com os mesmos parâmetros gera
+exatamente as mesmas linhas.
+
+Uso:
+    python creates/generate_synthetic_data.py --database-url sqlite:///bench.db
+    python creates/generate_synthetic_data.py --escala 0.01          # ~1% do volume padrão
+    python creates/generate_synthetic_data.py --agendamentos 500000 --seed 7
+
+Sem ``--database-url`` usa a DATABASE_URL do ambiente/.env. Use um banco
+descartável: as tabelas são criadas se não existirem e a plataforma tem uma
+única UBS (a existente é reaproveitada; sem nenhuma, uma UBS sintética é
+criada). Todos os usuários sintéticos usam a senha ``Sintetico123``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.engine import Connection
+
+# Adiciona o diretorio raiz ao path para importar os modelos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import Base  # noqa: E402
+import models.materiais_models  # noqa: E402,F401
+import models.suporte_feedback_models  # noqa: E402,F401
+import models.tempo_real_models  # noqa: E402,F401
+from models.agendamento_models import (  # noqa: E402
+    DURACAO_PADRAO_MINUTOS,
+    Agendamento,
+    BloqueioAgenda,
+    EstatisticaAgendaDiaria,
+    StatusAgendamento,
+)
+from models.auth_models import ProfissionalUbs, Usuario  # noqa: E402
+from models.cronograma_models import CronogramaEvent, CronogramaTipo, RecurrenceType  # noqa: E402
+from models.diagnostico_models import UBS, Indicator, UBSProblem  # noqa: E402
+from models.gestao_equipes_models import Microarea  # noqa: E402
+from services.agenda import estatisticas  # noqa: E402
+
+DOMINIO_EMAIL = "sintetico.exemplo.com"  # precisa passar na validação de EmailStr do login
+SENHA_PADRAO = "Sintetico123"
+# Hash calculado uma vez (sal fixo) para não gastar 100k derivações de chave
+SENHA_HASH = pbkdf2_sha256.using(salt=b"sintetico", rounds=29000).hash(SENHA_PADRAO)
+
+# Referência fixa em vez de "agora": mantém a saída idêntica entre execuções
+DATA_REFERENCIA = datetime(2026, 1, 5, tzinfo=timezone.utc)
+
+PADRAO = {
+    "usuarios": 100_000,
+    "profissionais": 500,
+    "agendamentos": 2_000_000,
+    "bloqueios": 5_000,
+    "indicadores": 5_000,
+    "problemas": 2_000,
+    "microareas": 2_000,
+}
+
+NOMES = [
+    "Ana", "Antônio", "Beatriz", "Carlos", "Daniela", "Eduardo", "Fernanda", "Francisco",
+    "Gabriela", "Helena", "Igor", "Joana", "José", "Juliana", "Lucas", "Luzia", "Marcos",
+    "Maria", "Paulo", "Raimunda", "Rafael", "Sebastião", "Tatiane", "Vitória",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Sousa", "Pereira", "Lima", "Carvalho", "Ferreira",
+    "Rodrigues", "Almeida", "Costa", "Gomes", "Araújo", "Ribeiro", "Nascimento", "Barbosa",
+]
+CARGOS = [
+    ("Médico", 25), ("Enfermeiro", 25), ("Dentista", 10), ("Técnico de Enfermagem", 20),
+    ("Nutricionista", 5), ("Psicólogo", 5), ("Fisioterapeuta", 5), ("Assistente Social", 5),
+]
+BAIRROS = [
+    "Centro", "Baixa do Aragão", "São José", "Piauí", "Frei Higino", "Rodoviária",
+    "Pindorama", "Planalto", "Santa Luzia", "Ceará", "Reis Veloso", "Catanduvas",
+]
+INDICADORES = [
+    ("Gestantes com 6 consultas (1a até 20a semana)", "PERCENTUAL", 90),
+    ("Cobertura vacinal Pólio < 1 ano", "PERCENTUAL", 95),
+    ("Hipertensos com pressão aferida no semestre", "PERCENTUAL", 50),
+    ("Diabéticos com hemoglobina glicada solicitada", "PERCENTUAL", 50),
+    ("Citopatológico em mulheres de 25 a 64 anos", "PERCENTUAL", 40),
+    ("Atendimentos odontológicos a gestantes", "PERCENTUAL", 60),
+    ("Visitas domiciliares realizadas", "ABSOLUTO", 1200),
+    ("Famílias cadastradas", "ABSOLUTO", 1000),
+]
+PROBLEMAS = [
+    "Baixa cobertura vacinal", "Falta de insumos", "Alta demanda reprimida",
+    "Rotatividade de profissionais", "Saneamento precário", "Acesso difícil em área rural",
+    "Aumento de casos de arboviroses", "Absenteísmo nas consultas agendadas",
+]
+EVENTOS_CRONOGRAMA = [
+    (CronogramaTipo.SALA_VACINA, "Sala de vacina", "Sala 3"),
+    (CronogramaTipo.FARMACIA_BASICA, "Dispensação da farmácia básica", "Farmácia"),
+    (CronogramaTipo.REUNIAO_EQUIPE, "Reunião de equipe", "Auditório"),
+    (CronogramaTipo.OUTRO, "Grupo de gestantes", "Sala de reuniões"),
+    (CronogramaTipo.OUTRO, "Ação de saúde na escola", "Escola municipal"),
+]
+
+# Grade de atendimento: 08:00-12:00 e 13:00-17:00 em horário local (UTC-3), 30 min
+HORARIOS_DIA = [(h, m) for h in (11, 12, 13, 14, 16, 17, 18, 19) for m in (0, 30)]
+# Consultas de meia hora: com a duração padrão a grade não tem sobreposições
+DURACAO_CONSULTA = timedelta(minutes=min(DURACAO_PADRAO_MINUTOS, 30))
+# Centro aproximado de Parnaíba - PI (lon, lat) e tamanho da célula da grade
+CENTRO_MAPA = (-41.7769, -2.9055)
+CELULA_GRAUS = 0.004
+
+
+def _get_sync_database_url(url: Optional[str]) -> str:
+    load_dotenv()
+    url = url or os.getenv("DATABASE_URL")
+    if not url:
+        print("ERRO: DATABASE_URL nao definida. Use --database-url ou configure no .env.")
+        sys.exit(1)
+    # Normaliza para drivers sincronos: psycopg (v3) no Postgres, sqlite3 no SQLite
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql+psycopg://", 1)
+    elif url.startswith("postgresql://") and "+psycopg" not in url:
+        url = url.replace("postgresql://", "postgresql+psycopg://", 1)
+    url = url.replace("+asyncpg", "+psycopg").replace("+aiosqlite", "")
+    return url
+
+
+# --- Inserção em lote ---
+
+
+def _inserir(conn: Connection, tabela, colunas: list[str], linhas: Iterable[tuple], lote: int) -> int:
+    """Insere ``linhas`` (tuplas na ordem de ``colunas``) e devolve quantas foram gravadas.
+
+    No PostgreSQL usa ``COPY ... FROM STDIN`` do psycopg na mesma transação;
+    nos demais bancos, ``executemany`` em lotes de ``lote`` linhas.
+    """
+    inicio = time.perf_counter()
+    total = 0
+    if conn.dialect.name == "postgresql":
+        tipos_json = {c.name for c in tabela.columns if c.type.__class__.__name__ in ("JSON", "JSONB")}
+        idx_json = [i for i, c in enumerate(colunas) if c in tipos_json]
+        cursor = conn.connection.driver_connection.cursor()
+        with cursor.copy(f"COPY {tabela.name} ({', '.join(colunas)}) FROM STDIN") as copy:
+            for linha in linhas:
+                if idx_json:
+                    linha = list(linha)
+                    for i in idx_json:
+                        linha[i] = json.dumps(linha[i], ensure_ascii=False)
+                copy.write_row(linha)
+                total += 1
+        cursor.close()
+    else:
+        stmt = tabela.insert()
+        buffer: list[dict] = []
+        for linha in linhas:
+            buffer.append(dict(zip(colunas, linha)))
+            if len(buffer) >= lote:
+                conn.execute(stmt, buffer)
+                total += len(buffer)
+                buffer = []
+        if buffer:
+            conn.execute(stmt, buffer)
+            total += len(buffer)
+    duracao = time.perf_counter() - inicio
+    print(f"  {tabela.name:<20} {total:>10,} linhas em {duracao:6.1f}s ({total / max(duracao, 1e-9):,.0f}/s)")
+    return total
+
+
+def _proximo_id(conn: Connection, modelo) -> int:
+    return (conn.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+def _ajustar_sequencia(conn: Connection, modelo) -> None:
+    # Inserimos ids explícitos; o Postgres precisa que a sequence acompanhe
+    if conn.dialect.name == "postgresql":
+        tabela = modelo.__tablename__
+        conn.execute(
+            text(f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), (SELECT MAX(id) FROM {tabela}))")
+        )
+
+
+# --- Geradores de linhas ---
+
+
+def _cpf(numero: int) -> str:
+    """CPF válido (com dígitos verificadores) a partir de um número de 9 dígitos."""
+    base = [int(d) for d in f"{numero:09d}"]
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(base, range(tamanho + 1, 1, -1)))
+        resto = soma * 10 % 11
+        base.append(0 if resto == 10 else resto)
+    return "".join(map(str, base))
+
+
+def _usuarios(rng: random.Random, primeiro_id: int, total: int, profissionais: int) -> Iterator[tuple]:
+    for i in range(total):
+        # O primeiro usuário é o gestor; os seguintes ``profissionais`` são profissionais
+        if i == 0:
+            role, cargo = "GESTOR", "Gestor"
+        elif i <= profissionais:
+            role, cargo = "PROFISSIONAL", None
+        else:
+            role, cargo = "USER", None
+        nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+        criado = DATA_REFERENCIA - timedelta(days=rng.randint(0, 3 * 365), seconds=rng.randint(0, 86399))
+        yield (
+            primeiro_id + i,
+            nome,
+            f"usuario{i:06d}@{DOMINIO_EMAIL}",
+            SENHA_HASH,
+            _cpf(100_000_000 + i),
+            role,
+            cargo,
+            True,
+            True,
+            0,
+            criado,
+        )
+
+
+def _cargos_profissionais(rng: random.Random, total: int) -> list[str]:
+    nomes, pesos = zip(*CARGOS)
+    return rng.choices(nomes, weights=pesos, k=total)
+
+
+def _profissionais(primeiro_id: int, primeiro_usuario: int, cargos: list[str]) -> Iterator[tuple]:
+    for i, cargo in enumerate(cargos):
+        yield (
+            primeiro_id + i,
+            primeiro_usuario + i,
+            cargo,
+            f"SINT-{primeiro_id + i:06d}",
+            True,
+            DATA_REFERENCIA - timedelta(days=3 * 365),
+        )
+
+
+def _dias_uteis(inicio: date, fim: date) -> list[date]:
+    dias = []
+    dia = inicio
+    while dia <= fim:
+        if dia.weekday() < 5:
+            dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+def _agendamentos(
+    rng: random.Random,
+    profissionais: list[int],
+    pacientes: tuple[int, int],
+    total: int,
+    dias: list[date],
+) -> Iterator[tuple]:
+    """Distribui ``total`` consultas pelos profissionais sem repetir horário.
+
+    Cada profissional percorre sua grade (dias úteis x ``HORARIOS_DIA``) e
+    ocupa cada horário com a probabilidade necessária para atingir sua cota;
+    consultas passadas ficam majoritariamente realizadas, futuras agendadas.
+    """
+    if not profissionais or total <= 0:
+        return
+    slots_por_profissional = len(dias) * len(HORARIOS_DIA)
+    cota, sobra = divmod(total, len(profissionais))
+    for n, profissional_id in enumerate(profissionais):
+        alvo = cota + (1 if n < sobra else 0)
+        restantes = slots_por_profissional
+        for dia in dias:
+            for hora, minuto in HORARIOS_DIA:
+                if alvo <= 0:
+                    break
+                # Amostragem sequencial: garante exatamente ``alvo`` horários distintos
+                if rng.random() * restantes < alvo:
+                    alvo -= 1
+                    data_hora = datetime(dia.year, dia.month, dia.day, hora, minuto, tzinfo=timezone.utc)
+                    sorteio = rng.random()
+                    if data_hora < DATA_REFERENCIA:
+                        if sorteio < 0.78:
+                            status = StatusAgendamento.REALIZADO.value
+                        elif sorteio < 0.92:
+                            status = StatusAgendamento.CANCELADO.value
+                        else:
+                            status = StatusAgendamento.FALTOU.value
+                    else:
+                        if sorteio < 0.9:
+                            status = StatusAgendamento.AGENDADO.value
+                        elif sorteio < 0.95:
+                            status = StatusAgendamento.REAGENDADO.value
+                        else:
+                            status = StatusAgendamento.CANCELADO.value
+                    criado = data_hora - timedelta(days=rng.randint(1, 45), minutes=rng.randint(0, 600))
+                    confirmacao = criado + timedelta(minutes=1) if rng.random() < 0.6 else None
+                    yield (
+                        rng.randint(*pacientes),
+                        profissional_id,
+                        data_hora,
+                        data_hora + DURACAO_CONSULTA,
+                        status,
+                        None,
+                        confirmacao,
+                        criado,
+                    )
+                restantes -= 1
+
+
+def _com_estatisticas(linhas: Iterable[tuple], acumulador: estatisticas.Acumulador) -> Iterator[tuple]:
+    for linha in linhas:
+        _paciente, profissional_id, data_hora, _fim, status, _observacoes, _confirmacao, criado = linha
+        acumulador.adicionar(estatisticas.contribuicao(profissional_id, data_hora, status, criado))
+        yield linha
+
+
+def _bloqueios(rng: random.Random, profissionais: list[int], total: int, dias: list[date]) -> Iterator[tuple]:
+    motivos = ["Férias", "Capacitação", "Licença médica", "Reunião externa", "Campanha de vacinação"]
+    for _ in range(total):
+        dia = rng.choice(dias)
+        inicio = datetime(dia.year, dia.month, dia.day, 11, 0, tzinfo=timezone.utc)
+        motivo = rng.choice(motivos)
+        if motivo in ("Férias", "Licença médica"):
+            fim = inicio + timedelta(days=rng.randint(3, 30), hours=8)
+        else:
+            inicio += timedelta(hours=rng.choice((0, 2, 4)))
+            fim = inicio + timedelta(hours=rng.randint(1, 4))
+        yield (rng.choice(profissionais), inicio, fim, motivo, inicio - timedelta(days=rng.randint(1, 60)))
+
+
+def _periodos(anos: int) -> list[str]:
+    ano_final = DATA_REFERENCIA.year
+    return [f"Q{q}/{ano}" for ano in range(ano_final - anos + 1, ano_final + 1) for q in range(1, 5)]
+
+
+def _indicadores(rng: random.Random, ubs_id: int, gestor_id: int, total: int, anos: int) -> Iterator[tuple]:
+    periodos = _periodos(anos)
+    for _ in range(total):
+        nome, tipo, meta = rng.choice(INDICADORES)
+        if tipo == "PERCENTUAL":
+            valor = Decimal(f"{rng.uniform(5, 100):.2f}")
+        else:
+            valor = Decimal(rng.randint(meta // 4, meta * 2))
+        criado = DATA_REFERENCIA - timedelta(days=rng.randint(0, anos * 365), seconds=rng.randint(0, 86399))
+        yield (ubs_id, nome, valor, Decimal(meta), tipo, rng.choice(periodos), None, gestor_id, criado)
+
+
+def _problemas(rng: random.Random, ubs_id: int, total: int) -> Iterator[tuple]:
+    for i in range(total):
+        g, u, t = rng.randint(1, 5), rng.randint(1, 5), rng.randint(1, 5)
+        score = g * u * t
+        titulo = f"{rng.choice(PROBLEMAS)} #{i + 1}"
+        criado = DATA_REFERENCIA - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86399))
+        yield (ubs_id, titulo, f"Problema sintético em {rng.choice(BAIRROS)}.", g, u, t, score, score >= 60, criado)
+
+
+def _poligono(rng: random.Random, celula: int, por_linha: int) -> dict:
+    """Polígono irregular (6-10 vértices) dentro da célula ``celula`` da grade."""
+    linha, coluna = divmod(celula, por_linha)
+    cx = CENTRO_MAPA[0] + (coluna - por_linha / 2 + 0.5) * CELULA_GRAUS
+    cy = CENTRO_MAPA[1] + (linha - por_linha / 2 + 0.5) * CELULA_GRAUS
+    vertices = rng.randint(6, 10)
+    anel = []
+    for v in range(vertices):
+        angulo = 2 * math.pi * v / vertices
+        raio = CELULA_GRAUS / 2 * rng.uniform(0.6, 0.95)
+        anel.append([round(cx + raio * math.cos(angulo), 7), round(cy + raio * math.sin(angulo), 7)])
+    anel.append(anel[0])
+    return {"type": "Polygon", "coordinates": [anel]}
+
+
+def _microareas(rng: random.Random, ubs_id: int, total: int) -> Iterator[tuple]:
+    por_linha = max(int(total ** 0.5 + 0.999), 1)
+    for i in range(total):
+        populacao = rng.randint(300, 1200)
+        status = "DESCOBERTA" if rng.random() < 0.15 else "COBERTA"
+        yield (
+            ubs_id,
+            f"Microárea {i + 1:04d}",
+            status,
+            populacao,
+            populacao // rng.randint(3, 4),
+            rng.choice(BAIRROS),
+            _poligono(rng, i, por_linha),
+            DATA_REFERENCIA - timedelta(days=3 * 365),
+        )
+
+
+def _cronograma(rng: random.Random, ubs_id: int, gestor_id: int, anos: int, por_semana: int) -> Iterator[tuple]:
+    inicio = DATA_REFERENCIA - timedelta(days=anos * 365)
+    inicio -= timedelta(days=inicio.weekday())
+    semanas = anos * 52 + 26  # alguns meses de eventos futuros
+    for semana in range(semanas):
+        segunda = inicio + timedelta(weeks=semana)
+        for _ in range(por_semana):
+            tipo, titulo, local = rng.choice(EVENTOS_CRONOGRAMA)
+            dia = segunda + timedelta(days=rng.randint(0, 4))
+            # Cadastrado de uma a quatro semanas antes, nunca depois da data de referência
+            criado = min(dia - timedelta(days=rng.randint(7, 28)), DATA_REFERENCIA)
+            if rng.random() < 0.1:
+                comeco = dia.replace(hour=3)
+                yield (ubs_id, titulo, tipo.value, local, comeco, None, True, None,
+                       RecurrenceType.NONE.value, 1, None, gestor_id, criado)
+                continue
+            comeco = dia.replace(hour=rng.choice((11, 12, 13, 16, 17, 18)))
+            fim = comeco + timedelta(hours=rng.choice((1, 2, 4)))
+            yield (ubs_id, titulo, tipo.value, local, comeco, fim, False, None,
+                   RecurrenceType.NONE.value, 1, None, gestor_id, criado)
+
+
+# --- Orquestração ---
+
+
+def _garantir_ubs(conn: Connection, gestor_id: int) -> int:
+    ubs_id = conn.execute(select(UBS.id).where(UBS.is_deleted.is_(False)).order_by(UBS.id).limit(1)).scalar()
+    if ubs_id is not None:
+        print(f"Reaproveitando a UBS existente (ID={ubs_id})")
+        return ubs_id
+    ubs_id = conn.execute(
+        UBS.__table__.insert()
+        .values(
+            tenant_id=1,
+            owner_user_id=gestor_id,
+            nome_ubs="UBS Sintética",
+            cnes="0000000",
+            area_atuacao="Área sintética para testes de carga",
+            status="DRAFT",
+            is_deleted=False,
+            created_at=DATA_REFERENCIA - timedelta(days=3 * 365),
+        )
+        .returning(UBS.id)
+    ).scalar_one()
+    print(f"UBS sintética criada com ID={ubs_id}")
+    return ubs_id
+
+
+def gerar(conn: Connection, args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    qtd = {chave: int(getattr(args, chave) * args.escala) for chave in PADRAO}
+    qtd["profissionais"] = max(min(qtd["profissionais"], qtd["usuarios"] - 1), 1)
+    qtd["usuarios"] = max(qtd["usuarios"], qtd["profissionais"] + 2)
+
+    ja_existe = conn.execute(
+        select(Usuario.id).where(Usuario.email.like(f"%@{DOMINIO_EMAIL}")).limit(1)
+    ).scalar()
+    if ja_existe is not None:
+        print(f"ERRO: o banco ja tem usuarios @{DOMINIO_EMAIL}. Use um banco descartavel novo.")
+        sys.exit(1)
+
+    print(f"Gerando dados (seed={args.seed}): " + ", ".join(f"{k}={v:,}" for k, v in qtd.items()))
+    primeiro_usuario = _proximo_id(conn, Usuario)
+    _inserir(
+        conn,
+        Usuario.__table__,
+        ["id", "nome", "email", "senha", "cpf", "role", "cargo", "welcome_email_sent", "ativo",
+         "tentativas_login", "created_at"],
+        _usuarios(rng, primeiro_usuario, qtd["usuarios"], qtd["profissionais"]),
+        args.lote,
+    )
+    _ajustar_sequencia(conn, Usuario)
+    gestor_id = primeiro_usuario
+
+    primeiro_profissional = _proximo_id(conn, ProfissionalUbs)
+    cargos = _cargos_profissionais(rng, qtd["profissionais"])
+    _inserir(
+        conn,
+        ProfissionalUbs.__table__,
+        ["id", "usuario_id", "cargo", "registro_professional", "ativo", "created_at"],
+        _profissionais(primeiro_profissional, primeiro_usuario + 1, cargos),
+        args.lote,
+    )
+    _ajustar_sequencia(conn, ProfissionalUbs)
+    # Mantém o cargo também no usuário, como faz a aprovação de profissionais
+    conn.execute(
+        Usuario.__table__.update()
+        .where(Usuario.id.between(primeiro_usuario + 1, primeiro_usuario + qtd["profissionais"]))
+        .values(
+            cargo=select(ProfissionalUbs.cargo)
+            .where(ProfissionalUbs.usuario_id == Usuario.id)
+            .scalar_subquery()
+        )
+    )
+    profissionais = list(range(primeiro_profissional, primeiro_profissional + qtd["profissionais"]))
+    pacientes = (primeiro_usuario + qtd["profissionais"] + 1, primeiro_usuario + qtd["usuarios"] - 1)
+
+    dias = _dias_uteis(
+        (DATA_REFERENCIA - timedelta(days=args.anos_agenda * 365)).date(),
+        (DATA_REFERENCIA + timedelta(days=90)).date(),
+    )
+    capacidade = len(dias) * len(HORARIOS_DIA) * len(profissionais)
+    if qtd["agendamentos"] > capacidade:
+        print(f"AVISO: {qtd['agendamentos']:,} agendamentos nao cabem na grade; limitando a {capacidade:,}.")
+        print("       Aumente --anos-agenda para gerar mais.")
+        qtd["agendamentos"] = capacidade
+    acumulador = estatisticas.Acumulador()
+    _inserir(
+        conn,
+        Agendamento.__table__,
+        ["paciente_id", "profissional_id", "data_hora", "data_hora_fim", "status", "observacoes",
+         "confirmacao_enviada", "created_at"],
+        _com_estatisticas(_agendamentos(rng, profissionais, pacientes, qtd["agendamentos"], dias), acumulador),
+        args.lote,
+    )
+    # Rollup dos painéis, como se cada consulta tivesse passado pelas rotas de escrita
+    _inserir(
+        conn,
+        EstatisticaAgendaDiaria.__table__,
+        ["dia", "profissional_id", *estatisticas.CONTADORES],
+        (tuple(linha.values()) for linha in acumulador.linhas()),
+        args.lote,
+    )
+    _inserir(
+        conn,
+        BloqueioAgenda.__table__,
+        ["profissional_id", "data_inicio", "data_fim", "motivo", "created_at"],
+        _bloqueios(rng, profissionais, qtd["bloqueios"], dias),
+        args.lote,
+    )
+
+    ubs_id = _garantir_ubs(conn, gestor_id)
+    _inserir(
+        conn,
+        Indicator.__table__,
+        ["ubs_id", "nome_indicador", "valor", "meta", "tipo_valor", "periodo_referencia", "observacoes",
+         "created_by", "created_at"],
+        _indicadores(rng, ubs_id, gestor_id, qtd["indicadores"], args.anos_cronograma),
+        args.lote,
+    )
+    _inserir(
+        conn,
+        UBSProblem.__table__,
+        ["ubs_id", "titulo", "descricao", "gut_gravidade", "gut_urgencia", "gut_tendencia", "gut_score",
+         "is_prioritario", "created_at"],
+        _problemas(rng, ubs_id, qtd["problemas"]),
+        args.lote,
+    )
+    _inserir(
+        conn,
+        Microarea.__table__,
+        ["ubs_id", "nome", "status", "populacao", "familias", "bairro", "geojson", "created_at"],
+        _microareas(rng, ubs_id, qtd["microareas"]),
+        args.lote,
+    )
+    _inserir(
+        conn,
+        CronogramaEvent.__table__,
+        ["ubs_id", "titulo", "tipo", "local", "inicio", "fim", "dia_inteiro", "observacoes", "recorrencia",
+         "recorrencia_intervalo", "recorrencia_fim", "created_by", "created_at"],
+        _cronograma(rng, ubs_id, gestor_id, args.anos_cronograma, args.eventos_semana),
+        args.lote,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="URL do banco (padrao: DATABASE_URL)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica todas as quantidades")
+    parser.add_argument("--lote", type=int, default=5_000, help="Linhas por executemany (fora do Postgres)")
+    for chave, valor in PADRAO.items():
+        parser.add_argument(f"--{chave}", type=int, default=valor)
+    parser.add_argument("--anos-agenda", type=int, default=2, help="Anos de agenda no passado")
+    parser.add_argument("--anos-cronograma", type=int, default=3)
+    parser.add_argument("--eventos-semana", type=int, default=12)
+    args = parser.parse_args()
+
+    url = _get_sync_database_url(args.database_url)
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+
+        @event.listens_for(engine, "connect")
+        def _pragmas(dbapi_conn, _record):
+            # Carga descartável: sem fsync por lote
+            cursor = dbapi_conn.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.close()
+
+    Base.metadata.create_all(engine)
+
+    inicio = time.perf_counter()
+    with engine.begin() as conn:
+        gerar(conn, args)
+    print(f"Concluido em {time.perf_counter() - inicio:.1f}s")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
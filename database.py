@@ -1,10 +1,17 @@
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+import logging
 import os
 from dotenv import load_dotenv
 
+from utils.metrics import NullPoolMedido, QueuePoolMedido
+from utils.read_your_writes import leitura_no_primario
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 Base = declarative_base()
@@ -46,6 +53,64 @@ if not DATABASE_URL:
 
 DATABASE_URL = _normalize_database_url(DATABASE_URL)
 
+# Perfis de pool (DB_POOL_PROFILE):
+# - free: valores fixos pequenos, adequados ao plano gratuito do Render (padrão)
+# - auto: divide DB_MAX_CONNECTIONS entre os WEB_CONCURRENCY workers do gunicorn
+# - pgbouncer: sem pool local (NullPool) e sem prepared statements, para
+#   PgBouncer em modo transaction
+# DB_POOL_SIZE, DB_MAX_OVERFLOW e DB_POOL_TIMEOUT sobrescrevem os perfis free e
+# auto; no pgbouncer não há pool local e elas são ignoradas (com aviso no log).
+POOL_PROFILES = ("free", "auto", "pgbouncer")
+_VARIAVEIS_POOL = ("DB_POOL_SIZE", "DB_MAX_OVERFLOW", "DB_POOL_TIMEOUT")
+
+
+def _env_int(env, nome: str, padrao: int) -> int:
+    valor = env.get(nome)
+    return int(valor) if valor not in (None, "") else padrao
+
+
+def pool_settings(env=os.environ) -> dict:
+    """Parâmetros de pool da engine para o perfil configurado no ambiente."""
+    perfil = (env.get("DB_POOL_PROFILE") or "free").lower()
+    if perfil not in POOL_PROFILES:
+        raise ValueError(f"DB_POOL_PROFILE inválido: {perfil} (use {', '.join(POOL_PROFILES)})")
+
+    if perfil == "pgbouncer":
+        ignoradas = [nome for nome in _VARIAVEIS_POOL if env.get(nome) not in (None, "")]
+        if ignoradas:
+            logger.warning(
+                "DB_POOL_PROFILE=pgbouncer não usa pool local; ignorando %s (ajuste o pool no PgBouncer)",
+                ", ".join(ignoradas),
+            )
+        # O PgBouncer faz o pool; prepared statements não sobrevivem à troca de conexão
+        return {
+            "poolclass": NullPoolMedido,
+            "connect_args": {"prepare_threshold": None},
+        }
+
+    if perfil == "auto":
+        workers = max(_env_int(env, "WEB_CONCURRENCY", 1), 1)
+        reservadas = _env_int(env, "DB_RESERVED_CONNECTIONS", 3)
+        por_worker = max((_env_int(env, "DB_MAX_CONNECTIONS", 20) - reservadas) // workers, 1)
+        # Concorrência esperada por worker limita o pool fixo; o restante vira overflow
+        concorrencia = _env_int(env, "DB_EXPECTED_CONCURRENCY", por_worker)
+        pool_size = max(min(concorrencia, por_worker), 1)
+        max_overflow = por_worker - pool_size
+        pool_timeout = 30
+    else:
+        pool_size, max_overflow, pool_timeout = 2, 3, 10
+
+    return {
+        "pool_pre_ping": True,
+        "pool_size": _env_int(env, "DB_POOL_SIZE", pool_size),
+        "max_overflow": _env_int(env, "DB_MAX_OVERFLOW", max_overflow),
+        "pool_recycle": 1800,
+        "pool_timeout": _env_int(env, "DB_POOL_TIMEOUT", pool_timeout),
+        # Mede a espera por conexão (histograma db_pool_wait_seconds)
+        "poolclass": QueuePoolMedido,
+    }
+
+
 #Criando a engine
 #Engine é um objeto do SQLAlchemy usado
 #para gerenciar e configurar conexões entre
@@ -56,23 +121,34 @@ engine_kwargs = {
 }
 
 if not DATABASE_URL.startswith("sqlite"):
-    engine_kwargs.update({
-        "pool_pre_ping": True,
-        "pool_size": 2,
-        "max_overflow": 3,
-        "pool_recycle": 1800,
-        "pool_timeout": 10,
-    })
+    engine_kwargs.update(pool_settings())
+    if "+psycopg" in DATABASE_URL and "connect_args" not in engine_kwargs:
+        # O psycopg prepara no servidor o SQL repetido na conexão a partir da N-ésima
+        # execução; os statements de utils/consultas_frequentes geram sempre o mesmo texto
+        engine_kwargs["connect_args"] = {
+            "prepare_threshold": int(os.getenv("DB_PREPARE_THRESHOLD", "2")),
+        }
+    logger.info(
+        "Pool do banco: perfil=%s pool_size=%s max_overflow=%s",
+        os.getenv("DB_POOL_PROFILE") or "free",
+        engine_kwargs.get("pool_size", 0),
+        engine_kwargs.get("max_overflow", 0),
+    )
+
+# Réplica de leitura opcional (mesmos parâmetros de pool do primário)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+if DATABASE_READ_URL:
+    DATABASE_READ_URL = _normalize_database_url(DATABASE_READ_URL)
 
 engine = None
 AsyncSessionLocal = None
+read_engine = None
+AsyncReadSessionLocal = None
 
-if os.getenv("SKIP_ASYNC_ENGINE") != "1":
-    engine = create_async_engine(DATABASE_URL, **engine_kwargs)
 
-    # Fábrica de sessões
-    AsyncSessionLocal = sessionmaker(
-        engine,
+def _session_factory(bind):
+    return sessionmaker(
+        bind,
         class_=AsyncSession,
         expire_on_commit=False,
         autoflush=False,
@@ -80,6 +156,17 @@ if os.getenv("SKIP_ASYNC_ENGINE") != "1":
     )
 
 
+if os.getenv("SKIP_ASYNC_ENGINE") != "1":
+    engine = create_async_engine(DATABASE_URL, **engine_kwargs)
+
+    # Fábrica de sessões
+    AsyncSessionLocal = _session_factory(engine)
+
+    if DATABASE_READ_URL:
+        read_engine = create_async_engine(DATABASE_READ_URL, **engine_kwargs)
+        AsyncReadSessionLocal = _session_factory(read_engine)
+
+
 # Função para criar e fornecer sessões para a rota.
 async def get_db():
     if AsyncSessionLocal is None:
@@ -89,3 +176,18 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+# Sessão para rotas somente leitura: usa a réplica quando configurada, exceto
+# logo após uma escrita do mesmo cliente (ver utils.read_your_writes).
+# Sem réplica, reaproveita a sessão de get_db da própria requisição.
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)):
+    if AsyncReadSessionLocal is None or leitura_no_primario(request):
+        yield db
+        return
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
@@ -7,6 +7,7 @@ const AppointmentList = ({ appointments, onCancel, onReschedule, showActions = t
       case 'CANCELADO': return 'bg-red-100 dark:bg-red-900/40 text-red-800 dark:text-red-300';
       case 'REALIZADO': return 'bg-green-100 dark:bg-green-900/40 text-green-800 dark:text-green-300';
       case 'REAGENDADO': return 'bg-yellow-100 dark:bg-yellow-900/40 text-yellow-800 dark:text-yellow-300';
+      case 'FALTOU': return 'bg-orange-100 dark:bg-orange-900/40 text-orange-800 dark:text-orange-300';
       default: return 'bg-gray-100 dark:bg-slate-700 text-gray-800 dark:text-slate-300';
     }
   };
@@ -0,0 +1,25 @@
+"""Configuração do gunicorn (carregada automaticamente a partir da raiz do projeto).
+
+Prepara o diretório compartilhado das métricas Prometheus para que o
+``/metrics`` de qualquer worker agregue os valores de todos os processos.
+"""
+
+import os
+import shutil
+
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/plataforma_prometheus"
+)
+
+
+def on_starting(server):
+    # Arquivos de uma execução anterior distorceriam contadores e histogramas
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Remove os gauges "live" do worker encerrado
+    multiprocess.mark_process_dead(worker.pid)
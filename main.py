@@ -2,6 +2,7 @@ from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 from contextlib import asynccontextmanager
+import database
 from database import get_db, engine, Base
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -11,7 +12,16 @@ import sys
 import os
 import asyncio
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response
+from services.notificacoes.contadores import contadores
+from utils.instrumentation import InstrumentacaoMiddleware, instrumentar_engine
+from utils.loop_watchdog import watchdog
+from utils.metrics import gerar_metricas, instrumentar_pool, monitorar_event_loop
+from utils.rate_limit import RATE_LIMIT_ENABLED
+from utils.read_your_writes import ReadYourWritesMiddleware
+from services.realtime.outbox import poll_loop
+from services.agendador.agendador import agendador
+from services.agendador.tarefas import registrar_tarefas_padrao
 
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -19,10 +29,13 @@ if sys.platform == 'win32':
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, enabled=RATE_LIMIT_ENABLED)
 
 KEEP_ALIVE_INTERVAL = int(os.getenv("KEEP_ALIVE_INTERVAL", "840"))  # 14 min
 
+# AGENDADOR_ATIVO=false desliga as tarefas em segundo plano (lembretes, limpezas)
+AGENDADOR_ATIVO = os.getenv("AGENDADOR_ATIVO", "true").lower() not in ("0", "false", "no")
+
 
 async def _keep_alive_loop():
     """Faz self-ping a cada 14 minutos para evitar que o Render free tier adormeça o serviço."""
@@ -51,13 +64,36 @@ async def lifespan(app: FastAPI):
     #Startup
     logger.info("Inicializando aplicação")
     keep_alive_task = asyncio.create_task(_keep_alive_loop())
+    loop_lag_task = asyncio.create_task(monitorar_event_loop())
+    watchdog.iniciar()
+    realtime_task = None
+    if database.AsyncSessionLocal is not None:
+        try:
+            async with database.AsyncSessionLocal() as db:
+                await contadores.carregar(db)
+        except Exception as exc:
+            # O stream de notificações carrega os contadores na primeira conexão
+            logger.warning("Contadores de notificação não carregados: %s", exc)
+        # Repassa eventos de SSE gravados por outros workers
+        realtime_task = asyncio.create_task(poll_loop(database.AsyncSessionLocal))
+        if AGENDADOR_ATIVO:
+            # Leases no banco: cada tarefa roda em um worker por vez
+            registrar_tarefas_padrao(agendador)
+            agendador.iniciar(database.AsyncSessionLocal)
     yield
 
     #Shutdown
     keep_alive_task.cancel()
+    loop_lag_task.cancel()
+    await watchdog.parar()
+    if realtime_task is not None:
+        realtime_task.cancel()
+    await agendador.parar()
     try:
         logger.info("Encerrando engine do banco de dados...")
         await engine.dispose()
+        if database.read_engine is not None:
+            await database.read_engine.dispose()
         logger.info("Engine do banco de dados encerrada")
     except Exception as e:
         logger.error(f"Erro ao encerrar engine do banco de dados: {e}")
@@ -76,6 +112,15 @@ app.add_middleware(
     allow_headers=["*"],
     max_age=600,
 )
+# Cookie de leitura no primário após escritas (só quando há réplica configurada)
+app.add_middleware(ReadYourWritesMiddleware, ativo=lambda: database.AsyncReadSessionLocal is not None)
+# Adicionado por último para ficar por fora e medir a requisição inteira
+app.add_middleware(InstrumentacaoMiddleware)
+if engine is not None:
+    instrumentar_engine(engine)
+    instrumentar_pool(engine)
+if database.read_engine is not None:
+    instrumentar_engine(database.read_engine)
 
 from routes.auth_routes import auth_router
 from routes.diagnostico_routes import diagnostico_router
@@ -85,6 +130,9 @@ from routes.cronograma_routes import cronograma_router
 from routes.suporte_feedback_routes import suporte_feedback_router
 from routes.gestao_equipes_routes import gestao_equipes_router
 from routes.cargos_routes import cargos_router
+from routes.calendario_routes import calendario_router
+from routes.notificacoes_routes import notificacoes_router
+from routes.observabilidade_routes import observabilidade_router
 
 # Incluindo as rotas (utilizando o prefixo /api para padronização)
 app.include_router(auth_router, prefix="/api")
@@ -95,6 +143,9 @@ app.include_router(cronograma_router, prefix="/api")
 app.include_router(suporte_feedback_router, prefix="/api")
 app.include_router(gestao_equipes_router, prefix="/api")
 app.include_router(cargos_router, prefix="/api")
+app.include_router(calendario_router, prefix="/api")
+app.include_router(notificacoes_router, prefix="/api")
+app.include_router(observabilidade_router, prefix="/api")
 
 # Monta o diretório de assets estáticos do frontend
 assets_path = "frontend-react/dist/assets"
@@ -108,6 +159,15 @@ else:
 async def ping():
     return "pong"
 
+# Métricas Prometheus (agrega todos os workers quando PROMETHEUS_MULTIPROC_DIR está definido)
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    metrics_token = os.getenv("METRICS_TOKEN")
+    if metrics_token and request.headers.get("authorization") != f"Bearer {metrics_token}":
+        return PlainTextResponse("Não autorizado", status_code=401)
+    conteudo, content_type = gerar_metricas()
+    return Response(content=conteudo, media_type=content_type)
+
 # Rota para verificar SAÚDE da API (verificar se o banco está conectado e a API rodando)
 @app.get("/health") #Rate limite de 10 requisições por minuto
 @limiter.limit("10/minute")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+
+class LeaseTarefa(Base):
+    """Lease de uma tarefa do agendador em segundo plano.
+
+    Cada worker roda o agendador, mas só quem detém o lease (``dono`` com
+    ``expira_em`` no futuro) executa a tarefa; os demais pulam a rodada.
+    """
+
+    __tablename__ = "agendador_leases"
+
+    nome = Column(String(100), primary_key=True)
+    dono = Column(String(64), nullable=False)
+    expira_em = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,14 +1,28 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Time, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
+from datetime import timedelta
 import enum
+import os
 from database import Base
 
+# Duração das consultas de cargos sem ``cargos.duracao_padrao_minutos``
+DURACAO_PADRAO_MINUTOS = int(os.getenv("AGENDA_DURACAO_CONSULTA_MINUTOS", "30"))
+
 class StatusAgendamento(str, enum.Enum):
     AGENDADO = "AGENDADO"
     CANCELADO = "CANCELADO"
     REALIZADO = "REALIZADO"
     REAGENDADO = "REAGENDADO"
+    FALTOU = "FALTOU"
+
+_LEMBRETE_PENDENTE = "confirmacao_enviada IS NULL AND status IN ('AGENDADO', 'REAGENDADO')"
+
+
+def _fim_padrao(context):
+    # Inserções sem fim explícito (scripts, testes) usam a duração padrão
+    return context.get_current_parameters()["data_hora"] + timedelta(minutes=DURACAO_PADRAO_MINUTOS)
+
 
 class Agendamento(Base):
     __tablename__ = "agendamentos"
@@ -18,6 +32,8 @@ class Agendamento(Base):
     profissional_id = Column(Integer, ForeignKey("profissionais.id"), nullable=False)
     
     data_hora = Column(DateTime(timezone=True), nullable=False)
+    # Fim (exclusivo) da consulta: conflito é sobreposição de [data_hora, data_hora_fim)
+    data_hora_fim = Column(DateTime(timezone=True), nullable=False, default=_fim_padrao)
     status = Column(String(20), default=StatusAgendamento.AGENDADO, nullable=False)
     observacoes = Column(Text, nullable=True)
     
@@ -30,6 +46,24 @@ class Agendamento(Base):
     paciente = relationship("Usuario", backref="meus_agendamentos")
     profissional = relationship("ProfissionalUbs", backref="agenda")
 
+    __table_args__ = (
+        # Agenda do profissional por período
+        Index("ix_agendamentos_profissional_data_hora", "profissional_id", "data_hora"),
+        # Checagem de sobreposição: só consultas que terminam após o início pedido.
+        # No PostgreSQL a constraint de exclusão ex_agendamentos_sem_sobreposicao
+        # (migração 20261019_0018) garante a regra no banco.
+        Index("ix_agendamentos_profissional_data_hora_fim", "profissional_id", "data_hora_fim"),
+        # "Meus agendamentos" do paciente, ordenados por data
+        Index("ix_agendamentos_paciente_data_hora", "paciente_id", "data_hora"),
+        # Lembretes pendentes (agendador): índice parcial, só consultas ativas sem aviso
+        Index(
+            "ix_agendamentos_lembrete_pendente",
+            "data_hora",
+            postgresql_where=text(_LEMBRETE_PENDENTE),
+            sqlite_where=text(_LEMBRETE_PENDENTE),
+        ),
+    )
+
 class BloqueioAgenda(Base):
     __tablename__ = "bloqueios_agenda"
 
@@ -42,3 +76,98 @@ class BloqueioAgenda(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     profissional = relationship("ProfissionalUbs", backref="bloqueios")
+
+    __table_args__ = (
+        Index("ix_bloqueios_agenda_profissional_inicio", "profissional_id", "data_inicio"),
+    )
+
+
+class JornadaProfissional(Base):
+    """Faixa de atendimento semanal do profissional (horário local da UBS).
+
+    Sem nenhuma faixa cadastrada vale o expediente padrão
+    (``AGENDA_EXPEDIENTE``, dias úteis).
+    """
+
+    __tablename__ = "jornadas_profissionais"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profissional_id = Column(Integer, ForeignKey("profissionais.id"), nullable=False)
+    # 0 = segunda-feira ... 6 = domingo (date.weekday())
+    dia_semana = Column(Integer, nullable=False)
+    hora_inicio = Column(Time, nullable=False)
+    hora_fim = Column(Time, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    profissional = relationship("ProfissionalUbs", backref="jornadas")
+
+    __table_args__ = (
+        Index("ix_jornadas_profissionais_profissional_dia", "profissional_id", "dia_semana"),
+    )
+
+
+class EstatisticaAgendaDiaria(Base):
+    """Totais diários de agendamentos por profissional (painéis da gestão).
+
+    Mantida incrementalmente pelas rotas de escrita de agendamentos e
+    recalculável com ``python -m services.agenda.estatisticas``. O dia é o
+    dia (UTC) de ``data_hora``.
+    """
+
+    __tablename__ = "agenda_estatisticas_diarias"
+
+    dia = Column(Date, primary_key=True)
+    profissional_id = Column(Integer, ForeignKey("profissionais.id"), primary_key=True)
+
+    total = Column(Integer, default=0, nullable=False)
+    agendados = Column(Integer, default=0, nullable=False)
+    reagendados = Column(Integer, default=0, nullable=False)
+    realizados = Column(Integer, default=0, nullable=False)
+    cancelados = Column(Integer, default=0, nullable=False)
+    faltas = Column(Integer, default=0, nullable=False)
+    # Soma, em minutos, da antecedência (data_hora - created_at) de cada agendamento
+    antecedencia_minutos = Column(BigInteger, default=0, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class StatusListaEspera(str, enum.Enum):
+    AGUARDANDO = "AGUARDANDO"
+    ATENDIDO = "ATENDIDO"
+    CANCELADO = "CANCELADO"
+
+
+class ListaEspera(Base):
+    """Pacientes à espera de um horário com um profissional ou cargo.
+
+    Quando um agendamento é cancelado, o horário liberado vai para o primeiro
+    paciente elegível da fila (ver ``services.agenda.lista_espera``).
+    """
+
+    __tablename__ = "lista_espera"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    paciente_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    # Um profissional específico ou qualquer profissional do cargo
+    profissional_id = Column(Integer, ForeignKey("profissionais.id"), nullable=True)
+    cargo = Column(String(100), nullable=False)
+
+    # Janela em que o paciente aceita ser encaixado (vazia = qualquer horário)
+    data_inicio = Column(DateTime(timezone=True), nullable=True)
+    data_fim = Column(DateTime(timezone=True), nullable=True)
+    observacoes = Column(Text, nullable=True)
+
+    status = Column(String(20), default=StatusListaEspera.AGUARDANDO, nullable=False)
+    agendamento_id = Column(Integer, ForeignKey("agendamentos.id"), nullable=True)
+    atendido_em = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    paciente = relationship("Usuario")
+    profissional = relationship("ProfissionalUbs")
+
+    __table_args__ = (
+        # Fila por ordem de chegada de um cargo (o profissional é filtrado dentro dela)
+        Index("ix_lista_espera_status_cargo_created", "status", "cargo", "created_at"),
+        Index("ix_lista_espera_paciente_id", "paciente_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, func, Text
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, func, Text, Index
 from database import Base
 
 class Usuario(Base):
@@ -40,12 +40,21 @@ class LoginAttempt(Base):
     motivo = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Histórico de tentativas por e-mail (auditoria de login)
+        Index("ix_login_attempts_email_created", "email", "created_at"),
+        # Retenção: remoção em lotes das linhas mais antigas que a janela
+        Index("ix_login_attempts_created_at", "created_at"),
+    )
+
 
 class Cargo(Base):
     __tablename__ = "cargos"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     nome = Column(String(255), nullable=False, unique=True)
+    # Duração das consultas do cargo na agenda (vazio = AGENDA_DURACAO_CONSULTA_MINUTOS)
+    duracao_padrao_minutos = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 
 from database import Base
@@ -42,3 +42,8 @@ class CronogramaEvent(Base):
     updated_by = Column(Integer, ForeignKey("usuarios.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Listagem por período, feed .ics e PDF filtram por UBS e início
+        Index("ix_cronograma_events_ubs_inicio", "ubs_id", "inicio"),
+    )
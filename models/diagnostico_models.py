@@ -10,6 +10,7 @@ from sqlalchemy import (
     ForeignKey,
     UniqueConstraint,
     Numeric,
+    Index,
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -150,6 +151,11 @@ class Indicator(Base):
 
     ubs = relationship("UBS", back_populates="indicators")
 
+    __table_args__ = (
+        # Série histórica por indicador e "último valor por nome"
+        Index("ix_indicators_ubs_nome_created", "ubs_id", "nome_indicador", "created_at"),
+    )
+
 
 class ProfessionalGroup(Base):
     __tablename__ = "professional_groups"
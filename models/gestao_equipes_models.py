@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -22,6 +22,24 @@ class Microarea(Base):
     ubs = relationship("UBS", backref="microareas")
     agentes = relationship("AgenteSaude", back_populates="microarea", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_microareas_ubs_id", "ubs_id"),
+    )
+
+
+class MicroareaRevisao(Base):
+    """Contador de escritas nas microáreas de uma UBS.
+
+    Entra na versão dos tiles: ``updated_at`` tem resolução de um segundo no
+    SQLite e duas edições no mesmo segundo não mudariam a versão.
+    """
+
+    __tablename__ = "microareas_revisoes"
+
+    ubs_id = Column(Integer, ForeignKey("ubs.id", ondelete="CASCADE"), primary_key=True)
+    revisao = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 
 class AgenteSaude(Base):
     __tablename__ = "agentes_saude"
@@ -35,3 +53,7 @@ class AgenteSaude(Base):
 
     usuario = relationship("Usuario", backref="agente_saude")
     microarea = relationship("Microarea", back_populates="agentes")
+
+    __table_args__ = (
+        Index("ix_agentes_saude_microarea_id", "microarea_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -26,6 +26,11 @@ class EducationalMaterial(Base):
         "EducationalMaterialFile", back_populates="material", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Lista de materiais da UBS, mais recentes primeiro
+        Index("ix_educational_materials_ubs_created", "ubs_id", "created_at"),
+    )
+
 
 class EducationalMaterialFile(Base):
     __tablename__ = "educational_material_files"
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from database import Base
+
+
+class EventoTempoReal(Base):
+    """Outbox de eventos em tempo real (SSE).
+
+    Cada worker publica localmente o que grava e lê periodicamente as linhas
+    gravadas pelos demais workers, garantindo a entrega entre processos.
+    """
+
+    __tablename__ = "eventos_tempo_real"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    canal = Column(String(100), nullable=False)
+    tipo = Column(String(50), nullable=False)
+    payload = Column(JSONB().with_variant(JSON, "sqlite"), nullable=False)
+    origem = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_eventos_tempo_real_canal_id", "canal", "id"),
+        Index("ix_eventos_tempo_real_created_at", "created_at"),
+    )
@@ -1,20 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import delete, select, or_
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from database import get_db
+from database import get_db, get_read_db
 from models.auth_models import Usuario, ProfissionalUbs
-from models.agendamento_models import Agendamento, BloqueioAgenda, StatusAgendamento
+from models.agendamento_models import (
+    Agendamento,
+    BloqueioAgenda,
+    EstatisticaAgendaDiaria,
+    JornadaProfissional,
+    ListaEspera,
+    StatusAgendamento,
+    StatusListaEspera,
+)
+from models.diagnostico_models import UBS
 from schemas.agendamento_schemas import (
     AgendamentoCreate, 
     AgendamentoUpdate, 
     AgendamentoResponse,
     BloqueioAgendaCreate,
-    BloqueioAgendaResponse
+    BloqueioAgendaResponse,
+    EstatisticasAgendaResponse,
+    EstatisticasCargo,
+    EstatisticasProfissional,
+    HorarioDisponivel,
+    JornadaFaixa,
+    JornadaProfissionalResponse,
+    ListaEsperaCreate,
+    ListaEsperaResponse,
+)
+from services.agenda import estatisticas
+from services.agenda.disponibilidade import agenda_do_profissional, horario_disponivel, proximos_horarios
+from services.agenda.lista_espera import preencher_horario_liberado
+from services.agenda.eventos import (
+    AGENDAMENTO_ATUALIZADO,
+    AGENDAMENTO_CRIADO,
+    BLOQUEIO_CRIADO,
+    BLOQUEIO_REMOVIDO,
+    CANAL_AGENDA,
+    canal_profissional,
+    registrar_evento_agendamento,
+    registrar_evento_bloqueio,
+    tipo_atualizacao,
 )
-from utils.deps import get_current_user
+from services.realtime.broker import broker
+from services.realtime.outbox import eventos_desde, publicar_local
+from services.realtime.sse import SSE_HEADERS, parse_last_event_id, stream_eventos
+from utils.deps import get_current_user, get_user_from_request_token
 
 agendamento_router = APIRouter(tags=["Agendamentos"])
 
@@ -22,48 +58,31 @@ STAFF_ROLES = {"PROFISSIONAL", "GESTOR"}
 AGENDA_VIEW_ROLES = {"PROFISSIONAL", "GESTOR"}
 
 
+def _status_ocupa_horario(valor) -> bool:
+    valor = valor.value if hasattr(valor, "value") else valor
+    return valor in (StatusAgendamento.AGENDADO.value, StatusAgendamento.REAGENDADO.value)
+
+
 def _validate_two_week_window(target: datetime, now_utc: datetime) -> None:
     max_date = now_utc + timedelta(days=14)
     if target > max_date:
         raise HTTPException(status_code=400, detail="Data invalida (maior que 2 semanas).")
 
-# --- Auxiliares ---
-async def check_availability(
-    db: AsyncSession, 
-    profissional_id: int, 
-    data_hora: datetime, 
-    exclude_agendamento_id: int = None
-):
-    # Verifica se já existe agendamento ativo no horário (exceto o próprio se for reagendamento)
-    query = select(Agendamento).where(
-        Agendamento.profissional_id == profissional_id,
-        Agendamento.data_hora == data_hora,
-        Agendamento.status.in_([StatusAgendamento.AGENDADO, StatusAgendamento.REAGENDADO])
-    )
-    if exclude_agendamento_id:
-        query = query.where(Agendamento.id != exclude_agendamento_id)
-        
-    result = await db.execute(query)
-    if result.scalars().first():
-        return False
 
-    # Verifica bloqueios
-    query_bloqueio = select(BloqueioAgenda).where(
-        BloqueioAgenda.profissional_id == profissional_id,
-        and_(BloqueioAgenda.data_inicio <= data_hora, BloqueioAgenda.data_fim >= data_hora)
-    )
-    result_bloqueio = await db.execute(query_bloqueio)
-    if result_bloqueio.scalars().first():
-        return False
-        
-    return True
+async def _gravar_sem_sobreposicao(db: AsyncSession, gravar, detail: str) -> None:
+    # No PostgreSQL a constraint de exclusão barra a corrida entre checagem e gravação
+    try:
+        await gravar()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=detail)
 
 # --- Rotas de Agendamento ---
 
 @agendamento_router.get("/agendamentos/meus", response_model=List[AgendamentoResponse])
 async def get_meus_agendamentos(
     current_user: Usuario = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Retorna o histórico de agendamentos do usuário logado."""
     query = select(Agendamento).where(Agendamento.paciente_id == current_user.id).order_by(Agendamento.data_hora.desc())
@@ -103,8 +122,14 @@ async def criar_agendamento(
 
     _validate_two_week_window(agendamento_in.data_hora, now_utc)
 
+    # Duração do cargo e jornada do profissional
+    agenda = await agenda_do_profissional(db, agendamento_in.profissional_id)
+    data_hora_fim = agendamento_in.data_hora + agenda.duracao
+    if not agenda.atende(agendamento_in.data_hora, data_hora_fim):
+        raise HTTPException(status_code=400, detail="Fora do horário de atendimento do profissional.")
+
     # Verificar disponibilidade
-    disponivel = await check_availability(db, agendamento_in.profissional_id, agendamento_in.data_hora)
+    disponivel = await horario_disponivel(db, agendamento_in.profissional_id, agendamento_in.data_hora, data_hora_fim)
     if not disponivel:
         raise HTTPException(status_code=409, detail="Horário indisponível.")
 
@@ -112,13 +137,20 @@ async def criar_agendamento(
         paciente_id=current_user.id,
         profissional_id=agendamento_in.profissional_id,
         data_hora=agendamento_in.data_hora,
+        data_hora_fim=data_hora_fim,
         observacoes=agendamento_in.observacoes,
-        status=StatusAgendamento.AGENDADO
+        status=StatusAgendamento.AGENDADO,
+        # Mesmo instante usado na antecedência do rollup de estatísticas
+        created_at=now_utc,
     )
     
     db.add(novo_agendamento)
-    await db.commit()
+    await _gravar_sem_sobreposicao(db, db.flush, "Horário indisponível.")
+    await estatisticas.registrar_alteracao(db, None, estatisticas.contribuicao_de(novo_agendamento))
+    evento = await registrar_evento_agendamento(db, AGENDAMENTO_CRIADO, novo_agendamento)
+    await _gravar_sem_sobreposicao(db, db.commit, "Horário indisponível.")
     await db.refresh(novo_agendamento)
+    publicar_local([evento])
     
     return AgendamentoResponse.from_orm(novo_agendamento)
 
@@ -143,6 +175,10 @@ async def atualizar_agendamento(
     if not (is_owner or is_staff):
         raise HTTPException(status_code=403, detail="Sem permissão")
 
+    contribuicao_anterior = estatisticas.contribuicao_de(agendamento)
+    horario_anterior = agendamento.data_hora
+    ocupava_horario = _status_ocupa_horario(agendamento.status)
+
     # Reagendamento (mudança de data)
     if agendamento_update.data_hora:
         now_utc = datetime.now(timezone.utc)
@@ -151,12 +187,22 @@ async def atualizar_agendamento(
 
         _validate_two_week_window(agendamento_update.data_hora, now_utc)
              
-        disponivel = await check_availability(
-            db, agendamento.profissional_id, agendamento_update.data_hora, exclude_agendamento_id=agendamento.id
+        # Mantém a duração da consulta
+        data_hora_fim = agendamento_update.data_hora + (agendamento.data_hora_fim - agendamento.data_hora)
+        agenda = await agenda_do_profissional(db, agendamento.profissional_id)
+        if not agenda.atende(agendamento_update.data_hora, data_hora_fim):
+            raise HTTPException(status_code=400, detail="Fora do horário de atendimento do profissional.")
+        disponivel = await horario_disponivel(
+            db,
+            agendamento.profissional_id,
+            agendamento_update.data_hora,
+            data_hora_fim,
+            excluir_agendamento_id=agendamento.id,
         )
         if not disponivel:
             raise HTTPException(status_code=409, detail="Novo horário indisponível.")
         agendamento.data_hora = agendamento_update.data_hora
+        agendamento.data_hora_fim = data_hora_fim
         if not agendamento_update.status:
             # Se apenas mudou data, marca como reagendado
             agendamento.status = StatusAgendamento.REAGENDADO
@@ -167,8 +213,23 @@ async def atualizar_agendamento(
     if agendamento_update.observacoes:
         agendamento.observacoes = agendamento_update.observacoes
 
-    await db.commit()
+    await _gravar_sem_sobreposicao(db, db.flush, "Novo horário indisponível.")
+    await estatisticas.registrar_alteracao(db, contribuicao_anterior, estatisticas.contribuicao_de(agendamento))
+    eventos = [await registrar_evento_agendamento(db, tipo_atualizacao(agendamento), agendamento)]
+
+    # Cancelamento ou mudança de horário libera o horário antigo para a lista de espera
+    if ocupava_horario and (
+        not _status_ocupa_horario(agendamento.status) or agendamento.data_hora != horario_anterior
+    ):
+        encaixe = await preencher_horario_liberado(
+            db, agendamento.profissional_id, horario_anterior, excluir_paciente_id=agendamento.paciente_id
+        )
+        if encaixe is not None:
+            eventos.append(encaixe)
+
+    await _gravar_sem_sobreposicao(db, db.commit, "Novo horário indisponível.")
     await db.refresh(agendamento)
+    publicar_local(eventos)
     return AgendamentoResponse.from_orm(agendamento)
 
 @agendamento_router.post("/agendamentos/{agendamento_id}/confirmar", response_model=AgendamentoResponse)
@@ -188,10 +249,114 @@ async def confirmar_consulta(
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
         
     agendamento.confirmacao_enviada = datetime.now(timezone.utc)
+    evento = await registrar_evento_agendamento(db, AGENDAMENTO_ATUALIZADO, agendamento)
     await db.commit()
     await db.refresh(agendamento)
+    publicar_local([evento])
     return AgendamentoResponse.from_orm(agendamento)
 
+# --- Lista de Espera ---
+
+@agendamento_router.post("/agendamentos/lista-espera", response_model=ListaEsperaResponse)
+async def entrar_lista_espera(
+    entrada_in: ListaEsperaCreate,
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Entra na lista de espera de um profissional ou de um cargo.
+    Um cancelamento encaixa automaticamente o primeiro paciente elegível.
+    """
+    cargo = entrada_in.cargo
+    if entrada_in.profissional_id:
+        prof = await db.get(ProfissionalUbs, entrada_in.profissional_id)
+        if not prof or not prof.ativo:
+            raise HTTPException(status_code=404, detail="Profissional não encontrado.")
+        cargo = prof.cargo
+    if not cargo:
+        raise HTTPException(status_code=400, detail="Informe o profissional ou o cargo.")
+    if entrada_in.data_inicio and entrada_in.data_fim and entrada_in.data_fim < entrada_in.data_inicio:
+        raise HTTPException(status_code=400, detail="Período inválido (início após o fim).")
+
+    mesmo_profissional = (
+        ListaEspera.profissional_id == entrada_in.profissional_id
+        if entrada_in.profissional_id
+        else ListaEspera.profissional_id.is_(None)
+    )
+    result = await db.execute(
+        select(ListaEspera.id).where(
+            ListaEspera.paciente_id == current_user.id,
+            ListaEspera.status == StatusListaEspera.AGUARDANDO.value,
+            ListaEspera.cargo == cargo,
+            mesmo_profissional,
+        )
+    )
+    if result.first():
+        raise HTTPException(status_code=409, detail="Você já está na lista de espera.")
+
+    entrada = ListaEspera(
+        paciente_id=current_user.id,
+        profissional_id=entrada_in.profissional_id,
+        cargo=cargo,
+        data_inicio=entrada_in.data_inicio,
+        data_fim=entrada_in.data_fim,
+        observacoes=entrada_in.observacoes,
+        status=StatusListaEspera.AGUARDANDO.value,
+    )
+    db.add(entrada)
+    await db.commit()
+    await db.refresh(entrada)
+    return entrada
+
+@agendamento_router.get("/agendamentos/lista-espera/minhas", response_model=List[ListaEsperaResponse])
+async def listar_minhas_esperas(
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Entradas do usuário logado na lista de espera, mais recentes primeiro."""
+    result = await db.execute(
+        select(ListaEspera)
+        .where(ListaEspera.paciente_id == current_user.id)
+        .order_by(ListaEspera.created_at.desc(), ListaEspera.id.desc())
+    )
+    return result.scalars().all()
+
+@agendamento_router.get("/agenda/lista-espera", response_model=List[ListaEsperaResponse])
+async def listar_lista_espera(
+    cargo: Optional[str] = None,
+    profissional_id: Optional[int] = None,
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Fila de espera (pacientes aguardando), na ordem de atendimento."""
+    if current_user.role not in STAFF_ROLES:
+        raise HTTPException(status_code=403, detail="Acesso restrito a profissionais.")
+    query = select(ListaEspera).where(ListaEspera.status == StatusListaEspera.AGUARDANDO.value)
+    if cargo:
+        query = query.where(ListaEspera.cargo == cargo)
+    if profissional_id:
+        query = query.where(or_(ListaEspera.profissional_id.is_(None), ListaEspera.profissional_id == profissional_id))
+    result = await db.execute(query.order_by(ListaEspera.created_at, ListaEspera.id))
+    return result.scalars().all()
+
+@agendamento_router.delete("/agendamentos/lista-espera/{entrada_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def sair_lista_espera(
+    entrada_id: int,
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Retira a entrada da lista de espera (paciente dono ou funcionário)."""
+    entrada = await db.get(ListaEspera, entrada_id)
+    if not entrada:
+        raise HTTPException(status_code=404, detail="Entrada não encontrada.")
+    if entrada.paciente_id != current_user.id and current_user.role not in STAFF_ROLES:
+        raise HTTPException(status_code=403, detail="Sem permissão")
+    if entrada.status != StatusListaEspera.AGUARDANDO.value:
+        raise HTTPException(status_code=409, detail="Entrada já encerrada.")
+    entrada.status = StatusListaEspera.CANCELADO.value
+    await db.commit()
+    return None
+
 # --- Rotas de Agenda (Visão Staff) ---
 
 @agendamento_router.get("/agenda/profissional/{profissional_id}", response_model=List[AgendamentoResponse])
@@ -200,7 +365,7 @@ async def get_agenda_profissional(
     start_date: datetime,
     end_date: datetime,
     current_user: Usuario = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Ver agenda semanal de um profissional.
@@ -238,6 +403,213 @@ async def get_agenda_profissional(
         
     return response
 
+# --- Jornada (horário de atendimento) do profissional ---
+
+async def _resposta_jornada(db: AsyncSession, profissional_id: int) -> JornadaProfissionalResponse:
+    agenda = await agenda_do_profissional(db, profissional_id)
+    faixas = [
+        JornadaFaixa(dia_semana=dia, hora_inicio=abertura, hora_fim=fechamento)
+        for dia, intervalos in sorted((agenda.jornada or {}).items())
+        for abertura, fechamento in intervalos
+    ]
+    return JornadaProfissionalResponse(
+        profissional_id=profissional_id,
+        duracao_consulta_minutos=int(agenda.duracao.total_seconds() // 60),
+        faixas=faixas,
+    )
+
+@agendamento_router.get("/agenda/profissional/{profissional_id}/jornada", response_model=JornadaProfissionalResponse)
+async def get_jornada_profissional(
+    profissional_id: int,
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Faixas semanais de atendimento e duração das consultas do profissional."""
+    if not await db.get(ProfissionalUbs, profissional_id):
+        raise HTTPException(status_code=404, detail="Profissional não encontrado.")
+    return await _resposta_jornada(db, profissional_id)
+
+@agendamento_router.put("/agenda/profissional/{profissional_id}/jornada", response_model=JornadaProfissionalResponse)
+async def definir_jornada_profissional(
+    profissional_id: int,
+    faixas: List[JornadaFaixa],
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Substitui as faixas semanais de atendimento (GESTOR ou o próprio profissional).
+    Lista vazia remove a jornada: a agenda volta a aceitar qualquer horário.
+    Consultas já marcadas fora das novas faixas não são alteradas.
+    """
+    prof = await db.get(ProfissionalUbs, profissional_id)
+    if not prof:
+        raise HTTPException(status_code=404, detail="Profissional não encontrado.")
+    if current_user.role != "GESTOR" and prof.usuario_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Sem permissão para alterar a jornada de outro profissional.")
+
+    ordenadas = sorted(faixas, key=lambda f: (f.dia_semana, f.hora_inicio))
+    for anterior, faixa in zip([None, *ordenadas], ordenadas):
+        if faixa.hora_fim <= faixa.hora_inicio:
+            raise HTTPException(status_code=400, detail="Faixa inválida (início após o fim).")
+        if anterior and anterior.dia_semana == faixa.dia_semana and faixa.hora_inicio < anterior.hora_fim:
+            raise HTTPException(status_code=400, detail="Faixas sobrepostas no mesmo dia.")
+
+    await db.execute(delete(JornadaProfissional).where(JornadaProfissional.profissional_id == profissional_id))
+    db.add_all(
+        JornadaProfissional(
+            profissional_id=profissional_id,
+            dia_semana=faixa.dia_semana,
+            hora_inicio=faixa.hora_inicio,
+            hora_fim=faixa.hora_fim,
+        )
+        for faixa in ordenadas
+    )
+    await db.commit()
+    return await _resposta_jornada(db, profissional_id)
+
+# --- Estatísticas da agenda (Gestão) ---
+# Leem apenas o rollup diário (agenda_estatisticas_diarias), nunca os agendamentos
+
+MAX_DIAS_ESTATISTICAS = 366
+
+
+def _periodo_estatisticas(current_user: Usuario, inicio: Optional[date], fim: Optional[date]) -> tuple[date, date]:
+    if current_user.role != "GESTOR":
+        raise HTTPException(status_code=403, detail="Acesso restrito a gestores.")
+    fim = fim or datetime.now(timezone.utc).date()
+    inicio = inicio or fim - timedelta(days=29)
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="Período inválido (início após o fim).")
+    if (fim - inicio).days >= MAX_DIAS_ESTATISTICAS:
+        raise HTTPException(status_code=400, detail=f"Período maior que {MAX_DIAS_ESTATISTICAS} dias.")
+    return inicio, fim
+
+
+@agendamento_router.get("/agenda/estatisticas", response_model=EstatisticasAgendaResponse)
+async def get_estatisticas_agenda(
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Totais e série diária de faltas, cancelamentos, utilização e antecedência (padrão: últimos 30 dias)."""
+    inicio, fim = _periodo_estatisticas(current_user, inicio, fim)
+    result = await db.execute(
+        select(EstatisticaAgendaDiaria.dia, *estatisticas.somas())
+        .where(estatisticas.filtro_periodo(inicio, fim))
+        .group_by(EstatisticaAgendaDiaria.dia)
+        .order_by(EstatisticaAgendaDiaria.dia)
+    )
+    por_dia = [row._asdict() for row in result.all()]
+    totais = {coluna: sum(d[coluna] for d in por_dia) for coluna in estatisticas.CONTADORES}
+    return {
+        "inicio": inicio,
+        "fim": fim,
+        "totais": estatisticas.indicadores(totais),
+        "por_dia": [{"dia": d["dia"], **estatisticas.indicadores(d)} for d in por_dia],
+    }
+
+
+@agendamento_router.get("/agenda/estatisticas/profissionais", response_model=List[EstatisticasProfissional])
+async def get_estatisticas_por_profissional(
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Indicadores da agenda por profissional no período."""
+    inicio, fim = _periodo_estatisticas(current_user, inicio, fim)
+    result = await db.execute(
+        select(EstatisticaAgendaDiaria.profissional_id, Usuario.nome, ProfissionalUbs.cargo, *estatisticas.somas())
+        .join(ProfissionalUbs, ProfissionalUbs.id == EstatisticaAgendaDiaria.profissional_id)
+        .join(Usuario, Usuario.id == ProfissionalUbs.usuario_id)
+        .where(estatisticas.filtro_periodo(inicio, fim))
+        .group_by(EstatisticaAgendaDiaria.profissional_id, Usuario.nome, ProfissionalUbs.cargo)
+        .order_by(Usuario.nome)
+    )
+    return [
+        {
+            "profissional_id": row.profissional_id,
+            "nome": row.nome,
+            "cargo": row.cargo,
+            **estatisticas.indicadores(row._asdict()),
+        }
+        for row in result.all()
+    ]
+
+
+@agendamento_router.get("/agenda/estatisticas/cargos", response_model=List[EstatisticasCargo])
+async def get_estatisticas_por_cargo(
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Indicadores da agenda por cargo no período."""
+    inicio, fim = _periodo_estatisticas(current_user, inicio, fim)
+    result = await db.execute(
+        select(ProfissionalUbs.cargo, *estatisticas.somas())
+        .join(ProfissionalUbs, ProfissionalUbs.id == EstatisticaAgendaDiaria.profissional_id)
+        .where(estatisticas.filtro_periodo(inicio, fim))
+        .group_by(ProfissionalUbs.cargo)
+        .order_by(ProfissionalUbs.cargo)
+    )
+    return [{"cargo": row.cargo, **estatisticas.indicadores(row._asdict())} for row in result.all()]
+
+# --- Eventos em tempo real (SSE) ---
+
+async def _abrir_stream_agenda(request: Request, canais: list[str], db: AsyncSession) -> StreamingResponse:
+    # Assina antes de buscar o histórico para não perder eventos no intervalo
+    assinatura = broker.subscribe(canais)
+    try:
+        ultimo_id = parse_last_event_id(request)
+        pendentes = await eventos_desde(db, canais, ultimo_id) if ultimo_id else []
+    except Exception:
+        broker.unsubscribe(assinatura)
+        raise
+    return StreamingResponse(
+        stream_eventos(request, assinatura, pendentes),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+async def _usuario_agenda_stream(request: Request, token: Optional[str], db: AsyncSession) -> Usuario:
+    # EventSource não envia headers: aceita o token também pela query string
+    usuario = await get_user_from_request_token(request, token, db)
+    if usuario.role not in AGENDA_VIEW_ROLES:
+        raise HTTPException(status_code=403, detail="Acesso restrito a profissionais.")
+    return usuario
+
+
+@agendamento_router.get("/agenda/profissional/{profissional_id}/eventos")
+async def stream_agenda_profissional(
+    profissional_id: int,
+    request: Request,
+    token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream SSE com criações, alterações, cancelamentos e bloqueios da agenda do profissional."""
+    await _usuario_agenda_stream(request, token, db)
+    if not await db.get(ProfissionalUbs, profissional_id):
+        raise HTTPException(status_code=404, detail="Profissional não encontrado.")
+    return await _abrir_stream_agenda(request, [canal_profissional(profissional_id)], db)
+
+
+@agendamento_router.get("/agenda/ubs/{ubs_id}/eventos")
+async def stream_agenda_ubs(
+    ubs_id: int,
+    request: Request,
+    token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream SSE com os eventos de agenda de todos os profissionais da UBS."""
+    await _usuario_agenda_stream(request, token, db)
+    ubs = await db.get(UBS, ubs_id)
+    if not ubs or ubs.is_deleted:
+        raise HTTPException(status_code=404, detail="UBS não encontrada")
+    return await _abrir_stream_agenda(request, [CANAL_AGENDA], db)
+
 # --- Bloqueios de Agenda ---
 
 @agendamento_router.post("/agenda/bloqueios", response_model=BloqueioAgendaResponse)
@@ -282,15 +654,18 @@ async def criar_bloqueio(
     )
     
     db.add(novo_bloqueio)
+    await db.flush()
+    evento = await registrar_evento_bloqueio(db, BLOQUEIO_CRIADO, novo_bloqueio)
     await db.commit()
     await db.refresh(novo_bloqueio)
+    publicar_local([evento])
     return BloqueioAgendaResponse.from_orm(novo_bloqueio)
 
 @agendamento_router.get("/agenda/bloqueios", response_model=List[BloqueioAgendaResponse])
 async def listar_meus_bloqueios(
     profissional_id: Optional[int] = None,
     current_user: Usuario = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Lista bloqueios.
@@ -330,8 +705,10 @@ async def deletar_bloqueio(
 
     # Se for Gestor, permite excluir qualquer bloqueio
     if current_user.role == "GESTOR":
+        evento = await registrar_evento_bloqueio(db, BLOQUEIO_REMOVIDO, bloqueio)
         await db.delete(bloqueio)
         await db.commit()
+        publicar_local([evento])
         return None
 
     # Se não for Gestor, verifica se é o dono do bloqueio (Profissional)
@@ -345,13 +722,15 @@ async def deletar_bloqueio(
     if bloqueio.profissional_id != me_profissional.id:
         raise HTTPException(status_code=403, detail="Você não pode excluir este bloqueio.")
         
+    evento = await registrar_evento_bloqueio(db, BLOQUEIO_REMOVIDO, bloqueio)
     await db.delete(bloqueio)
     await db.commit()
+    publicar_local([evento])
     return None
 
 @agendamento_router.get("/agendamentos/especialidades", response_model=List[str])
 async def list_especialidades(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """Lista especialidades (cargos) ativas para agendamento."""
@@ -363,7 +742,7 @@ async def list_especialidades(
 @agendamento_router.get("/agendamentos/profissionais", response_model=List[dict])
 async def list_profissionais_ativos(
     cargo: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """Lista profissionais para agendamento."""
@@ -380,3 +759,44 @@ async def list_profissionais_ativos(
         })
     return profissionais
 
+
+
+@agendamento_router.get("/agendamentos/disponibilidade", response_model=List[HorarioDisponivel])
+async def buscar_disponibilidade(
+    cargo: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limite: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Primeiros horários livres entre todos os profissionais ativos do cargo.
+    Período padrão: de agora até o fim da janela de duas semanas.
+    """
+    if any(d is not None and d.tzinfo is None for d in (start, end)):
+        raise HTTPException(status_code=400, detail="Informe o fuso horário em start/end.")
+    now_utc = datetime.now(timezone.utc)
+    limite_janela = now_utc + timedelta(days=14)
+    inicio = max(start or now_utc, now_utc)
+    fim = min(end or limite_janela, limite_janela)
+    if fim <= inicio:
+        raise HTTPException(status_code=400, detail="Período inválido (fora da janela de duas semanas).")
+
+    result = await db.execute(
+        select(ProfissionalUbs.id, Usuario.nome)
+        .join(Usuario, ProfissionalUbs.usuario_id == Usuario.id)
+        .where(ProfissionalUbs.ativo == True, ProfissionalUbs.cargo == cargo)
+    )
+    nomes = dict(result.all())
+    horarios = await proximos_horarios(db, list(nomes), inicio, fim, limite)
+    return [
+        HorarioDisponivel(
+            profissional_id=h.profissional_id,
+            nome_profissional=nomes[h.profissional_id],
+            cargo=cargo,
+            data_hora=h.data_hora,
+            data_hora_fim=h.data_hora_fim,
+        )
+        for h in horarios
+    ]
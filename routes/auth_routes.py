@@ -11,12 +11,19 @@ from database import get_db
 from models.auth_models import Usuario, ProfissionalUbs, LoginAttempt, ProfessionalRequest, Cargo
 from utils.jwt_handler import create_access_token
 from utils.cpf_validator import validate_cpf
+from utils.rate_limit import RATE_LIMIT_ENABLED
+from services.notificacoes.contadores import (
+    BOAS_VINDAS_PENDENTES,
+    SOLICITACOES_PROFISSIONAIS,
+    registrar_delta,
+)
+from services.realtime.outbox import publicar_local
 from utils.deps import get_current_active_user, get_current_gestor_user
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, enabled=RATE_LIMIT_ENABLED)
 
 # Usa pbkdf2_sha256 para evitar dependência direta do backend bcrypt
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
@@ -293,8 +300,10 @@ async def register_user(
         welcome_email_sent=False,
     )
     db.add(usuario)
+    evento = await registrar_delta(db, BOAS_VINDAS_PENDENTES, 1)
     await db.commit()
     await db.refresh(usuario)
+    publicar_local([evento])
 
     return UsuarioOut(
         id=usuario.id,
@@ -337,8 +346,10 @@ async def create_acs_user(
         welcome_email_sent=False,
     )
     db.add(usuario)
+    evento = await registrar_delta(db, BOAS_VINDAS_PENDENTES, 1)
     await db.commit()
     await db.refresh(usuario)
+    publicar_local([evento])
 
     return UsuarioOut(
         id=usuario.id,
@@ -491,8 +502,10 @@ async def create_professional_request(
             status="PENDING",
         )
         db.add(solicitacao)
+        evento = await registrar_delta(db, SOLICITACOES_PROFISSIONAIS, 1)
         await db.commit()
         await db.refresh(solicitacao)
+        publicar_local([evento])
         return solicitacao
 
     # Reenvio após rejeição
@@ -503,8 +516,10 @@ async def create_professional_request(
     existente.reviewed_at = None
     existente.reviewed_by_user_id = None
     existente.submitted_at = datetime.utcnow()
+    evento = await registrar_delta(db, SOLICITACOES_PROFISSIONAIS, 1)
     await db.commit()
     await db.refresh(existente)
+    publicar_local([evento])
     return existente
 
 
@@ -611,7 +626,9 @@ async def approve_professional_request(
     solicitacao.reviewed_by_user_id = current_user.id
     solicitacao.rejection_reason = None
 
+    evento = await registrar_delta(db, SOLICITACOES_PROFISSIONAIS, -1)
     await db.commit()
+    publicar_local([evento])
     return {"message": "Solicitação aprovada", "role": usuario.role}
 
 
@@ -634,7 +651,9 @@ async def reject_professional_request(
     solicitacao.reviewed_by_user_id = current_user.id
     solicitacao.rejection_reason = payload.rejection_reason
 
+    evento = await registrar_delta(db, SOLICITACOES_PROFISSIONAIS, -1)
     await db.commit()
+    publicar_local([evento])
     return {"message": "Solicitação reprovada"}
 
 
@@ -672,7 +691,11 @@ async def confirm_welcome_email_sent(
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
         
+    eventos = []
+    if not usuario.welcome_email_sent and usuario.ativo:
+        eventos.append(await registrar_delta(db, BOAS_VINDAS_PENDENTES, -1))
     usuario.welcome_email_sent = True
     await db.commit()
+    publicar_local(eventos)
     
     return {"message": "Status de boas-vindas atualizado"}
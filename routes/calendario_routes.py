@@ -0,0 +1,320 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_
+
+from database import get_db, get_read_db
+from models.agendamento_models import Agendamento, BloqueioAgenda, StatusAgendamento
+from models.auth_models import Usuario, ProfissionalUbs
+from models.cronograma_models import CronogramaEvent
+from models.diagnostico_models import UBS
+from schemas.calendario_schemas import CalendarioFeedsOut
+from services.calendario.ics import (
+    UID_DOMAIN,
+    CalendarEvent,
+    as_utc,
+    expand_occurrences,
+    iter_calendar,
+)
+from utils.deps import (
+    CALENDAR_TOKEN_SCOPE,
+    get_current_active_user,
+    get_user_from_request_token,
+)
+from utils.http_cache import format_http_date, make_etag, not_modified
+from utils.jwt_handler import create_access_token
+
+calendario_router = APIRouter(prefix="/calendario", tags=["calendario"])
+
+FEED_ROLES = {"GESTOR", "PROFISSIONAL"}
+
+JANELA_PASSADO = timedelta(days=30)
+JANELA_FUTURO = timedelta(days=180)
+DURACAO_CONSULTA = timedelta(minutes=30)
+VALIDADE_TOKEN_FEED = timedelta(days=180)
+
+_STATUS_ICS = {
+    StatusAgendamento.CANCELADO.value: "CANCELLED",
+}
+
+# Versão de cada feed vista por este processo: (fingerprint, momento em que mudou).
+# Usada como Last-Modified, pois exclusões não aparecem em max(updated_at).
+_versoes_feed: dict[tuple, tuple[tuple, datetime]] = {}
+_MAX_VERSOES_FEED = 1024
+
+
+def _ensure_role(usuario: Usuario) -> None:
+    role = (usuario.role or "USER").upper()
+    if role not in FEED_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito")
+
+
+async def _feed_user(request: Request, token: Optional[str], db: AsyncSession) -> Usuario:
+    usuario = await get_user_from_request_token(request, token, db, scopes=(None, CALENDAR_TOKEN_SCOPE))
+    _ensure_role(usuario)
+    return usuario
+
+
+def _janela(agora: datetime) -> tuple[datetime, datetime]:
+    # Janela alinhada ao dia para que o fingerprint mude no máximo uma vez por dia
+    hoje = agora.replace(hour=0, minute=0, second=0, microsecond=0)
+    return hoje - JANELA_PASSADO, hoje + JANELA_FUTURO
+
+
+def _last_modified(chave: tuple, fingerprint: tuple) -> datetime:
+    agora = datetime.now(timezone.utc).replace(microsecond=0)
+    anterior = _versoes_feed.get(chave)
+    if anterior is not None:
+        if anterior[0] == fingerprint:
+            return anterior[1]
+        # Mudanças no mesmo segundo ainda precisam invalidar If-Modified-Since
+        agora = max(agora, anterior[1] + timedelta(seconds=1))
+    if len(_versoes_feed) >= _MAX_VERSOES_FEED:
+        _versoes_feed.clear()
+    _versoes_feed[chave] = (fingerprint, agora)
+    return agora
+
+
+def _ics_response(
+    request: Request,
+    chave: tuple,
+    fingerprint: tuple,
+) -> tuple[Optional[Response], dict]:
+    etag = make_etag(*chave, *fingerprint)
+    last_modified = _last_modified(chave, fingerprint)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_http_date(last_modified),
+        "Cache-Control": "private, no-cache",
+    }
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers), headers
+    return None, headers
+
+
+@calendario_router.get("/feeds", response_model=CalendarioFeedsOut)
+async def obter_feeds(
+    current_user: Usuario = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Gera um token de assinatura e as URLs dos feeds ICS do usuário."""
+    _ensure_role(current_user)
+
+    expira_em = datetime.now(timezone.utc) + VALIDADE_TOKEN_FEED
+    token = create_access_token(
+        {"sub": str(current_user.id), "scope": CALENDAR_TOKEN_SCOPE},
+        expires_delta=VALIDADE_TOKEN_FEED,
+    )
+
+    profissional = (
+        await db.execute(
+            select(ProfissionalUbs.id).where(
+                ProfissionalUbs.usuario_id == current_user.id,
+                ProfissionalUbs.ativo.is_(True),
+            )
+        )
+    ).scalars().first()
+    ubs_ids = (
+        await db.execute(select(UBS.id).where(UBS.is_deleted.is_(False)).order_by(UBS.id))
+    ).scalars().all()
+
+    return CalendarioFeedsOut(
+        token=token,
+        expira_em=expira_em,
+        profissional_url=(
+            f"/api/calendario/profissional/{profissional}.ics?token={token}" if profissional else None
+        ),
+        ubs_urls=[f"/api/calendario/ubs/{ubs_id}.ics?token={token}" for ubs_id in ubs_ids],
+    )
+
+
+def _eventos_profissional(agendamentos, bloqueios) -> Iterator[CalendarEvent]:
+    for ag in agendamentos:
+        inicio = as_utc(ag.data_hora)
+        # Dados do paciente não são enviados a calendários de terceiros
+        yield CalendarEvent(
+            uid=f"agendamento-{ag.id}@{UID_DOMAIN}",
+            inicio=inicio,
+            fim=inicio + DURACAO_CONSULTA,
+            resumo="Consulta agendada",
+            descricao=f"Status: {ag.status}",
+            status=_STATUS_ICS.get(ag.status, "CONFIRMED"),
+            modificado_em=as_utc(ag.updated_at or ag.created_at) if (ag.updated_at or ag.created_at) else None,
+        )
+    for bl in bloqueios:
+        yield CalendarEvent(
+            uid=f"bloqueio-{bl.id}@{UID_DOMAIN}",
+            inicio=as_utc(bl.data_inicio),
+            fim=as_utc(bl.data_fim),
+            resumo="Agenda bloqueada",
+            descricao=bl.motivo,
+            modificado_em=as_utc(bl.created_at) if bl.created_at else None,
+        )
+
+
+@calendario_router.get("/profissional/{profissional_id}.ics")
+async def feed_profissional(
+    profissional_id: int,
+    request: Request,
+    token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Feed iCalendar com as consultas e bloqueios de um profissional."""
+    await _feed_user(request, token, db)
+
+    profissional = await db.get(ProfissionalUbs, profissional_id)
+    if not profissional:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profissional não encontrado")
+
+    janela_inicio, janela_fim = _janela(datetime.now(timezone.utc))
+    filtro_agendamentos = and_(
+        Agendamento.profissional_id == profissional_id,
+        Agendamento.data_hora >= janela_inicio,
+        Agendamento.data_hora <= janela_fim,
+    )
+    filtro_bloqueios = and_(
+        BloqueioAgenda.profissional_id == profissional_id,
+        BloqueioAgenda.data_fim >= janela_inicio,
+        BloqueioAgenda.data_inicio <= janela_fim,
+    )
+
+    # Validadores calculados com uma consulta agregada, antes de carregar eventos
+    versao = (
+        await db.execute(
+            select(
+                select(func.count(Agendamento.id)).where(filtro_agendamentos).scalar_subquery(),
+                select(func.max(func.coalesce(Agendamento.updated_at, Agendamento.created_at)))
+                .where(filtro_agendamentos)
+                .scalar_subquery(),
+                select(func.count(BloqueioAgenda.id)).where(filtro_bloqueios).scalar_subquery(),
+                select(func.max(BloqueioAgenda.created_at)).where(filtro_bloqueios).scalar_subquery(),
+            )
+        )
+    ).one()
+    fingerprint = (janela_inicio.date().isoformat(), *(str(v) for v in versao))
+    resposta_304, headers = _ics_response(request, ("profissional", profissional_id), fingerprint)
+    if resposta_304 is not None:
+        return resposta_304
+
+    agendamentos = (
+        await db.execute(
+            select(
+                Agendamento.id,
+                Agendamento.data_hora,
+                Agendamento.status,
+                Agendamento.created_at,
+                Agendamento.updated_at,
+            )
+            .where(filtro_agendamentos)
+            .order_by(Agendamento.data_hora)
+        )
+    ).all()
+    bloqueios = (
+        await db.execute(
+            select(
+                BloqueioAgenda.id,
+                BloqueioAgenda.data_inicio,
+                BloqueioAgenda.data_fim,
+                BloqueioAgenda.motivo,
+                BloqueioAgenda.created_at,
+            )
+            .where(filtro_bloqueios)
+            .order_by(BloqueioAgenda.data_inicio)
+        )
+    ).all()
+
+    return StreamingResponse(
+        iter_calendar("Agenda do profissional", _eventos_profissional(agendamentos, bloqueios)),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers,
+    )
+
+
+def _eventos_cronograma(eventos, janela_inicio: datetime, janela_fim: datetime) -> Iterator[CalendarEvent]:
+    for ev in eventos:
+        inicio = as_utc(ev.inicio)
+        fim = as_utc(ev.fim) if ev.fim else None
+        modificado_em = ev.updated_at or ev.created_at
+        ocorrencias = expand_occurrences(
+            inicio,
+            fim,
+            ev.recorrencia,
+            ev.recorrencia_intervalo,
+            ev.recorrencia_fim,
+            janela_inicio,
+            janela_fim,
+        )
+        for ocorrencia_inicio, ocorrencia_fim in ocorrencias:
+            yield CalendarEvent(
+                uid=f"cronograma-{ev.id}-{ocorrencia_inicio:%Y%m%d}@{UID_DOMAIN}",
+                inicio=ocorrencia_inicio,
+                fim=ocorrencia_fim,
+                resumo=ev.titulo,
+                descricao=ev.observacoes,
+                local=ev.local,
+                dia_inteiro=bool(ev.dia_inteiro),
+                modificado_em=as_utc(modificado_em) if modificado_em else None,
+            )
+
+
+@calendario_router.get("/ubs/{ubs_id}.ics")
+async def feed_ubs(
+    ubs_id: int,
+    request: Request,
+    token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Feed iCalendar do cronograma da UBS, com as recorrências expandidas."""
+    await _feed_user(request, token, db)
+
+    ubs = (
+        await db.execute(select(UBS.nome_ubs).where(UBS.id == ubs_id, UBS.is_deleted.is_(False)))
+    ).scalar_one_or_none()
+    if ubs is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="UBS não encontrada")
+
+    janela_inicio, janela_fim = _janela(datetime.now(timezone.utc))
+    filtro = and_(CronogramaEvent.ubs_id == ubs_id, CronogramaEvent.inicio <= janela_fim)
+
+    versao = (
+        await db.execute(
+            select(
+                func.count(CronogramaEvent.id),
+                func.max(func.coalesce(CronogramaEvent.updated_at, CronogramaEvent.created_at)),
+            ).where(filtro)
+        )
+    ).one()
+    fingerprint = (janela_inicio.date().isoformat(), *(str(v) for v in versao))
+    resposta_304, headers = _ics_response(request, ("ubs", ubs_id), fingerprint)
+    if resposta_304 is not None:
+        return resposta_304
+
+    eventos = (
+        await db.execute(
+            select(
+                CronogramaEvent.id,
+                CronogramaEvent.titulo,
+                CronogramaEvent.local,
+                CronogramaEvent.inicio,
+                CronogramaEvent.fim,
+                CronogramaEvent.dia_inteiro,
+                CronogramaEvent.observacoes,
+                CronogramaEvent.recorrencia,
+                CronogramaEvent.recorrencia_intervalo,
+                CronogramaEvent.recorrencia_fim,
+                CronogramaEvent.created_at,
+                CronogramaEvent.updated_at,
+            )
+            .where(filtro)
+            .order_by(CronogramaEvent.inicio)
+        )
+    ).all()
+
+    return StreamingResponse(
+        iter_calendar(f"Cronograma - {ubs}", _eventos_cronograma(eventos, janela_inicio, janela_fim)),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers,
+    )
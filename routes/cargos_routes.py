@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
-from database import get_db
+from database import get_db, get_read_db
 from models.auth_models import Cargo, Usuario
 from utils.deps import get_current_active_user, get_current_gestor_user
 
@@ -12,15 +13,22 @@ cargos_router = APIRouter(prefix="/cargos", tags=["cargos"])
 
 class CargoCreate(BaseModel):
     nome: str = Field(..., min_length=2, max_length=255)
+    # Duração das consultas do cargo na agenda (vazio = padrão do sistema)
+    duracao_padrao_minutos: Optional[int] = Field(None, ge=5, le=480)
+
+
+class CargoUpdate(BaseModel):
+    duracao_padrao_minutos: Optional[int] = Field(None, ge=5, le=480)
 
 
 class CargoOut(BaseModel):
     id: int
     nome: str
+    duracao_padrao_minutos: Optional[int] = None
 
 
 @cargos_router.get("", response_model=list[CargoOut])
-async def listar_cargos(db: AsyncSession = Depends(get_db)):
+async def listar_cargos(db: AsyncSession = Depends(get_read_db)):
     """Lista todos os cargos disponíveis (público)."""
     resultado = await db.execute(select(Cargo).order_by(Cargo.nome))
     return resultado.scalars().all()
@@ -37,13 +45,31 @@ async def criar_cargo(
     if resultado.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Cargo já existe.")
 
-    cargo = Cargo(nome=payload.nome)
+    cargo = Cargo(nome=payload.nome, duracao_padrao_minutos=payload.duracao_padrao_minutos)
     db.add(cargo)
     await db.commit()
     await db.refresh(cargo)
     return cargo
 
 
+@cargos_router.patch("/{cargo_id}", response_model=CargoOut)
+async def atualizar_cargo(
+    cargo_id: int,
+    payload: CargoUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Usuario = Depends(get_current_gestor_user),
+):
+    """Altera a duração padrão das consultas do cargo (somente GESTOR). Vale para novos agendamentos."""
+    cargo = await db.get(Cargo, cargo_id)
+    if not cargo:
+        raise HTTPException(status_code=404, detail="Cargo não encontrado.")
+
+    cargo.duracao_padrao_minutos = payload.duracao_padrao_minutos
+    await db.commit()
+    await db.refresh(cargo)
+    return cargo
+
+
 @cargos_router.delete("/{cargo_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remover_cargo(
     cargo_id: int,
@@ -4,12 +4,13 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from database import get_db
+from database import get_db, get_read_db
 from models.cronograma_models import CronogramaEvent, CronogramaTipo, RecurrenceType
 from models.diagnostico_models import UBS
 from models.auth_models import Usuario
 from schemas.cronograma_schemas import CronogramaCreate, CronogramaUpdate, CronogramaOut
 from utils.deps import get_current_active_user
+from utils import consultas_frequentes
 
 cronograma_router = APIRouter(prefix="/cronograma", tags=["cronograma"])
 
@@ -41,9 +42,7 @@ def _normalize_all_day(inicio: datetime, fim: datetime | None) -> tuple[datetime
 
 
 async def _get_ubs_or_404(ubs_id: int, db: AsyncSession) -> UBS:
-    resultado = await db.execute(
-        select(UBS).where(UBS.id == ubs_id, UBS.is_deleted.is_(False))
-    )
+    resultado = await db.execute(consultas_frequentes.ubs_ativa(ubs_id))
     ubs = resultado.scalar_one_or_none()
     if not ubs:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="UBS não encontrada")
@@ -55,7 +54,7 @@ async def list_events(
     ubs_id: int = Query(..., ge=1),
     start: datetime | None = Query(None),
     end: datetime | None = Query(None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
     _ensure_role(current_user)
@@ -1,16 +1,18 @@
-from typing import List, Optional
+from typing import IO, List, Optional
 from pathlib import Path
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
 import logging
 from fastapi.responses import Response as FastAPIResponse
 from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, insert, update, delete, or_
+from sqlalchemy.orm import selectinload, aliased
 
-from database import get_db
+from database import get_db, get_read_db
 from models.diagnostico_models import (
     UBS,
     Service,
@@ -36,6 +38,10 @@ from schemas.diagnostico_schemas import (
     IndicatorCreate,
     IndicatorUpdate,
     IndicatorOut,
+    IndicatorSeriesOut,
+    IndicatorSeriesPoint,
+    IndicatorImportErro,
+    IndicatorImportOut,
     ProfessionalGroupCreate,
     ProfessionalGroupUpdate,
     ProfessionalGroupOut,
@@ -49,6 +55,12 @@ from schemas.diagnostico_schemas import (
     UBSProblemCreate,
     UBSProblemUpdate,
     UBSProblemOut,
+    UBSProblemTreeOut,
+    UBSPlanBatchRequest,
+    UBSPlanBatchOut,
+    UBSPlanOperation,
+    PlanOperationType,
+    PlanEntity,
     UBSInterventionCreate,
     UBSInterventionUpdate,
     UBSInterventionOut,
@@ -63,6 +75,10 @@ from schemas.diagnostico_schemas import (
     UBSSubmitRequest,
 )
 from utils.deps import get_current_professional_user, get_current_active_user
+from utils.http_cache import etag_matches, make_etag
+from utils.metrics import PDF_RENDER, observar_upload
+from utils.planilha_utils import PlanilhaError, iter_csv_rows, iter_xlsx_rows, parse_numero
+from utils import consultas_frequentes
 
 
 diagnostico_router = APIRouter(prefix="/ubs", tags=["diagnostico"])
@@ -92,12 +108,7 @@ async def _get_ubs_or_404(
     current_user: Usuario,
     db: AsyncSession,
 ) -> UBS:
-    resultado = await db.execute(
-        select(UBS).where(
-            UBS.id == ubs_id,
-            UBS.is_deleted.is_(False),
-        )
-    )
+    resultado = await db.execute(consultas_frequentes.ubs_ativa(ubs_id))
     ubs = resultado.scalar_one_or_none()
     if not ubs:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="UBS não encontrada")
@@ -175,7 +186,7 @@ async def update_ubs(
 
 @diagnostico_router.get("", response_model=PaginatedUBS)
 async def list_ubs_reports(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_active_user),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -243,7 +254,7 @@ async def delete_ubs_report(
 @diagnostico_router.get("/{ubs_id}/professionals", response_model=List[ProfessionalGroupOut])
 async def list_professional_groups(
     ubs_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     ubs = await _get_ubs_or_404(ubs_id, current_user, db)
@@ -286,7 +297,7 @@ async def create_professional_group(
 @diagnostico_router.get("/professionals/{group_id}", response_model=ProfessionalGroupOut)
 async def get_professional_group(
     group_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     resultado = await db.execute(
@@ -356,7 +367,7 @@ async def delete_professional_group(
 @diagnostico_router.get("/{ubs_id}/territory", response_model=TerritoryProfileOut)
 async def get_territory_profile(
     ubs_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     ubs = await _get_ubs_or_404(ubs_id, current_user, db)
@@ -416,7 +427,7 @@ async def upsert_territory_profile(
 @diagnostico_router.get("/{ubs_id}/needs", response_model=UBSNeedsOut)
 async def get_ubs_needs(
     ubs_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     ubs = await _get_ubs_or_404(ubs_id, current_user, db)
@@ -470,10 +481,43 @@ async def upsert_ubs_needs(
 # ----------------------- Indicadores epidemiológicos -----------------------
 
 
+def _indicator_to_out(ind: Indicator) -> IndicatorOut:
+    return IndicatorOut(
+        id=ind.id,
+        ubs_id=ind.ubs_id,
+        nome_indicador=ind.nome_indicador,
+        valor=float(ind.valor),
+        meta=float(ind.meta) if ind.meta is not None else None,
+        tipo_valor=ind.tipo_valor,
+        periodo_referencia=ind.periodo_referencia,
+        observacoes=ind.observacoes,
+        created_at=ind.created_at,
+        updated_at=ind.updated_at,
+    )
+
+
+async def _latest_indicators(ubs_id: int, db: AsyncSession) -> List[Indicator]:
+    """Último registro de cada indicador, resolvido no banco via ROW_NUMBER()."""
+    ordem = (
+        func.row_number()
+        .over(
+            partition_by=Indicator.nome_indicador,
+            order_by=(Indicator.created_at.desc(), Indicator.id.desc()),
+        )
+        .label("ordem")
+    )
+    subconsulta = select(Indicator, ordem).where(Indicator.ubs_id == ubs_id).subquery()
+    ultimo = aliased(Indicator, subconsulta)
+    resultado = await db.execute(
+        select(ultimo).where(subconsulta.c.ordem == 1).order_by(ultimo.nome_indicador)
+    )
+    return list(resultado.scalars().all())
+
+
 @diagnostico_router.get("/{ubs_id}/indicators", response_model=List[IndicatorOut])
 async def list_ubs_indicators(
     ubs_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     ubs = await _get_ubs_or_404(ubs_id, current_user, db)
@@ -483,21 +527,53 @@ async def list_ubs_indicators(
         .order_by(Indicator.nome_indicador, Indicator.created_at.desc())
     )
     indicators = resultado.scalars().all()
-    return [
-        IndicatorOut(
-            id=ind.id,
-            ubs_id=ind.ubs_id,
-            nome_indicador=ind.nome_indicador,
-            valor=float(ind.valor),
-            meta=float(ind.meta) if ind.meta is not None else None,
-            tipo_valor=ind.tipo_valor,
-            periodo_referencia=ind.periodo_referencia,
-            observacoes=ind.observacoes,
-            created_at=ind.created_at,
-            updated_at=ind.updated_at,
+    return [_indicator_to_out(ind) for ind in indicators]
+
+
+@diagnostico_router.get("/{ubs_id}/indicators/{nome_indicador}/series", response_model=IndicatorSeriesOut)
+async def get_indicator_series(
+    ubs_id: int,
+    nome_indicador: str,
+    limite: int = Query(120, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Usuario = Depends(get_current_professional_user),
+):
+    """Histórico de um indicador (mais antigo → mais recente) para gráficos de tendência."""
+    ubs = await _get_ubs_or_404(ubs_id, current_user, db)
+
+    # Busca os N registros mais recentes pelo índice (ubs_id, nome_indicador, created_at)
+    resultado = await db.execute(
+        select(
+            Indicator.id,
+            Indicator.tipo_valor,
+            Indicator.periodo_referencia,
+            Indicator.valor,
+            Indicator.meta,
+            Indicator.created_at,
         )
-        for ind in indicators
+        .where(Indicator.ubs_id == ubs.id, Indicator.nome_indicador == nome_indicador)
+        .order_by(Indicator.created_at.desc(), Indicator.id.desc())
+        .limit(limite)
+    )
+    linhas = resultado.all()
+    if not linhas:
+        raise HTTPException(status_code=404, detail="Indicador não encontrado")
+
+    pontos = [
+        IndicatorSeriesPoint(
+            id=linha.id,
+            periodo_referencia=linha.periodo_referencia,
+            valor=float(linha.valor),
+            meta=float(linha.meta) if linha.meta is not None else None,
+            created_at=linha.created_at,
+        )
+        for linha in reversed(linhas)
     ]
+    return IndicatorSeriesOut(
+        nome_indicador=nome_indicador,
+        tipo_valor=linhas[0].tipo_valor,
+        pontos=pontos,
+    )
 
 
 @diagnostico_router.post("/{ubs_id}/indicators", response_model=IndicatorOut, status_code=status.HTTP_201_CREATED)
@@ -525,6 +601,166 @@ async def create_ubs_indicator(
     return indicador
 
 
+# Cabeçalhos aceitos nas planilhas (já normalizados) -> campo do indicador
+_COLUNAS_INDICADOR = {
+    "nome_indicador": "nome_indicador",
+    "indicador": "nome_indicador",
+    "nome": "nome_indicador",
+    "valor": "valor",
+    "resultado": "valor",
+    "meta": "meta",
+    "tipo_valor": "tipo_valor",
+    "tipo": "tipo_valor",
+    "periodo_referencia": "periodo_referencia",
+    "periodo_de_referencia": "periodo_referencia",
+    "periodo": "periodo_referencia",
+    "competencia": "periodo_referencia",
+    "quadrimestre": "periodo_referencia",
+    "observacoes": "observacoes",
+    "observacao": "observacoes",
+}
+
+_MAX_LINHAS_IMPORTACAO = 5000
+
+
+def _texto_celula(valor) -> Optional[str]:
+    if valor is None:
+        return None
+    texto = str(valor).strip()
+    return texto or None
+
+
+def _row_to_indicator(celulas: dict) -> IndicatorCreate:
+    dados: dict = {}
+    for chave, valor in celulas.items():
+        campo = _COLUNAS_INDICADOR.get(chave)
+        if campo and campo not in dados:
+            dados[campo] = valor
+
+    for campo in ("valor", "meta"):
+        dados[campo] = parse_numero(dados.get(campo))
+    for campo in ("nome_indicador", "periodo_referencia", "observacoes"):
+        dados[campo] = _texto_celula(dados.get(campo))
+    tipo_valor = _texto_celula(dados.pop("tipo_valor", None))
+    if tipo_valor:
+        dados["tipo_valor"] = tipo_valor.upper().replace(" ", "_")
+
+    # Reaproveita as regras de IndicatorBase (inclusive _validate_by_type)
+    return IndicatorCreate(**dados)
+
+
+def _motivo_validacao(exc: ValidationError) -> str:
+    partes = []
+    for erro in exc.errors():
+        campo = ".".join(str(p) for p in erro.get("loc", ()))
+        mensagem = str(erro.get("msg", "")).removeprefix("Value error, ")
+        partes.append(f"{campo}: {mensagem}" if campo else mensagem)
+    return "; ".join(partes)
+
+
+def _is_xlsx(file: UploadFile) -> bool:
+    nome = (file.filename or "").lower()
+    if nome.endswith((".xlsx", ".xlsm")):
+        return True
+    if nome.endswith((".csv", ".txt")):
+        return False
+    # Sem extensão conhecida: XLSX é um ZIP (assinatura PK)
+    inicio = file.file.read(4)
+    file.file.seek(0)
+    return inicio == b"PK\x03\x04"
+
+
+def _parse_indicadores(
+    fileobj: IO[bytes], xlsx: bool
+) -> tuple[dict[tuple[str, str], IndicatorCreate], list[IndicatorImportErro], int]:
+    """Valida a planilha linha a linha e devolve os indicadores por (nome, período)."""
+    linhas = iter_xlsx_rows(fileobj) if xlsx else iter_csv_rows(fileobj)
+    validos: dict[tuple[str, str], IndicatorCreate] = {}
+    erros: list[IndicatorImportErro] = []
+    total = 0
+    for numero, celulas in linhas:
+        total += 1
+        if total > _MAX_LINHAS_IMPORTACAO:
+            raise PlanilhaError(f"A planilha excede o limite de {_MAX_LINHAS_IMPORTACAO} linhas")
+        try:
+            indicador = _row_to_indicator(celulas)
+        except ValidationError as exc:
+            nome = next(
+                (_texto_celula(v) for k, v in celulas.items() if _COLUNAS_INDICADOR.get(k) == "nome_indicador"),
+                None,
+            )
+            erros.append(IndicatorImportErro(linha=numero, nome_indicador=nome, motivo=_motivo_validacao(exc)))
+            continue
+        except PlanilhaError as exc:
+            erros.append(IndicatorImportErro(linha=numero, motivo=str(exc)))
+            continue
+        # Linhas repetidas no mesmo arquivo: prevalece a última
+        validos[(indicador.nome_indicador, indicador.periodo_referencia)] = indicador
+    return validos, erros, total
+
+
+@diagnostico_router.post("/{ubs_id}/indicators/import", response_model=IndicatorImportOut)
+async def import_ubs_indicators(
+    ubs_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: Usuario = Depends(get_current_professional_user),
+):
+    """Importa indicadores de uma planilha CSV/XLSX (upsert por nome + período).
+
+    Nada é gravado se alguma linha for inválida; a resposta 400 lista os erros por linha.
+    """
+    ubs = await _get_ubs_or_404(ubs_id, current_user, db)
+
+    observar_upload("indicadores", file.size)
+    try:
+        xlsx = _is_xlsx(file)
+        validos, erros, total = await run_in_threadpool(_parse_indicadores, file.file, xlsx)
+    except PlanilhaError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    if erros:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "detail": "Falha na validação da planilha de indicadores",
+                "errors": [e.model_dump() for e in erros],
+            },
+        )
+    if not validos:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Planilha sem indicadores.")
+
+    # Uma única consulta para descobrir o que já existe; em caso de histórico
+    # duplicado para a mesma chave, atualiza o registro mais recente.
+    resultado = await db.execute(
+        select(Indicator.id, Indicator.nome_indicador, Indicator.periodo_referencia)
+        .where(
+            Indicator.ubs_id == ubs.id,
+            Indicator.nome_indicador.in_({nome for nome, _ in validos}),
+        )
+        .order_by(Indicator.created_at, Indicator.id)
+    )
+    existentes = {(nome, periodo): indicador_id for indicador_id, nome, periodo in resultado.all()}
+
+    novos = []
+    alterados = []
+    for chave, indicador in validos.items():
+        dados = indicador.model_dump()
+        dados["tipo_valor"] = indicador.tipo_valor.value
+        if chave in existentes:
+            alterados.append({"id": existentes[chave], "updated_by": current_user.id, **dados})
+        else:
+            novos.append({"ubs_id": ubs.id, "created_by": current_user.id, **dados})
+
+    if novos:
+        await db.execute(insert(Indicator), novos)
+    if alterados:
+        await db.execute(update(Indicator), alterados)
+    await db.commit()
+
+    return IndicatorImportOut(total=total, criados=len(novos), atualizados=len(alterados))
+
+
 @diagnostico_router.patch("/indicators/{indicator_id}", response_model=IndicatorOut)
 async def update_indicator(
     indicator_id: int,
@@ -685,7 +921,7 @@ async def submit_diagnosis(
 @diagnostico_router.get("/{ubs_id}/diagnosis", response_model=FullDiagnosisOut)
 async def get_full_diagnosis(
     ubs_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
     ubs = await _get_ubs_or_404(ubs_id, current_user, db)
@@ -695,7 +931,6 @@ async def get_full_diagnosis(
         select(UBS)
         .options(
             selectinload(UBS.services).selectinload(UBSService.service),
-            selectinload(UBS.indicators),
             selectinload(UBS.professional_groups),
             selectinload(UBS.territory_profile),
             selectinload(UBS.needs),
@@ -712,30 +947,9 @@ async def get_full_diagnosis(
     ]
     saida_servicos = UBSServicesOut(services=itens_servicos, outros_servicos=ubs_obj.outros_servicos)
 
-    # Indicadores (último valor por nome)
-
-    indicadores_ordenados = sorted(
-        ubs_obj.indicators,
-        key=lambda i: (i.nome_indicador, i.created_at or i.id),
-    )
-    ultimo_por_nome: dict[str, Indicator] = {}
-    for ind in indicadores_ordenados:
-        ultimo_por_nome[ind.nome_indicador] = ind
-
+    # Indicadores (último valor por nome, calculado no banco)
     indicators_latest: List[IndicatorOut] = [
-        IndicatorOut(
-            id=ind.id,
-            ubs_id=ind.ubs_id,
-            nome_indicador=ind.nome_indicador,
-            valor=float(ind.valor),
-            meta=float(ind.meta) if ind.meta is not None else None,
-            tipo_valor=ind.tipo_valor,
-            periodo_referencia=ind.periodo_referencia,
-            observacoes=ind.observacoes,
-            created_at=ind.created_at,
-            updated_at=ind.updated_at,
-        )
-        for ind in ultimo_por_nome.values()
+        _indicator_to_out(ind) for ind in await _latest_indicators(ubs_obj.id, db)
     ]
 
     # Grupos profissionais
@@ -781,7 +995,7 @@ async def get_full_diagnosis(
 @diagnostico_router.get("/{ubs_id}/problems", response_model=List[UBSProblemOut])
 async def list_ubs_problems(
     ubs_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     ubs = await _get_ubs_or_404(ubs_id, current_user, db)
@@ -793,6 +1007,53 @@ async def list_ubs_problems(
     return resultado.scalars().all()
 
 
+_problem_tree_adapter = TypeAdapter(List[UBSProblemTreeOut])
+
+
+def _mais_recentes_primeiro(itens):
+    return sorted(itens, key=lambda item: (item.created_at is not None, item.created_at, item.id), reverse=True)
+
+
+async def _load_problem_tree(ubs_id: int, db: AsyncSession) -> List[UBSProblemTreeOut]:
+    """Problemas → intervenções → ações da UBS em três consultas (selectinload)."""
+    resultado = await db.execute(
+        select(UBSProblem)
+        .options(
+            selectinload(UBSProblem.interventions).selectinload(UBSIntervention.actions)
+        )
+        .where(UBSProblem.ubs_id == ubs_id)
+        .order_by(UBSProblem.gut_score.desc(), UBSProblem.created_at.desc(), UBSProblem.id.desc())
+    )
+    arvore = [UBSProblemTreeOut.model_validate(p) for p in resultado.scalars().all()]
+    # Mesma ordem dos endpoints de listagem (mais recentes primeiro)
+    for problem in arvore:
+        problem.interventions = _mais_recentes_primeiro(problem.interventions)
+        for intervention in problem.interventions:
+            intervention.actions = _mais_recentes_primeiro(intervention.actions)
+    return arvore
+
+
+@diagnostico_router.get("/{ubs_id}/problems/tree", response_model=List[UBSProblemTreeOut])
+async def get_ubs_problem_tree(
+    ubs_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Usuario = Depends(get_current_professional_user),
+):
+    """Hierarquia completa do plano (problema → intervenção → ação) em uma resposta.
+
+    O ETag é derivado do conteúdo; com If-None-Match válido responde 304.
+    """
+    ubs = await _get_ubs_or_404(ubs_id, current_user, db)
+    corpo = _problem_tree_adapter.dump_json(await _load_problem_tree(ubs.id, db))
+
+    etag = make_etag(ubs.id, corpo.decode("utf-8"))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=corpo, media_type="application/json", headers=headers)
+
+
 @diagnostico_router.post(
     "/{ubs_id}/problems",
     response_model=UBSProblemOut,
@@ -884,7 +1145,7 @@ async def delete_ubs_problem(
 )
 async def list_problem_interventions(
     problem_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     problem = await _get_problem_or_404(problem_id, current_user, db)
@@ -977,7 +1238,7 @@ async def delete_intervention(
 )
 async def list_intervention_actions(
     intervention_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     intervention = await _get_intervention_or_404(intervention_id, current_user, db)
@@ -1065,13 +1326,320 @@ async def delete_intervention_action(
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+# ----------------------- Edição em lote do plano -----------------------
+
+
+_PLAN_MODELS = {
+    PlanEntity.PROBLEM: UBSProblem,
+    PlanEntity.INTERVENTION: UBSIntervention,
+    PlanEntity.ACTION: UBSInterventionAction,
+}
+_PLAN_CREATE_SCHEMAS = {
+    PlanEntity.PROBLEM: UBSProblemCreate,
+    PlanEntity.INTERVENTION: UBSInterventionCreate,
+    PlanEntity.ACTION: UBSInterventionActionCreate,
+}
+_PLAN_UPDATE_SCHEMAS = {
+    PlanEntity.PROBLEM: UBSProblemUpdate,
+    PlanEntity.INTERVENTION: UBSInterventionUpdate,
+    PlanEntity.ACTION: UBSInterventionActionUpdate,
+}
+_PLAN_PARENT = {
+    PlanEntity.INTERVENTION: (PlanEntity.PROBLEM, "problem_id"),
+    PlanEntity.ACTION: (PlanEntity.INTERVENTION, "intervention_id"),
+}
+_PLAN_NOT_FOUND = {
+    PlanEntity.PROBLEM: "Problema não encontrado",
+    PlanEntity.INTERVENTION: "Intervenção não encontrada",
+    PlanEntity.ACTION: "Ação não encontrada",
+}
+
+
+def _plan_values(payload, exclude_unset: bool) -> dict:
+    dados = payload.model_dump(exclude_unset=exclude_unset) if payload is not None else {}
+    return {k: (v.value if hasattr(v, "value") else v) for k, v in dados.items()}
+
+
+def _validate_plan_operations(
+    operacoes: List[UBSPlanOperation],
+) -> tuple[list[ErrorDetail], list[dict]]:
+    """Valida a estrutura de cada operação e os ``dados`` com os schemas de create/update."""
+    erros: list[ErrorDetail] = []
+    validadas: list[dict] = []
+    refs: dict[str, PlanEntity] = {}
+
+    for i, op in enumerate(operacoes):
+        campo = f"operacoes[{i}]"
+        if op.op == PlanOperationType.CREATE:
+            if op.id is not None:
+                erros.append(ErrorDetail(field=f"{campo}.id", message="Não informe id ao criar", code="invalid"))
+            if op.ref:
+                if op.ref in refs:
+                    erros.append(ErrorDetail(field=f"{campo}.ref", message="ref repetida no lote", code="duplicate"))
+                refs[op.ref] = op.entidade
+            if op.entidade == PlanEntity.PROBLEM and (op.parent_id is not None or op.parent_ref is not None):
+                erros.append(
+                    ErrorDetail(field=campo, message="Problemas não possuem item pai", code="invalid_parent")
+                )
+            if op.entidade in _PLAN_PARENT:
+                entidade_pai, _ = _PLAN_PARENT[op.entidade]
+                if (op.parent_id is None) == (op.parent_ref is None):
+                    erros.append(
+                        ErrorDetail(field=campo, message="Informe parent_id ou parent_ref", code="missing_parent")
+                    )
+                elif op.parent_ref is not None and refs.get(op.parent_ref) != entidade_pai:
+                    erros.append(
+                        ErrorDetail(
+                            field=f"{campo}.parent_ref",
+                            message="parent_ref deve apontar para um create anterior do lote",
+                            code="invalid_ref",
+                        )
+                    )
+            schema = _PLAN_CREATE_SCHEMAS[op.entidade]
+        else:
+            if op.id is None:
+                erros.append(ErrorDetail(field=f"{campo}.id", message="id é obrigatório", code="missing"))
+            if op.parent_id is not None or op.parent_ref is not None:
+                erros.append(
+                    ErrorDetail(field=campo, message="parent só é aceito ao criar", code="invalid_parent")
+                )
+            schema = _PLAN_UPDATE_SCHEMAS[op.entidade]
+
+        payload = None
+        if op.op != PlanOperationType.DELETE:
+            try:
+                payload = schema.model_validate(op.dados)
+            except ValidationError as exc:
+                for erro in exc.errors():
+                    caminho = ".".join(str(p) for p in erro.get("loc", ()))
+                    erros.append(
+                        ErrorDetail(
+                            field=f"{campo}.dados.{caminho}" if caminho else f"{campo}.dados",
+                            message=str(erro.get("msg", "")),
+                            code=str(erro.get("type", "invalid")),
+                        )
+                    )
+                continue
+        # Criações usam todos os campos (com defaults) para um INSERT homogêneo
+        validadas.append(
+            {"op": op, "valores": _plan_values(payload, exclude_unset=op.op != PlanOperationType.CREATE)}
+        )
+    return erros, validadas
+
+
+async def _plan_ids_owned_by_ubs(
+    ubs_id: int,
+    ids: dict[PlanEntity, set[int]],
+    db: AsyncSession,
+) -> tuple[dict[PlanEntity, set[int]], dict[PlanEntity, dict[int, int]]]:
+    """Resolve em uma única consulta quais ids do lote pertencem à UBS.
+
+    Devolve também o pai de cada intervenção e ação encontrada, para que o
+    lote confira a cadeia inteira de ancestrais contra as exclusões.
+    """
+    encontrados = {entidade: set() for entidade in PlanEntity}
+    pais: dict[PlanEntity, dict[int, int]] = {entidade: {} for entidade in _PLAN_PARENT}
+    filtros = [
+        _PLAN_MODELS[entidade].id.in_(valores)
+        for entidade, valores in ids.items()
+        if valores
+    ]
+    if not filtros:
+        return encontrados, pais
+
+    resultado = await db.execute(
+        select(UBSProblem.id, UBSIntervention.id, UBSInterventionAction.id)
+        .select_from(UBSProblem)
+        .outerjoin(UBSIntervention, UBSIntervention.problem_id == UBSProblem.id)
+        .outerjoin(UBSInterventionAction, UBSInterventionAction.intervention_id == UBSIntervention.id)
+        .where(UBSProblem.ubs_id == ubs_id, or_(*filtros))
+    )
+    for problem_id, intervention_id, action_id in resultado.all():
+        encontrados[PlanEntity.PROBLEM].add(problem_id)
+        if intervention_id is not None:
+            encontrados[PlanEntity.INTERVENTION].add(intervention_id)
+            pais[PlanEntity.INTERVENTION][intervention_id] = problem_id
+        if action_id is not None:
+            encontrados[PlanEntity.ACTION].add(action_id)
+            pais[PlanEntity.ACTION][action_id] = intervention_id
+    return encontrados, pais
+
+
+def _plan_chain_excluded(
+    entidade: PlanEntity,
+    item_id: int,
+    excluidos: dict[PlanEntity, set[int]],
+    pais: dict[PlanEntity, dict[int, int]],
+) -> bool:
+    """Indica se o item existente ou algum de seus ancestrais é excluído no lote."""
+    while item_id is not None:
+        if item_id in excluidos[entidade]:
+            return True
+        if entidade not in _PLAN_PARENT:
+            return False
+        item_id = pais[entidade].get(item_id)
+        entidade = _PLAN_PARENT[entidade][0]
+    return False
+
+
+@diagnostico_router.post("/{ubs_id}/problems/batch", response_model=UBSPlanBatchOut)
+async def batch_update_ubs_plan(
+    ubs_id: int,
+    payload: UBSPlanBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Usuario = Depends(get_current_professional_user),
+):
+    """Aplica criações, edições e exclusões de problemas, intervenções e ações
+    em uma única transação e devolve a árvore atualizada do plano."""
+    ubs = await _get_ubs_or_404(ubs_id, current_user, db)
+
+    erros, operacoes = _validate_plan_operations(payload.operacoes)
+    if erros:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "detail": "Falha na validação do lote de operações",
+                "errors": [e.model_dump() for e in erros],
+            },
+        )
+
+    # Ids existentes referenciados pelo lote (alvos e pais)
+    referenciados: dict[PlanEntity, set[int]] = {entidade: set() for entidade in PlanEntity}
+    for item in operacoes:
+        op = item["op"]
+        if op.id is not None:
+            referenciados[op.entidade].add(op.id)
+        if op.parent_id is not None:
+            referenciados[_PLAN_PARENT[op.entidade][0]].add(op.parent_id)
+
+    existentes, pais = await _plan_ids_owned_by_ubs(ubs.id, referenciados, db)
+    for entidade, valores in referenciados.items():
+        if valores - existentes[entidade]:
+            raise HTTPException(status_code=404, detail=_PLAN_NOT_FOUND[entidade])
+
+    excluidos = {entidade: set() for entidade in PlanEntity}
+    for item in operacoes:
+        if item["op"].op == PlanOperationType.DELETE:
+            excluidos[item["op"].entidade].add(item["op"].id)
+    # Exclusões cascateiam: editar ou criar sob um descendente de um item
+    # excluído no mesmo lote seria aplicado e apagado em silêncio
+    for item in operacoes:
+        op = item["op"]
+        alvo_excluido = op.op == PlanOperationType.UPDATE and _plan_chain_excluded(
+            op.entidade, op.id, excluidos, pais
+        )
+        pai_excluido = op.parent_id is not None and _plan_chain_excluded(
+            _PLAN_PARENT[op.entidade][0], op.parent_id, excluidos, pais
+        )
+        if alvo_excluido or pai_excluido:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="O lote altera ou usa como pai um item que ele mesmo exclui",
+            )
+
+    # 1) Criações: um INSERT em lote por nível, do problema até a ação
+    refs: dict[str, int] = {}
+    gut_recalcular: set[int] = set()
+    for entidade in PlanEntity:
+        criacoes = [
+            item for item in operacoes
+            if item["op"].op == PlanOperationType.CREATE and item["op"].entidade == entidade
+        ]
+        if not criacoes:
+            continue
+        linhas = []
+        for item in criacoes:
+            op = item["op"]
+            linha = dict(item["valores"])
+            if entidade == PlanEntity.PROBLEM:
+                linha["ubs_id"] = ubs.id
+            else:
+                coluna_pai = _PLAN_PARENT[entidade][1]
+                linha[coluna_pai] = op.parent_id if op.parent_id is not None else refs[op.parent_ref]
+            linhas.append(linha)
+        modelo = _PLAN_MODELS[entidade]
+        resultado = await db.execute(
+            insert(modelo).returning(modelo.id, sort_by_parameter_order=True), linhas
+        )
+        novos_ids = resultado.scalars().all()
+        for item, novo_id in zip(criacoes, novos_ids):
+            if item["op"].ref:
+                refs[item["op"].ref] = novo_id
+        if entidade == PlanEntity.PROBLEM:
+            gut_recalcular.update(novos_ids)
+
+    # 2) Edições: UPDATE em lote por chave primária (edições repetidas são mescladas)
+    for entidade in PlanEntity:
+        alteracoes: dict[int, dict] = {}
+        for item in operacoes:
+            op = item["op"]
+            if op.op == PlanOperationType.UPDATE and op.entidade == entidade and item["valores"]:
+                alteracoes.setdefault(op.id, {}).update(item["valores"])
+        if not alteracoes:
+            continue
+        await db.execute(
+            update(_PLAN_MODELS[entidade]),
+            [{"id": item_id, **valores} for item_id, valores in alteracoes.items()],
+        )
+        if entidade == PlanEntity.PROBLEM:
+            gut_recalcular.update(
+                item_id
+                for item_id, valores in alteracoes.items()
+                if valores.keys() & {"gut_gravidade", "gut_urgencia", "gut_tendencia"}
+            )
+
+    # 3) GUT recalculado no banco para todos os problemas afetados
+    if gut_recalcular:
+        await db.execute(
+            update(UBSProblem)
+            .where(UBSProblem.id.in_(gut_recalcular))
+            .values(gut_score=UBSProblem.gut_gravidade * UBSProblem.gut_urgencia * UBSProblem.gut_tendencia)
+            .execution_options(synchronize_session=False)
+        )
+
+    # 4) Exclusões de baixo para cima (sem depender de ON DELETE CASCADE no banco)
+    problemas = excluidos[PlanEntity.PROBLEM]
+    filtro_intervencoes = or_(
+        UBSIntervention.id.in_(excluidos[PlanEntity.INTERVENTION]),
+        UBSIntervention.problem_id.in_(problemas),
+    )
+    if any(excluidos.values()):
+        await db.execute(
+            delete(UBSInterventionAction)
+            .where(
+                or_(
+                    UBSInterventionAction.id.in_(excluidos[PlanEntity.ACTION]),
+                    UBSInterventionAction.intervention_id.in_(
+                        select(UBSIntervention.id).where(filtro_intervencoes)
+                    ),
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+    if excluidos[PlanEntity.INTERVENTION] or problemas:
+        await db.execute(
+            delete(UBSIntervention)
+            .where(filtro_intervencoes)
+            .execution_options(synchronize_session=False)
+        )
+    if problemas:
+        await db.execute(
+            delete(UBSProblem)
+            .where(UBSProblem.id.in_(problemas))
+            .execution_options(synchronize_session=False)
+        )
+
+    await db.commit()
+    return UBSPlanBatchOut(refs=refs, problems=await _load_problem_tree(ubs.id, db))
+
+
 # ----------------------- Anexos -----------------------
 
 
 @diagnostico_router.get("/{ubs_id}/attachments", response_model=List[UBSAttachmentOut])
 async def list_ubs_attachments(
     ubs_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     ubs = await _get_ubs_or_404(ubs_id, current_user, db)
@@ -1108,6 +1676,7 @@ async def upload_ubs_attachments(
     for f in files:
         content = await f.read()
         size_bytes = len(content)
+        observar_upload("anexos_ubs", size_bytes)
         if size_bytes <= 0:
             continue
 
@@ -1164,7 +1733,7 @@ async def _get_attachment_or_404(
 @diagnostico_router.get("/attachments/{attachment_id}/download")
 async def download_ubs_attachment(
     attachment_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_professional_user),
 ):
     att = await _get_attachment_or_404(attachment_id, current_user, db)
@@ -1206,7 +1775,7 @@ async def delete_ubs_attachment(
 @diagnostico_router.get("/{ubs_id}/export/pdf")
 async def export_situational_report_pdf(
     ubs_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
     """Exporta o relatório situacional completo em PDF.
@@ -1403,14 +1972,15 @@ async def export_situational_report_pdf(
             generate_situational_report_pdf_simple,
         )
 
-        pdf_bytes, filename_base = generate_situational_report_pdf_simple(
-            diagnosis,
-            municipality="Município de Parnaíba",
-            reference_period=(diagnosis.ubs.periodo_referencia or ""),
-            attachments=attachments_for_pdf,
-            attachments_base_dir=_UPLOADS_BASE_DIR,
-            extra_data=extra_data,
-        )
+        with PDF_RENDER.labels("relatorio_situacional").time():
+            pdf_bytes, filename_base = generate_situational_report_pdf_simple(
+                diagnosis,
+                municipality="Município de Parnaíba",
+                reference_period=(diagnosis.ubs.periodo_referencia or ""),
+                attachments=attachments_for_pdf,
+                attachments_base_dir=_UPLOADS_BASE_DIR,
+                extra_data=extra_data,
+            )
     except Exception as exc:
         logger.exception("Erro ao gerar PDF")
         raise HTTPException(status_code=500, detail=f"Erro ao gerar PDF: {exc}") from exc
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func as sqlfunc
-from typing import List, Optional
+from sqlalchemy import select, insert, update, func as sqlfunc
+from typing import IO, List, Optional
 
-from database import get_db
+from database import get_db, get_read_db
 from models.auth_models import Usuario
-from models.gestao_equipes_models import Microarea, AgenteSaude
+from models.gestao_equipes_models import Microarea, MicroareaRevisao, AgenteSaude
 from schemas.gestao_equipes_schemas import (
     MicroareaCreate,
     MicroareaUpdate,
     MicroareaOut,
+    MicroareaImportErro,
+    MicroareaImportOut,
     AgenteSaudeCreate,
     AgenteSaudeUpdate,
     AgenteSaudeOut,
@@ -17,6 +20,10 @@ from schemas.gestao_equipes_schemas import (
     AcsUserOut,
 )
 from utils.deps import get_current_user
+from utils.geojson_utils import GeoJSONError, iter_feature_collection, normalize_geometry
+from utils.http_cache import etag_matches, make_etag
+from utils.metrics import observar_upload
+from services.mapas import microarea_tiles
 from models.diagnostico_models import UBS
 
 gestao_equipes_router = APIRouter(tags=["Gestão de Equipes e Microáreas"])
@@ -35,7 +42,7 @@ def _ensure_allowed(current_user: Usuario):
 )
 async def get_kpis(
     current_user: Usuario = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     ubs_id: Optional[int] = Query(None, ge=1),
 ):
     """Retorna KPIs calculados dinamicamente a partir das microáreas."""
@@ -75,7 +82,7 @@ async def get_kpis(
 )
 async def listar_agentes(
     current_user: Usuario = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     ubs_id: Optional[int] = Query(None, ge=1),
 ):
     """Lista todos os agentes de saúde com dados da microárea."""
@@ -112,7 +119,7 @@ async def listar_agentes(
 )
 async def listar_microareas(
     current_user: Usuario = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     ubs_id: Optional[int] = Query(None, ge=1),
 ):
     """Lista todas as microáreas."""
@@ -125,6 +132,86 @@ async def listar_microareas(
     return result.scalars().all()
 
 
+@gestao_equipes_router.get("/gestao-equipes/microareas/tiles/{z}/{x}/{y}")
+async def tile_microareas(
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    ubs_id: Optional[int] = Query(None, ge=1),
+):
+    """Tile vetorial XYZ com os polígonos das microáreas (GeoJSON compacto).
+
+    As coordenadas vêm recortadas ao tile e quantizadas em inteiros de
+    0 a ``extent`` (origem no canto superior esquerdo, como no MVT).
+    """
+    _ensure_allowed(current_user)
+
+    if not 0 <= z <= microarea_tiles.MAX_ZOOM:
+        raise HTTPException(status_code=400, detail="Zoom fora do intervalo suportado.")
+    if not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+        raise HTTPException(status_code=404, detail="Tile inexistente.")
+
+    # Versão das microáreas: detecta escritas feitas por outros workers. O contador
+    # de revisões cobre edições no mesmo segundo (resolução de updated_at no SQLite)
+    revisoes_stmt = select(sqlfunc.coalesce(sqlfunc.sum(MicroareaRevisao.revisao), 0))
+    versao_stmt = select(
+        sqlfunc.count(Microarea.id),
+        sqlfunc.max(sqlfunc.coalesce(Microarea.updated_at, Microarea.created_at)),
+    )
+    if ubs_id:
+        versao_stmt = versao_stmt.where(Microarea.ubs_id == ubs_id)
+        revisoes_stmt = revisoes_stmt.where(MicroareaRevisao.ubs_id == ubs_id)
+    versao_stmt = versao_stmt.add_columns(revisoes_stmt.scalar_subquery())
+    total, ultima_alteracao, revisao = (await db.execute(versao_stmt)).one()
+    fingerprint = (total, str(ultima_alteracao), int(revisao))
+
+    etag = make_etag("microareas", ubs_id, fingerprint, z, x, y)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache_key = ("ubs", ubs_id)
+    index = microarea_tiles.get_cached_index(cache_key, fingerprint)
+    if index is None:
+        rows_stmt = select(
+            Microarea.id,
+            Microarea.nome,
+            Microarea.status,
+            Microarea.populacao,
+            Microarea.familias,
+            Microarea.bairro,
+            Microarea.geojson,
+        )
+        if ubs_id:
+            rows_stmt = rows_stmt.where(Microarea.ubs_id == ubs_id)
+        rows = (await db.execute(rows_stmt)).all()
+        # Projeção e recorte são CPU puro: fora do event loop
+        index = await run_in_threadpool(microarea_tiles.build_index, cache_key, fingerprint, rows)
+
+    conteudo = microarea_tiles.cached_tile(cache_key, fingerprint, z, x, y)
+    if conteudo is None:
+        conteudo = await run_in_threadpool(microarea_tiles.get_tile, cache_key, index, z, x, y)
+    return Response(content=conteudo, media_type="application/geo+json", headers=headers)
+
+
+async def _registrar_revisao(db: AsyncSession, ubs_id: int) -> None:
+    """Incrementa o contador de revisões das microáreas da UBS (sem commit)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(MicroareaRevisao).values(ubs_id=ubs_id, revisao=1)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["ubs_id"],
+            set_={"revisao": MicroareaRevisao.revisao + 1, "updated_at": sqlfunc.now()},
+        )
+    )
+
+
 @gestao_equipes_router.post(
     "/gestao-equipes/microareas",
     response_model=MicroareaOut,
@@ -147,7 +234,9 @@ async def criar_microarea(
 
     nova = Microarea(**payload.model_dump())
     db.add(nova)
+    await _registrar_revisao(db, nova.ubs_id)
     await db.commit()
+    microarea_tiles.invalidate_tiles()
     await db.refresh(nova)
     return nova
 
@@ -173,10 +262,14 @@ async def atualizar_microarea(
     if "status" in dados and dados["status"] not in ("COBERTA", "DESCOBERTA"):
         raise HTTPException(status_code=400, detail="Status deve ser COBERTA ou DESCOBERTA.")
 
+    ubs_anterior = microarea.ubs_id
     for campo, valor in dados.items():
         setattr(microarea, campo, valor)
 
+    for ubs_afetada in {ubs_anterior, microarea.ubs_id}:
+        await _registrar_revisao(db, ubs_afetada)
     await db.commit()
+    microarea_tiles.invalidate_tiles()
     await db.refresh(microarea)
     return microarea
 
@@ -197,11 +290,159 @@ async def deletar_microarea(
     if not microarea:
         raise HTTPException(status_code=404, detail="Microárea não encontrada.")
 
+    ubs_id = microarea.ubs_id
     await db.delete(microarea)
+    await _registrar_revisao(db, ubs_id)
     await db.commit()
+    microarea_tiles.invalidate_tiles()
     return None
 
 
+def _int_property(valor, campo: str) -> int:
+    if valor is None or valor == "":
+        return 0
+    if isinstance(valor, bool):
+        raise GeoJSONError(f"{campo} deve ser um número inteiro")
+    try:
+        numero = int(str(valor).strip()) if isinstance(valor, str) else int(valor)
+    except (TypeError, ValueError) as exc:
+        raise GeoJSONError(f"{campo} deve ser um número inteiro") from exc
+    if isinstance(valor, float) and valor != numero:
+        raise GeoJSONError(f"{campo} deve ser um número inteiro")
+    if numero < 0:
+        raise GeoJSONError(f"{campo} não pode ser negativo")
+    return numero
+
+
+def _feature_to_row(feature) -> dict:
+    if not isinstance(feature, dict) or feature.get("type") != "Feature":
+        raise GeoJSONError("Item não é uma Feature")
+
+    propriedades = feature.get("properties") or {}
+    if not isinstance(propriedades, dict):
+        raise GeoJSONError("'properties' deve ser um objeto")
+    props = {str(k).lower(): v for k, v in propriedades.items()}
+    nome = str(props.get("nome") or "").strip()
+    if not nome:
+        raise GeoJSONError("Propriedade 'nome' é obrigatória")
+    if len(nome) > 100:
+        raise GeoJSONError("Propriedade 'nome' excede 100 caracteres")
+
+    row = {
+        "nome": nome,
+        "populacao": _int_property(props.get("populacao"), "populacao"),
+        "familias": _int_property(props.get("familias"), "familias"),
+        "geojson": normalize_geometry(feature.get("geometry")),
+    }
+    if props.get("bairro"):
+        row["bairro"] = str(props["bairro"]).strip()[:150]
+    if props.get("status"):
+        status_value = str(props["status"]).strip().upper()
+        if status_value not in ("COBERTA", "DESCOBERTA"):
+            raise GeoJSONError("Status deve ser COBERTA ou DESCOBERTA.")
+        row["status"] = status_value
+    return row
+
+
+def _parse_microareas_geojson(fileobj: IO[bytes]) -> tuple[dict[str, dict], list[MicroareaImportErro], int]:
+    """Lê o FeatureCollection em streaming e devolve as linhas válidas por nome."""
+    linhas: dict[str, dict] = {}
+    erros: list[MicroareaImportErro] = []
+    total = 0
+    for indice, feature in enumerate(iter_feature_collection(fileobj)):
+        total += 1
+        try:
+            row = _feature_to_row(feature)
+        except GeoJSONError as exc:
+            props = feature.get("properties") if isinstance(feature, dict) else None
+            nome = props.get("nome") if isinstance(props, dict) else None
+            erros.append(
+                MicroareaImportErro(indice=indice, nome=None if nome is None else str(nome), motivo=str(exc))
+            )
+            continue
+        # Nomes repetidos no mesmo arquivo: prevalece a última feature
+        linhas[row["nome"]] = row
+    return linhas, erros, total
+
+
+@gestao_equipes_router.post(
+    "/gestao-equipes/microareas/import",
+    response_model=MicroareaImportOut,
+)
+async def importar_microareas(
+    ubs_id: int = Form(..., ge=1),
+    file: UploadFile = File(...),
+    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Importa (upsert por nome) as microáreas de um FeatureCollection GeoJSON.
+
+    Nada é gravado se alguma feature for inválida; a resposta 400 lista os erros.
+    Se um nome do arquivo corresponder a mais de uma microárea da UBS, a
+    resposta é 409 com esses nomes.
+    """
+    _ensure_allowed(current_user)
+
+    ubs = await db.get(UBS, ubs_id)
+    if not ubs:
+        raise HTTPException(status_code=404, detail="UBS não encontrada.")
+
+    observar_upload("microareas", file.size)
+    try:
+        linhas, erros, total = await run_in_threadpool(_parse_microareas_geojson, file.file)
+    except GeoJSONError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if erros:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "detail": "Falha na validação do GeoJSON",
+                "errors": [e.model_dump() for e in erros],
+            },
+        )
+    if not linhas:
+        raise HTTPException(status_code=400, detail="FeatureCollection sem features.")
+
+    resultado = await db.execute(
+        select(Microarea.nome, Microarea.id).where(Microarea.ubs_id == ubs_id)
+    )
+    existentes: dict[str, int] = {}
+    repetidas = set()
+    for nome, microarea_id in resultado.all():
+        if nome in existentes:
+            repetidas.add(nome)
+        existentes[nome] = microarea_id
+    # Sem unicidade de (ubs_id, nome) no banco: não escolhe uma das linhas ao acaso
+    conflitos = sorted(repetidas.intersection(linhas))
+    if conflitos:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "detail": "Há mais de uma microárea com o mesmo nome nesta UBS; renomeie ou remova as duplicadas",
+                "nomes": conflitos,
+            },
+        )
+
+    novas = []
+    alteradas = []
+    for nome, row in linhas.items():
+        if nome in existentes:
+            alteradas.append({"id": existentes[nome], **row})
+        else:
+            novas.append({"ubs_id": ubs_id, "status": "COBERTA", **row})
+
+    if novas:
+        await db.execute(insert(Microarea), novas)
+    if alteradas:
+        await db.execute(update(Microarea), alteradas)
+    await _registrar_revisao(db, ubs_id)
+    await db.commit()
+    microarea_tiles.invalidate_tiles()
+
+    return MicroareaImportOut(total=total, criadas=len(novas), atualizadas=len(alteradas))
+
+
 # ─── Agentes CRUD ─────────────────────────────────────────────────────
 
 @gestao_equipes_router.post(
@@ -308,7 +549,7 @@ async def deletar_agente(
 )
 async def listar_acs_users(
     current_user: Usuario = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Lista usuarios ACS ativos para vinculo nas microareas."""
     _ensure_allowed(current_user)
@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from database import get_db
+from database import get_db, get_read_db
 from models.materiais_models import EducationalMaterial, EducationalMaterialFile
 from models.diagnostico_models import UBS
 from models.auth_models import Usuario
@@ -16,8 +16,9 @@ from schemas.materiais_schemas import (
     EducationalMaterialOut,
     EducationalMaterialFileOut,
 )
-from utils.deps import get_current_active_user
-from utils.jwt_handler import verify_token
+from utils.deps import get_current_active_user, get_user_from_request_token
+from utils.metrics import observar_upload
+from utils import consultas_frequentes
 
 materiais_router = APIRouter(prefix="/materiais", tags=["materiais"])
 
@@ -55,30 +56,8 @@ def _resolve_path(storage_path: str) -> Path:
     return (_UPLOADS_BASE_DIR / resolved).resolve()
 
 
-async def _get_user_from_token(raw_token: str, db: AsyncSession) -> Usuario:
-    payload = verify_token(raw_token)
-    if not payload:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido")
-
-    user_id = payload.get("sub")
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido")
-
-    resultado = await db.execute(select(Usuario).where(Usuario.id == int(user_id)))
-    usuario = resultado.scalar_one_or_none()
-    if not usuario:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario nao encontrado")
-
-    if not usuario.ativo:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario inativo")
-
-    return usuario
-
-
 async def _get_ubs_or_404(ubs_id: int, db: AsyncSession) -> UBS:
-    resultado = await db.execute(
-        select(UBS).where(UBS.id == ubs_id, UBS.is_deleted.is_(False))
-    )
+    resultado = await db.execute(consultas_frequentes.ubs_ativa(ubs_id))
     ubs = resultado.scalar_one_or_none()
     if not ubs:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="UBS não encontrada")
@@ -88,7 +67,7 @@ async def _get_ubs_or_404(ubs_id: int, db: AsyncSession) -> UBS:
 @materiais_router.get("", response_model=list[EducationalMaterialOut])
 async def list_materials(
     ubs_id: int = Query(..., ge=1),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_active_user),
 ):
     _ensure_role(current_user)
@@ -139,6 +118,7 @@ async def create_material(
         storage_path = dest_dir / filename
 
         content = await file.read()
+        observar_upload("materiais", len(content))
         if len(content) > _MAX_FILE_SIZE_BYTES:
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
@@ -236,6 +216,7 @@ async def upload_material_file(
     storage_path = dest_dir / filename
 
     content = await file.read()
+    observar_upload("materiais", len(content))
     if len(content) > _MAX_FILE_SIZE_BYTES:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
@@ -261,19 +242,9 @@ async def download_material_file(
     file_id: int,
     request: Request,
     token: str | None = Query(None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    header_auth = request.headers.get("authorization")
-    raw_token = None
-    if header_auth and header_auth.lower().startswith("bearer "):
-        raw_token = header_auth.split(" ", 1)[1].strip()
-    if not raw_token and token:
-        raw_token = token
-
-    if not raw_token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Não autenticado")
-
-    usuario = await _get_user_from_token(raw_token, db)
+    usuario = await get_user_from_request_token(request, token, db)
     _ensure_role(usuario)
 
     file_entry = await db.get(EducationalMaterialFile, file_id)
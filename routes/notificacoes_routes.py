@@ -0,0 +1,43 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from services.notificacoes.contadores import canal_categoria, categorias_visiveis, contadores
+from services.realtime.broker import broker
+from services.realtime.sse import SSE_HEADERS, stream_eventos
+from utils.deps import get_user_from_request_token
+
+notificacoes_router = APIRouter(prefix="/notificacoes", tags=["notificacoes"])
+
+
+@notificacoes_router.get("/eventos")
+async def stream_notificacoes(
+    request: Request,
+    token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream SSE único com os contadores de pendências do usuário.
+
+    Envia um evento ``contadores`` com os totais atuais e, em seguida, um
+    ``contador.delta`` a cada alteração. Na reconexão o cliente recebe um novo
+    snapshot, então não há replay por Last-Event-ID.
+    """
+    usuario = await get_user_from_request_token(request, token, db)
+    categorias = categorias_visiveis(usuario)
+    if not categorias:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito à recepção ou gestão")
+
+    # Carrega na primeira conexão e reconta periodicamente (corrige deriva dos deltas)
+    await contadores.atualizar(db)
+
+    # Sem await entre assinar e ler os totais: todo delta posterior ao snapshot chega pela fila
+    assinatura = broker.subscribe([canal_categoria(c) for c in categorias])
+    snapshot = {"tipo": "contadores", "dados": contadores.snapshot(categorias)}
+    return StreamingResponse(
+        stream_eventos(request, assinatura, [snapshot]),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
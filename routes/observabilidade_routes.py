@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query
+
+from models.auth_models import Usuario
+from schemas.observabilidade_schemas import LoopWatchdogOut
+from utils.deps import get_current_gestor_user
+from utils.loop_watchdog import watchdog
+
+observabilidade_router = APIRouter(prefix="/observabilidade", tags=["observabilidade"])
+
+
+@observabilidade_router.get("/loop-bloqueios", response_model=LoopWatchdogOut)
+async def listar_bloqueios_loop(
+    limpar: bool = Query(False, description="Esvazia o buffer após a leitura"),
+    current_user: Usuario = Depends(get_current_gestor_user),
+):
+    """Bloqueios do event loop detectados neste worker (mais recentes por último).
+
+    Requer ``LOOP_WATCHDOG_MS`` definido; cada worker mantém o próprio buffer.
+    """
+    bloqueios = watchdog.registros()
+    if limpar:
+        watchdog.limpar()
+    return LoopWatchdogOut(ativo=watchdog.em_execucao, limite_ms=watchdog.limite_ms, bloqueios=bloqueios)
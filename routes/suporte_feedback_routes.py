@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
 
-from database import get_db
+from database import get_db, get_read_db
 from models.auth_models import Usuario
 from models.suporte_feedback_models import SuporteFeedback, StatusFeedback
 from schemas.suporte_feedback_schemas import (
@@ -11,6 +11,8 @@ from schemas.suporte_feedback_schemas import (
     SuporteFeedbackUpdateStatus,
     SuporteFeedbackResponse,
 )
+from services.notificacoes.contadores import FEEDBACK_PENDENTE, registrar_delta
+from services.realtime.outbox import publicar_local
 from utils.deps import get_current_user
 
 suporte_feedback_router = APIRouter(tags=["Suporte e Feedback"])
@@ -41,8 +43,10 @@ async def criar_feedback(
     )
 
     db.add(novo)
+    evento = await registrar_delta(db, FEEDBACK_PENDENTE, 1)
     await db.commit()
     await db.refresh(novo)
+    publicar_local([evento])
 
     resp = SuporteFeedbackResponse.model_validate(novo)
     resp.nome_usuario = current_user.nome
@@ -56,7 +60,7 @@ async def criar_feedback(
 )
 async def listar_feedbacks(
     current_user: Usuario = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Lista todas as mensagens de feedback (Gestão ou Recepcionista)."""
     role = (current_user.role or "USER").upper()
@@ -104,9 +108,14 @@ async def atualizar_status_feedback(
     if payload.status not in (StatusFeedback.PENDENTE, StatusFeedback.LIDA):
         raise HTTPException(status_code=400, detail="Status inválido.")
 
+    eventos = []
+    if feedback.status != payload.status:
+        delta = 1 if payload.status == StatusFeedback.PENDENTE else -1
+        eventos.append(await registrar_delta(db, FEEDBACK_PENDENTE, delta))
     feedback.status = payload.status
     await db.commit()
     await db.refresh(feedback)
+    publicar_local(eventos)
 
     usuario = await db.get(Usuario, feedback.usuario_id)
     resp = SuporteFeedbackResponse.model_validate(feedback)
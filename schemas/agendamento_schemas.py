@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date, datetime, time
 from typing import Optional, List
 from models.agendamento_models import StatusAgendamento
 
@@ -21,6 +21,7 @@ class AgendamentoUpdate(BaseModel):
 class AgendamentoResponse(AgendamentoBase):
     id: int
     paciente_id: int
+    data_hora_fim: Optional[datetime] = None
     status: str
     confirmacao_enviada: Optional[datetime] = None
     created_at: datetime
@@ -49,3 +50,82 @@ class BloqueioAgendaResponse(BloqueioAgendaBase):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+# --- Schemas de Jornada do Profissional ---
+
+class JornadaFaixa(BaseModel):
+    # 0 = segunda-feira ... 6 = domingo; horários locais da UBS
+    dia_semana: int = Field(..., ge=0, le=6)
+    hora_inicio: time
+    hora_fim: time
+
+class JornadaProfissionalResponse(BaseModel):
+    profissional_id: int
+    duracao_consulta_minutos: int
+    # Vazia: sem faixas cadastradas (qualquer horário)
+    faixas: List[JornadaFaixa]
+
+# --- Schemas de Estatísticas da Agenda ---
+
+class IndicadoresAgenda(BaseModel):
+    total: int
+    agendados: int
+    reagendados: int
+    realizados: int
+    cancelados: int
+    faltas: int
+    taxa_falta: float
+    taxa_cancelamento: float
+    taxa_utilizacao: float
+    antecedencia_media_horas: float
+
+class EstatisticasDia(IndicadoresAgenda):
+    dia: date
+
+class EstatisticasProfissional(IndicadoresAgenda):
+    profissional_id: int
+    nome: Optional[str] = None
+    cargo: Optional[str] = None
+
+class EstatisticasCargo(IndicadoresAgenda):
+    cargo: str
+
+class EstatisticasAgendaResponse(BaseModel):
+    inicio: date
+    fim: date
+    totais: IndicadoresAgenda
+    por_dia: List[EstatisticasDia]
+
+# --- Schemas de Lista de Espera ---
+
+class ListaEsperaCreate(BaseModel):
+    # Informe o profissional ou, para aceitar qualquer um, o cargo
+    profissional_id: Optional[int] = None
+    cargo: Optional[str] = None
+    data_inicio: Optional[datetime] = None
+    data_fim: Optional[datetime] = None
+    observacoes: Optional[str] = None
+
+class ListaEsperaResponse(BaseModel):
+    id: int
+    paciente_id: int
+    profissional_id: Optional[int] = None
+    cargo: str
+    data_inicio: Optional[datetime] = None
+    data_fim: Optional[datetime] = None
+    observacoes: Optional[str] = None
+    status: str
+    agendamento_id: Optional[int] = None
+    atendido_em: Optional[datetime] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Schemas de Disponibilidade ---
+
+class HorarioDisponivel(BaseModel):
+    profissional_id: int
+    nome_profissional: Optional[str] = None
+    cargo: str
+    data_hora: datetime
+    data_hora_fim: datetime
@@ -0,0 +1,11 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CalendarioFeedsOut(BaseModel):
+    token: str
+    expira_em: datetime
+    profissional_url: Optional[str] = None
+    ubs_urls: list[str] = []
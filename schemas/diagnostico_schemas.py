@@ -173,6 +173,49 @@ class UBSInterventionActionOut(UBSInterventionActionBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UBSInterventionTreeOut(UBSInterventionOut):
+    actions: List[UBSInterventionActionOut] = []
+
+
+class UBSProblemTreeOut(UBSProblemOut):
+    interventions: List[UBSInterventionTreeOut] = []
+
+
+class PlanOperationType(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class PlanEntity(str, Enum):
+    PROBLEM = "problem"
+    INTERVENTION = "intervention"
+    ACTION = "action"
+
+
+class UBSPlanOperation(BaseModel):
+    """Uma operação do lote: ``id`` para update/delete; ``parent_id`` ou
+    ``parent_ref`` (``ref`` de um create anterior do mesmo lote) para criar
+    intervenções e ações."""
+
+    op: PlanOperationType
+    entidade: PlanEntity
+    id: Optional[int] = None
+    ref: Optional[str] = Field(None, max_length=64)
+    parent_id: Optional[int] = None
+    parent_ref: Optional[str] = Field(None, max_length=64)
+    dados: dict = Field(default_factory=dict)
+
+
+class UBSPlanBatchRequest(BaseModel):
+    operacoes: List[UBSPlanOperation] = Field(..., min_length=1, max_length=500)
+
+
+class UBSPlanBatchOut(BaseModel):
+    refs: dict[str, int] = Field(default_factory=dict)
+    problems: List[UBSProblemTreeOut]
+
+
 class ServicesCatalogItem(BaseModel):
     id: int
     name: str
@@ -265,6 +308,32 @@ class IndicatorOut(IndicatorBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class IndicatorSeriesPoint(BaseModel):
+    id: int
+    periodo_referencia: str
+    valor: float
+    meta: Optional[float] = None
+    created_at: Optional[datetime] = None
+
+
+class IndicatorSeriesOut(BaseModel):
+    nome_indicador: str
+    tipo_valor: Optional[IndicatorValueType] = None
+    pontos: List[IndicatorSeriesPoint]
+
+
+class IndicatorImportErro(BaseModel):
+    linha: int
+    nome_indicador: Optional[str] = None
+    motivo: str
+
+
+class IndicatorImportOut(BaseModel):
+    total: int
+    criados: int
+    atualizados: int
+
+
 class ProfessionalGroupBase(BaseModel):
     cargo_funcao: str = Field(..., max_length=255)
     quantidade: int = Field(..., ge=0)
@@ -39,6 +39,18 @@ class MicroareaOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MicroareaImportErro(BaseModel):
+    indice: int
+    nome: Optional[str] = None
+    motivo: str
+
+
+class MicroareaImportOut(BaseModel):
+    total: int
+    criadas: int
+    atualizadas: int
+
+
 # ─── Agente de Saúde ─────────────────────────────────────────────────
 
 class AgenteSaudeCreate(BaseModel):
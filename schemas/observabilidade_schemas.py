@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class LoopBloqueioOut(BaseModel):
+    detectado_em: datetime
+    duracao_ms: Optional[float] = None
+    metodo: Optional[str] = None
+    rota: Optional[str] = None
+    pilha: list[str] = []
+
+
+class LoopWatchdogOut(BaseModel):
+    ativo: bool
+    limite_ms: float
+    bloqueios: list[LoopBloqueioOut] = []
@@ -0,0 +1,102 @@
+"""Envio automático dos lembretes de confirmação de consulta.
+
+Tarefa do agendador: seleciona em lotes as consultas ativas das próximas
+``LEMBRETES_ANTECEDENCIA_HORAS`` ainda sem ``confirmacao_enviada``, entrega
+o lote ao notificador e marca os enviados com um único UPDATE por lote.
+A confirmação manual (``POST /agendamentos/{id}/confirmar``) continua
+disponível para a recepção.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from models.agendamento_models import Agendamento, StatusAgendamento
+from models.auth_models import ProfissionalUbs, Usuario
+from services.notificacoes.notificadores import Lembrete, Notificador
+
+logger = logging.getLogger(__name__)
+
+ANTECEDENCIA = timedelta(hours=int(os.getenv("LEMBRETES_ANTECEDENCIA_HORAS", "48")))
+LOTE = int(os.getenv("LEMBRETES_LOTE", "200"))
+
+# Literais (não bind parameters): o planejador só usa o índice parcial
+# ix_agendamentos_lembrete_pendente se o filtro repetir o seu predicado
+_STATUS_ATIVOS = [
+    literal_column(f"'{status.value}'") for status in (StatusAgendamento.AGENDADO, StatusAgendamento.REAGENDADO)
+]
+
+
+def consulta_pendentes(agora: datetime, antecedencia: timedelta, lote: int):
+    """Próximas consultas sem lembrete, com os dados do aviso (uma consulta, sem N+1)."""
+    paciente = aliased(Usuario)
+    usuario_profissional = aliased(Usuario)
+    return (
+        select(
+            Agendamento.id,
+            Agendamento.data_hora,
+            paciente.nome,
+            paciente.email,
+            usuario_profissional.nome,
+            ProfissionalUbs.cargo,
+        )
+        .join(paciente, paciente.id == Agendamento.paciente_id)
+        .join(ProfissionalUbs, ProfissionalUbs.id == Agendamento.profissional_id)
+        .outerjoin(usuario_profissional, usuario_profissional.id == ProfissionalUbs.usuario_id)
+        .where(
+            Agendamento.confirmacao_enviada.is_(None),
+            Agendamento.status.in_(_STATUS_ATIVOS),
+            Agendamento.data_hora > agora,
+            Agendamento.data_hora <= agora + antecedencia,
+        )
+        .order_by(Agendamento.data_hora, Agendamento.id)
+        .limit(lote)
+        # Só as linhas de agendamentos; outra rodada ou a recepção não as disputam
+        .with_for_update(of=Agendamento, skip_locked=True)
+    )
+
+
+async def enviar_confirmacoes(
+    db: AsyncSession,
+    notificador: Notificador,
+    antecedencia: Optional[timedelta] = None,
+    lote: Optional[int] = None,
+    agora: Optional[datetime] = None,
+) -> int:
+    """Envia os lembretes pendentes em lotes; devolve quantos foram enviados."""
+    antecedencia = antecedencia or ANTECEDENCIA
+    lote = lote or LOTE
+    agora = agora or datetime.now(timezone.utc)
+    enviados = 0
+    while True:
+        linhas = (await db.execute(consulta_pendentes(agora, antecedencia, lote))).all()
+        if not linhas:
+            break
+        lembretes = [Lembrete(*linha) for linha in linhas]
+        try:
+            ids = await notificador.enviar(lembretes)
+        except Exception:
+            await db.rollback()
+            raise
+        if ids:
+            await db.execute(
+                update(Agendamento)
+                .where(Agendamento.id.in_(ids))
+                .values(confirmacao_enviada=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        enviados += len(ids)
+        # Falhas parciais ficam para a próxima rodada (não repetir o mesmo lote agora)
+        if len(linhas) < lote or len(ids) < len(linhas):
+            break
+    if enviados:
+        logger.info("Lembretes de confirmação enviados: %d", enviados)
+    return enviados
@@ -0,0 +1,274 @@
+"""Regras de disponibilidade de horário na agenda dos profissionais.
+
+Cada consulta ocupa o intervalo [data_hora, data_hora_fim). A duração vem do
+cargo (``cargos.duracao_padrao_minutos``, senão
+``AGENDA_DURACAO_CONSULTA_MINUTOS``) e o horário de atendimento das faixas
+semanais em ``jornadas_profissionais``. Profissional sem faixas cadastradas
+aceita qualquer horário; a busca de horários sugere o expediente padrão
+(``AGENDA_EXPEDIENTE``, padrão ``08:00-12:00,13:00-17:00``, dias úteis).
+Horários locais seguem ``AGENDA_FUSO_HORARIO`` (America/Sao_Paulo).
+
+:func:`horario_disponivel` confere um intervalo (agendamento e reagendamento).
+:func:`proximos_horarios` busca os primeiros horários livres entre vários
+profissionais: uma consulta traz agendamentos e bloqueios de todos eles no
+período e uma varredura k-way (``heapq.merge``) sobre a grade de cada
+profissional devolve os N mais cedo, sem montar a grade inteira.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.agendamento_models import (
+    DURACAO_PADRAO_MINUTOS,
+    Agendamento,
+    BloqueioAgenda,
+    JornadaProfissional,
+    StatusAgendamento,
+)
+from models.auth_models import Cargo, ProfissionalUbs
+from utils import consultas_frequentes
+
+logger = logging.getLogger(__name__)
+
+# dia da semana (0 = segunda) -> faixas [abertura, fechamento) em horário local
+Jornada = dict[int, list[tuple[time, time]]]
+
+
+def _carregar_expediente(valor: str) -> list[tuple[time, time]]:
+    faixas = []
+    for faixa in valor.split(","):
+        inicio, fim = faixa.strip().split("-")
+        faixas.append((time.fromisoformat(inicio), time.fromisoformat(fim)))
+    return faixas
+
+
+def _carregar_fuso(nome: str) -> tzinfo:
+    try:
+        return ZoneInfo(nome)
+    except ZoneInfoNotFoundError:
+        # Sem base de fusos (ex.: Windows sem tzdata); o Brasil não tem horário de verão desde 2019
+        logger.warning("Fuso %s indisponível; usando UTC-03:00", nome)
+        return timezone(timedelta(hours=-3))
+
+
+EXPEDIENTE = _carregar_expediente(os.getenv("AGENDA_EXPEDIENTE", "08:00-12:00,13:00-17:00"))
+JORNADA_PADRAO: Jornada = {dia: EXPEDIENTE for dia in range(5)}
+DURACAO_CONSULTA = timedelta(minutes=DURACAO_PADRAO_MINUTOS)
+FUSO_HORARIO = _carregar_fuso(os.getenv("AGENDA_FUSO_HORARIO", "America/Sao_Paulo"))
+
+_STATUS_OCUPAM_HORARIO = (StatusAgendamento.AGENDADO.value, StatusAgendamento.REAGENDADO.value)
+
+
+def _utc(valor: datetime) -> datetime:
+    # SQLite devolve datas sem fuso; a aplicação grava sempre em UTC
+    return valor.replace(tzinfo=timezone.utc) if valor.tzinfo is None else valor.astimezone(timezone.utc)
+
+
+@dataclass(frozen=True)
+class AgendaProfissional:
+    duracao: timedelta = DURACAO_CONSULTA
+    # None: sem faixas cadastradas
+    jornada: Optional[Jornada] = None
+
+    def atende(self, inicio: datetime, fim: datetime, fuso: tzinfo = FUSO_HORARIO) -> bool:
+        """Se [inicio, fim) cabe inteiro numa faixa da jornada."""
+        if self.jornada is None:
+            return True
+        inicio_local, fim_local = _utc(inicio).astimezone(fuso), _utc(fim).astimezone(fuso)
+        if inicio_local.date() != fim_local.date():
+            return False
+        return any(
+            abertura <= inicio_local.time() and fim_local.time() <= fechamento
+            for abertura, fechamento in self.jornada.get(inicio_local.weekday(), [])
+        )
+
+
+async def carregar_agendas(db: AsyncSession, profissionais: list[int]) -> dict[int, AgendaProfissional]:
+    """Duração e jornada de cada profissional (duas consultas, qualquer quantidade)."""
+    duracoes = await db.execute(
+        select(ProfissionalUbs.id, Cargo.duracao_padrao_minutos)
+        .outerjoin(Cargo, Cargo.nome == ProfissionalUbs.cargo)
+        .where(ProfissionalUbs.id.in_(profissionais))
+    )
+    jornadas: dict[int, Jornada] = {}
+    faixas = await db.execute(
+        select(
+            JornadaProfissional.profissional_id,
+            JornadaProfissional.dia_semana,
+            JornadaProfissional.hora_inicio,
+            JornadaProfissional.hora_fim,
+        )
+        .where(JornadaProfissional.profissional_id.in_(profissionais))
+        .order_by(JornadaProfissional.profissional_id, JornadaProfissional.dia_semana, JornadaProfissional.hora_inicio)
+    )
+    for profissional_id, dia, abertura, fechamento in faixas:
+        jornadas.setdefault(profissional_id, {}).setdefault(dia, []).append((abertura, fechamento))
+    return {
+        profissional_id: AgendaProfissional(
+            timedelta(minutes=minutos) if minutos else DURACAO_CONSULTA, jornadas.get(profissional_id)
+        )
+        for profissional_id, minutos in duracoes
+    }
+
+
+async def agenda_do_profissional(db: AsyncSession, profissional_id: int) -> AgendaProfissional:
+    return (await carregar_agendas(db, [profissional_id])).get(profissional_id, AgendaProfissional())
+
+
+async def horario_disponivel(
+    db: AsyncSession,
+    profissional_id: int,
+    data_hora: datetime,
+    data_hora_fim: datetime,
+    excluir_agendamento_id: Optional[int] = None,
+) -> bool:
+    # Verifica se algum agendamento ativo se sobrepõe ao intervalo (exceto o próprio se for reagendamento)
+    result = await db.execute(
+        consultas_frequentes.agendamento_no_horario(
+            profissional_id, data_hora, data_hora_fim, excluir_agendamento_id
+        )
+    )
+    if result.first():
+        return False
+
+    # Verifica bloqueios
+    result_bloqueio = await db.execute(
+        consultas_frequentes.bloqueio_no_horario(profissional_id, data_hora, data_hora_fim)
+    )
+    if result_bloqueio.first():
+        return False
+
+    return True
+
+
+# --- Busca de horários livres entre profissionais ---
+
+
+@dataclass(frozen=True, order=True)
+class HorarioLivre:
+    data_hora: datetime
+    profissional_id: int
+    data_hora_fim: datetime
+
+
+def grade(
+    inicio: datetime,
+    fim: datetime,
+    jornada: Jornada = JORNADA_PADRAO,
+    duracao: timedelta = DURACAO_CONSULTA,
+    fuso: tzinfo = FUSO_HORARIO,
+) -> Iterator[datetime]:
+    """Inícios da grade em [inicio, fim), em ordem, como datetimes UTC."""
+    dia: date = inicio.astimezone(fuso).date()
+    ultimo_dia = fim.astimezone(fuso).date()
+    while dia <= ultimo_dia:
+        for abertura, fechamento in jornada.get(dia.weekday(), []):
+            horario = datetime.combine(dia, abertura, tzinfo=fuso)
+            limite = datetime.combine(dia, fechamento, tzinfo=fuso)
+            while horario + duracao <= limite:
+                em_utc = horario.astimezone(timezone.utc)
+                if em_utc >= fim:
+                    return
+                if em_utc >= inicio:
+                    yield em_utc
+                horario += duracao
+        dia += timedelta(days=1)
+
+
+def _livres_do_profissional(
+    profissional_id: int,
+    horarios: Iterable[datetime],
+    duracao: timedelta,
+    ocupacoes: list[tuple[datetime, datetime, bool]],
+) -> Iterator[HorarioLivre]:
+    """Filtra a grade de um profissional; ``ocupacoes`` (inicio, fim, bloqueio) ordenadas pelo início."""
+    proximo = 0
+    fim_agendamentos: Optional[datetime] = None
+    fim_bloqueios: Optional[datetime] = None
+    for horario in horarios:
+        horario_fim = horario + duracao
+        # Grade crescente: basta o maior fim entre as ocupações iniciadas antes do fim do horário
+        while proximo < len(ocupacoes) and ocupacoes[proximo][0] < horario_fim:
+            _, ocupado_fim, bloqueio = ocupacoes[proximo]
+            if bloqueio:
+                fim_bloqueios = ocupado_fim if fim_bloqueios is None else max(fim_bloqueios, ocupado_fim)
+            else:
+                fim_agendamentos = ocupado_fim if fim_agendamentos is None else max(fim_agendamentos, ocupado_fim)
+            proximo += 1
+        if fim_agendamentos is not None and fim_agendamentos > horario:
+            continue
+        # Bloqueios incluem o instante final (como em bloqueio_no_horario)
+        if fim_bloqueios is not None and fim_bloqueios >= horario:
+            continue
+        yield HorarioLivre(horario, profissional_id, horario_fim)
+
+
+def consulta_ocupacao(profissionais: list[int], inicio: datetime, fim: datetime):
+    """Agendamentos ativos e bloqueios dos profissionais que tocam o período, numa única consulta."""
+    agendamentos = select(
+        Agendamento.profissional_id,
+        Agendamento.data_hora.label("inicio"),
+        Agendamento.data_hora_fim.label("fim"),
+        literal(False).label("bloqueio"),
+    ).where(
+        Agendamento.profissional_id.in_(profissionais),
+        Agendamento.data_hora_fim > inicio,
+        Agendamento.data_hora < fim,
+        Agendamento.status.in_(_STATUS_OCUPAM_HORARIO),
+    )
+    bloqueios = select(
+        BloqueioAgenda.profissional_id,
+        BloqueioAgenda.data_inicio,
+        BloqueioAgenda.data_fim,
+        literal(True),
+    ).where(
+        BloqueioAgenda.profissional_id.in_(profissionais),
+        BloqueioAgenda.data_inicio < fim,
+        BloqueioAgenda.data_fim >= inicio,
+    )
+    uniao = union_all(agendamentos, bloqueios).subquery()
+    return select(uniao).order_by(uniao.c.inicio)
+
+
+async def proximos_horarios(
+    db: AsyncSession,
+    profissionais: list[int],
+    inicio: datetime,
+    fim: datetime,
+    limite: int,
+) -> list[HorarioLivre]:
+    """Os ``limite`` horários livres mais cedo entre ``profissionais`` com início em [inicio, fim)."""
+    if not profissionais or limite <= 0 or inicio >= fim:
+        return []
+    agendas = await carregar_agendas(db, profissionais)
+    if not agendas:
+        return []
+    # O último horário pode terminar depois de ``fim``
+    maior_duracao = max(agenda.duracao for agenda in agendas.values())
+    ocupacoes: dict[int, list[tuple[datetime, datetime, bool]]] = {p: [] for p in agendas}
+    for profissional_id, ocupado_inicio, ocupado_fim, bloqueio in await db.execute(
+        consulta_ocupacao(list(agendas), inicio, fim + maior_duracao)
+    ):
+        ocupacoes[profissional_id].append((_utc(ocupado_inicio), _utc(ocupado_fim), bool(bloqueio)))
+
+    fluxos = [
+        _livres_do_profissional(
+            p,
+            grade(inicio, fim, agendas[p].jornada or JORNADA_PADRAO, agendas[p].duracao),
+            agendas[p].duracao,
+            ocupacoes[p],
+        )
+        for p in sorted(agendas)
+    ]
+    return list(islice(heapq.merge(*fluxos), limite))
@@ -0,0 +1,243 @@
+"""Estatísticas de agendamentos para os painéis da gestão.
+
+Taxas de falta e de cancelamento, utilização por profissional e por cargo e
+antecedência média saem da tabela ``agenda_estatisticas_diarias`` (um total
+por dia e profissional), nunca de ``agendamentos``: o painel lê poucas
+centenas de linhas mesmo com milhões de consultas.
+
+As rotas de escrita aplicam a cada gravação a diferença entre a contribuição
+do agendamento antes e depois da alteração (UPSERT com incremento, na mesma
+transação). O recálculo completo, para a carga inicial ou para corrigir
+divergências, reprocessa ``agendamentos`` em blocos de dias:
+
+    python -m services.agenda.estatisticas
+    python -m services.agenda.estatisticas --desde 2025-01-01 --ate 2025-12-31
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.agendamento_models import Agendamento, EstatisticaAgendaDiaria, StatusAgendamento
+
+logger = logging.getLogger(__name__)
+
+# Coluna do rollup incrementada por cada status
+COLUNA_STATUS = {
+    StatusAgendamento.AGENDADO.value: "agendados",
+    StatusAgendamento.REAGENDADO.value: "reagendados",
+    StatusAgendamento.REALIZADO.value: "realizados",
+    StatusAgendamento.CANCELADO.value: "cancelados",
+    StatusAgendamento.FALTOU.value: "faltas",
+}
+CONTADORES = ("total", *COLUNA_STATUS.values(), "antecedencia_minutos")
+_POSICAO = {coluna: i for i, coluna in enumerate(CONTADORES)}
+
+DIAS_POR_BLOCO = 31
+
+
+@dataclass(frozen=True)
+class Contribuicao:
+    """O que um agendamento soma ao rollup: uma linha (dia, profissional)."""
+
+    dia: date
+    profissional_id: int
+    coluna: str
+    antecedencia_minutos: int
+
+    def deltas(self, sinal: int = 1) -> dict[str, int]:
+        return {"total": sinal, self.coluna: sinal, "antecedencia_minutos": sinal * self.antecedencia_minutos}
+
+
+def _utc(valor: datetime) -> datetime:
+    # SQLite devolve datas sem fuso; a aplicação grava sempre em UTC
+    return valor.replace(tzinfo=timezone.utc) if valor.tzinfo is None else valor.astimezone(timezone.utc)
+
+
+def _valor(status) -> str:
+    return status.value if hasattr(status, "value") else str(status)
+
+
+def contribuicao(
+    profissional_id: int, data_hora: datetime, status, criado_em: Optional[datetime]
+) -> Optional[Contribuicao]:
+    coluna = COLUNA_STATUS.get(_valor(status))
+    if coluna is None or data_hora is None:
+        return None
+    data_hora = _utc(data_hora)
+    antecedencia = 0
+    if criado_em is not None:
+        antecedencia = max(int((data_hora - _utc(criado_em)).total_seconds() // 60), 0)
+    return Contribuicao(data_hora.date(), profissional_id, coluna, antecedencia)
+
+
+def contribuicao_de(agendamento: Agendamento) -> Optional[Contribuicao]:
+    return contribuicao(
+        agendamento.profissional_id, agendamento.data_hora, agendamento.status, agendamento.created_at
+    )
+
+
+class Acumulador:
+    """Soma contribuições em memória, por (dia, profissional)."""
+
+    def __init__(self) -> None:
+        # Listas na ordem de CONTADORES: o recálculo pode acumular centenas de milhares de chaves
+        self._totais: dict[tuple[date, int], list[int]] = defaultdict(lambda: [0] * len(CONTADORES))
+
+    def adicionar(self, item: Optional[Contribuicao], sinal: int = 1) -> None:
+        if item is None:
+            return
+        totais = self._totais[(item.dia, item.profissional_id)]
+        for coluna, delta in item.deltas(sinal).items():
+            totais[_POSICAO[coluna]] += delta
+
+    def linhas(self) -> Iterator[dict]:
+        for (dia, profissional_id), totais in sorted(self._totais.items()):
+            if any(totais):
+                yield {"dia": dia, "profissional_id": profissional_id, **dict(zip(CONTADORES, totais))}
+
+
+def _insert(db: AsyncSession):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(EstatisticaAgendaDiaria)
+
+
+async def registrar_alteracao(
+    db: AsyncSession, antes: Optional[Contribuicao], depois: Optional[Contribuicao]
+) -> None:
+    """Aplica ao rollup a troca de ``antes`` por ``depois`` (sem commit).
+
+    Chamado na transação que grava o agendamento, para que rollup e tabela
+    nunca divirjam.
+    """
+    if antes == depois:
+        return
+    acumulador = Acumulador()
+    acumulador.adicionar(antes, -1)
+    acumulador.adicionar(depois)
+    tabela = EstatisticaAgendaDiaria.__table__
+    for linha in acumulador.linhas():
+        insert = _insert(db).values(**linha)
+        incrementos = {coluna: tabela.c[coluna] + insert.excluded[coluna] for coluna in CONTADORES}
+        await db.execute(
+            insert.on_conflict_do_update(
+                index_elements=["dia", "profissional_id"],
+                set_={**incrementos, "updated_at": func.now()},
+            )
+        )
+
+
+def _inicio_utc(dia: date) -> datetime:
+    return datetime.combine(dia, time.min, tzinfo=timezone.utc)
+
+
+async def recalcular(
+    db: AsyncSession,
+    desde: Optional[date] = None,
+    ate: Optional[date] = None,
+    dias_por_bloco: int = DIAS_POR_BLOCO,
+) -> int:
+    """Refaz o rollup de ``desde`` a ``ate`` (inclusive) a partir de ``agendamentos``.
+
+    Cada bloco de dias é apagado e regravado numa transação própria. Sem
+    datas, cobre todo o período com agendamentos. Devolve as linhas gravadas.
+    """
+    if desde is None or ate is None:
+        minimo, maximo = (
+            await db.execute(select(func.min(Agendamento.data_hora), func.max(Agendamento.data_hora)))
+        ).one()
+        if minimo is None:
+            return 0
+        desde = desde or _utc(minimo).date()
+        ate = ate or _utc(maximo).date()
+
+    gravadas = 0
+    inicio = desde
+    while inicio <= ate:
+        fim = min(inicio + timedelta(days=dias_por_bloco), ate + timedelta(days=1))
+        resultado = await db.execute(
+            select(
+                Agendamento.profissional_id, Agendamento.data_hora, Agendamento.status, Agendamento.created_at
+            ).where(Agendamento.data_hora >= _inicio_utc(inicio), Agendamento.data_hora < _inicio_utc(fim))
+        )
+        acumulador = Acumulador()
+        for linha in resultado:
+            acumulador.adicionar(contribuicao(*linha))
+        linhas = list(acumulador.linhas())
+
+        await db.execute(
+            delete(EstatisticaAgendaDiaria).where(
+                EstatisticaAgendaDiaria.dia >= inicio, EstatisticaAgendaDiaria.dia < fim
+            )
+        )
+        if linhas:
+            await db.execute(EstatisticaAgendaDiaria.__table__.insert(), linhas)
+        await db.commit()
+        gravadas += len(linhas)
+        logger.info("Estatísticas da agenda: %s a %s, %d linhas", inicio, fim - timedelta(days=1), len(linhas))
+        inicio = fim
+    return gravadas
+
+
+# --- Leitura (painéis) ---
+
+
+def indicadores(totais: dict) -> dict:
+    """Totais somados do rollup mais as taxas derivadas."""
+    total = int(totais.get("total") or 0)
+    contagens = {coluna: int(totais.get(coluna) or 0) for coluna in COLUNA_STATUS.values()}
+    compareceram_ou_faltaram = contagens["realizados"] + contagens["faltas"]
+    ocupados = total - contagens["cancelados"]
+    antecedencia = int(totais.get("antecedencia_minutos") or 0)
+    return {
+        "total": total,
+        **contagens,
+        "taxa_falta": round(contagens["faltas"] / compareceram_ou_faltaram, 4) if compareceram_ou_faltaram else 0.0,
+        "taxa_cancelamento": round(contagens["cancelados"] / total, 4) if total else 0.0,
+        # Fração dos horários reservados (não cancelados) que viraram atendimento
+        "taxa_utilizacao": round(contagens["realizados"] / ocupados, 4) if ocupados else 0.0,
+        "antecedencia_media_horas": round(antecedencia / total / 60, 1) if total else 0.0,
+    }
+
+
+def somas() -> list:
+    return [func.coalesce(func.sum(getattr(EstatisticaAgendaDiaria, coluna)), 0).label(coluna) for coluna in CONTADORES]
+
+
+def filtro_periodo(inicio: date, fim: date):
+    return (EstatisticaAgendaDiaria.dia >= inicio) & (EstatisticaAgendaDiaria.dia <= fim)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    import database
+
+    async with database.AsyncSessionLocal() as db:
+        gravadas = await recalcular(db, desde=args.desde, ate=args.ate, dias_por_bloco=args.bloco)
+    await database.engine.dispose()
+    print(f"Linhas gravadas em {EstatisticaAgendaDiaria.__tablename__}: {gravadas}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primeiro dia (AAAA-MM-DD); padrão: o mais antigo")
+    parser.add_argument("--ate", type=date.fromisoformat, help="Último dia (AAAA-MM-DD); padrão: o mais recente")
+    parser.add_argument("--bloco", type=int, default=DIAS_POR_BLOCO, help="Dias por transação")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
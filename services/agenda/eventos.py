@@ -0,0 +1,66 @@
+"""Eventos de agenda publicados em tempo real (SSE)."""
+
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.agendamento_models import Agendamento, BloqueioAgenda, StatusAgendamento
+from models.tempo_real_models import EventoTempoReal
+from services.realtime.outbox import registrar_evento
+
+# A plataforma atende uma única UBS; o canal raiz reúne a agenda de todos os profissionais
+CANAL_AGENDA = "agenda"
+
+AGENDAMENTO_CRIADO = "agendamento.criado"
+AGENDAMENTO_ATUALIZADO = "agendamento.atualizado"
+AGENDAMENTO_CANCELADO = "agendamento.cancelado"
+BLOQUEIO_CRIADO = "bloqueio.criado"
+BLOQUEIO_REMOVIDO = "bloqueio.removido"
+
+
+def canal_profissional(profissional_id: int) -> str:
+    return f"{CANAL_AGENDA}.profissional.{profissional_id}"
+
+
+def _valor(status) -> str:
+    return status.value if hasattr(status, "value") else str(status)
+
+
+def tipo_atualizacao(agendamento: Agendamento) -> str:
+    if _valor(agendamento.status) == StatusAgendamento.CANCELADO.value:
+        return AGENDAMENTO_CANCELADO
+    return AGENDAMENTO_ATUALIZADO
+
+
+async def registrar_evento_agendamento(
+    db: AsyncSession, tipo: str, agendamento: Agendamento
+) -> EventoTempoReal:
+    # Sem dados do paciente: o cliente recarrega o item pela API autenticada
+    return await registrar_evento(
+        db,
+        canal_profissional(agendamento.profissional_id),
+        tipo,
+        {
+            "agendamento_id": agendamento.id,
+            "profissional_id": agendamento.profissional_id,
+            "data_hora": agendamento.data_hora.isoformat() if agendamento.data_hora else None,
+            "data_hora_fim": agendamento.data_hora_fim.isoformat() if agendamento.data_hora_fim else None,
+            "status": _valor(agendamento.status),
+        },
+    )
+
+
+async def registrar_evento_bloqueio(
+    db: AsyncSession, tipo: str, bloqueio: BloqueioAgenda
+) -> EventoTempoReal:
+    return await registrar_evento(
+        db,
+        canal_profissional(bloqueio.profissional_id),
+        tipo,
+        {
+            "bloqueio_id": bloqueio.id,
+            "profissional_id": bloqueio.profissional_id,
+            "data_inicio": bloqueio.data_inicio.isoformat() if bloqueio.data_inicio else None,
+            "data_fim": bloqueio.data_fim.isoformat() if bloqueio.data_fim else None,
+        },
+    )
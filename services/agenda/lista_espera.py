@@ -0,0 +1,140 @@
+"""Lista de espera: encaixe automático em horários liberados.
+
+Quando um agendamento é cancelado (ou reagendado para outro horário), a rota
+chama :func:`preencher_horario_liberado` antes do commit. O primeiro paciente
+da fila (ordem de chegada) que aceita aquele profissional, cujo cargo e
+janela de datas combinam e que não tem outra consulta que se sobreponha ao
+horário recebe um agendamento novo, tudo na mesma transação do cancelamento.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.agendamento_models import Agendamento, ListaEspera, StatusAgendamento, StatusListaEspera
+from models.auth_models import ProfissionalUbs
+from models.tempo_real_models import EventoTempoReal
+from services.agenda import estatisticas
+from services.agenda.disponibilidade import agenda_do_profissional, horario_disponivel
+from services.agenda.eventos import AGENDAMENTO_CRIADO, registrar_evento_agendamento
+
+logger = logging.getLogger(__name__)
+
+OBSERVACAO_ENCAIXE = "Encaixe automático (lista de espera)"
+
+_STATUS_ATIVOS = (StatusAgendamento.AGENDADO.value, StatusAgendamento.REAGENDADO.value)
+
+
+def consulta_candidatos(
+    profissional_id: int,
+    cargo: str,
+    data_hora: datetime,
+    data_hora_fim: datetime,
+    excluir_paciente_id: Optional[int],
+):
+    """Entradas elegíveis para o horário [data_hora, data_hora_fim), na ordem da fila."""
+    paciente_ocupado = (
+        select(Agendamento.id)
+        .where(
+            Agendamento.paciente_id == ListaEspera.paciente_id,
+            Agendamento.data_hora < data_hora_fim,
+            Agendamento.data_hora_fim > data_hora,
+            Agendamento.status.in_(_STATUS_ATIVOS),
+        )
+        .exists()
+    )
+    consulta = select(ListaEspera).where(
+        ListaEspera.status == StatusListaEspera.AGUARDANDO.value,
+        ListaEspera.cargo == cargo,
+        or_(ListaEspera.profissional_id.is_(None), ListaEspera.profissional_id == profissional_id),
+        or_(ListaEspera.data_inicio.is_(None), ListaEspera.data_inicio <= data_hora),
+        # A consulta inteira precisa caber na janela do paciente
+        or_(ListaEspera.data_fim.is_(None), ListaEspera.data_fim >= data_hora_fim),
+        ~paciente_ocupado,
+    )
+    if excluir_paciente_id is not None:
+        consulta = consulta.where(ListaEspera.paciente_id != excluir_paciente_id)
+    return consulta.order_by(ListaEspera.created_at, ListaEspera.id)
+
+
+async def preencher_horario_liberado(
+    db: AsyncSession,
+    profissional_id: int,
+    data_hora: datetime,
+    excluir_paciente_id: Optional[int] = None,
+    agora: Optional[datetime] = None,
+) -> Optional[EventoTempoReal]:
+    """Encaixa o próximo paciente da fila no horário liberado (sem commit).
+
+    Devolve o evento de tempo real do agendamento criado, para a rota
+    publicar após o commit, ou None se o horário continua livre.
+    """
+    agora = agora or datetime.now(timezone.utc)
+    if data_hora.tzinfo is None:
+        # SQLite devolve datas sem fuso; a aplicação grava sempre em UTC
+        data_hora = data_hora.replace(tzinfo=timezone.utc)
+    if data_hora <= agora:
+        return None
+    # A consulta encaixada tem a duração atual do cargo e precisa caber na jornada
+    agenda = await agenda_do_profissional(db, profissional_id)
+    data_hora_fim = data_hora + agenda.duracao
+    if not agenda.atende(data_hora, data_hora_fim):
+        return None
+    if not await horario_disponivel(db, profissional_id, data_hora, data_hora_fim):
+        return None
+    cargo = await db.scalar(select(ProfissionalUbs.cargo).where(ProfissionalUbs.id == profissional_id))
+    if cargo is None:
+        return None
+
+    # SKIP LOCKED (PostgreSQL): cancelamentos simultâneos não disputam o mesmo paciente
+    entrada = await db.scalar(
+        consulta_candidatos(profissional_id, cargo, data_hora, data_hora_fim, excluir_paciente_id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if entrada is None:
+        return None
+
+    agendamento = Agendamento(
+        paciente_id=entrada.paciente_id,
+        profissional_id=profissional_id,
+        data_hora=data_hora,
+        data_hora_fim=data_hora_fim,
+        observacoes=f"{OBSERVACAO_ENCAIXE}: {entrada.observacoes}" if entrada.observacoes else OBSERVACAO_ENCAIXE,
+        status=StatusAgendamento.AGENDADO,
+        created_at=agora,
+    )
+    # Savepoint: se a constraint de sobreposição (PostgreSQL) recusar o encaixe,
+    # por uma consulta gravada em paralelo, só o encaixe é desfeito e o
+    # cancelamento que liberou o horário segue para o commit.
+    try:
+        async with db.begin_nested():
+            db.add(agendamento)
+            await db.flush()
+    except IntegrityError as exc:
+        logger.warning(
+            "Lista de espera: encaixe no horário %s do profissional %s recusado pelo banco: %s",
+            data_hora.isoformat(),
+            profissional_id,
+            exc.orig,
+        )
+        return None
+
+    entrada.status = StatusListaEspera.ATENDIDO.value
+    entrada.agendamento_id = agendamento.id
+    entrada.atendido_em = agora
+    await estatisticas.registrar_alteracao(db, None, estatisticas.contribuicao_de(agendamento))
+    logger.info(
+        "Lista de espera: entrada %s encaixada no agendamento %s (profissional %s, %s)",
+        entrada.id,
+        agendamento.id,
+        profissional_id,
+        data_hora.isoformat(),
+    )
+    return await registrar_evento_agendamento(db, AGENDAMENTO_CRIADO, agendamento)
@@ -0,0 +1,126 @@
+"""Agendador de tarefas periódicas em segundo plano.
+
+Roda dentro de cada worker (iniciado no lifespan da aplicação). Antes de
+cada rodada o worker tenta obter o lease da tarefa na tabela
+``agendador_leases``; o lease vale pelo intervalo da tarefa, então só um
+worker a executa por intervalo, e se ele cair outro assume quando o lease
+expira. No encerramento os leases são liberados.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.agendador_models import LeaseTarefa
+from services.realtime.outbox import WORKER_ID
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Tarefa:
+    nome: str
+    intervalo: timedelta
+    funcao: Callable[[AsyncSession], Awaitable[object]]
+
+
+def _insert(db: AsyncSession):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(LeaseTarefa)
+
+
+async def adquirir_lease(
+    db: AsyncSession, nome: str, dono: str, duracao: timedelta, agora: Optional[datetime] = None
+) -> bool:
+    """Obtém (ou renova) o lease ``nome`` para ``dono``; False se outro worker o detém."""
+    agora = agora or datetime.now(timezone.utc)
+    expira_em = agora + duracao
+    # UPDATE condicional: atômico entre workers, sem SELECT ... FOR UPDATE
+    resultado = await db.execute(
+        update(LeaseTarefa)
+        .where(LeaseTarefa.nome == nome, (LeaseTarefa.expira_em <= agora) | (LeaseTarefa.dono == dono))
+        .values(dono=dono, expira_em=expira_em)
+    )
+    if not resultado.rowcount:
+        resultado = await db.execute(
+            _insert(db)
+            .values(nome=nome, dono=dono, expira_em=expira_em)
+            .on_conflict_do_nothing(index_elements=["nome"])
+        )
+    await db.commit()
+    return bool(resultado.rowcount)
+
+
+async def liberar_leases(db: AsyncSession, dono: str, agora: Optional[datetime] = None) -> None:
+    await db.execute(
+        update(LeaseTarefa)
+        .where(LeaseTarefa.dono == dono)
+        .values(expira_em=agora or datetime.now(timezone.utc))
+    )
+    await db.commit()
+
+
+class Agendador:
+    def __init__(self, dono: str = WORKER_ID) -> None:
+        self.dono = dono
+        self._tarefas: dict[str, Tarefa] = {}
+        self._loops: list[asyncio.Task] = []
+        self._session_factory = None
+
+    @property
+    def tarefas(self) -> list[Tarefa]:
+        return list(self._tarefas.values())
+
+    def registrar(self, nome: str, intervalo: timedelta, funcao: Callable[[AsyncSession], Awaitable[object]]) -> None:
+        self._tarefas[nome] = Tarefa(nome, intervalo, funcao)
+
+    async def executar(self, tarefa: Tarefa) -> bool:
+        """Uma rodada da tarefa, se este worker obtiver o lease. Devolve se executou."""
+        async with self._session_factory() as db:
+            if not await adquirir_lease(db, tarefa.nome, self.dono, tarefa.intervalo):
+                return False
+            # Limitada ao intervalo: ao fim do lease outro worker pode começar
+            resultado = await asyncio.wait_for(tarefa.funcao(db), timeout=tarefa.intervalo.total_seconds())
+        logger.info("Agendador: %s concluída (%s)", tarefa.nome, resultado)
+        return True
+
+    async def _loop(self, tarefa: Tarefa) -> None:
+        while True:
+            try:
+                await self.executar(tarefa)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Agendador: falha em %s: %s", tarefa.nome, exc)
+            await asyncio.sleep(tarefa.intervalo.total_seconds())
+
+    def iniciar(self, session_factory) -> None:
+        self._session_factory = session_factory
+        self._loops = [asyncio.create_task(self._loop(tarefa)) for tarefa in self._tarefas.values()]
+        logger.info("Agendador iniciado: %s", ", ".join(self._tarefas) or "nenhuma tarefa")
+
+    async def parar(self) -> None:
+        for loop in self._loops:
+            loop.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops = []
+        if self._session_factory is None:
+            return
+        try:
+            async with self._session_factory() as db:
+                await liberar_leases(db, self.dono)
+        except Exception as exc:
+            logger.warning("Agendador: leases não liberados: %s", exc)
+
+
+agendador = Agendador()
@@ -0,0 +1,40 @@
+"""Tarefas periódicas registradas no agendador da aplicação."""
+
+from __future__ import annotations
+
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.agenda.confirmacoes import enviar_confirmacoes
+from services.agendador.agendador import Agendador
+from services.notificacoes.notificadores import criar_notificador
+from services.realtime import outbox
+from services.retencao import login_attempts
+
+INTERVALO_LEMBRETES = timedelta(seconds=int(os.getenv("LEMBRETES_INTERVALO_SEGUNDOS", "300")))
+INTERVALO_LIMPEZA_TEMPO_REAL = timedelta(minutes=10)
+INTERVALO_RETENCAO_LOGIN = timedelta(hours=24)
+
+# Arquivo opcional para onde a retenção copia as tentativas removidas
+ARQUIVO_LOGIN_ATTEMPTS = os.getenv("LOGIN_ATTEMPTS_ARQUIVO")
+
+
+def registrar_tarefas_padrao(agendador: Agendador) -> None:
+    notificador = criar_notificador()
+
+    async def lembretes(db: AsyncSession) -> int:
+        return await enviar_confirmacoes(db, notificador)
+
+    async def limpeza_tempo_real(db: AsyncSession) -> int:
+        return await outbox.limpar_antigos(db)
+
+    async def retencao_login(db: AsyncSession) -> int:
+        arquivo = Path(ARQUIVO_LOGIN_ATTEMPTS) if ARQUIVO_LOGIN_ATTEMPTS else None
+        return (await login_attempts.aplicar_retencao(db, arquivo=arquivo)).removidas
+
+    agendador.registrar("lembretes_confirmacao", INTERVALO_LEMBRETES, lembretes)
+    agendador.registrar("limpeza_eventos_tempo_real", INTERVALO_LIMPEZA_TEMPO_REAL, limpeza_tempo_real)
+    agendador.registrar("retencao_login_attempts", INTERVALO_RETENCAO_LOGIN, retencao_login)
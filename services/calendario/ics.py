@@ -0,0 +1,194 @@
+"""Geração incremental de iCalendar (RFC 5545).
+
+As funções aqui não fazem I/O: recebem dados já carregados e devolvem
+linhas/blocos de texto, permitindo que a rota transmita o feed em streaming.
+"""
+
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+
+PRODID = "-//Plataforma Virtual UBS//Calendario//PT-BR"
+UID_DOMAIN = "plataforma-virtual"
+MAX_OCORRENCIAS = 1000
+
+
+@dataclass
+class CalendarEvent:
+    uid: str
+    inicio: datetime
+    fim: Optional[datetime]
+    resumo: str
+    descricao: Optional[str] = None
+    local: Optional[str] = None
+    dia_inteiro: bool = False
+    status: Optional[str] = None  # CONFIRMED | TENTATIVE | CANCELLED
+    modificado_em: Optional[datetime] = None
+
+
+def as_utc(valor: datetime) -> datetime:
+    """Datas sem fuso vindas do banco (SQLite) são tratadas como UTC."""
+    if valor.tzinfo is None:
+        return valor.replace(tzinfo=timezone.utc)
+    return valor.astimezone(timezone.utc)
+
+
+def _escape(texto: str) -> str:
+    return (
+        texto.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(linha: str) -> str:
+    """Quebra linhas com mais de 75 octetos (continuação inicia com espaço)."""
+    dados = linha.encode("utf-8")
+    if len(dados) <= 75:
+        return linha + "\r\n"
+    partes = []
+    atual = ""
+    tamanho = 0
+    limite = 75
+    for ch in linha:
+        n = len(ch.encode("utf-8"))
+        if tamanho + n > limite:
+            partes.append(atual)
+            atual = ""
+            tamanho = 0
+            limite = 74  # o espaço inicial da continuação conta
+        atual += ch
+        tamanho += n
+    partes.append(atual)
+    return "\r\n ".join(partes) + "\r\n"
+
+
+def _format_datetime(valor: datetime) -> str:
+    return as_utc(valor).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _format_date(valor: date) -> str:
+    return valor.strftime("%Y%m%d")
+
+
+def render_event(evento: CalendarEvent, dtstamp: datetime) -> str:
+    linhas = [
+        "BEGIN:VEVENT",
+        f"UID:{evento.uid}",
+        f"DTSTAMP:{_format_datetime(evento.modificado_em or dtstamp)}",
+    ]
+    if evento.dia_inteiro:
+        inicio = evento.inicio.date()
+        fim = (evento.fim.date() if evento.fim else inicio) + timedelta(days=1)
+        linhas.append(f"DTSTART;VALUE=DATE:{_format_date(inicio)}")
+        linhas.append(f"DTEND;VALUE=DATE:{_format_date(fim)}")
+    else:
+        linhas.append(f"DTSTART:{_format_datetime(evento.inicio)}")
+        if evento.fim and evento.fim > evento.inicio:
+            linhas.append(f"DTEND:{_format_datetime(evento.fim)}")
+    linhas.append(f"SUMMARY:{_escape(evento.resumo)}")
+    if evento.descricao:
+        linhas.append(f"DESCRIPTION:{_escape(evento.descricao)}")
+    if evento.local:
+        linhas.append(f"LOCATION:{_escape(evento.local)}")
+    if evento.status:
+        linhas.append(f"STATUS:{evento.status}")
+    if evento.modificado_em:
+        linhas.append(f"LAST-MODIFIED:{_format_datetime(evento.modificado_em)}")
+    linhas.append("END:VEVENT")
+    return "".join(_fold(linha) for linha in linhas)
+
+
+def iter_calendar(nome: str, eventos: Iterable[CalendarEvent]) -> Iterator[bytes]:
+    """Produz o VCALENDAR em blocos: cabeçalho, um VEVENT por vez e rodapé."""
+    dtstamp = datetime.now(timezone.utc)
+    cabecalho = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(nome)}",
+        "X-PUBLISHED-TTL:PT15M",
+    ]
+    yield "".join(_fold(linha) for linha in cabecalho).encode("utf-8")
+    for evento in eventos:
+        yield render_event(evento, dtstamp).encode("utf-8")
+    yield b"END:VCALENDAR\r\n"
+
+
+def _add_months(valor: datetime, meses: int) -> Optional[datetime]:
+    mes = valor.month - 1 + meses
+    ano = valor.year + mes // 12
+    mes = mes % 12 + 1
+    # Como no RRULE: meses sem o dia (ex.: 31) são pulados
+    if valor.day > calendar.monthrange(ano, mes)[1]:
+        return None
+    return valor.replace(year=ano, month=mes)
+
+
+def expand_occurrences(
+    inicio: datetime,
+    fim: Optional[datetime],
+    recorrencia: str,
+    intervalo: int,
+    recorrencia_fim: Optional[date],
+    janela_inicio: datetime,
+    janela_fim: datetime,
+) -> Iterator[tuple[datetime, Optional[datetime]]]:
+    """Gera (início, fim) de cada ocorrência que intersecta a janela informada."""
+    duracao = (fim - inicio) if fim else None
+    intervalo = max(int(intervalo or 1), 1)
+    recorrencia = (recorrencia or "NONE").upper()
+    limite = janela_fim
+    if recorrencia_fim is not None:
+        fim_recorrencia = datetime.combine(recorrencia_fim, time.max, tzinfo=inicio.tzinfo)
+        limite = min(limite, fim_recorrencia)
+
+    def _intersecta(ocorrencia: datetime) -> bool:
+        termino = ocorrencia + duracao if duracao else ocorrencia
+        return termino >= janela_inicio and ocorrencia <= janela_fim
+
+    if recorrencia == "NONE":
+        if _intersecta(inicio):
+            yield inicio, fim
+        return
+
+    passo_dias = {"DAILY": 1, "WEEKLY": 7}.get(recorrencia)
+    if passo_dias is None and recorrencia != "MONTHLY":
+        if _intersecta(inicio):
+            yield inicio, fim
+        return
+
+    # Avança direto para perto da janela em vez de iterar desde o início
+    n = 0
+    if passo_dias is not None and janela_inicio > inicio:
+        passo = timedelta(days=passo_dias * intervalo)
+        margem = duracao or timedelta(0)
+        n = max(int((janela_inicio - margem - inicio) / passo), 0)
+    elif recorrencia == "MONTHLY" and janela_inicio > inicio:
+        meses = (janela_inicio.year - inicio.year) * 12 + janela_inicio.month - inicio.month
+        n = max(meses // intervalo - 1, 0)
+
+    emitidas = 0
+    while emitidas < MAX_OCORRENCIAS:
+        if passo_dias is not None:
+            ocorrencia = inicio + timedelta(days=passo_dias * intervalo * n)
+        else:
+            ocorrencia = _add_months(inicio, intervalo * n)
+            if ocorrencia is None:
+                n += 1
+                if n > 12 * 100:
+                    return
+                continue
+        if ocorrencia > limite:
+            return
+        if _intersecta(ocorrencia):
+            yield ocorrencia, (ocorrencia + duracao if duracao else None)
+            emitidas += 1
+        n += 1
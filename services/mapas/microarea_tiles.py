@@ -0,0 +1,245 @@
+"""Tiles vetoriais (GeoJSON compacto) das microáreas.
+
+Cada tile segue o esquema XYZ (Web Mercator). As geometrias são projetadas
+uma única vez por versão das microáreas, recortadas ao retângulo do tile
+(com uma pequena margem para evitar costuras) e quantizadas para uma grade
+inteira de ``TILE_EXTENT`` x ``TILE_EXTENT``, como no formato MVT.
+
+Projeção e recorte são CPU puro: a rota chama :func:`build_index` e
+:func:`get_tile` numa thread (``run_in_threadpool``) e só consulta o cache
+de tiles (:func:`cached_tile`) no event loop. O estado do módulo é protegido
+por ``_lock``.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+MAX_ZOOM = 22
+_MAX_CACHED_TILES = 2048
+_MAX_LAT = 85.0511287798
+
+_lock = threading.Lock()
+_tiles: "OrderedDict[tuple, bytes]" = OrderedDict()
+_indices: dict[tuple, "_MicroareaIndex"] = {}
+
+
+@dataclass
+class _ProjectedMicroarea:
+    id: int
+    properties: dict
+    bbox: tuple[float, float, float, float]
+    polygons: list[list[list[tuple[float, float]]]]
+
+
+@dataclass
+class _MicroareaIndex:
+    fingerprint: tuple
+    items: list[_ProjectedMicroarea]
+
+
+def invalidate_tiles() -> None:
+    """Descarta tiles e índices em memória (chamar após escrever microáreas)."""
+    with _lock:
+        _tiles.clear()
+        _indices.clear()
+
+
+def _project(lon: float, lat: float) -> tuple[float, float]:
+    lat = max(min(lat, _MAX_LAT), -_MAX_LAT)
+    x = (lon + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+def _extract_polygons(geojson) -> list:
+    if not isinstance(geojson, dict):
+        return []
+    tipo = geojson.get("type")
+    if tipo == "Feature":
+        return _extract_polygons(geojson.get("geometry"))
+    if tipo == "FeatureCollection":
+        poligonos = []
+        for feature in geojson.get("features") or []:
+            poligonos.extend(_extract_polygons(feature))
+        return poligonos
+    if tipo == "Polygon":
+        return [geojson.get("coordinates") or []]
+    if tipo == "MultiPolygon":
+        return list(geojson.get("coordinates") or [])
+    return []
+
+
+def _project_microarea(row) -> Optional[_ProjectedMicroarea]:
+    poligonos = []
+    min_x = min_y = math.inf
+    max_x = max_y = -math.inf
+    for poligono in _extract_polygons(row.geojson):
+        aneis = []
+        for anel in poligono or []:
+            try:
+                pontos = [_project(float(p[0]), float(p[1])) for p in anel]
+            except (TypeError, ValueError, IndexError):
+                continue
+            if len(pontos) < 3:
+                continue
+            for px, py in pontos:
+                min_x, max_x = min(min_x, px), max(max_x, px)
+                min_y, max_y = min(min_y, py), max(max_y, py)
+            aneis.append(pontos)
+        if aneis:
+            poligonos.append(aneis)
+    if not poligonos:
+        return None
+    return _ProjectedMicroarea(
+        id=row.id,
+        properties={
+            "nome": row.nome,
+            "status": row.status,
+            "populacao": row.populacao,
+            "familias": row.familias,
+            "bairro": row.bairro,
+        },
+        bbox=(min_x, min_y, max_x, max_y),
+        polygons=poligonos,
+    )
+
+
+def get_cached_index(cache_key: tuple, fingerprint: tuple) -> Optional[_MicroareaIndex]:
+    """Retorna o índice projetado se ainda corresponder à versão informada."""
+    with _lock:
+        index = _indices.get(cache_key)
+    if index is not None and index.fingerprint == fingerprint:
+        return index
+    return None
+
+
+def build_index(cache_key: tuple, fingerprint: tuple, rows) -> _MicroareaIndex:
+    items = [p for p in (_project_microarea(r) for r in rows) if p is not None]
+    index = _MicroareaIndex(fingerprint=fingerprint, items=items)
+    with _lock:
+        _indices[cache_key] = index
+    return index
+
+
+def _clip_ring(ring: list[tuple[float, float]], lo: float, hi: float) -> list[tuple[float, float]]:
+    """Sutherland–Hodgman contra o quadrado [lo, hi] x [lo, hi]."""
+    pontos = ring[:-1] if len(ring) > 1 and ring[0] == ring[-1] else list(ring)
+    for eixo, limite, manter_menor in ((0, lo, False), (0, hi, True), (1, lo, False), (1, hi, True)):
+        if not pontos:
+            break
+        entrada = pontos
+        pontos = []
+        anterior = entrada[-1]
+        for atual in entrada:
+            dentro_atual = atual[eixo] <= limite if manter_menor else atual[eixo] >= limite
+            dentro_anterior = anterior[eixo] <= limite if manter_menor else anterior[eixo] >= limite
+            if dentro_atual != dentro_anterior:
+                t = (limite - anterior[eixo]) / (atual[eixo] - anterior[eixo])
+                outro = 1 - eixo
+                cruzamento = [0.0, 0.0]
+                cruzamento[eixo] = limite
+                cruzamento[outro] = anterior[outro] + t * (atual[outro] - anterior[outro])
+                pontos.append((cruzamento[0], cruzamento[1]))
+            if dentro_atual:
+                pontos.append(atual)
+            anterior = atual
+    return pontos
+
+
+def _quantize_ring(pontos: Iterable[tuple[float, float]]) -> Optional[list[list[int]]]:
+    anel: list[list[int]] = []
+    for x, y in pontos:
+        q = [int(round(x)), int(round(y))]
+        if not anel or anel[-1] != q:
+            anel.append(q)
+    if len(anel) > 1 and anel[0] == anel[-1]:
+        anel.pop()
+    if len(anel) < 3:
+        return None
+    area = 0
+    for (x1, y1), (x2, y2) in zip(anel, anel[1:] + anel[:1]):
+        area += x1 * y2 - x2 * y1
+    if area == 0:
+        return None
+    anel.append(list(anel[0]))
+    return anel
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    n = 1 << z
+    return x / n, y / n, (x + 1) / n, (y + 1) / n
+
+
+def render_tile(index: _MicroareaIndex, z: int, x: int, y: int) -> bytes:
+    n = 1 << z
+    min_x, min_y, max_x, max_y = tile_bounds(z, x, y)
+    margem = TILE_BUFFER / TILE_EXTENT / n
+
+    features = []
+    for item in index.items:
+        bx0, by0, bx1, by1 = item.bbox
+        if bx1 < min_x - margem or bx0 > max_x + margem or by1 < min_y - margem or by0 > max_y + margem:
+            continue
+        poligonos = []
+        for poligono in item.polygons:
+            aneis = []
+            for i, anel in enumerate(poligono):
+                local = [((px * n - x) * TILE_EXTENT, (py * n - y) * TILE_EXTENT) for px, py in anel]
+                recortado = _clip_ring(local, -TILE_BUFFER, TILE_EXTENT + TILE_BUFFER)
+                quantizado = _quantize_ring(recortado)
+                if quantizado is None:
+                    if i == 0:
+                        break
+                    continue
+                aneis.append(quantizado)
+            if aneis:
+                poligonos.append(aneis)
+        if not poligonos:
+            continue
+        geometry = (
+            {"type": "Polygon", "coordinates": poligonos[0]}
+            if len(poligonos) == 1
+            else {"type": "MultiPolygon", "coordinates": poligonos}
+        )
+        features.append(
+            {"type": "Feature", "id": item.id, "properties": item.properties, "geometry": geometry}
+        )
+
+    tile = {
+        "type": "FeatureCollection",
+        "extent": TILE_EXTENT,
+        "tile": {"z": z, "x": x, "y": y},
+        "features": features,
+    }
+    return json.dumps(tile, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def cached_tile(cache_key: tuple, fingerprint: tuple, z: int, x: int, y: int) -> Optional[bytes]:
+    chave = (cache_key, fingerprint, z, x, y)
+    with _lock:
+        conteudo = _tiles.get(chave)
+        if conteudo is not None:
+            _tiles.move_to_end(chave)
+        return conteudo
+
+
+def get_tile(cache_key: tuple, index: _MicroareaIndex, z: int, x: int, y: int) -> bytes:
+    conteudo = cached_tile(cache_key, index.fingerprint, z, x, y)
+    if conteudo is not None:
+        return conteudo
+    chave = (cache_key, index.fingerprint, z, x, y)
+    conteudo = render_tile(index, z, x, y)
+    with _lock:
+        _tiles[chave] = conteudo
+        while len(_tiles) > _MAX_CACHED_TILES:
+            _tiles.popitem(last=False)
+    return conteudo
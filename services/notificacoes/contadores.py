@@ -0,0 +1,158 @@
+"""Contadores de pendências exibidos na NavBar (push via SSE).
+
+Cada worker mantém os totais em memória: carrega com um COUNT por categoria
+e depois aplica os deltas publicados pelas rotas de escrita. Os deltas passam
+pelo outbox de tempo real, então chegam a todos os workers.
+
+A contagem lê, no mesmo SELECT (mesmo snapshot), o maior id do outbox; deltas
+com id até esse cursor já estão nos totais e são ignorados. Alterações sem
+delta (SQL direto, evento perdido) são corrigidas pela recontagem que o stream
+faz ao conectar, no máximo uma vez a cada ``NOTIFICACOES_RECONTAGEM_SEGUNDOS``
+por worker. Não é tarefa do agendador porque o lease roda cada tarefa em um
+único worker, e os totais ficam na memória de cada um.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.auth_models import ProfessionalRequest, Usuario
+from models.suporte_feedback_models import StatusFeedback, SuporteFeedback
+from models.tempo_real_models import EventoTempoReal
+from services.realtime.broker import broker
+from services.realtime.outbox import registrar_evento
+
+CANAL_NOTIFICACOES = "notificacoes"
+TIPO_DELTA = "contador.delta"
+
+SOLICITACOES_PROFISSIONAIS = "solicitacoes_profissionais"
+BOAS_VINDAS_PENDENTES = "boas_vindas_pendentes"
+FEEDBACK_PENDENTE = "feedback_pendente"
+
+CATEGORIAS = (SOLICITACOES_PROFISSIONAIS, BOAS_VINDAS_PENDENTES, FEEDBACK_PENDENTE)
+
+INTERVALO_RECONTAGEM = float(os.getenv("NOTIFICACOES_RECONTAGEM_SEGUNDOS", "60"))
+
+
+def canal_categoria(categoria: str) -> str:
+    return f"{CANAL_NOTIFICACOES}.{categoria}"
+
+
+def categorias_visiveis(usuario: Usuario) -> list[str]:
+    """Mesmas regras de acesso das rotas que listam cada pendência."""
+    role = (usuario.role or "USER").upper()
+    if role == "GESTOR":
+        return list(CATEGORIAS)
+    if usuario.cargo == "Recepcionista":
+        return [BOAS_VINDAS_PENDENTES, FEEDBACK_PENDENTE]
+    return []
+
+
+async def _contar(db: AsyncSession) -> tuple[dict[str, int], int]:
+    """Totais por categoria e o cursor do outbox, lidos no mesmo snapshot."""
+    linha = (
+        await db.execute(
+            select(
+                select(func.count(ProfessionalRequest.id))
+                .where(ProfessionalRequest.status == "PENDING")
+                .scalar_subquery(),
+                select(func.count(Usuario.id))
+                .where(
+                    (Usuario.welcome_email_sent.is_(False)) | (Usuario.welcome_email_sent.is_(None)),
+                    Usuario.ativo.is_(True),
+                )
+                .scalar_subquery(),
+                select(func.count(SuporteFeedback.id))
+                .where(SuporteFeedback.status == StatusFeedback.PENDENTE.value)
+                .scalar_subquery(),
+                select(func.max(EventoTempoReal.id)).scalar_subquery(),
+            )
+        )
+    ).one()
+    *totais, cursor = linha
+    return {categoria: int(valor or 0) for categoria, valor in zip(CATEGORIAS, totais)}, int(cursor or 0)
+
+
+class Contadores:
+    def __init__(self) -> None:
+        self._totais: Optional[dict[str, int]] = None
+        self._cursor = 0
+        self._contado_em = 0.0
+        # Deltas que chegam enquanto a contagem está em andamento
+        self._pendentes: Optional[list[dict]] = None
+        self._observando = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def carregado(self) -> bool:
+        return self._totais is not None
+
+    async def carregar(self, db: AsyncSession) -> None:
+        """Faz a contagem inicial (uma consulta) e passa a observar os deltas."""
+        async with self._lock:
+            if self._totais is None:
+                await self._recontar(db)
+
+    async def atualizar(self, db: AsyncSession, agora: Optional[float] = None) -> None:
+        """Carrega ou reconta se a última contagem for mais antiga que ``INTERVALO_RECONTAGEM``."""
+        agora = time.monotonic() if agora is None else agora
+        async with self._lock:
+            if self._totais is None or agora - self._contado_em >= INTERVALO_RECONTAGEM:
+                await self._recontar(db, agora)
+
+    async def _recontar(self, db: AsyncSession, agora: Optional[float] = None) -> None:
+        if not self._observando:
+            broker.observar(CANAL_NOTIFICACOES, self._aplicar)
+            self._observando = True
+        self._pendentes = []
+        try:
+            totais, self._cursor = await _contar(db)
+            self._totais = totais
+            self._contado_em = time.monotonic() if agora is None else agora
+        finally:
+            pendentes, self._pendentes = self._pendentes, None
+            for evento in pendentes:
+                self._aplicar(CANAL_NOTIFICACOES, evento)
+
+    def descarregar(self) -> None:
+        broker.remover_observador(self._aplicar)
+        self._observando = False
+        self._totais = None
+        self._cursor = 0
+        self._contado_em = 0.0
+
+    def snapshot(self, categorias: list[str]) -> dict[str, int]:
+        totais = self._totais or {}
+        return {categoria: totais.get(categoria, 0) for categoria in categorias}
+
+    def _aplicar(self, canal: str, evento: dict) -> None:
+        if self._pendentes is not None:
+            self._pendentes.append(evento)
+            return
+        dados = evento.get("dados") or {}
+        categoria = dados.get("categoria")
+        if self._totais is None or categoria not in self._totais:
+            return
+        if (evento.get("id") or 0) <= self._cursor:
+            # Já contado: gravado antes do snapshot da última contagem
+            return
+        self._totais[categoria] = max(self._totais[categoria] + int(dados.get("delta") or 0), 0)
+
+
+contadores = Contadores()
+
+
+async def registrar_delta(db: AsyncSession, categoria: str, delta: int) -> EventoTempoReal:
+    """Grava o delta na transação corrente; publicar com ``publicar_local`` após o commit."""
+    return await registrar_evento(
+        db,
+        canal_categoria(categoria),
+        TIPO_DELTA,
+        {"categoria": categoria, "delta": delta},
+    )
@@ -0,0 +1,80 @@
+"""Canais de envio dos lembretes de consulta.
+
+O agendador entrega os lembretes em lotes a um :class:`Notificador`; cada
+implementação devolve os ids dos agendamentos efetivamente avisados, e só
+esses são marcados com ``confirmacao_enviada``. O canal é escolhido por
+``NOTIFICADOR_LEMBRETES``:
+
+    log                 registra cada lembrete no log (padrão)
+    arquivo:<caminho>   acrescenta um JSON por linha ao arquivo (testes, integração)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Protocol, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Lembrete:
+    agendamento_id: int
+    data_hora: datetime
+    paciente_nome: str
+    paciente_email: str
+    profissional_nome: Optional[str] = None
+    cargo: Optional[str] = None
+
+
+class Notificador(Protocol):
+    async def enviar(self, lembretes: Sequence[Lembrete]) -> list[int]:
+        """Envia os lembretes; devolve os ids de agendamento enviados."""
+        ...
+
+
+class NotificadorLog:
+    async def enviar(self, lembretes: Sequence[Lembrete]) -> list[int]:
+        for lembrete in lembretes:
+            logger.info(
+                "Lembrete: agendamento %s de %s <%s> em %s com %s (%s)",
+                lembrete.agendamento_id,
+                lembrete.paciente_nome,
+                lembrete.paciente_email,
+                lembrete.data_hora.isoformat(),
+                lembrete.profissional_nome or "-",
+                lembrete.cargo or "-",
+            )
+        return [lembrete.agendamento_id for lembrete in lembretes]
+
+
+class NotificadorArquivo:
+    def __init__(self, caminho: Path) -> None:
+        self.caminho = Path(caminho)
+
+    def _gravar(self, linhas: list[str]) -> None:
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self.caminho.open("a", encoding="utf-8") as arquivo:
+            arquivo.writelines(linhas)
+
+    async def enviar(self, lembretes: Sequence[Lembrete]) -> list[int]:
+        linhas = [json.dumps(asdict(lembrete), default=str, ensure_ascii=False) + "\n" for lembrete in lembretes]
+        # Escrita em disco fora do event loop
+        await asyncio.to_thread(self._gravar, linhas)
+        return [lembrete.agendamento_id for lembrete in lembretes]
+
+
+def criar_notificador(configuracao: Optional[str] = None) -> Notificador:
+    configuracao = configuracao or os.getenv("NOTIFICADOR_LEMBRETES", "log")
+    tipo, _, parametro = configuracao.partition(":")
+    if tipo == "arquivo" and parametro:
+        return NotificadorArquivo(Path(parametro))
+    if tipo != "log":
+        logger.warning("NOTIFICADOR_LEMBRETES inválido (%s); usando o log", configuracao)
+    return NotificadorLog()
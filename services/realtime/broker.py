@@ -0,0 +1,99 @@
+"""Pub/sub em memória para eventos em tempo real (SSE).
+
+Canais são nomes hierárquicos separados por ponto (``agenda.profissional.7``).
+Uma assinatura em ``agenda`` recebe todos os eventos cujo canal começa com
+``agenda.``; uma assinatura em ``agenda.profissional.7`` recebe só os daquele
+profissional.
+
+O broker é local ao processo. A entrega entre workers do gunicorn é feita
+pelo outbox (``services.realtime.outbox``), que grava cada evento no banco e
+republica aqui os eventos gravados por outros processos.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+FILA_MAX = 100
+
+
+def canal_corresponde(canal: str, assinatura: str) -> bool:
+    return canal == assinatura or canal.startswith(assinatura + ".")
+
+
+@dataclass(eq=False)
+class Assinatura:
+    canais: tuple[str, ...]
+    fila: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=FILA_MAX))
+    descartados: int = 0
+
+    def aceita(self, canal: str) -> bool:
+        return any(canal_corresponde(canal, c) for c in self.canais)
+
+
+class Broker:
+    def __init__(self) -> None:
+        self._assinaturas: set[Assinatura] = set()
+        self._observadores: list[tuple[str, Callable[[str, dict], None]]] = []
+
+    @property
+    def total_assinaturas(self) -> int:
+        return len(self._assinaturas)
+
+    @property
+    def tem_observadores(self) -> bool:
+        return bool(self._observadores)
+
+    def observar(self, canal: str, callback: Callable[[str, dict], None]) -> None:
+        """Registra um callback síncrono chamado antes da entrega às filas.
+
+        Usado por estado mantido em memória (ex.: contadores de notificação),
+        que precisa ver todos os eventos do canal mesmo sem clientes conectados.
+        """
+        self._observadores.append((canal, callback))
+
+    def remover_observador(self, callback: Callable[[str, dict], None]) -> None:
+        self._observadores = [(c, cb) for c, cb in self._observadores if cb is not callback]
+
+    def subscribe(self, canais: Iterable[str]) -> Assinatura:
+        assinatura = Assinatura(canais=tuple(canais))
+        self._assinaturas.add(assinatura)
+        return assinatura
+
+    def unsubscribe(self, assinatura: Assinatura) -> None:
+        self._assinaturas.discard(assinatura)
+
+    def publish(self, canal: str, evento: dict) -> int:
+        """Entrega o evento às assinaturas do canal; devolve quantas o receberam.
+
+        Clientes lentos não bloqueiam quem publica: com a fila cheia, o evento
+        mais antigo é descartado (o cliente pode recuperar via Last-Event-ID).
+        """
+        for canal_observado, callback in list(self._observadores):
+            if canal_corresponde(canal, canal_observado):
+                try:
+                    callback(canal, evento)
+                except Exception:
+                    logger.exception("Falha no observador do canal %s", canal_observado)
+
+        entregues = 0
+        for assinatura in list(self._assinaturas):
+            if not assinatura.aceita(canal):
+                continue
+            if assinatura.fila.full():
+                try:
+                    assinatura.fila.get_nowait()
+                    assinatura.descartados += 1
+                except asyncio.QueueEmpty:
+                    pass
+            assinatura.fila.put_nowait(evento)
+            entregues += 1
+        return entregues
+
+
+broker = Broker()
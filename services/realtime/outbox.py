@@ -0,0 +1,167 @@
+"""Outbox transacional dos eventos em tempo real.
+
+Fluxo de escrita: a rota chama :func:`registrar_evento` antes do commit (o
+evento é gravado na mesma transação da alteração) e, após o commit, chama
+:func:`publicar_local` para entregar aos clientes conectados neste worker.
+Os demais workers recebem o evento pelo :func:`poll_loop`, que lê as linhas
+novas gravadas por outras origens.
+
+No PostgreSQL o id vem da sequence na inserção, não no commit: uma transação
+com id menor pode confirmar depois que um id maior já foi lido. Por isso o
+poll guarda as lacunas que o cursor pulou e volta a consultá-las até
+aparecerem ou passarem de ``REALTIME_LACUNA_SEGUNDOS`` (rollbacks deixam
+lacunas permanentes).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.tempo_real_models import EventoTempoReal
+from services.realtime.broker import broker
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[:64]
+
+POLL_INTERVAL = float(os.getenv("REALTIME_POLL_INTERVAL", "2"))
+RETENCAO = timedelta(hours=int(os.getenv("REALTIME_RETENCAO_HORAS", "24")))
+_LOTE_POLL = 500
+ESPERA_LACUNA = float(os.getenv("REALTIME_LACUNA_SEGUNDOS", "30"))
+_MAX_LACUNAS = 1000
+
+
+def serializar(evento: EventoTempoReal) -> dict:
+    return {
+        "id": evento.id,
+        "canal": evento.canal,
+        "tipo": evento.tipo,
+        "dados": evento.payload,
+        "created_at": evento.created_at.isoformat() if evento.created_at else None,
+    }
+
+
+async def registrar_evento(db: AsyncSession, canal: str, tipo: str, payload: dict) -> EventoTempoReal:
+    """Adiciona o evento à transação corrente (faz flush para obter o id)."""
+    # created_at preenchido aqui: o evento é serializado após o commit, sem novo SELECT
+    evento = EventoTempoReal(
+        canal=canal,
+        tipo=tipo,
+        payload=payload,
+        origem=WORKER_ID,
+        created_at=datetime.now(timezone.utc),
+    )
+    db.add(evento)
+    await db.flush()
+    return evento
+
+
+def publicar_local(eventos: Iterable[EventoTempoReal]) -> None:
+    """Entrega aos assinantes deste processo eventos já confirmados no banco."""
+    for evento in eventos:
+        broker.publish(evento.canal, serializar(evento))
+
+
+def _filtro_canais(canais: Iterable[str]):
+    return or_(
+        *[
+            or_(EventoTempoReal.canal == canal, EventoTempoReal.canal.like(f"{canal}.%"))
+            for canal in canais
+        ]
+    )
+
+
+async def eventos_desde(
+    db: AsyncSession,
+    canais: Iterable[str],
+    ultimo_id: int,
+    limite: int = 200,
+) -> list[dict]:
+    """Eventos posteriores a ``ultimo_id`` (reconexão com Last-Event-ID)."""
+    resultado = await db.execute(
+        select(EventoTempoReal)
+        .where(EventoTempoReal.id > ultimo_id, _filtro_canais(canais))
+        .order_by(EventoTempoReal.id)
+        .limit(limite)
+    )
+    return [serializar(e) for e in resultado.scalars().all()]
+
+
+async def ultimo_id(db: AsyncSession) -> int:
+    return (await db.execute(select(func.max(EventoTempoReal.id)))).scalar() or 0
+
+
+async def poll_once(
+    db: AsyncSession,
+    desde_id: int,
+    lacunas: Optional[dict[int, float]] = None,
+    agora: Optional[float] = None,
+) -> int:
+    """Republica localmente eventos gravados por outros workers; devolve o novo cursor.
+
+    ``lacunas`` (id -> instante monotônico em que foi percebida) é atualizado
+    no lugar: ids pulados pelo cursor ainda podem ser confirmados depois.
+    """
+    lacunas = {} if lacunas is None else lacunas
+    agora = time.monotonic() if agora is None else agora
+    filtro = EventoTempoReal.id > desde_id
+    if lacunas:
+        filtro = or_(filtro, EventoTempoReal.id.in_(list(lacunas)))
+    resultado = await db.execute(
+        select(EventoTempoReal).where(filtro).order_by(EventoTempoReal.id).limit(_LOTE_POLL)
+    )
+    for evento in resultado.scalars().all():
+        if evento.id > desde_id:
+            # Ids entre o cursor e este evento ainda não confirmados
+            for faltante in range(max(desde_id + 1, evento.id - _MAX_LACUNAS), evento.id):
+                lacunas.setdefault(faltante, agora)
+            desde_id = evento.id
+        else:
+            lacunas.pop(evento.id, None)
+        if evento.origem != WORKER_ID:
+            broker.publish(evento.canal, serializar(evento))
+    for id_lacuna, percebida in list(lacunas.items()):
+        if agora - percebida > ESPERA_LACUNA:
+            del lacunas[id_lacuna]
+    # Mantém as mais recentes se muitas transações ficarem pendentes
+    for id_lacuna in sorted(lacunas)[:-_MAX_LACUNAS]:
+        del lacunas[id_lacuna]
+    return desde_id
+
+
+async def limpar_antigos(db: AsyncSession, agora: Optional[datetime] = None) -> int:
+    """Remove eventos além da retenção (tarefa do agendador, um worker por vez)."""
+    limite = (agora or datetime.now(timezone.utc)) - RETENCAO
+    resultado = await db.execute(delete(EventoTempoReal).where(EventoTempoReal.created_at < limite))
+    await db.commit()
+    return resultado.rowcount or 0
+
+
+async def poll_loop(session_factory) -> None:
+    """Laço do fallback entre workers (iniciado no lifespan da aplicação)."""
+    cursor: Optional[int] = None
+    lacunas: dict[int, float] = {}
+    while True:
+        try:
+            async with session_factory() as db:
+                if cursor is None or (broker.total_assinaturas == 0 and not broker.tem_observadores):
+                    # Sem clientes nem observadores só acompanha o cursor (consulta pelo índice da PK)
+                    cursor = await ultimo_id(db)
+                    lacunas.clear()
+                else:
+                    cursor = await poll_once(db, cursor, lacunas)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Falha ao ler eventos em tempo real: %s", exc)
+        await asyncio.sleep(POLL_INTERVAL)
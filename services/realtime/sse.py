@@ -0,0 +1,90 @@
+"""Formatação e laço de envio de Server-Sent Events."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Iterable, Optional
+
+from fastapi import Request
+
+from services.realtime.broker import Assinatura, broker
+
+HEARTBEAT_SEGUNDOS = 15
+RETRY_MS = 3000
+# Ids lembrados por stream para descartar duplicados (pendentes x assinatura)
+_MAX_IDS_ENVIADOS = 1000
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Desliga o buffer de proxies (nginx/Render) para o evento sair na hora
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(evento: dict, nome: Optional[str] = None) -> str:
+    linhas = []
+    if evento.get("id") is not None:
+        linhas.append(f"id: {evento['id']}")
+    linhas.append(f"event: {nome or evento.get('tipo', 'message')}")
+    dados = json.dumps(evento, ensure_ascii=False, separators=(",", ":"))
+    linhas.append(f"data: {dados}")
+    return "\n".join(linhas) + "\n\n"
+
+
+def parse_last_event_id(request: Request) -> int:
+    valor = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    try:
+        return max(int(valor), 0) if valor else 0
+    except ValueError:
+        return 0
+
+
+async def stream_eventos(
+    request: Request,
+    assinatura: Assinatura,
+    pendentes: Iterable[dict] = (),
+    heartbeat: float = HEARTBEAT_SEGUNDOS,
+) -> AsyncIterator[str]:
+    """Envia os eventos pendentes e depois os que chegarem na assinatura.
+
+    A assinatura deve ser criada antes de buscar os pendentes para não perder
+    eventos no intervalo; duplicados são descartados pelo id. Os ids não chegam
+    em ordem (commits fora de ordem, eventos de outros workers repassados pelo
+    ``poll_loop``), então o descarte usa os últimos ids enviados, não o maior.
+    """
+    enviados: set[int] = set()
+    ordem: deque[int] = deque()
+
+    def lembrar(evento_id: int) -> None:
+        enviados.add(evento_id)
+        ordem.append(evento_id)
+        if len(ordem) > _MAX_IDS_ENVIADOS:
+            enviados.discard(ordem.popleft())
+
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        for evento in pendentes:
+            if evento.get("id") is not None:
+                lembrar(evento["id"])
+            yield format_sse(evento)
+
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Comentário SSE mantém a conexão viva atrás de proxies
+                yield ": keep-alive\n\n"
+                continue
+            evento_id = evento.get("id")
+            if evento_id is not None:
+                if evento_id in enviados:
+                    continue
+                lembrar(evento_id)
+            yield format_sse(evento)
+    finally:
+        broker.unsubscribe(assinatura)
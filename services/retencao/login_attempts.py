@@ -0,0 +1,332 @@
+"""Retenção do histórico de tentativas de login (``login_attempts``).
+
+Cada login, com sucesso ou não, grava uma linha; ataques de força bruta
+fazem a tabela crescer sem limite. Linhas mais antigas que
+``LOGIN_ATTEMPTS_RETENCAO_DIAS`` (padrão 90) são removidas em lotes de
+``LOGIN_ATTEMPTS_LOTE`` linhas, cada lote na sua própria transação, para não
+segurar locks por muito tempo. Opcionalmente as linhas removidas são antes
+gravadas num arquivo NDJSON comprimido (gzip, um JSON por linha; execuções
+seguintes acrescentam ao mesmo arquivo).
+
+No PostgreSQL a tabela pode ser particionada por mês (script opcional na
+seção 11.1 de ``scripts_banco_incremental.md``). Nesse caso partições
+inteiramente expiradas são descartadas com ``DROP TABLE`` (instantâneo, sem
+gerar linhas mortas) e as partições dos próximos meses são criadas
+antecipadamente. Se a tarefa ficar parada por mais que ``MESES_A_FRENTE``
+meses, as tentativas desse período caem na partição padrão; ao criar a
+partição do mês, essas linhas são movidas para ela.
+
+Uso:
+    python -m services.retencao.login_attempts --dias 90 --arquivo exports/login_attempts.ndjson.gz
+    python -m services.retencao.login_attempts --simular
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Optional
+
+from sqlalchemy import and_, delete, func, or_, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.auth_models import LoginAttempt
+
+logger = logging.getLogger(__name__)
+
+RETENCAO_DIAS = int(os.getenv("LOGIN_ATTEMPTS_RETENCAO_DIAS", "90"))
+LOTE = int(os.getenv("LOGIN_ATTEMPTS_LOTE", "5000"))
+MESES_A_FRENTE = 3
+
+TABELA = LoginAttempt.__tablename__
+_PARTICAO = re.compile(rf"^{TABELA}_p(\d{{4}})(\d{{2}})$")
+_COLUNAS = ", ".join(coluna.name for coluna in LoginAttempt.__table__.columns)
+
+
+@dataclass
+class ResultadoRetencao:
+    limite: datetime
+    arquivadas: int = 0
+    removidas: int = 0
+    particoes_removidas: list[str] = field(default_factory=list)
+    particoes_criadas: list[str] = field(default_factory=list)
+
+
+def limite_retencao(dias: int, agora: Optional[datetime] = None) -> datetime:
+    return (agora or datetime.now(timezone.utc)) - timedelta(days=dias)
+
+
+def serializar(tentativa: LoginAttempt) -> dict:
+    return {
+        "id": tentativa.id,
+        "email": tentativa.email,
+        "ip_address": tentativa.ip_address,
+        "sucesso": tentativa.sucesso,
+        "motivo": tentativa.motivo,
+        "created_at": tentativa.created_at.isoformat() if tentativa.created_at else None,
+    }
+
+
+# --- Partições mensais (PostgreSQL) ---
+
+
+def _inicio_mes(data: datetime) -> datetime:
+    return datetime(data.year, data.month, 1, tzinfo=timezone.utc)
+
+
+def _mes_seguinte(inicio: datetime) -> datetime:
+    return datetime(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def nome_particao(inicio: datetime) -> str:
+    return f"{TABELA}_p{inicio.year:04d}{inicio.month:02d}"
+
+
+def limites_particao(nome: str) -> Optional[tuple[datetime, datetime]]:
+    """Intervalo [início, fim) de uma partição mensal pelo nome; None se não for mensal."""
+    casado = _PARTICAO.match(nome)
+    if not casado:
+        return None
+    inicio = datetime(int(casado.group(1)), int(casado.group(2)), 1, tzinfo=timezone.utc)
+    return inicio, _mes_seguinte(inicio)
+
+
+async def tabela_particionada(db: AsyncSession) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    resultado = await db.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tabela)"),
+        {"tabela": TABELA},
+    )
+    return resultado.first() is not None
+
+
+async def listar_particoes(db: AsyncSession) -> list[str]:
+    resultado = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:tabela) ORDER BY c.relname"
+        ),
+        {"tabela": TABELA},
+    )
+    return [linha[0] for linha in resultado.all()]
+
+
+async def particao_padrao(db: AsyncSession) -> Optional[str]:
+    resultado = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partdefid "
+            "WHERE p.partrelid = to_regclass(:tabela)"
+        ),
+        {"tabela": TABELA},
+    )
+    return resultado.scalar()
+
+
+async def _criar_particao(db: AsyncSession, nome: str, inicio: datetime, fim: datetime, padrao: Optional[str]) -> None:
+    valores = f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+    periodo = {"inicio": inicio, "fim": fim}
+    no_mes = "created_at >= :inicio AND created_at < :fim"
+    ocupada = padrao is not None and (
+        await db.execute(text(f"SELECT 1 FROM {padrao} WHERE {no_mes} LIMIT 1"), periodo)
+    ).first() is not None
+    if not ocupada:
+        await db.execute(text(f"CREATE TABLE IF NOT EXISTS {nome} PARTITION OF {TABELA} {valores}"))
+        return
+
+    # Com linhas do mês na partição padrão o CREATE ... PARTITION OF falha. A tabela
+    # é criada avulsa, recebe as linhas e só então é anexada; o lock impede que novas
+    # tentativas caiam na partição padrão antes do ATTACH (que a revalida)
+    await db.execute(text(f"LOCK TABLE {padrao} IN ACCESS EXCLUSIVE MODE"))
+    await db.execute(text(f"CREATE TABLE {nome} (LIKE {TABELA} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    movidas = await db.execute(
+        text(
+            f"WITH movidas AS (DELETE FROM {padrao} WHERE {no_mes} RETURNING {_COLUNAS}) "
+            f"INSERT INTO {nome} ({_COLUNAS}) SELECT {_COLUNAS} FROM movidas"
+        ),
+        periodo,
+    )
+    await db.execute(text(f"ALTER TABLE {TABELA} ATTACH PARTITION {nome} {valores}"))
+    logger.warning("Partição %s criada com %d linhas movidas de %s", nome, movidas.rowcount or 0, padrao)
+
+
+async def garantir_particoes(
+    db: AsyncSession, meses_a_frente: int = MESES_A_FRENTE, agora: Optional[datetime] = None
+) -> list[str]:
+    """Cria as partições do mês corrente e dos próximos meses que ainda não existem."""
+    existentes = set(await listar_particoes(db))
+    padrao = await particao_padrao(db)
+    criadas = []
+    inicio = _inicio_mes(agora or datetime.now(timezone.utc))
+    for _ in range(meses_a_frente + 1):
+        fim = _mes_seguinte(inicio)
+        nome = nome_particao(inicio)
+        if nome not in existentes:
+            await _criar_particao(db, nome, inicio, fim, padrao)
+            criadas.append(nome)
+        inicio = fim
+    await db.commit()
+    return criadas
+
+
+# --- Retenção ---
+
+
+async def _arquivar_e_remover(
+    db: AsyncSession,
+    filtro,
+    lote: int,
+    arquivo: Optional[IO[str]],
+    remover: bool,
+) -> tuple[int, int]:
+    """Percorre em lotes as linhas do ``filtro``; arquiva e, se pedido, remove."""
+    arquivadas = removidas = 0
+    cursor: Optional[tuple[datetime, int]] = None
+    while True:
+        # Paginação por (created_at, id): percorre ix_login_attempts_created_at, sem varrer a PK
+        consulta = select(LoginAttempt).where(filtro)
+        if cursor is not None:
+            consulta = consulta.where(
+                or_(
+                    LoginAttempt.created_at > cursor[0],
+                    and_(LoginAttempt.created_at == cursor[0], LoginAttempt.id > cursor[1]),
+                )
+            )
+        resultado = await db.execute(consulta.order_by(LoginAttempt.created_at, LoginAttempt.id).limit(lote))
+        linhas = resultado.scalars().all()
+        if not linhas:
+            break
+        # Valores copiados antes do commit (que expira os objetos)
+        cursor = (linhas[-1].created_at, linhas[-1].id)
+        if arquivo is not None:
+            arquivo.writelines(json.dumps(serializar(t), ensure_ascii=False) + "\n" for t in linhas)
+            # Só remove depois que o lote está no arquivo
+            arquivo.flush()
+            arquivadas += len(linhas)
+        if remover:
+            ids = [t.id for t in linhas]
+            removido = await db.execute(
+                delete(LoginAttempt)
+                .where(LoginAttempt.id.in_(ids), filtro)
+                .execution_options(synchronize_session=False)
+            )
+            removidas += removido.rowcount or 0
+        await db.commit()
+        db.expunge_all()
+        # Entre lotes cede o event loop (e os locks) às requisições
+        await asyncio.sleep(0)
+    return arquivadas, removidas
+
+
+async def aplicar_retencao(
+    db: AsyncSession,
+    dias: Optional[int] = None,
+    arquivo: Optional[Path] = None,
+    lote: Optional[int] = None,
+    agora: Optional[datetime] = None,
+    simular: bool = False,
+) -> ResultadoRetencao:
+    """Arquiva (opcional) e remove as tentativas anteriores ao limite de retenção.
+
+    Com ``simular`` apenas conta o que seria removido.
+    """
+    dias = RETENCAO_DIAS if dias is None else dias
+    lote = lote or LOTE
+    agora = agora or datetime.now(timezone.utc)
+    resultado = ResultadoRetencao(limite=limite_retencao(dias, agora))
+    expiradas = LoginAttempt.created_at < resultado.limite
+
+    if simular:
+        resultado.removidas = await db.scalar(select(func.count()).select_from(LoginAttempt).where(expiradas)) or 0
+        return resultado
+
+    saida = None
+    if arquivo is not None:
+        arquivo.parent.mkdir(parents=True, exist_ok=True)
+        saida = gzip.open(arquivo, "at", encoding="utf-8")
+    try:
+        if await tabela_particionada(db):
+            try:
+                resultado.particoes_criadas = await garantir_particoes(db, agora=agora)
+            except DBAPIError as exc:
+                # Sem as partições novas as tentativas seguem na partição padrão; a
+                # retenção continua (o DROP das expiradas e a remoção por linhas)
+                await db.rollback()
+                logger.error("Partições de %s não criadas: %s", TABELA, exc.orig)
+            for nome in await listar_particoes(db):
+                limites = limites_particao(nome)
+                if limites is None or limites[1] > resultado.limite:
+                    continue
+                inicio, fim = limites
+                if saida is not None:
+                    arquivadas, _ = await _arquivar_e_remover(
+                        db,
+                        (LoginAttempt.created_at >= inicio) & (LoginAttempt.created_at < fim),
+                        lote,
+                        saida,
+                        remover=False,
+                    )
+                    resultado.arquivadas += arquivadas
+                await db.execute(text(f"DROP TABLE IF EXISTS {nome}"))
+                await db.commit()
+                resultado.particoes_removidas.append(nome)
+
+        arquivadas, removidas = await _arquivar_e_remover(db, expiradas, lote, saida, remover=True)
+        resultado.arquivadas += arquivadas
+        resultado.removidas += removidas
+    finally:
+        if saida is not None:
+            saida.close()
+
+    logger.info(
+        "Retenção de %s: limite %s, %d removidas, %d arquivadas, partições removidas %s",
+        TABELA,
+        resultado.limite.isoformat(),
+        resultado.removidas,
+        resultado.arquivadas,
+        resultado.particoes_removidas or "-",
+    )
+    return resultado
+
+
+async def _main(args: argparse.Namespace) -> None:
+    import database
+
+    async with database.AsyncSessionLocal() as db:
+        resultado = await aplicar_retencao(
+            db, dias=args.dias, arquivo=args.arquivo, lote=args.lote, simular=args.simular
+        )
+    await database.engine.dispose()
+    acao = "seriam removidas" if args.simular else "removidas"
+    print(f"Limite: {resultado.limite.isoformat()} ({args.dias} dias)")
+    print(f"Linhas {acao}: {resultado.removidas}")
+    if args.arquivo and not args.simular:
+        print(f"Linhas arquivadas em {args.arquivo}: {resultado.arquivadas}")
+    if resultado.particoes_removidas:
+        print(f"Partições removidas: {', '.join(resultado.particoes_removidas)}")
+    if resultado.particoes_criadas:
+        print(f"Partições criadas: {', '.join(resultado.particoes_criadas)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, default=RETENCAO_DIAS, help="Janela de retenção em dias")
+    parser.add_argument("--arquivo", type=Path, help="Arquiva as linhas removidas neste .ndjson.gz")
+    parser.add_argument("--lote", type=int, default=LOTE, help="Linhas por transação")
+    parser.add_argument("--simular", action="store_true", help="Só conta as linhas expiradas")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
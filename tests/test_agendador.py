@@ -0,0 +1,165 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models.agendador_models import LeaseTarefa
+from models.agendamento_models import Agendamento, StatusAgendamento
+from models.auth_models import ProfissionalUbs, Usuario
+from services.agenda.confirmacoes import enviar_confirmacoes
+from services.agendador.agendador import Agendador, adquirir_lease
+from services.notificacoes.notificadores import NotificadorArquivo, NotificadorLog, criar_notificador
+
+AGORA = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def async_session(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _criar_agenda(db: AsyncSession) -> dict[str, int]:
+    paciente = Usuario(nome="Paciente", email="paciente@exemplo.com", senha="x", cpf="52998224725", role="USER")
+    medico = Usuario(nome="Dra. Ana", email="ana@exemplo.com", senha="x", cpf="11144477735", role="PROFISSIONAL")
+    db.add_all([paciente, medico])
+    await db.flush()
+    prof = ProfissionalUbs(usuario_id=medico.id, cargo="Medico", registro_professional="CRM-1")
+    db.add(prof)
+    await db.flush()
+
+    casos = {
+        "amanha": (timedelta(hours=20), StatusAgendamento.AGENDADO, None),
+        "reagendado": (timedelta(hours=30), StatusAgendamento.REAGENDADO, None),
+        "depois_de_amanha": (timedelta(hours=40), StatusAgendamento.AGENDADO, None),
+        "ja_avisado": (timedelta(hours=10), StatusAgendamento.AGENDADO, AGORA - timedelta(days=1)),
+        "cancelado": (timedelta(hours=12), StatusAgendamento.CANCELADO, None),
+        "fora_da_janela": (timedelta(days=5), StatusAgendamento.AGENDADO, None),
+        "passado": (-timedelta(hours=2), StatusAgendamento.AGENDADO, None),
+    }
+    ids = {}
+    for nome, (delta, status, confirmacao) in casos.items():
+        agendamento = Agendamento(
+            paciente_id=paciente.id,
+            profissional_id=prof.id,
+            data_hora=AGORA + delta,
+            status=status,
+            confirmacao_enviada=confirmacao,
+        )
+        db.add(agendamento)
+        await db.flush()
+        ids[nome] = agendamento.id
+    await db.commit()
+    return ids
+
+
+async def test_confirmations_are_sent_in_batches_with_one_update_each(engine, async_session, tmp_path):
+    async with async_session() as db:
+        ids = await _criar_agenda(db)
+
+    updates = []
+
+    def _contar(_conn, _cursor, statement, _params, _context, _executemany):
+        if statement.lstrip().upper().startswith("UPDATE AGENDAMENTOS"):
+            updates.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _contar)
+    arquivo = tmp_path / "lembretes.ndjson"
+    async with async_session() as db:
+        enviados = await enviar_confirmacoes(
+            db, NotificadorArquivo(arquivo), antecedencia=timedelta(hours=48), lote=2, agora=AGORA
+        )
+    event.remove(engine.sync_engine, "before_cursor_execute", _contar)
+
+    assert enviados == 3
+    assert len(updates) == 2  # lotes de 2 + 1
+
+    lembretes = [json.loads(linha) for linha in arquivo.read_text(encoding="utf-8").splitlines()]
+    assert [l["agendamento_id"] for l in lembretes] == [ids["amanha"], ids["reagendado"], ids["depois_de_amanha"]]
+    assert lembretes[0]["paciente_email"] == "paciente@exemplo.com"
+    assert lembretes[0]["profissional_nome"] == "Dra. Ana"
+
+    async with async_session() as db:
+        confirmados = set(
+            (await db.scalars(select(Agendamento.id).where(Agendamento.confirmacao_enviada.is_not(None)))).all()
+        )
+        assert confirmados == {ids["amanha"], ids["reagendado"], ids["depois_de_amanha"], ids["ja_avisado"]}
+        # Nova rodada não reenvia
+        reenvio = await enviar_confirmacoes(
+            db, NotificadorArquivo(arquivo), antecedencia=timedelta(hours=48), agora=AGORA
+        )
+        assert reenvio == 0
+
+
+async def test_partial_delivery_only_marks_sent_appointments(async_session):
+    async with async_session() as db:
+        ids = await _criar_agenda(db)
+
+    class NotificadorParcial:
+        async def enviar(self, lembretes):
+            return [lembretes[0].agendamento_id]
+
+    async with async_session() as db:
+        enviados = await enviar_confirmacoes(db, NotificadorParcial(), antecedencia=timedelta(hours=48), agora=AGORA)
+        assert enviados == 1
+        pendentes = (
+            await db.scalars(
+                select(Agendamento.id).where(
+                    Agendamento.confirmacao_enviada.is_(None), Agendamento.id.in_([ids["reagendado"], ids["amanha"]])
+                )
+            )
+        ).all()
+        assert pendentes == [ids["reagendado"]]
+
+
+async def test_lease_allows_a_single_owner_until_expiry(async_session):
+    duracao = timedelta(minutes=5)
+    async with async_session() as db:
+        assert await adquirir_lease(db, "lembretes", "worker-a", duracao, agora=AGORA)
+        assert not await adquirir_lease(db, "lembretes", "worker-b", duracao, agora=AGORA)
+        # O dono renova; outro worker assume após a expiração
+        assert await adquirir_lease(db, "lembretes", "worker-a", duracao, agora=AGORA + timedelta(minutes=1))
+        assert await adquirir_lease(db, "lembretes", "worker-b", duracao, agora=AGORA + timedelta(minutes=7))
+        lease = await db.get(LeaseTarefa, "lembretes")
+        assert lease.dono == "worker-b"
+
+
+async def test_scheduler_runs_each_job_on_one_worker_and_releases_leases(async_session):
+    execucoes = []
+
+    async def tarefa(db):
+        execucoes.append("rodou")
+        return len(execucoes)
+
+    worker_a, worker_b = Agendador(dono="worker-a"), Agendador(dono="worker-b")
+    for worker in (worker_a, worker_b):
+        worker.registrar("relatorio", timedelta(hours=1), tarefa)
+        worker._session_factory = async_session
+
+    assert await worker_a.executar(worker_a.tarefas[0])
+    assert not await worker_b.executar(worker_b.tarefas[0])
+    assert execucoes == ["rodou"]
+
+    # Encerrar o worker A libera o lease para o próximo
+    await worker_a.parar()
+    assert await worker_b.executar(worker_b.tarefas[0])
+    assert execucoes == ["rodou", "rodou"]
+
+
+def test_notifier_is_chosen_by_configuration(tmp_path):
+    assert isinstance(criar_notificador("log"), NotificadorLog)
+    notificador = criar_notificador(f"arquivo:{tmp_path / 'saida.ndjson'}")
+    assert isinstance(notificador, NotificadorArquivo)
+    assert isinstance(criar_notificador("desconhecido"), NotificadorLog)
@@ -0,0 +1,39 @@
+from benchmarks.run_benchmarks import Amostra, comparar, resumir
+
+
+def _resultado(**cenarios):
+    return {"cenarios": cenarios}
+
+
+def _cenario(p50=10.0, p95=20.0, sql=3, erros=0):
+    return {"p50_ms": p50, "p95_ms": p95, "sql_por_requisicao": sql, "erros": erros}
+
+
+def test_resumir_uses_worst_statement_count_and_counts_errors():
+    amostras = [Amostra(10.0, 2.0, 3, 200), Amostra(30.0, 4.0, 5, 200), Amostra(20.0, 3.0, 3, 409)]
+    resumo = resumir(amostras)
+    assert resumo["p50_ms"] == 20.0
+    assert resumo["p95_ms"] == 30.0
+    assert resumo["sql_por_requisicao"] == 5
+    assert resumo["erros"] == 1
+
+
+def test_comparar_tolerates_latency_noise_within_threshold():
+    baseline = _resultado(agenda=_cenario())
+    atual = _resultado(agenda=_cenario(p50=12.0, p95=24.0))
+    assert comparar(atual, baseline, tolerancia=0.25) == []
+
+
+def test_comparar_flags_latency_statement_and_error_regressions():
+    baseline = _resultado(agenda=_cenario(), login=_cenario())
+    atual = _resultado(agenda=_cenario(p50=14.0, sql=4), login=_cenario(erros=2))
+    regressoes = comparar(atual, baseline, tolerancia=0.25)
+    assert any(r.startswith("agenda: p50_ms") for r in regressoes)
+    assert any(r.startswith("agenda: sql_por_requisicao 4 > 3") for r in regressoes)
+    assert any(r.startswith("login: 2 respostas") for r in regressoes)
+    assert not any("p95_ms" in r for r in regressoes)
+
+
+def test_comparar_ignores_scenarios_not_measured():
+    baseline = _resultado(exportar_pdf=_cenario())
+    assert comparar(_resultado(), baseline, tolerancia=0.1) == []
@@ -0,0 +1,220 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from routes import calendario_routes
+from services.calendario.ics import expand_occurrences
+from database import Base, get_db
+from models.auth_models import Usuario, ProfissionalUbs
+from models.agendamento_models import Agendamento, BloqueioAgenda, StatusAgendamento
+from utils.jwt_handler import create_access_token
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "USER") -> Usuario:
+    user = Usuario(
+        nome="Usuario Teste",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def _create_profissional(session: AsyncSession, email: str, cargo: str = "Medico") -> ProfissionalUbs:
+    user = await _create_user(session, email=email, role="PROFISSIONAL")
+    prof = ProfissionalUbs(
+        usuario_id=user.id,
+        cargo=cargo,
+        registro_professional=f"REG-{user.id}",
+        ativo=True,
+    )
+    session.add(prof)
+    await session.commit()
+    await session.refresh(prof)
+    return prof
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def test_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, async_session
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+async def _create_ubs(client: AsyncClient, headers: dict) -> int:
+    payload = {
+        "nome_ubs": "UBS Centro",
+        "cnes": "1234567",
+        "area_atuacao": "Centro",
+    }
+    response = await client.post("/api/ubs", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_expand_weekly_occurrences_inside_window():
+    inicio = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+    ocorrencias = list(
+        expand_occurrences(
+            inicio,
+            inicio + timedelta(hours=2),
+            "WEEKLY",
+            2,
+            None,
+            datetime(2026, 3, 1, tzinfo=timezone.utc),
+            datetime(2026, 3, 31, tzinfo=timezone.utc),
+        )
+    )
+    assert [o[0].date().isoformat() for o in ocorrencias] == ["2026-03-02", "2026-03-16", "2026-03-30"]
+    assert all(fim - ini == timedelta(hours=2) for ini, fim in ocorrencias)
+
+
+def test_expand_monthly_skips_missing_days():
+    inicio = datetime(2026, 1, 31, 8, 0, tzinfo=timezone.utc)
+    ocorrencias = list(
+        expand_occurrences(
+            inicio,
+            None,
+            "MONTHLY",
+            1,
+            datetime(2026, 6, 30).date(),
+            datetime(2026, 1, 1, tzinfo=timezone.utc),
+            datetime(2026, 12, 31, tzinfo=timezone.utc),
+        )
+    )
+    assert [o[0].month for o in ocorrencias] == [1, 3, 5]
+
+
+@pytest.mark.asyncio
+async def test_profissional_feed_streams_events_and_revalidates(test_client):
+    client, async_session = test_client
+    calendario_routes._versoes_feed.clear()
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_ics@example.com")
+        prof_user = await session.get(Usuario, prof.usuario_id)
+        paciente = await _create_user(session, "paciente_ics@example.com")
+        amanha = datetime.now(timezone.utc) + timedelta(days=1)
+        session.add(
+            Agendamento(
+                paciente_id=paciente.id,
+                profissional_id=prof.id,
+                data_hora=amanha,
+                status=StatusAgendamento.AGENDADO.value,
+            )
+        )
+        session.add(
+            BloqueioAgenda(
+                profissional_id=prof.id,
+                data_inicio=amanha + timedelta(days=1),
+                data_fim=amanha + timedelta(days=1, hours=4),
+                motivo="Capacitação; turno, manhã",
+            )
+        )
+        await session.commit()
+        headers = _auth_headers(prof_user)
+        paciente_headers = _auth_headers(paciente)
+
+    feeds = await client.get("/api/calendario/feeds", headers=headers)
+    assert feeds.status_code == 200
+    url = feeds.json()["profissional_url"]
+    assert url.startswith(f"/api/calendario/profissional/{prof.id}.ics?token=")
+
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    body = response.text
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    assert body.count("BEGIN:VEVENT") == 2
+    assert "paciente" not in body.lower()
+    assert "SUMMARY:Agenda bloqueada" in body
+    assert "DESCRIPTION:Capacitação\\; turno\\, manhã" in body
+
+    cached = await client.get(url, headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert cached.status_code == 304
+    cached_etag = await client.get(url, headers={"If-None-Match": response.headers["etag"]})
+    assert cached_etag.status_code == 304
+
+    # O token de calendário não dá acesso às demais rotas da API
+    calendar_token = url.split("token=", 1)[1]
+    other = await client.get(
+        f"/api/agenda/profissional/{prof.id}",
+        params={"start_date": amanha.isoformat(), "end_date": amanha.isoformat()},
+        headers={"Authorization": f"Bearer {calendar_token}"},
+    )
+    assert other.status_code == 401
+
+    forbidden = await client.get(f"/api/calendario/profissional/{prof.id}.ics", headers=paciente_headers)
+    assert forbidden.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_ubs_feed_expands_recurrence_and_detects_deletion(test_client):
+    client, async_session = test_client
+    calendario_routes._versoes_feed.clear()
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_ics@example.com", role="GESTOR")
+        headers = _auth_headers(gestor)
+
+    ubs_id = await _create_ubs(client, headers)
+    inicio = (datetime.now(timezone.utc) + timedelta(days=1)).replace(hour=12, minute=0, second=0, microsecond=0)
+    created = await client.post(
+        "/api/cronograma",
+        json={
+            "ubs_id": ubs_id,
+            "titulo": "Sala de vacina",
+            "tipo": "SALA_VACINA",
+            "inicio": inicio.isoformat(),
+            "fim": (inicio + timedelta(hours=4)).isoformat(),
+            "dia_inteiro": False,
+            "recorrencia": "WEEKLY",
+            "recorrencia_intervalo": 1,
+            "recorrencia_fim": (inicio + timedelta(days=20)).date().isoformat(),
+        },
+        headers=headers,
+    )
+    assert created.status_code == 201
+
+    response = await client.get(f"/api/calendario/ubs/{ubs_id}.ics", headers=headers)
+    assert response.status_code == 200
+    assert response.text.count("BEGIN:VEVENT") == 3
+    assert f"UID:cronograma-{created.json()['id']}-{inicio:%Y%m%d}@" in response.text
+
+    last_modified = response.headers["last-modified"]
+    deleted = await client.delete(f"/api/cronograma/{created.json()['id']}", headers=headers)
+    assert deleted.status_code == 204
+
+    # Exclusões não alteram max(updated_at); ainda assim o feed deve ser reenviado
+    after = await client.get(
+        f"/api/calendario/ubs/{ubs_id}.ics",
+        headers={**headers, "If-Modified-Since": last_modified},
+    )
+    assert after.status_code == 200
+    assert "BEGIN:VEVENT" not in after.text
@@ -0,0 +1,45 @@
+import pytest
+
+from database import pool_settings
+from utils.metrics import NullPoolMedido, QueuePoolMedido
+
+
+def test_default_profile_keeps_free_tier_values():
+    settings = pool_settings({})
+    assert settings["pool_size"] == 2
+    assert settings["max_overflow"] == 3
+    assert settings["pool_timeout"] == 10
+    assert settings["poolclass"] is QueuePoolMedido
+
+
+def test_auto_profile_splits_connections_between_workers():
+    env = {"DB_POOL_PROFILE": "auto", "WEB_CONCURRENCY": "4", "DB_MAX_CONNECTIONS": "100"}
+    settings = pool_settings(env)
+    # (100 - 3 reservadas) // 4 workers = 24 conexões por worker
+    assert settings["pool_size"] + settings["max_overflow"] == 24
+    assert settings["pool_timeout"] == 30
+
+    env["DB_EXPECTED_CONCURRENCY"] = "8"
+    settings = pool_settings(env)
+    assert (settings["pool_size"], settings["max_overflow"]) == (8, 16)
+
+    env["DB_POOL_SIZE"] = "5"
+    assert pool_settings(env)["pool_size"] == 5
+
+
+def test_pgbouncer_profile_disables_local_pool_and_prepared_statements():
+    settings = pool_settings({"DB_POOL_PROFILE": "pgbouncer"})
+    assert settings["poolclass"] is NullPoolMedido
+    assert settings["connect_args"] == {"prepare_threshold": None}
+    assert "pool_size" not in settings
+
+
+def test_pgbouncer_profile_warns_about_ignored_pool_variables(caplog):
+    settings = pool_settings({"DB_POOL_PROFILE": "pgbouncer", "DB_POOL_SIZE": "10", "DB_POOL_TIMEOUT": "5"})
+    assert "pool_size" not in settings
+    assert "ignorando DB_POOL_SIZE, DB_POOL_TIMEOUT" in caplog.text
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        pool_settings({"DB_POOL_PROFILE": "grande"})
@@ -0,0 +1,310 @@
+import pytest
+from datetime import datetime, time, timedelta, timezone
+
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from database import Base, get_db, get_read_db
+from models.auth_models import Cargo, Usuario, ProfissionalUbs
+from models.agendamento_models import Agendamento, BloqueioAgenda, JornadaProfissional, StatusAgendamento
+from services.agenda.disponibilidade import grade, proximos_horarios
+from utils.jwt_handler import create_access_token
+
+# Segunda-feira; 08:00 em Brasília (UTC-3)
+SEGUNDA = datetime(2026, 10, 19, 11, 0, tzinfo=timezone.utc)
+UTC_MENOS_3 = timezone(timedelta(hours=-3))
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "USER") -> Usuario:
+    user = Usuario(
+        nome=f"Usuario {email.split('@')[0]}",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def _create_profissional(
+    session: AsyncSession, email: str, cargo: str = "Medico", ativo: bool = True
+) -> ProfissionalUbs:
+    user = await _create_user(session, email=email, role="PROFISSIONAL")
+    prof = ProfissionalUbs(
+        usuario_id=user.id,
+        cargo=cargo,
+        registro_professional=f"REG-{user.id}",
+        ativo=ativo,
+    )
+    session.add(prof)
+    await session.commit()
+    await session.refresh(prof)
+    return prof
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def test_client(engine):
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, async_session
+
+    app.dependency_overrides.clear()
+
+
+def test_grid_skips_weekends_and_lunch_break():
+    expediente = [(time(8, 0), time(9, 0)), (time(13, 0), time(14, 0))]
+    jornada = {dia: expediente for dia in range(5)}
+    sexta = datetime(2026, 10, 23, 0, 0, tzinfo=timezone.utc)
+    horarios = list(grade(sexta, sexta + timedelta(days=4), jornada, timedelta(minutes=30), UTC_MENOS_3))
+    locais = [h.astimezone(UTC_MENOS_3).strftime("%a %H:%M") for h in horarios]
+    assert locais == [
+        "Fri 08:00", "Fri 08:30", "Fri 13:00", "Fri 13:30",
+        "Mon 08:00", "Mon 08:30", "Mon 13:00", "Mon 13:30",
+    ]
+
+
+async def test_earliest_slots_merge_professionals_with_fixed_queries(engine, test_client):
+    _, async_session = test_client
+    async with async_session() as session:
+        paciente = await _create_user(session, "paciente_disp@example.com")
+        ocupado = await _create_profissional(session, "ocupado@example.com")
+        bloqueado = await _create_profissional(session, "bloqueado@example.com")
+        livre = await _create_profissional(session, "livre@example.com")
+        session.add_all([
+            Agendamento(paciente_id=paciente.id, profissional_id=ocupado.id, data_hora=SEGUNDA,
+                        status=StatusAgendamento.AGENDADO),
+            Agendamento(paciente_id=paciente.id, profissional_id=livre.id, data_hora=SEGUNDA,
+                        status=StatusAgendamento.CANCELADO),
+            Agendamento(paciente_id=paciente.id, profissional_id=livre.id, data_hora=SEGUNDA + timedelta(minutes=30),
+                        status=StatusAgendamento.REAGENDADO),
+            # Bloqueio inclusivo nas duas pontas, como na checagem de um horário
+            BloqueioAgenda(profissional_id=bloqueado.id, data_inicio=SEGUNDA - timedelta(hours=1),
+                           data_fim=SEGUNDA + timedelta(hours=1), motivo="Reunião"),
+        ])
+        await session.commit()
+
+    consultas = []
+
+    def _contar(_conn, _cursor, statement, _params, _context, _executemany):
+        consultas.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _contar)
+    async with async_session() as session:
+        horarios = await proximos_horarios(
+            session, [ocupado.id, bloqueado.id, livre.id], SEGUNDA, SEGUNDA + timedelta(hours=3), limite=6
+        )
+    event.remove(engine.sync_engine, "before_cursor_execute", _contar)
+
+    # Durações, jornadas e (uma só) ocupação de todos os profissionais
+    assert len(consultas) == 3
+    meia_hora = timedelta(minutes=30)
+    assert [(h.data_hora, h.profissional_id) for h in horarios] == [
+        (SEGUNDA, livre.id),
+        (SEGUNDA + meia_hora, ocupado.id),
+        (SEGUNDA + 2 * meia_hora, ocupado.id),
+        (SEGUNDA + 2 * meia_hora, livre.id),
+        (SEGUNDA + 3 * meia_hora, ocupado.id),
+        (SEGUNDA + 3 * meia_hora, bloqueado.id),
+    ]
+    assert all(h.data_hora_fim == h.data_hora + meia_hora for h in horarios)
+
+
+async def test_slots_follow_cargo_duration_and_working_hours(test_client):
+    _, async_session = test_client
+    async with async_session() as session:
+        paciente = await _create_user(session, "paciente_jornada@example.com")
+        session.add(Cargo(nome="Psicologo", duracao_padrao_minutos=50))
+        psicologo = await _create_profissional(session, "psicologo@example.com", cargo="Psicologo")
+        # Segunda das 08:00 às 11:00 (horário local)
+        session.add(JornadaProfissional(
+            profissional_id=psicologo.id, dia_semana=0, hora_inicio=time(8, 0), hora_fim=time(11, 0)
+        ))
+        # Consulta de 30 min às 09:00 local sobrepõe o horário das 08:50
+        session.add(Agendamento(paciente_id=paciente.id, profissional_id=psicologo.id,
+                                data_hora=SEGUNDA + timedelta(hours=1), status=StatusAgendamento.AGENDADO))
+        await session.commit()
+
+    async with async_session() as session:
+        horarios = await proximos_horarios(session, [psicologo.id], SEGUNDA, SEGUNDA + timedelta(days=8), limite=3)
+
+    locais = [h.data_hora.astimezone(UTC_MENOS_3).strftime("%a %H:%M") for h in horarios]
+    # 08:00, [08:50 ocupado], 09:40 e a segunda-feira seguinte (terça a domingo sem jornada)
+    assert locais == ["Mon 08:00", "Mon 09:40", "Mon 08:00"]
+    assert horarios[2].data_hora.date() == (SEGUNDA + timedelta(days=7)).date()
+    assert horarios[0].data_hora_fim - horarios[0].data_hora == timedelta(minutes=50)
+
+
+async def test_availability_endpoint_lists_active_professionals_of_cargo(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        paciente = await _create_user(session, "paciente_rota@example.com")
+        dentista = await _create_profissional(session, "dentista@example.com", cargo="Dentista")
+        await _create_profissional(session, "inativo@example.com", cargo="Dentista", ativo=False)
+        await _create_profissional(session, "medico@example.com", cargo="Medico")
+    headers = _auth_headers(paciente)
+
+    response = await client.get(
+        "/api/agendamentos/disponibilidade", params={"cargo": "Dentista", "limite": 3}, headers=headers
+    )
+    assert response.status_code == 200
+    horarios = response.json()
+    assert len(horarios) == 3
+    assert {h["profissional_id"] for h in horarios} == {dentista.id}
+    assert horarios[0]["nome_profissional"] == "Usuario dentista"
+    datas = [datetime.fromisoformat(h["data_hora"]) for h in horarios]
+    assert datas == sorted(datas)
+    assert datas[0] > datetime.now(timezone.utc)
+
+    response = await client.get(
+        "/api/agendamentos/disponibilidade", params={"cargo": "Fisioterapeuta"}, headers=headers
+    )
+    assert response.json() == []
+
+    alem_da_janela = (datetime.now(timezone.utc) + timedelta(days=20)).isoformat()
+    response = await client.get(
+        "/api/agendamentos/disponibilidade",
+        params={"cargo": "Dentista", "start": alem_da_janela},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+
+def _dia_util_local(hora: int, minuto: int = 0) -> datetime:
+    # Próximo dia útil a pelo menos 2 dias, no horário local informado (UTC-3)
+    dia = datetime.now(UTC_MENOS_3) + timedelta(days=2)
+    while dia.weekday() >= 5:
+        dia += timedelta(days=1)
+    return dia.replace(hour=hora, minute=minuto, second=0, microsecond=0).astimezone(timezone.utc)
+
+
+async def test_booking_conflicts_on_interval_overlap(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_sobreposicao@example.com")
+        primeiro = await _create_user(session, "primeiro_sobreposicao@example.com")
+        segundo = await _create_user(session, "segundo_sobreposicao@example.com")
+    dez = _dia_util_local(10)
+
+    response = await client.post(
+        "/api/agendamentos",
+        json={"profissional_id": prof.id, "data_hora": dez.isoformat()},
+        headers=_auth_headers(primeiro),
+    )
+    assert response.status_code == 200
+    assert datetime.fromisoformat(response.json()["data_hora_fim"]).replace(tzinfo=timezone.utc) == dez + timedelta(minutes=30)
+
+    # 10:05 começa dentro da consulta das 10:00
+    response = await client.post(
+        "/api/agendamentos",
+        json={"profissional_id": prof.id, "data_hora": (dez + timedelta(minutes=5)).isoformat()},
+        headers=_auth_headers(segundo),
+    )
+    assert response.status_code == 409
+    # 09:45 termina dentro dela
+    response = await client.post(
+        "/api/agendamentos",
+        json={"profissional_id": prof.id, "data_hora": (dez - timedelta(minutes=15)).isoformat()},
+        headers=_auth_headers(segundo),
+    )
+    assert response.status_code == 409
+    # 10:30 encosta no fim (intervalo aberto à direita)
+    response = await client.post(
+        "/api/agendamentos",
+        json={"profissional_id": prof.id, "data_hora": (dez + timedelta(minutes=30)).isoformat()},
+        headers=_auth_headers(segundo),
+    )
+    assert response.status_code == 200
+
+
+async def test_cargo_duration_and_working_hours_apply_to_booking(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_jornada@example.com", role="GESTOR")
+        paciente = await _create_user(session, "paciente_cargo@example.com")
+        outro = await _create_user(session, "outro_jornada@example.com")
+        prof = await _create_profissional(session, "fisio@example.com", cargo="Fisioterapeuta")
+        prof_usuario = await session.get(Usuario, prof.usuario_id)
+
+    response = await client.post(
+        "/api/cargos", json={"nome": "Fisioterapeuta", "duracao_padrao_minutos": 30}, headers=_auth_headers(gestor)
+    )
+    assert response.status_code == 201
+    response = await client.patch(
+        f"/api/cargos/{response.json()['id']}", json={"duracao_padrao_minutos": 45}, headers=_auth_headers(gestor)
+    )
+    assert response.json()["duracao_padrao_minutos"] == 45
+
+    faixas = [
+        {"dia_semana": dia, "hora_inicio": "08:00", "hora_fim": "12:00"} for dia in range(5)
+    ]
+    url_jornada = f"/api/agenda/profissional/{prof.id}/jornada"
+    response = await client.put(url_jornada, json=faixas, headers=_auth_headers(outro))
+    assert response.status_code == 403
+    response = await client.put(
+        url_jornada,
+        json=[{"dia_semana": 0, "hora_inicio": "08:00", "hora_fim": "10:00"},
+              {"dia_semana": 0, "hora_inicio": "09:00", "hora_fim": "11:00"}],
+        headers=_auth_headers(prof_usuario),
+    )
+    assert response.status_code == 400
+    response = await client.put(url_jornada, json=faixas, headers=_auth_headers(prof_usuario))
+    assert response.status_code == 200
+
+    response = await client.get(url_jornada, headers=_auth_headers(paciente))
+    jornada = response.json()
+    assert jornada["duracao_consulta_minutos"] == 45
+    assert len(jornada["faixas"]) == 5
+
+    # 11:30 + 45 min passa do fim da faixa (12:00)
+    response = await client.post(
+        "/api/agendamentos",
+        json={"profissional_id": prof.id, "data_hora": _dia_util_local(11, 30).isoformat()},
+        headers=_auth_headers(paciente),
+    )
+    assert response.status_code == 400
+    response = await client.post(
+        "/api/agendamentos",
+        json={"profissional_id": prof.id, "data_hora": _dia_util_local(11, 15).isoformat()},
+        headers=_auth_headers(paciente),
+    )
+    assert response.status_code == 200
+    inicio = datetime.fromisoformat(response.json()["data_hora"])
+    fim = datetime.fromisoformat(response.json()["data_hora_fim"])
+    assert fim - inicio == timedelta(minutes=45)
+
+    # Reagendar mantém a duração e respeita a jornada
+    response = await client.patch(
+        f"/api/agendamentos/{response.json()['id']}",
+        json={"data_hora": _dia_util_local(14).isoformat()},
+        headers=_auth_headers(paciente),
+    )
+    assert response.status_code == 400
@@ -0,0 +1,198 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from database import Base, get_db
+from models.auth_models import Usuario, ProfissionalUbs
+from models.agendamento_models import Agendamento, EstatisticaAgendaDiaria, StatusAgendamento
+from services.agenda import estatisticas
+from utils.jwt_handler import create_access_token
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "USER") -> Usuario:
+    user = Usuario(
+        nome=f"Usuario {email.split('@')[0]}",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def _create_profissional(session: AsyncSession, email: str, cargo: str = "Medico") -> ProfissionalUbs:
+    user = await _create_user(session, email=email, role="PROFISSIONAL")
+    prof = ProfissionalUbs(
+        usuario_id=user.id,
+        cargo=cargo,
+        registro_professional=f"REG-{user.id}",
+        ativo=True,
+    )
+    session.add(prof)
+    await session.commit()
+    await session.refresh(prof)
+    return prof
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def test_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, async_session
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+def _periodo(dias: int = 14) -> dict:
+    hoje = datetime.now(timezone.utc).date()
+    return {"inicio": hoje.isoformat(), "fim": (hoje + timedelta(days=dias)).isoformat()}
+
+
+async def _rollup(async_session) -> list[dict]:
+    async with async_session() as session:
+        result = await session.execute(
+            select(EstatisticaAgendaDiaria).order_by(EstatisticaAgendaDiaria.dia, EstatisticaAgendaDiaria.profissional_id)
+        )
+        return [
+            {"dia": e.dia, "profissional_id": e.profissional_id, **{c: getattr(e, c) for c in estatisticas.CONTADORES}}
+            for e in result.scalars().all()
+            if e.total
+        ]
+
+
+@pytest.mark.asyncio
+async def test_write_paths_keep_daily_rollup_in_sync(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_stats@example.com")
+        paciente = await _create_user(session, "paciente_stats@example.com")
+        gestor = await _create_user(session, "gestor_stats@example.com", role="GESTOR")
+
+    amanha = (datetime.now(timezone.utc) + timedelta(days=1)).replace(hour=12, minute=0, second=0, microsecond=0)
+    ids = []
+    for horas in (0, 1, 2):
+        response = await client.post(
+            "/api/agendamentos",
+            json={"profissional_id": prof.id, "data_hora": (amanha + timedelta(hours=horas)).isoformat()},
+            headers=_auth_headers(paciente),
+        )
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+
+    headers_gestor = _auth_headers(gestor)
+    await client.patch(f"/api/agendamentos/{ids[0]}", json={"status": "FALTOU"}, headers=headers_gestor)
+    await client.patch(f"/api/agendamentos/{ids[1]}", json={"status": "CANCELADO"}, headers=headers_gestor)
+    # Reagendamento para outro dia move a contagem entre as linhas do rollup
+    await client.patch(
+        f"/api/agendamentos/{ids[2]}",
+        json={"data_hora": (amanha + timedelta(days=1)).isoformat()},
+        headers=headers_gestor,
+    )
+
+    response = await client.get("/api/agenda/estatisticas", params=_periodo(), headers=headers_gestor)
+    assert response.status_code == 200
+    data = response.json()
+    totais = data["totais"]
+    assert (totais["total"], totais["faltas"], totais["cancelados"], totais["reagendados"]) == (3, 1, 1, 1)
+    assert totais["taxa_falta"] == 1.0
+    assert totais["taxa_cancelamento"] == pytest.approx(0.3333)
+    assert totais["antecedencia_media_horas"] > 0
+    assert [(d["dia"], d["total"]) for d in data["por_dia"]] == [
+        (amanha.date().isoformat(), 2),
+        ((amanha + timedelta(days=1)).date().isoformat(), 1),
+    ]
+
+    # O recálculo a partir de agendamentos chega aos mesmos totais
+    incremental = await _rollup(async_session)
+    async with async_session() as session:
+        await estatisticas.recalcular(session)
+    assert await _rollup(async_session) == incremental
+
+
+@pytest.mark.asyncio
+async def test_statistics_by_professional_and_cargo(test_client):
+    client, async_session = test_client
+    agora = datetime.now(timezone.utc).replace(microsecond=0)
+    async with async_session() as session:
+        medico = await _create_profissional(session, "medico_stats@example.com", cargo="Medico")
+        dentista = await _create_profissional(session, "dentista_stats@example.com", cargo="Dentista")
+        paciente = await _create_user(session, "paciente_cargo@example.com")
+        gestor = await _create_user(session, "gestor_cargo@example.com", role="GESTOR")
+        for prof, status, horas in (
+            (medico, StatusAgendamento.REALIZADO, 1),
+            (medico, StatusAgendamento.REALIZADO, 2),
+            (medico, StatusAgendamento.FALTOU, 3),
+            (dentista, StatusAgendamento.CANCELADO, 1),
+            (dentista, StatusAgendamento.REALIZADO, 2),
+        ):
+            session.add(
+                Agendamento(
+                    paciente_id=paciente.id,
+                    profissional_id=prof.id,
+                    data_hora=agora + timedelta(days=2, hours=horas),
+                    status=status,
+                    created_at=agora,
+                )
+            )
+        await session.commit()
+        await estatisticas.recalcular(session)
+
+    headers = _auth_headers(gestor)
+    response = await client.get("/api/agenda/estatisticas/profissionais", params=_periodo(), headers=headers)
+    assert response.status_code == 200
+    por_profissional = {p["profissional_id"]: p for p in response.json()}
+    assert por_profissional[medico.id]["cargo"] == "Medico"
+    assert por_profissional[medico.id]["taxa_utilizacao"] == pytest.approx(0.6667)
+    assert por_profissional[dentista.id]["taxa_utilizacao"] == 1.0
+
+    response = await client.get("/api/agenda/estatisticas/cargos", params=_periodo(), headers=headers)
+    por_cargo = {c["cargo"]: c for c in response.json()}
+    assert por_cargo["Medico"]["total"] == 3
+    assert por_cargo["Dentista"]["taxa_cancelamento"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_statistics_restricted_to_gestor_and_valid_period(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_restrito@example.com")
+        gestor = await _create_user(session, "gestor_restrito@example.com", role="GESTOR")
+        prof_user = await session.get(Usuario, prof.usuario_id)
+
+    response = await client.get("/api/agenda/estatisticas", headers=_auth_headers(prof_user))
+    assert response.status_code == 403
+
+    response = await client.get(
+        "/api/agenda/estatisticas", params={"inicio": "2026-02-01", "fim": "2026-01-01"}, headers=_auth_headers(gestor)
+    )
+    assert response.status_code == 400
+
+    response = await client.get("/api/agenda/estatisticas/cargos", headers=_auth_headers(gestor))
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,348 @@
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from database import Base, get_db
+from models.auth_models import Usuario
+from models.gestao_equipes_models import Microarea
+from utils import geojson_utils
+from utils.jwt_handler import create_access_token
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "GESTOR") -> Usuario:
+    user = Usuario(
+        nome="Usuario Teste",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def test_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, async_session
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+async def _create_ubs(client: AsyncClient, headers: dict) -> int:
+    payload = {
+        "nome_ubs": "UBS Centro",
+        "cnes": "1234567",
+        "area_atuacao": "Centro",
+    }
+    response = await client.post("/api/ubs", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def _square(x0: float, y0: float, size: float = 0.01, clockwise: bool = False) -> list:
+    ring = [[x0, y0], [x0 + size, y0], [x0 + size, y0 + size], [x0, y0 + size], [x0, y0]]
+    return list(reversed(ring)) if clockwise else ring
+
+
+def _feature(nome: str, ring: list, **props) -> dict:
+    return {
+        "type": "Feature",
+        "properties": {"nome": nome, **props},
+        "geometry": {"type": "Polygon", "coordinates": [ring]},
+    }
+
+
+def _upload(collection: dict) -> dict:
+    return {"file": ("microareas.geojson", json.dumps(collection).encode(), "application/geo+json")}
+
+
+def test_iter_feature_collection_small_chunks(monkeypatch):
+    monkeypatch.setattr(geojson_utils, "_CHUNK_SIZE", 7)
+    collection = {
+        "type": "FeatureCollection",
+        "name": "parnaiba",
+        "features": [_feature(f"MA {i}", _square(-41.7 + i, -2.9), populacao=1234567) for i in range(5)],
+        "crs": {"type": "name", "properties": {"name": "EPSG:4326"}},
+    }
+    features = list(geojson_utils.iter_feature_collection(io.BytesIO(json.dumps(collection).encode())))
+    assert [f["properties"]["nome"] for f in features] == [f"MA {i}" for i in range(5)]
+    assert features[0]["properties"]["populacao"] == 1234567
+
+
+def test_normalize_geometry_closes_and_orients_ring():
+    ring = [[-41.7, -2.9, 12.0], [-41.7, -2.8], [-41.6, -2.8], [-41.6, -2.9]]
+    geometry = geojson_utils.normalize_geometry({"type": "Polygon", "coordinates": [ring]})
+    exterior = geometry["coordinates"][0]
+    assert exterior[0] == exterior[-1]
+    assert all(len(p) == 2 for p in exterior)
+    assert geojson_utils._signed_area(exterior) > 0
+
+
+@pytest.mark.asyncio
+async def test_import_microareas_upserts_by_nome(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_geo@example.com")
+        headers = _auth_headers(gestor)
+
+    ubs_id = await _create_ubs(client, headers)
+    existing = await client.post(
+        "/api/gestao-equipes/microareas",
+        json={"ubs_id": ubs_id, "nome": "MA 01", "populacao": 10, "familias": 2},
+        headers=headers,
+    )
+    assert existing.status_code == 201
+
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            _feature("MA 01", _square(-41.77, -2.90, clockwise=True), populacao=900, familias=300),
+            _feature("MA 02", _square(-41.76, -2.90), populacao="450", familias=120, status="descoberta"),
+        ],
+    }
+    response = await client.post(
+        "/api/gestao-equipes/microareas/import",
+        data={"ubs_id": str(ubs_id)},
+        files=_upload(collection),
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"total": 2, "criadas": 1, "atualizadas": 1}
+
+    async with async_session() as session:
+        rows = (await session.execute(select(Microarea).order_by(Microarea.nome))).scalars().all()
+    assert [(m.nome, m.populacao, m.familias, m.status) for m in rows] == [
+        ("MA 01", 900, 300, "COBERTA"),
+        ("MA 02", 450, 120, "DESCOBERTA"),
+    ]
+    assert geojson_utils._signed_area(rows[0].geojson["coordinates"][0]) > 0
+
+
+@pytest.mark.asyncio
+async def test_import_microareas_reports_duplicated_existing_names(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_geo_dup@example.com")
+        headers = _auth_headers(gestor)
+
+    ubs_id = await _create_ubs(client, headers)
+    for populacao in (10, 20):
+        response = await client.post(
+            "/api/gestao-equipes/microareas",
+            json={"ubs_id": ubs_id, "nome": "MA 01", "populacao": populacao, "familias": 2},
+            headers=headers,
+        )
+        assert response.status_code == 201
+
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            _feature("MA 01", _square(-41.77, -2.90), populacao=900, familias=300),
+            _feature("MA 02", _square(-41.76, -2.90), populacao=450, familias=120),
+        ],
+    }
+    response = await client.post(
+        "/api/gestao-equipes/microareas/import",
+        data={"ubs_id": str(ubs_id)},
+        files=_upload(collection),
+        headers=headers,
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"]["nomes"] == ["MA 01"]
+
+    async with async_session() as session:
+        rows = (await session.execute(select(Microarea).order_by(Microarea.id))).scalars().all()
+    assert [(m.nome, m.populacao) for m in rows] == [("MA 01", 10), ("MA 01", 20)]
+
+
+@pytest.mark.asyncio
+async def test_import_microareas_rejects_invalid_feature(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_geo_invalid@example.com")
+        headers = _auth_headers(gestor)
+
+    ubs_id = await _create_ubs(client, headers)
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            _feature("MA 01", _square(-41.77, -2.90)),
+            _feature("MA 02", [[-41.7, -2.9], [-41.6, -2.9]]),
+            {"type": "Feature", "properties": {}, "geometry": None},
+        ],
+    }
+    response = await client.post(
+        "/api/gestao-equipes/microareas/import",
+        data={"ubs_id": str(ubs_id)},
+        files=_upload(collection),
+        headers=headers,
+    )
+    assert response.status_code == 400
+    errors = response.json()["detail"]["errors"]
+    assert [e["indice"] for e in errors] == [1, 2]
+
+    async with async_session() as session:
+        count = len((await session.execute(select(Microarea))).scalars().all())
+    assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_import_microareas_reports_malformed_properties_as_row_errors(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_geo_props@example.com")
+        headers = _auth_headers(gestor)
+
+    ubs_id = await _create_ubs(client, headers)
+    geometria = {"type": "Polygon", "coordinates": [_square(-41.76, -2.90)]}
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            _feature("MA 01", _square(-41.77, -2.90)),
+            {"type": "Feature", "properties": ["MA 02"], "geometry": geometria},
+            {"type": "Feature", "properties": "MA 03", "geometry": geometria},
+            {"type": "Feature", "properties": {"nome": 5}, "geometry": None},
+        ],
+    }
+    response = await client.post(
+        "/api/gestao-equipes/microareas/import",
+        data={"ubs_id": str(ubs_id)},
+        files=_upload(collection),
+        headers=headers,
+    )
+    assert response.status_code == 400
+    errors = response.json()["detail"]["errors"]
+    assert [(e["indice"], e["nome"]) for e in errors] == [(1, None), (2, None), (3, "5")]
+    assert errors[0]["motivo"] == "'properties' deve ser um objeto"
+
+
+def _tile_for(lon: float, lat: float, z: int) -> tuple[int, int]:
+    from services.mapas.microarea_tiles import _project
+
+    px, py = _project(lon, lat)
+    return int(px * (1 << z)), int(py * (1 << z))
+
+
+@pytest.mark.asyncio
+async def test_microarea_tiles_clip_and_revalidate(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_tiles@example.com")
+        headers = _auth_headers(gestor)
+
+    ubs_id = await _create_ubs(client, headers)
+    created = await client.post(
+        "/api/gestao-equipes/microareas",
+        json={
+            "ubs_id": ubs_id,
+            "nome": "MA Tile",
+            "geojson": {"type": "Polygon", "coordinates": [_square(-41.78, -2.91, size=0.02)]},
+        },
+        headers=headers,
+    )
+    assert created.status_code == 201
+    microarea_id = created.json()["id"]
+
+    z = 16
+    x, y = _tile_for(-41.77, -2.90, z)
+    url = f"/api/gestao-equipes/microareas/tiles/{z}/{x}/{y}?ubs_id={ubs_id}"
+    response = await client.get(url, headers=headers)
+    assert response.status_code == 200
+    tile = response.json()
+    assert tile["extent"] == 4096
+    assert [f["id"] for f in tile["features"]] == [microarea_id]
+    coords = [c for ring in tile["features"][0]["geometry"]["coordinates"] for p in ring for c in p]
+    assert all(isinstance(c, int) and -64 <= c <= 4096 + 64 for c in coords)
+
+    etag = response.headers["etag"]
+    cached = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    far_x, far_y = _tile_for(-40.0, -5.0, z)
+    empty = await client.get(f"/api/gestao-equipes/microareas/tiles/{z}/{far_x}/{far_y}", headers=headers)
+    assert empty.status_code == 200
+    assert empty.json()["features"] == []
+
+    removed = await client.delete(f"/api/gestao-equipes/microareas/{microarea_id}", headers=headers)
+    assert removed.status_code == 204
+    after = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.json()["features"] == []
+
+
+@pytest.mark.asyncio
+async def test_microarea_tiles_change_version_on_edits_within_same_timestamp(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_tiles_versao@example.com")
+        headers = _auth_headers(gestor)
+
+    ubs_id = await _create_ubs(client, headers)
+    created = await client.post(
+        "/api/gestao-equipes/microareas",
+        json={
+            "ubs_id": ubs_id,
+            "nome": "MA Versao",
+            "geojson": {"type": "Polygon", "coordinates": [_square(-41.78, -2.91, size=0.02)]},
+        },
+        headers=headers,
+    )
+    microarea_id = created.json()["id"]
+    carimbo = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+    async def _fixar_carimbo():
+        # Simula a resolução de um segundo do CURRENT_TIMESTAMP no SQLite
+        async with async_session() as session:
+            await session.execute(
+                update(Microarea).where(Microarea.id == microarea_id).values(updated_at=carimbo)
+            )
+            await session.commit()
+
+    await _fixar_carimbo()
+    z = 16
+    x, y = _tile_for(-41.77, -2.90, z)
+    url = f"/api/gestao-equipes/microareas/tiles/{z}/{x}/{y}?ubs_id={ubs_id}"
+    etags = [(await client.get(url, headers=headers)).headers["etag"]]
+
+    for tamanho in (0.015, 0.018):
+        response = await client.patch(
+            f"/api/gestao-equipes/microareas/{microarea_id}",
+            json={"geojson": {"type": "Polygon", "coordinates": [_square(-41.78, -2.91, size=tamanho)]}},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        await _fixar_carimbo()
+        response = await client.get(url, headers={**headers, "If-None-Match": etags[-1]})
+        assert response.status_code == 200
+        etags.append(response.headers["etag"])
+
+    assert len(set(etags)) == 3
@@ -0,0 +1,239 @@
+import io
+
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from database import Base, get_db
+from models.auth_models import Usuario
+from models.diagnostico_models import Indicator
+from utils.jwt_handler import create_access_token
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "PROFISSIONAL") -> Usuario:
+    user = Usuario(
+        nome="Usuario Teste",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def test_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, async_session
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+async def _create_ubs(client: AsyncClient, headers: dict) -> int:
+    payload = {
+        "nome_ubs": "UBS Centro",
+        "cnes": "1234567",
+        "area_atuacao": "Centro",
+    }
+    response = await client.post("/api/ubs", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def _create_indicator(client: AsyncClient, ubs_id: int, headers: dict, nome: str, valor: float, periodo: str) -> int:
+    payload = {
+        "nome_indicador": nome,
+        "tipo_valor": "PERCENTUAL",
+        "valor": valor,
+        "meta": 80,
+        "periodo_referencia": periodo,
+        "observacoes": None,
+    }
+    response = await client.post(f"/api/ubs/{ubs_id}/indicators", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def _seed_history(client: AsyncClient, async_session, ubs_id: int, headers: dict) -> None:
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    serie = [
+        ("Cobertura vacinal", 60, "2026-01"),
+        ("Cobertura vacinal", 70, "2026-02"),
+        ("Cobertura vacinal", 75, "2026-03"),
+        ("Pré-natal", 40, "2026-01"),
+        ("Pré-natal", 55, "2026-02"),
+    ]
+    for i, (nome, valor, periodo) in enumerate(serie):
+        indicador_id = await _create_indicator(client, ubs_id, headers, nome, valor, periodo)
+        # O SQLite grava created_at com resolução de segundos; fixa datas distintas
+        async with async_session() as session:
+            await session.execute(
+                update(Indicator)
+                .where(Indicator.id == indicador_id)
+                .values(created_at=base + timedelta(days=30 * i))
+            )
+            await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_indicator_series_returns_history_in_order(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_series@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+    await _seed_history(client, async_session, ubs_id, headers)
+
+    response = await client.get(f"/api/ubs/{ubs_id}/indicators/Cobertura vacinal/series", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["nome_indicador"] == "Cobertura vacinal"
+    assert [p["periodo_referencia"] for p in data["pontos"]] == ["2026-01", "2026-02", "2026-03"]
+    assert [p["valor"] for p in data["pontos"]] == [60, 70, 75]
+
+    limited = await client.get(
+        f"/api/ubs/{ubs_id}/indicators/Cobertura vacinal/series?limite=2", headers=headers
+    )
+    assert [p["periodo_referencia"] for p in limited.json()["pontos"]] == ["2026-02", "2026-03"]
+
+    missing = await client.get(f"/api/ubs/{ubs_id}/indicators/Inexistente/series", headers=headers)
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_full_diagnosis_returns_latest_indicator_per_name(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_latest@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+    await _seed_history(client, async_session, ubs_id, headers)
+
+    response = await client.get(f"/api/ubs/{ubs_id}/diagnosis", headers=headers)
+    assert response.status_code == 200
+    latest = response.json()["indicators_latest"]
+    assert [(i["nome_indicador"], i["periodo_referencia"]) for i in latest] == [
+        ("Cobertura vacinal", "2026-03"),
+        ("Pré-natal", "2026-02"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_indicators_csv_upserts_by_nome_and_periodo(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_import_csv@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+    await _create_indicator(client, ubs_id, headers, "Cobertura vacinal", 50, "2026-Q1")
+
+    conteudo = (
+        "Indicador;Valor;Meta;Tipo;Período de Referência;Observações\n"
+        "Cobertura vacinal;72,5;90;percentual;2026-Q1;revisado\n"
+        "Consultas pré-natal;1.234,5;;absoluto;2026-Q1;\n"
+        "\n"
+    ).encode("cp1252")
+    response = await client.post(
+        f"/api/ubs/{ubs_id}/indicators/import",
+        files={"file": ("previne.csv", conteudo, "text/csv")},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"total": 2, "criados": 1, "atualizados": 1}
+
+    async with async_session() as session:
+        rows = (
+            await session.execute(select(Indicator).order_by(Indicator.nome_indicador))
+        ).scalars().all()
+    assert [(r.nome_indicador, float(r.valor), r.tipo_valor, r.observacoes) for r in rows] == [
+        ("Cobertura vacinal", 72.5, "PERCENTUAL", "revisado"),
+        ("Consultas pré-natal", 1234.5, "ABSOLUTO", None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_indicators_csv_rejects_mixed_encoding_after_sample(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_import_encoding@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+
+    # Início em UTF-8 (além da amostra de detecção) e uma linha em Windows-1252 no fim
+    linhas = ["Indicador;Valor;Tipo;Período de Referência"]
+    linhas += [f"Indicador {i};{i};absoluto;2026-Q1" for i in range(3_000)]
+    conteudo = ("\n".join(linhas) + "\n").encode("utf-8") + "Pré-natal;10;absoluto;2026-Q1\n".encode("cp1252")
+    response = await client.post(
+        f"/api/ubs/{ubs_id}/indicators/import",
+        files={"file": ("previne.csv", conteudo, "text/csv")},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert "Codificação inválida após a linha" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_import_indicators_xlsx_reports_row_errors(test_client):
+    from openpyxl import Workbook
+
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_import_xlsx@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["nome_indicador", "valor", "meta", "tipo_valor", "periodo_referencia"])
+    sheet.append(["Cobertura vacinal", 80, 90, "PERCENTUAL", "2026-Q2"])
+    sheet.append(["Hipertensos acompanhados", -5, None, "PERCENTUAL", "2026-Q2"])
+    sheet.append(["Diabéticos acompanhados", "abc", None, "PERCENTUAL", "2026-Q2"])
+    sheet.append([None, 10, None, "PERCENTUAL", "2026-Q2"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    response = await client.post(
+        f"/api/ubs/{ubs_id}/indicators/import",
+        files={"file": ("esus.xlsx", buffer.getvalue(), "application/octet-stream")},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    errors = response.json()["detail"]["errors"]
+    assert [e["linha"] for e in errors] == [3, 4, 5]
+    assert errors[0]["nome_indicador"] == "Hipertensos acompanhados"
+
+    async with async_session() as session:
+        count = len((await session.execute(select(Indicator))).scalars().all())
+    assert count == 0
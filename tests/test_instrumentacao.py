@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from database import Base, get_db
+from models.auth_models import Cargo, Usuario
+from prometheus_client import REGISTRY
+
+from utils.instrumentation import instrumentar_engine, metricas_atuais
+from utils.jwt_handler import create_access_token
+from utils.loop_watchdog import LoopWatchdog, watchdog
+from utils.metrics import QueuePoolMedido, instrumentar_pool
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "USER") -> Usuario:
+    user = Usuario(
+        nome="Usuario Teste",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def test_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    instrumentar_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, async_session
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+def _log_requests(caplog) -> list[dict]:
+    return [
+        json.loads(r.getMessage())
+        for r in caplog.records
+        if r.name == "plataforma.requests"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_request_reports_db_time_statements_and_size(test_client, caplog):
+    client, async_session = test_client
+    async with async_session() as session:
+        session.add_all([Cargo(nome="Médico"), Cargo(nome="Enfermeiro")])
+        await session.commit()
+
+    with caplog.at_level(logging.INFO, logger="plataforma.requests"):
+        response = await client.get("/api/cargos")
+
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'desc="1 queries"' in timing
+
+    registro = _log_requests(caplog)[-1]
+    assert registro["rota"] == "/api/cargos"
+    assert registro["status"] == 200
+    assert registro["db_statements"] == 1
+    assert registro["bytes"] == len(response.content)
+
+
+@pytest.mark.asyncio
+async def test_route_template_is_logged_and_outside_requests_are_ignored(test_client, caplog):
+    client, async_session = test_client
+    async with async_session() as session:
+        await session.execute(text("SELECT 1"))
+    assert metricas_atuais() is None
+
+    with caplog.at_level(logging.INFO, logger="plataforma.requests"):
+        response = await client.get("/api/ubs/123/problems/tree")
+
+    assert response.status_code == 401
+    registro = _log_requests(caplog)[-1]
+    assert registro["rota"] == "/api/ubs/{ubs_id}/problems/tree"
+    assert registro["db_statements"] == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_route_histogram(test_client, monkeypatch):
+    client, _ = test_client
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    response = await client.get("/api/cargos")
+    assert response.status_code == 200
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/cargos",status="200"}' in response.text
+    assert "event_loop_lag_seconds" in response.text
+
+    monkeypatch.setenv("METRICS_TOKEN", "segredo")
+    assert (await client.get("/metrics")).status_code == 401
+    response = await client.get("/metrics", headers={"Authorization": "Bearer segredo"})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_pool_gauges_and_wait_time(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePoolMedido,
+        pool_size=2,
+        max_overflow=1,
+    )
+    instrumentar_pool(engine)
+    esperas_antes = REGISTRY.get_sample_value("db_pool_wait_seconds_count") or 0
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert REGISTRY.get_sample_value("db_pool_checked_out") == 1
+        assert REGISTRY.get_sample_value("db_pool_size") == 2
+
+    assert REGISTRY.get_sample_value("db_pool_checked_out") == 0
+    assert REGISTRY.get_sample_value("db_pool_wait_seconds_count") == esperas_antes + 1
+    await engine.dispose()
+
+
+def _bloqueia_loop(segundos: float) -> None:
+    time.sleep(segundos)
+
+
+@pytest.mark.asyncio
+async def test_watchdog_records_blocking_call_with_route():
+    monitor = LoopWatchdog(limite_ms=30)
+    monitor.iniciar()
+    try:
+        await asyncio.sleep(0.05)
+        task = monitor.registrar_requisicao({"method": "POST", "path": "/api/materiais"})
+        _bloqueia_loop(0.2)
+        await asyncio.sleep(0.05)
+        monitor.remover_requisicao(task)
+    finally:
+        await monitor.parar()
+
+    registros = monitor.registros()
+    assert len(registros) == 1
+    bloqueio = registros[0]
+    assert bloqueio["rota"] == "/api/materiais"
+    assert bloqueio["metodo"] == "POST"
+    assert bloqueio["duracao_ms"] >= 150
+    assert any("_bloqueia_loop" in linha for linha in bloqueio["pilha"])
+
+
+@pytest.mark.asyncio
+async def test_loop_blocking_endpoint_is_restricted_to_gestor(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_obs@example.com", role="GESTOR")
+        usuario = await _create_user(session, "usuario_obs@example.com")
+
+    response = await client.get("/api/observabilidade/loop-bloqueios", headers=_auth_headers(usuario))
+    assert response.status_code == 403
+
+    response = await client.get("/api/observabilidade/loop-bloqueios", headers=_auth_headers(gestor))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ativo"] is watchdog.em_execucao
+    assert body["bloqueios"] == []
+
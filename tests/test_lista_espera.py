@@ -0,0 +1,275 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from database import Base, get_db
+from models.auth_models import Usuario, ProfissionalUbs
+from models.agendamento_models import Agendamento, EstatisticaAgendaDiaria, ListaEspera, StatusAgendamento
+from utils.jwt_handler import create_access_token
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "USER") -> Usuario:
+    user = Usuario(
+        nome="Usuario Teste",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def _create_profissional(session: AsyncSession, email: str, cargo: str = "Medico") -> ProfissionalUbs:
+    user = await _create_user(session, email=email, role="PROFISSIONAL")
+    prof = ProfissionalUbs(
+        usuario_id=user.id,
+        cargo=cargo,
+        registro_professional=f"REG-{user.id}",
+        ativo=True,
+    )
+    session.add(prof)
+    await session.commit()
+    await session.refresh(prof)
+    return prof
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def test_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, async_session
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+def _slot(dias: int = 2) -> datetime:
+    return (datetime.now(timezone.utc) + timedelta(days=dias)).replace(hour=13, minute=0, second=0, microsecond=0)
+
+
+async def _agendar(session: AsyncSession, paciente: Usuario, prof: ProfissionalUbs, data_hora: datetime) -> Agendamento:
+    agendamento = Agendamento(
+        paciente_id=paciente.id,
+        profissional_id=prof.id,
+        data_hora=data_hora,
+        status=StatusAgendamento.AGENDADO,
+    )
+    session.add(agendamento)
+    await session.commit()
+    await session.refresh(agendamento)
+    return agendamento
+
+
+@pytest.mark.asyncio
+async def test_cancellation_assigns_slot_to_first_eligible_patient(test_client):
+    client, async_session = test_client
+    slot = _slot()
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_espera@example.com", cargo="Medico")
+        dono = await _create_user(session, "dono_espera@example.com")
+        fora_da_janela = await _create_user(session, "janela_espera@example.com")
+        outro_cargo = await _create_user(session, "cargo_espera@example.com")
+        primeiro = await _create_user(session, "primeiro_espera@example.com")
+        segundo = await _create_user(session, "segundo_espera@example.com")
+
+    response = await client.post(
+        "/api/agendamentos",
+        json={"profissional_id": prof.id, "data_hora": slot.isoformat()},
+        headers=_auth_headers(dono),
+    )
+    agendamento_id = response.json()["id"]
+
+    entradas = [
+        (fora_da_janela, {"cargo": "Medico", "data_inicio": (slot + timedelta(days=1)).isoformat()}),
+        (outro_cargo, {"cargo": "Dentista"}),
+        (primeiro, {"cargo": "Medico", "observacoes": "Prefere manhã"}),
+        (segundo, {"profissional_id": prof.id}),
+    ]
+    for paciente, payload in entradas:
+        response = await client.post("/api/agendamentos/lista-espera", json=payload, headers=_auth_headers(paciente))
+        assert response.status_code == 200
+
+    response = await client.patch(
+        f"/api/agendamentos/{agendamento_id}", json={"status": "CANCELADO"}, headers=_auth_headers(dono)
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "CANCELADO"
+
+    async with async_session() as session:
+        novos = (
+            await session.execute(select(Agendamento).where(Agendamento.id != agendamento_id))
+        ).scalars().all()
+        assert [(a.paciente_id, a.status) for a in novos] == [(primeiro.id, "AGENDADO")]
+        assert novos[0].observacoes.endswith("Prefere manhã")
+        entrada = (
+            await session.execute(select(ListaEspera).where(ListaEspera.paciente_id == primeiro.id))
+        ).scalar_one()
+        assert (entrada.status, entrada.agendamento_id) == ("ATENDIDO", novos[0].id)
+        # O rollup de estatísticas conta o cancelamento e o encaixe
+        linha = (await session.execute(select(EstatisticaAgendaDiaria))).scalar_one()
+        assert (linha.total, linha.agendados, linha.cancelados) == (2, 1, 1)
+
+    response = await client.get("/api/agendamentos/lista-espera/minhas", headers=_auth_headers(segundo))
+    assert [e["status"] for e in response.json()] == ["AGUARDANDO"]
+
+
+@pytest.mark.asyncio
+async def test_reschedule_frees_old_slot_for_waitlist(test_client):
+    client, async_session = test_client
+    slot = _slot()
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_reag@example.com", cargo="Enfermeiro")
+        dono = await _create_user(session, "dono_reag@example.com")
+        espera = await _create_user(session, "espera_reag@example.com")
+        agendamento = await _agendar(session, dono, prof, slot)
+
+    await client.post("/api/agendamentos/lista-espera", json={"cargo": "Enfermeiro"}, headers=_auth_headers(espera))
+    response = await client.patch(
+        f"/api/agendamentos/{agendamento.id}",
+        json={"data_hora": (slot + timedelta(hours=2)).isoformat()},
+        headers=_auth_headers(dono),
+    )
+    assert response.status_code == 200
+
+    async with async_session() as session:
+        encaixado = (
+            await session.execute(select(Agendamento).where(Agendamento.paciente_id == espera.id))
+        ).scalar_one()
+        assert encaixado.data_hora.replace(tzinfo=timezone.utc) == slot
+
+
+@pytest.mark.asyncio
+async def test_no_assignment_for_patient_busy_at_same_time(test_client):
+    client, async_session = test_client
+    slot = _slot()
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_ocupado@example.com", cargo="Medico")
+        outro_prof = await _create_profissional(session, "prof_outro@example.com", cargo="Medico")
+        dono = await _create_user(session, "dono_ocupado@example.com")
+        ocupado = await _create_user(session, "paciente_ocupado@example.com")
+        agendamento = await _agendar(session, dono, prof, slot)
+        # Já tem consulta no mesmo horário com outro profissional
+        await _agendar(session, ocupado, outro_prof, slot)
+
+    await client.post("/api/agendamentos/lista-espera", json={"cargo": "Medico"}, headers=_auth_headers(ocupado))
+    await client.patch(f"/api/agendamentos/{agendamento.id}", json={"status": "CANCELADO"}, headers=_auth_headers(dono))
+
+    response = await client.get("/api/agendamentos/lista-espera/minhas", headers=_auth_headers(ocupado))
+    assert response.json()[0]["status"] == "AGUARDANDO"
+
+
+@pytest.mark.asyncio
+async def test_no_assignment_when_window_ends_before_appointment_end(test_client):
+    client, async_session = test_client
+    slot = _slot()
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_janela@example.com", cargo="Medico")
+        dono = await _create_user(session, "dono_janela@example.com")
+        espera = await _create_user(session, "espera_janela@example.com")
+        agendamento = await _agendar(session, dono, prof, slot)
+
+    # A janela começa antes do horário, mas termina no meio da consulta de 30 minutos
+    await client.post(
+        "/api/agendamentos/lista-espera",
+        json={"cargo": "Medico", "data_fim": (slot + timedelta(minutes=10)).isoformat()},
+        headers=_auth_headers(espera),
+    )
+    await client.patch(f"/api/agendamentos/{agendamento.id}", json={"status": "CANCELADO"}, headers=_auth_headers(dono))
+
+    response = await client.get("/api/agendamentos/lista-espera/minhas", headers=_auth_headers(espera))
+    assert response.json()[0]["status"] == "AGUARDANDO"
+
+
+@pytest.mark.asyncio
+async def test_cancellation_survives_refill_rejected_by_database(test_client):
+    client, async_session = test_client
+    slot = _slot()
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_recusa@example.com", cargo="Medico")
+        dono = await _create_user(session, "dono_recusa@example.com")
+        espera = await _create_user(session, "espera_recusa@example.com")
+        agendamento = await _agendar(session, dono, prof, slot)
+        # Simula a constraint de sobreposição do PostgreSQL recusando o encaixe
+        await session.execute(
+            text(
+                "CREATE TRIGGER recusa_encaixe BEFORE INSERT ON agendamentos "
+                "BEGIN SELECT RAISE(ABORT, 'sobreposicao'); END"
+            )
+        )
+        await session.commit()
+
+    await client.post("/api/agendamentos/lista-espera", json={"cargo": "Medico"}, headers=_auth_headers(espera))
+    response = await client.patch(
+        f"/api/agendamentos/{agendamento.id}", json={"status": "CANCELADO"}, headers=_auth_headers(dono)
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "CANCELADO"
+
+    async with async_session() as session:
+        assert (await session.get(Agendamento, agendamento.id)).status == "CANCELADO"
+        entrada = (
+            await session.execute(select(ListaEspera).where(ListaEspera.paciente_id == espera.id))
+        ).scalar_one()
+        assert (entrada.status, entrada.agendamento_id) == ("AGUARDANDO", None)
+
+
+@pytest.mark.asyncio
+async def test_waitlist_entry_validation_and_leaving(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_valida@example.com", cargo="Dentista")
+        paciente = await _create_user(session, "paciente_valida@example.com")
+        outro = await _create_user(session, "outro_valida@example.com")
+        gestor = await _create_user(session, "gestor_valida@example.com", role="GESTOR")
+    headers = _auth_headers(paciente)
+
+    response = await client.post("/api/agendamentos/lista-espera", json={}, headers=headers)
+    assert response.status_code == 400
+    response = await client.post("/api/agendamentos/lista-espera", json={"profissional_id": 999}, headers=headers)
+    assert response.status_code == 404
+
+    response = await client.post("/api/agendamentos/lista-espera", json={"profissional_id": prof.id}, headers=headers)
+    assert response.status_code == 200
+    entrada = response.json()
+    assert entrada["cargo"] == "Dentista"
+    response = await client.post("/api/agendamentos/lista-espera", json={"profissional_id": prof.id}, headers=headers)
+    assert response.status_code == 409
+
+    response = await client.get("/api/agenda/lista-espera", headers=headers)
+    assert response.status_code == 403
+    response = await client.get(
+        "/api/agenda/lista-espera", params={"profissional_id": prof.id}, headers=_auth_headers(gestor)
+    )
+    assert [e["id"] for e in response.json()] == [entrada["id"]]
+
+    response = await client.delete(f"/api/agendamentos/lista-espera/{entrada['id']}", headers=_auth_headers(outro))
+    assert response.status_code == 403
+    response = await client.delete(f"/api/agendamentos/lista-espera/{entrada['id']}", headers=headers)
+    assert response.status_code == 204
+    response = await client.get("/api/agenda/lista-espera", headers=_auth_headers(gestor))
+    assert response.json() == []
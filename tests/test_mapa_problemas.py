@@ -184,3 +184,211 @@ async def test_intervention_action_flow(test_client):
     )
     assert list_response.status_code == 200
     assert len(list_response.json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_problem_tree_returns_hierarchy_with_etag(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_tree@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+    problem_ids = []
+    for titulo, gravidade in (("Fila de espera", 2), ("Falta de insumos", 5)):
+        response = await client.post(
+            f"/api/ubs/{ubs_id}/problems",
+            json={
+                "titulo": titulo,
+                "gut_gravidade": gravidade,
+                "gut_urgencia": 2,
+                "gut_tendencia": 2,
+                "is_prioritario": False,
+            },
+            headers=headers,
+        )
+        assert response.status_code == 201
+        problem_ids.append(response.json()["id"])
+
+    intervention_response = await client.post(
+        f"/api/ubs/problems/{problem_ids[0]}/interventions",
+        json={"objetivo": "Reduzir a fila", "status": "PLANEJADO"},
+        headers=headers,
+    )
+    intervention_id = intervention_response.json()["id"]
+    await client.post(
+        f"/api/ubs/interventions/{intervention_id}/actions",
+        json={"acao": "Revisar agenda", "status": "PLANEJADO"},
+        headers=headers,
+    )
+
+    response = await client.get(f"/api/ubs/{ubs_id}/problems/tree", headers=headers)
+    assert response.status_code == 200
+    tree = response.json()
+    assert [p["id"] for p in tree] == [problem_ids[1], problem_ids[0]]
+    assert tree[0]["interventions"] == []
+    assert [iv["id"] for iv in tree[1]["interventions"]] == [intervention_id]
+    assert [a["acao"] for a in tree[1]["interventions"][0]["actions"]] == ["Revisar agenda"]
+
+    etag = response.headers["etag"]
+    cached = await client.get(
+        f"/api/ubs/{ubs_id}/problems/tree",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert cached.status_code == 304
+
+    await client.patch(
+        f"/api/ubs/interventions/{intervention_id}",
+        json={"status": "CONCLUIDO"},
+        headers=headers,
+    )
+    changed = await client.get(
+        f"/api/ubs/{ubs_id}/problems/tree",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[1]["interventions"][0]["status"] == "CONCLUIDO"
+
+
+@pytest.mark.asyncio
+async def test_plan_batch_applies_operations_in_one_request(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_batch@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+    problem_response = await client.post(
+        f"/api/ubs/{ubs_id}/problems",
+        json={"titulo": "Fila de espera", "gut_gravidade": 1, "gut_urgencia": 1, "gut_tendencia": 1},
+        headers=headers,
+    )
+    problem_id = problem_response.json()["id"]
+    intervention_response = await client.post(
+        f"/api/ubs/problems/{problem_id}/interventions",
+        json={"objetivo": "Intervenção antiga"},
+        headers=headers,
+    )
+    old_intervention_id = intervention_response.json()["id"]
+    await client.post(
+        f"/api/ubs/interventions/{old_intervention_id}/actions",
+        json={"acao": "Ação antiga"},
+        headers=headers,
+    )
+
+    payload = {
+        "operacoes": [
+            {
+                "op": "create",
+                "entidade": "problem",
+                "ref": "p1",
+                "dados": {"titulo": "Falta de insumos", "gut_gravidade": 2, "gut_urgencia": 2, "gut_tendencia": 2},
+            },
+            {"op": "create", "entidade": "intervention", "ref": "i1", "parent_ref": "p1", "dados": {"objetivo": "Comprar"}},
+            {"op": "create", "entidade": "action", "parent_ref": "i1", "dados": {"acao": "Cotação", "prazo": "2030-01-01"}},
+            {"op": "update", "entidade": "problem", "id": problem_id, "dados": {"gut_gravidade": 5, "gut_urgencia": 5}},
+            {"op": "delete", "entidade": "intervention", "id": old_intervention_id},
+        ]
+    }
+    response = await client.post(f"/api/ubs/{ubs_id}/problems/batch", json=payload, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["refs"]) == {"p1", "i1"}
+
+    tree = {p["id"]: p for p in data["problems"]}
+    assert tree[problem_id]["gut_score"] == 25
+    assert tree[problem_id]["interventions"] == []
+    novo = tree[data["refs"]["p1"]]
+    assert novo["gut_score"] == 8
+    assert [iv["id"] for iv in novo["interventions"]] == [data["refs"]["i1"]]
+    assert [a["acao"] for a in novo["interventions"][0]["actions"]] == ["Cotação"]
+
+    actions = await client.get(f"/api/ubs/interventions/{old_intervention_id}/actions", headers=headers)
+    assert actions.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_plan_batch_rejects_invalid_operations_without_writing(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_batch_invalid@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+
+    invalid = await client.post(
+        f"/api/ubs/{ubs_id}/problems/batch",
+        json={
+            "operacoes": [
+                {"op": "create", "entidade": "problem", "dados": {"titulo": "Novo", "gut_gravidade": 9, "gut_urgencia": 1, "gut_tendencia": 1}},
+                {"op": "create", "entidade": "action", "parent_ref": "inexistente", "dados": {"acao": "X"}},
+            ]
+        },
+        headers=headers,
+    )
+    assert invalid.status_code == 400
+    fields = [e["field"] for e in invalid.json()["detail"]["errors"]]
+    assert fields == ["operacoes[0].dados.gut_gravidade", "operacoes[1].parent_ref"]
+
+    missing = await client.post(
+        f"/api/ubs/{ubs_id}/problems/batch",
+        json={
+            "operacoes": [
+                {"op": "create", "entidade": "problem", "dados": {"titulo": "Novo", "gut_gravidade": 1, "gut_urgencia": 1, "gut_tendencia": 1}},
+                {"op": "delete", "entidade": "problem", "id": 999999},
+            ]
+        },
+        headers=headers,
+    )
+    assert missing.status_code == 404
+
+    listed = await client.get(f"/api/ubs/{ubs_id}/problems", headers=headers)
+    assert listed.json() == []
+
+
+@pytest.mark.asyncio
+async def test_plan_batch_rejects_operations_under_ancestor_deleted_in_same_batch(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        user = await _create_user(session, "prof_batch_conflict@example.com")
+        headers = _auth_headers(user)
+
+    ubs_id = await _create_ubs(client, headers)
+    problem_response = await client.post(
+        f"/api/ubs/{ubs_id}/problems",
+        json={"titulo": "Fila de espera", "gut_gravidade": 1, "gut_urgencia": 1, "gut_tendencia": 1},
+        headers=headers,
+    )
+    problem_id = problem_response.json()["id"]
+    intervention_response = await client.post(
+        f"/api/ubs/problems/{problem_id}/interventions",
+        json={"objetivo": "Intervenção"},
+        headers=headers,
+    )
+    intervention_id = intervention_response.json()["id"]
+    action_response = await client.post(
+        f"/api/ubs/interventions/{intervention_id}/actions",
+        json={"acao": "Ação antiga"},
+        headers=headers,
+    )
+    action_id = action_response.json()["id"]
+
+    lotes = [
+        # Edição de uma ação cujo avô é excluído
+        [{"op": "update", "entidade": "action", "id": action_id, "dados": {"acao": "Editada"}}],
+        # Criação sob uma intervenção cujo problema é excluído
+        [{"op": "create", "entidade": "action", "parent_id": intervention_id, "dados": {"acao": "Nova"}}],
+    ]
+    for operacoes in lotes:
+        response = await client.post(
+            f"/api/ubs/{ubs_id}/problems/batch",
+            json={"operacoes": [*operacoes, {"op": "delete", "entidade": "problem", "id": problem_id}]},
+            headers=headers,
+        )
+        assert response.status_code == 409
+
+    listed = await client.get(f"/api/ubs/{ubs_id}/problems", headers=headers)
+    assert [p["id"] for p in listed.json()] == [problem_id]
+    actions = await client.get(f"/api/ubs/interventions/{intervention_id}/actions", headers=headers)
+    assert [a["acao"] for a in actions.json()] == ["Ação antiga"]
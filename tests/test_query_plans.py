@@ -0,0 +1,214 @@
+"""Garante que as consultas quentes continuam usando os índices esperados.
+
+Captura o ``EXPLAIN`` de cada consulta sobre o dataset sintético
+(``creates/generate_synthetic_data.py`` em escala reduzida, num SQLite
+temporário) e verifica o índice no plano. Sem ``ANALYZE`` o SQLite trata os
+índices como seletivos, e no Postgres o teste desliga o seq scan: o que se
+verifica é que existe um índice que atende a consulta, não a escolha por custo
+(com uma única UBS, um scan de ``ubs_id`` seria o plano mais barato).
+
+Para rodar contra um Postgres já populado pelo gerador:
+    QUERY_PLAN_DATABASE_URL=postgresql+psycopg://u:s@localhost/bench pytest tests/test_query_plans.py
+"""
+
+import argparse
+import importlib.util
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, select
+
+from database import Base
+from models.agendamento_models import Agendamento, ListaEspera
+from models.auth_models import LoginAttempt
+from models.cronograma_models import CronogramaEvent
+from models.diagnostico_models import Indicator
+from models.gestao_equipes_models import AgenteSaude, Microarea
+from models.materiais_models import EducationalMaterial
+from services.agenda import confirmacoes, disponibilidade, lista_espera
+from utils import consultas_frequentes
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = datetime(2025, 11, 3, 12, 0, tzinfo=timezone.utc)
+DATA_FIM = DATA + timedelta(minutes=30)
+
+
+def _carregar_gerador():
+    spec = importlib.util.spec_from_file_location("generate_synthetic_data", ROOT / "creates" / "generate_synthetic_data.py")
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    url = os.getenv("QUERY_PLAN_DATABASE_URL")
+    if url:
+        engine = create_engine(url)
+    else:
+        gerador = _carregar_gerador()
+        engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('planos') / 'planos.db'}")
+        Base.metadata.create_all(engine)
+        args = argparse.Namespace(
+            seed=1, escala=1.0, lote=5_000, usuarios=300, profissionais=10, agendamentos=5_000,
+            bloqueios=200, indicadores=200, problemas=20, microareas=50, anos_agenda=1,
+            anos_cronograma=1, eventos_semana=5,
+        )
+        with engine.begin() as c:
+            gerador.gerar(c, args)
+    with engine.connect() as c:
+        if c.dialect.name == "postgresql":
+            c.exec_driver_sql("SET enable_seqscan = off")
+        yield c
+    engine.dispose()
+
+
+def capturar_plano(conn, stmt) -> str:
+    """Executa ``stmt`` e devolve o texto do plano (EXPLAIN) do SQL realmente emitido."""
+    prefixo = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    linhas = []
+
+    def _explain(_conn, cursor, statement, parameters, _context, _executemany):
+        cursor.execute(prefixo + statement, parameters)
+        linhas.extend(str(linha[-1]) for linha in cursor.fetchall())
+
+    event.listen(conn, "before_cursor_execute", _explain)
+    try:
+        conn.execute(stmt).all()
+    finally:
+        event.remove(conn, "before_cursor_execute", _explain)
+    return "\n".join(linhas)
+
+
+# Sobreposição (data_hora < fim AND data_hora_fim > inicio): os dois índices por
+# profissional atendem e, sem estatísticas, o SQLite escolhe pela ordem de criação
+# (Table.indexes é um set). Uma tupla aceita qualquer uma das alternativas.
+_INDICES_SOBREPOSICAO = ("ix_agendamentos_profissional_data_hora_fim", "ix_agendamentos_profissional_data_hora")
+
+CONSULTAS_QUENTES = [
+    (
+        "conflito_de_horario",
+        lambda: consultas_frequentes.agendamento_no_horario(1, DATA, DATA_FIM),
+        _INDICES_SOBREPOSICAO,
+    ),
+    (
+        "agenda_semanal",
+        lambda: select(Agendamento)
+        .where(
+            Agendamento.profissional_id == 1,
+            Agendamento.data_hora >= DATA,
+            Agendamento.data_hora <= DATA + timedelta(days=7),
+        )
+        .order_by(Agendamento.data_hora),
+        "ix_agendamentos_profissional_data_hora",
+    ),
+    (
+        "meus_agendamentos",
+        lambda: select(Agendamento).where(Agendamento.paciente_id == 50).order_by(Agendamento.data_hora.desc()),
+        "ix_agendamentos_paciente_data_hora",
+    ),
+    (
+        "lembretes_pendentes",
+        lambda: confirmacoes.consulta_pendentes(DATA, timedelta(hours=48), 200),
+        "ix_agendamentos_lembrete_pendente",
+    ),
+    (
+        "bloqueio_no_horario",
+        lambda: consultas_frequentes.bloqueio_no_horario(1, DATA, DATA_FIM),
+        "ix_bloqueios_agenda_profissional_inicio",
+    ),
+    # Busca por especialidade: os dois ramos do UNION ALL usam índice
+    (
+        "ocupacao_por_cargo_agendamentos",
+        lambda: disponibilidade.consulta_ocupacao([1, 2, 3], DATA, DATA + timedelta(days=14)),
+        _INDICES_SOBREPOSICAO,
+    ),
+    (
+        "ocupacao_por_cargo_bloqueios",
+        lambda: disponibilidade.consulta_ocupacao([1, 2, 3], DATA, DATA + timedelta(days=14)),
+        "ix_bloqueios_agenda_profissional_inicio",
+    ),
+    (
+        "candidatos_da_lista_de_espera",
+        lambda: lista_espera.consulta_candidatos(1, "Medico", DATA, DATA_FIM, None).limit(1),
+        "ix_lista_espera_status_cargo_created",
+    ),
+    (
+        "minha_lista_de_espera",
+        lambda: select(ListaEspera).where(ListaEspera.paciente_id == 50).order_by(ListaEspera.created_at.desc()),
+        "ix_lista_espera_paciente_id",
+    ),
+    (
+        "tentativas_de_login",
+        lambda: select(LoginAttempt)
+        .where(LoginAttempt.email == "usuario000001@sintetico.exemplo.com")
+        .order_by(LoginAttempt.created_at.desc())
+        .limit(10),
+        "ix_login_attempts_email_created",
+    ),
+    (
+        "tentativas_expiradas",
+        lambda: select(LoginAttempt)
+        .where(LoginAttempt.created_at < DATA)
+        .order_by(LoginAttempt.created_at, LoginAttempt.id)
+        .limit(5_000),
+        "ix_login_attempts_created_at",
+    ),
+    (
+        "indicadores_da_ubs",
+        lambda: select(Indicator).where(Indicator.ubs_id == 1),
+        "ix_indicators_ubs_nome_created",
+    ),
+    (
+        "cronograma_por_periodo",
+        lambda: select(CronogramaEvent)
+        .where(
+            CronogramaEvent.ubs_id == 1,
+            CronogramaEvent.inicio >= DATA,
+            CronogramaEvent.inicio <= DATA + timedelta(days=31),
+        )
+        .order_by(CronogramaEvent.inicio),
+        "ix_cronograma_events_ubs_inicio",
+    ),
+    (
+        "microareas_da_ubs",
+        lambda: select(Microarea).where(Microarea.ubs_id == 1),
+        "ix_microareas_ubs_id",
+    ),
+    (
+        "agentes_da_microarea",
+        lambda: select(AgenteSaude).where(AgenteSaude.microarea_id == 1),
+        "ix_agentes_saude_microarea_id",
+    ),
+    (
+        "materiais_da_ubs",
+        lambda: select(EducationalMaterial)
+        .where(EducationalMaterial.ubs_id == 1)
+        .order_by(EducationalMaterial.created_at.desc()),
+        "ix_educational_materials_ubs_created",
+    ),
+]
+
+
+@pytest.mark.parametrize("nome,consulta,indice", CONSULTAS_QUENTES, ids=[c[0] for c in CONSULTAS_QUENTES])
+def test_hot_query_uses_expected_index(conn, nome, consulta, indice):
+    plano = capturar_plano(conn, consulta())
+    alternativas = indice if isinstance(indice, tuple) else (indice,)
+    # Nome inteiro: ix_..._data_hora não deve casar com ix_..._data_hora_fim
+    assert any(re.search(rf"\b{ix}\b", plano) for ix in alternativas), f"{nome} não usa {indice}:\n{plano}"
+
+
+def test_every_model_index_has_a_plan_assertion():
+    # Índice novo nas tabelas cobertas sem consulta aqui indica teste faltando
+    tabelas = {
+        "agendamentos", "bloqueios_agenda", "login_attempts", "indicators", "cronograma_events",
+        "microareas", "agentes_saude", "educational_materials", "lista_espera",
+    }
+    declarados = {ix.name for nome, tabela in Base.metadata.tables.items() if nome in tabelas for ix in tabela.indexes}
+    verificados = {
+        ix for _, _, indice in CONSULTAS_QUENTES for ix in (indice if isinstance(indice, tuple) else (indice,))
+    }
+    assert declarados <= verificados
@@ -0,0 +1,100 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import database
+from main import app
+from database import Base, get_db
+from models.auth_models import Cargo, Usuario
+from utils.jwt_handler import create_access_token
+from utils.read_your_writes import COOKIE_LEITURA_PRIMARIO
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "USER") -> Usuario:
+    user = Usuario(
+        nome="Usuario Teste",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def replica_client(tmp_path, monkeypatch):
+    """Primário e réplica em dois arquivos SQLite; a réplica não recebe as escritas."""
+    engines = []
+    sessions = []
+    for nome in ("primario.db", "replica.db"):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / nome}", future=True)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        engines.append(engine)
+        sessions.append(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    primario, replica = sessions
+
+    async def override_get_db():
+        async with primario() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", replica)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, primario, replica
+
+    app.dependency_overrides.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+async def _nomes_cargos(client: AsyncClient) -> list[str]:
+    response = await client.get("/api/cargos")
+    assert response.status_code == 200
+    return [c["nome"] for c in response.json()]
+
+
+@pytest.mark.asyncio
+async def test_get_reads_from_replica_until_client_writes(replica_client):
+    client, primario, replica = replica_client
+    async with primario() as session:
+        gestor = await _create_user(session, "gestor_replica@example.com", role="GESTOR")
+        session.add(Cargo(nome="Médico"))
+        await session.commit()
+    async with replica() as session:
+        session.add(Cargo(nome="Dentista"))
+        await session.commit()
+
+    assert await _nomes_cargos(client) == ["Dentista"]
+
+    response = await client.post("/api/cargos", json={"nome": "Enfermeiro"}, headers=_auth_headers(gestor))
+    assert response.status_code == 201
+    assert COOKIE_LEITURA_PRIMARIO in response.cookies
+
+    # Logo após escrever, o mesmo cliente lê do primário
+    assert await _nomes_cargos(client) == ["Enfermeiro", "Médico"]
+
+    client.cookies.clear()
+    assert await _nomes_cargos(client) == ["Dentista"]
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_pin_reads_to_primary(replica_client):
+    client, primario, _ = replica_client
+    async with primario() as session:
+        usuario = await _create_user(session, "usuario_replica@example.com")
+
+    response = await client.post("/api/cargos", json={"nome": "Enfermeiro"}, headers=_auth_headers(usuario))
+    assert response.status_code == 403
+    assert COOKIE_LEITURA_PRIMARIO not in response.cookies
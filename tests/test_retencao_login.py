@@ -0,0 +1,118 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models.auth_models import LoginAttempt
+from services.retencao import login_attempts as retencao
+
+AGORA = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as db:
+        yield db
+
+    await engine.dispose()
+
+
+async def _criar_tentativas(db: AsyncSession, dias_atras: list[int]) -> None:
+    for i, dias in enumerate(dias_atras):
+        db.add(
+            LoginAttempt(
+                email=f"usuario{i}@exemplo.com",
+                ip_address="10.0.0.1",
+                sucesso=i % 2 == 0,
+                motivo="Senha incorreta" if i % 2 else "Login bem-sucedido",
+                created_at=AGORA - timedelta(days=dias),
+            )
+        )
+    await db.commit()
+
+
+async def _total(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count()).select_from(LoginAttempt))
+
+
+async def test_retention_deletes_only_expired_rows_in_batches(session):
+    await _criar_tentativas(session, [200, 120, 95, 91, 89, 30, 1])
+
+    resultado = await retencao.aplicar_retencao(session, dias=90, lote=2, agora=AGORA)
+
+    assert resultado.removidas == 4
+    assert resultado.arquivadas == 0
+    assert await _total(session) == 3
+    restantes = (await session.execute(select(LoginAttempt.created_at))).scalars().all()
+    assert all(c.replace(tzinfo=timezone.utc) >= resultado.limite for c in restantes)
+
+
+async def test_retention_archives_expired_rows_to_gzipped_ndjson(session, tmp_path):
+    await _criar_tentativas(session, [300, 150, 100, 10])
+    arquivo = tmp_path / "arquivo" / "login_attempts.ndjson.gz"
+
+    resultado = await retencao.aplicar_retencao(session, dias=90, arquivo=arquivo, lote=2, agora=AGORA)
+    assert resultado.arquivadas == resultado.removidas == 3
+
+    # Nova execução acrescenta ao mesmo arquivo (gzip com vários membros)
+    await _criar_tentativas(session, [120])
+    await retencao.aplicar_retencao(session, dias=90, arquivo=arquivo, agora=AGORA)
+
+    with gzip.open(arquivo, "rt", encoding="utf-8") as f:
+        linhas = [json.loads(linha) for linha in f]
+    assert len(linhas) == 4
+    assert set(linhas[0]) == {"id", "email", "ip_address", "sucesso", "motivo", "created_at"}
+    assert linhas[0]["email"] == "usuario0@exemplo.com"
+    assert await _total(session) == 1
+
+
+async def test_simulation_counts_without_deleting(session):
+    await _criar_tentativas(session, [365, 180, 5])
+
+    resultado = await retencao.aplicar_retencao(session, dias=90, agora=AGORA, simular=True)
+
+    assert resultado.removidas == 2
+    assert await _total(session) == 3
+
+
+async def test_retention_continues_when_partitions_cannot_be_created(session, monkeypatch, caplog):
+    await _criar_tentativas(session, [120, 1])
+
+    async def particionada(db):
+        return True
+
+    async def sem_particoes(db):
+        return []
+
+    async def falha(db, **kwargs):
+        raise DBAPIError("CREATE TABLE login_attempts_p202610", {}, Exception("default partition violated"))
+
+    monkeypatch.setattr(retencao, "tabela_particionada", particionada)
+    monkeypatch.setattr(retencao, "listar_particoes", sem_particoes)
+    monkeypatch.setattr(retencao, "garantir_particoes", falha)
+
+    resultado = await retencao.aplicar_retencao(session, dias=90, agora=AGORA)
+
+    assert resultado.particoes_criadas == []
+    assert resultado.removidas == 1
+    assert await _total(session) == 1
+    assert "Partições de login_attempts não criadas" in caplog.text
+
+
+def test_monthly_partition_names_and_bounds():
+    assert retencao.nome_particao(datetime(2026, 12, 1, tzinfo=timezone.utc)) == "login_attempts_p202612"
+    inicio, fim = retencao.limites_particao("login_attempts_p202612")
+    assert inicio == datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert fim == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert retencao.limites_particao("login_attempts_padrao") is None
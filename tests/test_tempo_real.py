@@ -0,0 +1,407 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from models.suporte_feedback_models import SuporteFeedback
+from models.tempo_real_models import EventoTempoReal
+from services.notificacoes.contadores import (
+    BOAS_VINDAS_PENDENTES,
+    FEEDBACK_PENDENTE,
+    INTERVALO_RECONTAGEM,
+    SOLICITACOES_PROFISSIONAIS,
+    categorias_visiveis,
+    contadores,
+    registrar_delta,
+)
+from services.realtime import outbox
+from services.realtime.broker import Broker, broker
+from services.realtime.sse import stream_eventos
+from database import Base, get_db
+from models.auth_models import Usuario, ProfissionalUbs, ProfessionalRequest
+from models.agendamento_models import StatusAgendamento
+from utils.jwt_handler import create_access_token
+
+
+async def _create_user(session: AsyncSession, email: str, role: str = "USER") -> Usuario:
+    user = Usuario(
+        nome="Usuario Teste",
+        email=email,
+        senha="hashed",
+        cpf=str(abs(hash(email)) % 10**11).zfill(11),
+        role=role,
+        ativo=True,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def _create_profissional(session: AsyncSession, email: str, cargo: str = "Medico") -> ProfissionalUbs:
+    user = await _create_user(session, email=email, role="PROFISSIONAL")
+    prof = ProfissionalUbs(
+        usuario_id=user.id,
+        cargo=cargo,
+        registro_professional=f"REG-{user.id}",
+        ativo=True,
+    )
+    session.add(prof)
+    await session.commit()
+    await session.refresh(prof)
+    return prof
+
+
+def _auth_headers(user: Usuario) -> dict:
+    token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _get_user(async_session, user_id: int) -> Usuario:
+    async with async_session() as session:
+        return await session.get(Usuario, user_id)
+
+
+@pytest.fixture
+async def test_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client, async_session
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+class _FakeRequest:
+    def __init__(self):
+        self.desconectado = False
+
+    async def is_disconnected(self):
+        return self.desconectado
+
+
+def test_broker_matches_channel_prefix_and_drops_oldest():
+    local = Broker()
+    todos = local.subscribe(["agenda"])
+    um = local.subscribe(["agenda.profissional.1"])
+
+    assert local.publish("agenda.profissional.2", {"id": 1}) == 1
+    assert local.publish("agenda.profissional.1", {"id": 2}) == 2
+    assert local.publish("agendamentos", {"id": 3}) == 0
+    assert todos.fila.qsize() == 2
+    assert um.fila.get_nowait() == {"id": 2}
+
+    for i in range(todos.fila.maxsize + 5):
+        local.publish("agenda.profissional.1", {"id": 10 + i})
+    assert todos.fila.full()
+    assert todos.descartados > 0
+    local.unsubscribe(todos)
+    local.unsubscribe(um)
+    assert local.total_assinaturas == 0
+
+
+@pytest.mark.asyncio
+async def test_agendamento_writes_outbox_and_publishes_locally(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_sse@example.com")
+        paciente = await _create_user(session, "paciente_sse@example.com")
+
+    assinatura = broker.subscribe(["agenda"])
+    try:
+        data_hora = (datetime.now(timezone.utc) + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+        response = await client.post(
+            "/api/agendamentos",
+            json={"profissional_id": prof.id, "data_hora": data_hora.isoformat()},
+            headers=_auth_headers(paciente),
+        )
+        assert response.status_code == 200
+        agendamento_id = response.json()["id"]
+
+        evento = assinatura.fila.get_nowait()
+        assert evento["tipo"] == "agendamento.criado"
+        assert evento["canal"] == f"agenda.profissional.{prof.id}"
+        assert evento["dados"]["agendamento_id"] == agendamento_id
+        assert "paciente_id" not in evento["dados"]
+
+        response = await client.patch(
+            f"/api/agendamentos/{agendamento_id}",
+            json={"status": StatusAgendamento.CANCELADO.value},
+            headers=_auth_headers(paciente),
+        )
+        assert response.status_code == 200
+        cancelado = assinatura.fila.get_nowait()
+        assert cancelado["tipo"] == "agendamento.cancelado"
+        assert cancelado["id"] > evento["id"]
+    finally:
+        broker.unsubscribe(assinatura)
+
+    async with async_session() as session:
+        replay = await outbox.eventos_desde(session, [f"agenda.profissional.{prof.id}"], evento["id"])
+        assert [e["id"] for e in replay] == [cancelado["id"]]
+
+
+@pytest.mark.asyncio
+async def test_poll_once_republishes_only_foreign_events(test_client):
+    _, async_session = test_client
+    async with async_session() as session:
+        proprio = await outbox.registrar_evento(session, "agenda.profissional.1", "bloqueio.criado", {"bloqueio_id": 1})
+        session.add(
+            EventoTempoReal(
+                canal="agenda.profissional.1",
+                tipo="bloqueio.removido",
+                payload={"bloqueio_id": 1},
+                origem="outro-worker",
+            )
+        )
+        await session.commit()
+
+    assinatura = broker.subscribe(["agenda"])
+    try:
+        async with async_session() as session:
+            cursor = await outbox.poll_once(session, proprio.id - 1)
+        assert cursor == proprio.id + 1
+        recebido = assinatura.fila.get_nowait()
+        assert recebido["tipo"] == "bloqueio.removido"
+        assert assinatura.fila.empty()
+    finally:
+        broker.unsubscribe(assinatura)
+
+
+@pytest.mark.asyncio
+async def test_poll_once_relays_events_committed_below_the_cursor(test_client):
+    _, async_session = test_client
+
+    def _evento(evento_id: int) -> EventoTempoReal:
+        return EventoTempoReal(
+            id=evento_id,
+            canal="agenda.profissional.1",
+            tipo="bloqueio.criado",
+            payload={"bloqueio_id": evento_id},
+            origem="outro-worker",
+        )
+
+    assinatura = broker.subscribe(["agenda"])
+    lacunas: dict[int, float] = {}
+    try:
+        async with async_session() as session:
+            session.add(_evento(103))
+            await session.commit()
+            cursor = await outbox.poll_once(session, 100, lacunas, agora=0.0)
+        assert cursor == 103
+        assert set(lacunas) == {101, 102}
+
+        # A transação com id 101 confirma depois que o 103 já foi lido
+        async with async_session() as session:
+            session.add(_evento(101))
+            await session.commit()
+            cursor = await outbox.poll_once(session, cursor, lacunas, agora=1.0)
+        assert cursor == 103
+        assert [assinatura.fila.get_nowait()["id"] for _ in range(2)] == [103, 101]
+        assert assinatura.fila.empty()
+
+        # O 102 (rollback) deixa de ser procurado após a espera
+        async with async_session() as session:
+            await outbox.poll_once(session, cursor, lacunas, agora=outbox.ESPERA_LACUNA + 1)
+        assert lacunas == {}
+        assert assinatura.fila.empty()
+    finally:
+        broker.unsubscribe(assinatura)
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_pending_and_skips_duplicates():
+    request = _FakeRequest()
+    assinatura = broker.subscribe(["agenda"])
+    pendentes = [{"id": 5, "tipo": "agendamento.criado", "dados": {}}]
+    gerador = stream_eventos(request, assinatura, pendentes, heartbeat=0.05)
+
+    assert (await gerador.__anext__()).startswith("retry:")
+    assert "id: 5\nevent: agendamento.criado" in await gerador.__anext__()
+
+    broker.publish("agenda.profissional.1", {"id": 5, "tipo": "agendamento.criado"})
+    broker.publish("agenda.profissional.1", {"id": 6, "tipo": "agendamento.atualizado"})
+    assert "id: 6\n" in await gerador.__anext__()
+    assert await gerador.__anext__() == ": keep-alive\n\n"
+
+    request.desconectado = True
+    with pytest.raises(StopAsyncIteration):
+        await gerador.__anext__()
+    assert assinatura not in broker._assinaturas
+
+
+@pytest.mark.asyncio
+async def test_stream_delivers_events_arriving_out_of_id_order():
+    request = _FakeRequest()
+    assinatura = broker.subscribe(["agenda"])
+    gerador = stream_eventos(request, assinatura, [], heartbeat=0.05)
+    assert (await gerador.__anext__()).startswith("retry:")
+
+    # 12 publicado localmente; 11, commitado depois em outro worker, chega pelo poll_loop
+    broker.publish("agenda.profissional.1", {"id": 12, "tipo": "agendamento.criado"})
+    broker.publish("agenda.profissional.1", {"id": 11, "tipo": "agendamento.criado"})
+    broker.publish("agenda.profissional.1", {"id": 12, "tipo": "agendamento.criado"})
+    assert "id: 12\n" in await gerador.__anext__()
+    assert "id: 11\n" in await gerador.__anext__()
+    assert await gerador.__anext__() == ": keep-alive\n\n"
+
+    request.desconectado = True
+    with pytest.raises(StopAsyncIteration):
+        await gerador.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_agenda_stream_requires_staff_token(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        prof = await _create_profissional(session, "prof_sse_auth@example.com")
+        paciente = await _create_user(session, "paciente_sse_auth@example.com")
+
+    response = await client.get(f"/api/agenda/profissional/{prof.id}/eventos")
+    assert response.status_code == 401
+
+    token = _auth_headers(paciente)["Authorization"].split()[1]
+    response = await client.get(f"/api/agenda/profissional/{prof.id}/eventos?token={token}")
+    assert response.status_code == 403
+
+    prof_user = await _get_user(async_session, prof.usuario_id)
+    token = _auth_headers(prof_user)["Authorization"].split()[1]
+    response = await client.get(f"/api/agenda/profissional/999999/eventos?token={token}")
+    assert response.status_code == 404
+    assert broker.total_assinaturas == 0
+
+
+@pytest.mark.asyncio
+async def test_notification_counters_follow_writes(test_client):
+    client, async_session = test_client
+    contadores.descarregar()
+    async with async_session() as session:
+        gestor = await _create_user(session, "gestor_notif@example.com", role="GESTOR")
+        paciente = await _create_user(session, "paciente_notif@example.com")
+        session.add(SuporteFeedback(usuario_id=paciente.id, assunto="duvida", mensagem="Antiga"))
+        solicitacao = ProfessionalRequest(
+            user_id=paciente.id,
+            cargo="Enfermeiro",
+            registro_profissional="COREN-123",
+            status="PENDING",
+        )
+        session.add(solicitacao)
+        await session.commit()
+        solicitacao_id = solicitacao.id
+        await contadores.carregar(session)
+
+    categorias = categorias_visiveis(gestor)
+    assert contadores.snapshot(categorias) == {
+        SOLICITACOES_PROFISSIONAIS: 1,
+        BOAS_VINDAS_PENDENTES: 2,
+        FEEDBACK_PENDENTE: 1,
+    }
+
+    assinatura = broker.subscribe([f"notificacoes.{c}" for c in categorias])
+    try:
+        response = await client.post(
+            "/api/suporte-feedback",
+            json={"assunto": "problema", "mensagem": "Não consigo agendar"},
+            headers=_auth_headers(paciente),
+        )
+        assert response.status_code == 201
+        feedback_id = response.json()["id"]
+        delta = assinatura.fila.get_nowait()
+        assert delta["dados"] == {"categoria": FEEDBACK_PENDENTE, "delta": 1}
+
+        for _ in range(2):
+            response = await client.patch(
+                f"/api/suporte-feedback/{feedback_id}",
+                json={"status": "LIDA"},
+                headers=_auth_headers(gestor),
+            )
+            assert response.status_code == 200
+
+        response = await client.post(
+            f"/api/auth/professional-requests/{solicitacao_id}/reject",
+            json={"rejection_reason": "Registro inválido"},
+            headers=_auth_headers(gestor),
+        )
+        assert response.status_code == 200
+        response = await client.patch(
+            f"/api/auth/users/{paciente.id}/confirm-welcome",
+            headers=_auth_headers(gestor),
+        )
+        assert response.status_code == 200
+
+        recebidos = []
+        while not assinatura.fila.empty():
+            recebidos.append(assinatura.fila.get_nowait()["dados"])
+        assert recebidos == [
+            {"categoria": FEEDBACK_PENDENTE, "delta": -1},
+            {"categoria": SOLICITACOES_PROFISSIONAIS, "delta": -1},
+            {"categoria": BOAS_VINDAS_PENDENTES, "delta": -1},
+        ]
+        assert contadores.snapshot(categorias) == {
+            SOLICITACOES_PROFISSIONAIS: 0,
+            BOAS_VINDAS_PENDENTES: 1,
+            FEEDBACK_PENDENTE: 1,
+        }
+    finally:
+        broker.unsubscribe(assinatura)
+        contadores.descarregar()
+
+
+@pytest.mark.asyncio
+async def test_notification_counters_skip_counted_deltas_and_recount(test_client):
+    client, async_session = test_client
+    contadores.descarregar()
+    try:
+        async with async_session() as session:
+            paciente = await _create_user(session, "paciente_recontagem@example.com")
+            session.add(SuporteFeedback(usuario_id=paciente.id, assunto="duvida", mensagem="Primeira"))
+            evento = await registrar_delta(session, FEEDBACK_PENDENTE, 1)
+            await session.commit()
+            await contadores.atualizar(session, agora=0.0)
+        assert contadores.snapshot([FEEDBACK_PENDENTE]) == {FEEDBACK_PENDENTE: 1}
+
+        # Delta já incluído na contagem, entregue depois pelo relay: ignorado
+        outbox.publicar_local([evento])
+        assert contadores.snapshot([FEEDBACK_PENDENTE]) == {FEEDBACK_PENDENTE: 1}
+
+        # Pendência criada sem delta: só a recontagem corrige
+        async with async_session() as session:
+            session.add(SuporteFeedback(usuario_id=paciente.id, assunto="duvida", mensagem="Sem delta"))
+            await session.commit()
+            await contadores.atualizar(session, agora=INTERVALO_RECONTAGEM / 2)
+            assert contadores.snapshot([FEEDBACK_PENDENTE]) == {FEEDBACK_PENDENTE: 1}
+            await contadores.atualizar(session, agora=INTERVALO_RECONTAGEM)
+        assert contadores.snapshot([FEEDBACK_PENDENTE]) == {FEEDBACK_PENDENTE: 2}
+    finally:
+        contadores.descarregar()
+
+
+@pytest.mark.asyncio
+async def test_notification_stream_filters_by_role(test_client):
+    client, async_session = test_client
+    async with async_session() as session:
+        paciente = await _create_user(session, "paciente_notif_role@example.com")
+        recepcao = await _create_user(session, "recepcao_notif@example.com", role="PROFISSIONAL")
+        recepcao.cargo = "Recepcionista"
+        await session.commit()
+
+    assert categorias_visiveis(recepcao) == [BOAS_VINDAS_PENDENTES, FEEDBACK_PENDENTE]
+    token = _auth_headers(paciente)["Authorization"].split()[1]
+    response = await client.get(f"/api/notificacoes/eventos?token={token}")
+    assert response.status_code == 403
+    assert broker.total_assinaturas == 0
+
@@ -0,0 +1,73 @@
+"""Statements das consultas executadas em quase toda requisição.
+
+São montados com ``lambda_stmt``: o SQLAlchemy constrói o ``select()`` e
+calcula a chave de cache só na primeira chamada; nas seguintes apenas extrai
+os parâmetros do closure e reaproveita o SQL já compilado. Como o texto SQL
+fica idêntico entre chamadas, o psycopg passa a usá-los como prepared
+statements no servidor (ver ``DB_PREPARE_THRESHOLD`` em ``database.py``).
+
+Os valores variáveis devem vir sempre de variáveis do closure (viram bind
+parameters); constantes ficam literais dentro da lambda.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from models.agendamento_models import Agendamento, BloqueioAgenda, StatusAgendamento
+from models.auth_models import Usuario
+from models.diagnostico_models import UBS
+
+
+# Tupla de str (não Enum) para o lambda_stmt tratá-la como valor de parâmetro simples
+_STATUS_OCUPAM_HORARIO = (StatusAgendamento.AGENDADO.value, StatusAgendamento.REAGENDADO.value)
+
+
+def usuario_por_id(usuario_id: int) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(Usuario).where(Usuario.id == usuario_id))
+
+
+def ubs_ativa(ubs_id: int) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(UBS).where(UBS.id == ubs_id, UBS.is_deleted.is_(False)))
+
+
+def agendamento_no_horario(
+    profissional_id: int,
+    data_hora: datetime,
+    data_hora_fim: datetime,
+    excluir_id: Optional[int] = None,
+) -> StatementLambdaElement:
+    """Id de um agendamento ativo do profissional que se sobrepõe a [data_hora, data_hora_fim).
+
+    O reagendamento exclui o próprio agendamento.
+    """
+    stmt = lambda_stmt(
+        lambda: select(Agendamento.id)
+        .where(
+            Agendamento.profissional_id == profissional_id,
+            Agendamento.data_hora_fim > data_hora,
+            Agendamento.data_hora < data_hora_fim,
+            Agendamento.status.in_(_STATUS_OCUPAM_HORARIO),
+        )
+        .limit(1)
+    )
+    if excluir_id:
+        stmt += lambda s: s.where(Agendamento.id != excluir_id)
+    return stmt
+
+
+def bloqueio_no_horario(profissional_id: int, data_hora: datetime, data_hora_fim: datetime) -> StatementLambdaElement:
+    # Bloqueios incluem o instante final: uma consulta que começa em data_fim conflita
+    return lambda_stmt(
+        lambda: select(BloqueioAgenda.id)
+        .where(
+            BloqueioAgenda.profissional_id == profissional_id,
+            BloqueioAgenda.data_inicio < data_hora_fim,
+            BloqueioAgenda.data_fim >= data_hora,
+        )
+        .limit(1)
+    )
@@ -1,15 +1,22 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from database import get_db
 from models.auth_models import Usuario, ProfissionalUbs
+from utils import consultas_frequentes
 from utils.jwt_handler import verify_token
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Tokens de longa duração emitidos para assinaturas de calendário (ICS).
+# Só são aceitos pelos feeds; as demais rotas exigem o token de acesso normal.
+CALENDAR_TOKEN_SCOPE = "calendar"
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
@@ -26,10 +33,10 @@ async def get_current_user(
         raise excecao_credenciais
 
     id_usuario = carga_util.get("sub")
-    if id_usuario is None:
+    if id_usuario is None or carga_util.get("scope") is not None:
         raise excecao_credenciais
 
-    resultado = await db.execute(select(Usuario).where(Usuario.id == int(id_usuario)))
+    resultado = await db.execute(consultas_frequentes.usuario_por_id(int(id_usuario)))
     usuario = resultado.scalar_one_or_none()
     if not usuario:
         raise excecao_credenciais
@@ -73,3 +80,52 @@ async def get_current_gestor_user(
     if role != "GESTOR":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito ao gestor")
     return current_user
+
+
+def extract_request_token(request: Request, token: Optional[str]) -> Optional[str]:
+    """Token do header Authorization ou, na falta dele, do parâmetro ``token``.
+
+    Usado por rotas abertas diretamente pelo navegador ou por clientes de
+    calendário, que não conseguem enviar headers.
+    """
+    header_auth = request.headers.get("authorization")
+    if header_auth and header_auth.lower().startswith("bearer "):
+        return header_auth.split(" ", 1)[1].strip()
+    return token or None
+
+
+async def get_user_from_raw_token(
+    raw_token: str,
+    db: AsyncSession,
+    scopes: tuple[Optional[str], ...] = (None,),
+) -> Usuario:
+    payload = verify_token(raw_token)
+    if not payload or payload.get("scope") not in scopes:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido")
+
+    user_id = payload.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido")
+
+    resultado = await db.execute(consultas_frequentes.usuario_por_id(int(user_id)))
+    usuario = resultado.scalar_one_or_none()
+    if not usuario:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario nao encontrado")
+
+    if not usuario.ativo:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario inativo")
+
+    return usuario
+
+
+async def get_user_from_request_token(
+    request: Request,
+    token: Optional[str],
+    db: AsyncSession,
+    scopes: tuple[Optional[str], ...] = (None,),
+) -> Usuario:
+    """Autentica rotas consumidas sem headers (downloads, feeds, EventSource)."""
+    raw_token = extract_request_token(request, token)
+    if not raw_token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Não autenticado")
+    return await get_user_from_raw_token(raw_token, db, scopes=scopes)
@@ -0,0 +1,199 @@
+import codecs
+import json
+from typing import IO, Iterator
+
+_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+_COORD_PRECISION = 7  # ~1 cm, suficiente para limites de microárea
+
+
+class GeoJSONError(ValueError):
+    pass
+
+
+class _StreamBuffer:
+    """Buffer incremental de texto sobre um arquivo binário (UTF-8)."""
+
+    def __init__(self, fileobj: IO[bytes], chunk_size: int = _CHUNK_SIZE):
+        self._file = fileobj
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        raw = self._file.read(self._chunk_size)
+        if not raw:
+            self.eof = True
+            self.text += self._decoder.decode(b"", final=True)
+            return False
+        # Descarta o que já foi consumido para manter o buffer pequeno
+        self.text = self.text[self.pos:] + self._decoder.decode(raw)
+        self.pos = 0
+        # Objetos grandes exigem leituras maiores para evitar reparse excessivo
+        self._chunk_size = min(self._chunk_size * 2, 4 * 1024 * 1024)
+        return True
+
+    def skip_ws(self) -> None:
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.fill():
+                return
+
+    def peek(self) -> str:
+        self.skip_ws()
+        if self.pos >= len(self.text):
+            raise GeoJSONError("Fim inesperado do arquivo GeoJSON")
+        return self.text[self.pos]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise GeoJSONError(f"GeoJSON inválido: esperado '{char}' na posição {self.pos}")
+        self.pos += 1
+
+    def decode_value(self, decoder: json.JSONDecoder):
+        self.skip_ws()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as exc:
+                if self.fill():
+                    continue
+                raise GeoJSONError(f"GeoJSON inválido: {exc.msg}") from exc
+            # Números no fim do buffer podem estar truncados ("12" de "123")
+            if end >= len(self.text) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_feature_collection(fileobj: IO[bytes]) -> Iterator[dict]:
+    """Percorre as features de um FeatureCollection sem carregar o arquivo inteiro.
+
+    Apenas o array ``features`` é lido item a item; as demais chaves do objeto
+    raiz (``type``, ``crs``, ``name``...) são decodificadas e descartadas.
+    """
+    decoder = json.JSONDecoder()
+    buf = _StreamBuffer(fileobj)
+    buf.expect("{")
+    tipo = None
+    encontrou_features = False
+
+    if buf.peek() == "}":
+        raise GeoJSONError("GeoJSON vazio")
+
+    while True:
+        chave = buf.decode_value(decoder)
+        if not isinstance(chave, str):
+            raise GeoJSONError("GeoJSON inválido: chave não textual")
+        buf.expect(":")
+
+        if chave == "features":
+            encontrou_features = True
+            buf.expect("[")
+            if buf.peek() == "]":
+                buf.pos += 1
+            else:
+                while True:
+                    feature = buf.decode_value(decoder)
+                    yield feature
+                    proximo = buf.peek()
+                    buf.pos += 1
+                    if proximo == "]":
+                        break
+                    if proximo != ",":
+                        raise GeoJSONError("GeoJSON inválido: lista de features malformada")
+        else:
+            valor = buf.decode_value(decoder)
+            if chave == "type":
+                tipo = valor
+
+        separador = buf.peek()
+        buf.pos += 1
+        if separador == "}":
+            break
+        if separador != ",":
+            raise GeoJSONError("GeoJSON inválido: objeto raiz malformado")
+
+    if tipo is not None and tipo != "FeatureCollection":
+        raise GeoJSONError("O arquivo deve ser um FeatureCollection")
+    if not encontrou_features:
+        raise GeoJSONError("FeatureCollection sem a chave 'features'")
+
+
+def _normalize_position(position) -> list[float]:
+    if not isinstance(position, (list, tuple)) or len(position) < 2:
+        raise GeoJSONError("Coordenada inválida")
+    try:
+        lon = float(position[0])
+        lat = float(position[1])
+    except (TypeError, ValueError) as exc:
+        raise GeoJSONError("Coordenada não numérica") from exc
+    if not (-180.0 <= lon <= 180.0) or not (-90.0 <= lat <= 90.0):
+        raise GeoJSONError("Coordenada fora dos limites de longitude/latitude")
+    # Descarta altitude (3ª dimensão) e limita a precisão
+    return [round(lon, _COORD_PRECISION), round(lat, _COORD_PRECISION)]
+
+
+def _signed_area(ring: list[list[float]]) -> float:
+    total = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        total += x1 * y2 - x2 * y1
+    return total / 2.0
+
+
+def _normalize_ring(ring, exterior: bool) -> list[list[float]]:
+    if not isinstance(ring, (list, tuple)):
+        raise GeoJSONError("Anel de polígono inválido")
+
+    pontos: list[list[float]] = []
+    for position in ring:
+        ponto = _normalize_position(position)
+        if not pontos or pontos[-1] != ponto:
+            pontos.append(ponto)
+
+    if pontos and pontos[0] != pontos[-1]:
+        pontos.append(list(pontos[0]))
+    if len(pontos) < 4:
+        raise GeoJSONError("Anel de polígono precisa de ao menos 4 posições")
+
+    area = _signed_area(pontos)
+    if area == 0:
+        raise GeoJSONError("Anel de polígono com área nula")
+    # RFC 7946: anel externo anti-horário, furos no sentido horário
+    if (area > 0) != exterior:
+        pontos.reverse()
+    return pontos
+
+
+def _normalize_polygon(rings) -> list[list[list[float]]]:
+    if not isinstance(rings, (list, tuple)) or not rings:
+        raise GeoJSONError("Polígono sem anéis")
+    return [_normalize_ring(ring, exterior=(i == 0)) for i, ring in enumerate(rings)]
+
+
+def normalize_geometry(geometry) -> dict:
+    """Valida e normaliza uma geometria Polygon/MultiPolygon.
+
+    Fecha anéis abertos, remove pontos repetidos e a 3ª dimensão, arredonda
+    as coordenadas e corrige a orientação dos anéis conforme a RFC 7946.
+    """
+    if not isinstance(geometry, dict):
+        raise GeoJSONError("Feature sem geometria")
+
+    tipo = geometry.get("type")
+    coordenadas = geometry.get("coordinates")
+    if tipo == "Polygon":
+        return {"type": "Polygon", "coordinates": _normalize_polygon(coordenadas)}
+    if tipo == "MultiPolygon":
+        if not isinstance(coordenadas, (list, tuple)) or not coordenadas:
+            raise GeoJSONError("MultiPolygon sem polígonos")
+        return {
+            "type": "MultiPolygon",
+            "coordinates": [_normalize_polygon(poly) for poly in coordenadas],
+        }
+    raise GeoJSONError(f"Tipo de geometria não suportado: {tipo}")
@@ -0,0 +1,53 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request
+
+
+def make_etag(*parts) -> str:
+    """Gera um ETag fraco estável a partir das partes informadas."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Indica se o cliente já possui a versão ``etag`` (If-None-Match)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Comparação fraca: ignora o prefixo W/ dos dois lados
+    alvo = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == alvo for tag in header.split(","))
+
+
+def format_http_date(valor: datetime) -> str:
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return format_datetime(valor.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Avalia os validadores condicionais (RFC 9110, seção 13.2.2).
+
+    If-None-Match tem precedência; If-Modified-Since só é considerado quando
+    o cliente não enviou ETag.
+    """
+    if request.headers.get("if-none-match"):
+        return etag_matches(request, etag)
+    header = request.headers.get("if-modified-since")
+    if not header or last_modified is None:
+        return False
+    try:
+        desde = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if desde.tzinfo is None:
+        desde = desde.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # Datas HTTP têm resolução de segundos
+    return last_modified.replace(microsecond=0) <= desde
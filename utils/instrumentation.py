@@ -0,0 +1,160 @@
+"""Medição por requisição: tempo total, tempo no banco, nº de SQLs e bytes.
+
+O middleware guarda um :class:`MetricasRequisicao` num ``ContextVar``; os
+eventos de cursor do SQLAlchemy somam nele o tempo e a quantidade de
+statements executados durante a requisição. Ao final, os números vão para o
+header ``Server-Timing`` e para uma linha de log JSON (logger
+``plataforma.requests``), o que deixa rotas lentas e N+1 visíveis nos logs.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from utils.loop_watchdog import watchdog
+from utils.metrics import observar_requisicao
+
+logger = logging.getLogger("plataforma.requests")
+
+# Rotas acima deste tempo são logadas como WARNING
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+_IGNORAR = {"/ping", "/metrics"}
+
+
+@dataclass
+class MetricasRequisicao:
+    inicio: float = field(default_factory=time.perf_counter)
+    db_segundos: float = 0.0
+    db_statements: int = 0
+    bytes_resposta: int = 0
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.inicio) * 1000
+
+    @property
+    def db_ms(self) -> float:
+        return self.db_segundos * 1000
+
+
+_metricas: ContextVar[Optional[MetricasRequisicao]] = ContextVar("metricas_requisicao", default=None)
+
+
+def metricas_atuais() -> Optional[MetricasRequisicao]:
+    return _metricas.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_inicio_cursor", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("_inicio_cursor")
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    metricas = _metricas.get()
+    if metricas is not None:
+        metricas.db_segundos += duracao
+        metricas.db_statements += 1
+
+
+def _handle_error(exception_context):
+    # Statement com erro não passa pelo after_cursor_execute: descarta o início pendente
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("_inicio_cursor"):
+        conn.info["_inicio_cursor"].pop()
+
+
+def instrumentar_engine(engine) -> None:
+    """Registra os eventos de cursor na engine (aceita AsyncEngine). Idempotente."""
+    alvo: Engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if event.contains(alvo, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(alvo, "before_cursor_execute", _before_cursor_execute)
+    event.listen(alvo, "after_cursor_execute", _after_cursor_execute)
+    event.listen(alvo, "handle_error", _handle_error)
+
+
+def server_timing(metricas: MetricasRequisicao) -> str:
+    return (
+        f"app;dur={metricas.total_ms:.1f}, "
+        f'db;dur={metricas.db_ms:.1f};desc="{metricas.db_statements} queries"'
+    )
+
+
+def _rota(scope) -> str:
+    # O FastAPI grava a rota casada no scope; usar o template agrupa /ubs/1 e /ubs/2
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+class InstrumentacaoMiddleware:
+    """Middleware ASGI puro (não bufferiza o corpo, então funciona com streaming)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in _IGNORAR:
+            await self.app(scope, receive, send)
+            return
+
+        metricas = MetricasRequisicao()
+        token = _metricas.set(metricas)
+        task = watchdog.registrar_requisicao(scope)
+        status_code = 500
+
+        async def send_instrumentado(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(metricas).encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                metricas.bytes_resposta += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_instrumentado)
+        finally:
+            _metricas.reset(token)
+            watchdog.remover_requisicao(task)
+            # Sem rota casada o path cru geraria uma série por URL
+            rota_metrica = _rota(scope) if scope.get("route") else "<sem_rota>"
+            observar_requisicao(scope.get("method", ""), rota_metrica, status_code, metricas.total_ms / 1000)
+            self._log(scope, status_code, metricas)
+
+    @staticmethod
+    def _log(scope, status_code: int, metricas: MetricasRequisicao) -> None:
+        total_ms = metricas.total_ms
+        nivel = logging.WARNING if total_ms >= SLOW_REQUEST_MS else logging.INFO
+        if not logger.isEnabledFor(nivel):
+            return
+        logger.log(
+            nivel,
+            json.dumps(
+                {
+                    "evento": "request",
+                    "metodo": scope.get("method"),
+                    "rota": _rota(scope),
+                    "status": status_code,
+                    "duracao_ms": round(total_ms, 1),
+                    "db_ms": round(metricas.db_ms, 1),
+                    "db_statements": metricas.db_statements,
+                    "bytes": metricas.bytes_resposta,
+                },
+                ensure_ascii=False,
+            ),
+        )
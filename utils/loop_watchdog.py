@@ -0,0 +1,164 @@
+"""Detector de bloqueios do event loop (opt-in via ``LOOP_WATCHDOG_MS``).
+
+Uma corrotina de batimento atualiza um timestamp a cada poucos ms; uma
+thread separada confere esse timestamp e, quando ele fica parado por mais
+que o limite, captura a pilha da thread do loop (onde está a chamada
+bloqueante) e a rota da requisição que estava executando. Quando o loop
+volta, o batimento fecha o episódio com a duração total.
+
+Os episódios ficam num buffer circular consultado por
+``GET /api/observabilidade/loop-bloqueios`` e também vão para o log.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger("plataforma.loop_watchdog")
+
+MAX_REGISTROS = 100
+_MAX_LINHAS_PILHA = 40
+
+
+class LoopWatchdog:
+    def __init__(self, limite_ms: float = 0, max_registros: int = MAX_REGISTROS) -> None:
+        self.limite_ms = limite_ms
+        self._limite = limite_ms / 1000
+        # Amostra 4x por limite para capturar a pilha ainda durante o bloqueio
+        self._intervalo = max(self._limite / 4, 0.002)
+        self._registros: deque[dict] = deque(maxlen=max_registros)
+        self._requisicoes: dict[asyncio.Task, dict] = {}
+        self._lock = threading.Lock()
+        self._episodio: Optional[dict] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_loop_id: Optional[int] = None
+        self._batimento = time.monotonic()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tarefa_batimento: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "LoopWatchdog":
+        return cls(limite_ms=float(os.getenv("LOOP_WATCHDOG_MS", "0") or 0))
+
+    @property
+    def ativo(self) -> bool:
+        return self.limite_ms > 0
+
+    @property
+    def em_execucao(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        if not self.ativo or self.em_execucao:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._thread_loop_id = threading.get_ident()
+        self._batimento = time.monotonic()
+        self._parar.clear()
+        self._tarefa_batimento = self._loop.create_task(self._bater())
+        self._thread = threading.Thread(target=self._vigiar, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("Watchdog do event loop ativo (limite %.0f ms)", self.limite_ms)
+
+    async def parar(self) -> None:
+        self._parar.set()
+        if self._tarefa_batimento is not None:
+            self._tarefa_batimento.cancel()
+            try:
+                await self._tarefa_batimento
+            except asyncio.CancelledError:
+                pass
+            self._tarefa_batimento = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # --- Atribuição à rota (chamado pelo middleware de instrumentação) ---
+
+    def registrar_requisicao(self, scope: dict) -> Optional[asyncio.Task]:
+        if not self.em_execucao:
+            return None
+        task = asyncio.current_task()
+        if task is not None:
+            # Guarda o próprio scope: o roteador grava nele a rota casada depois
+            self._requisicoes[task] = scope
+        return task
+
+    def remover_requisicao(self, task: Optional[asyncio.Task]) -> None:
+        if task is not None:
+            self._requisicoes.pop(task, None)
+
+    # --- Consulta ---
+
+    def registros(self) -> list[dict]:
+        with self._lock:
+            return list(self._registros)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._registros.clear()
+
+    # --- Internos ---
+
+    async def _bater(self) -> None:
+        while True:
+            await asyncio.sleep(self._intervalo)
+            agora = time.monotonic()
+            atraso = agora - self._batimento - self._intervalo
+            self._batimento = agora
+            with self._lock:
+                episodio, self._episodio = self._episodio, None
+                if episodio is not None:
+                    episodio["duracao_ms"] = round(max(atraso, self._limite) * 1000, 1)
+                    self._registros.append(episodio)
+            if episodio is not None:
+                logger.warning(
+                    "Event loop bloqueado por %.0f ms em %s %s\n%s",
+                    episodio["duracao_ms"],
+                    episodio["metodo"] or "-",
+                    episodio["rota"] or "(fora de requisição)",
+                    "".join(episodio["pilha"]),
+                )
+
+    def _vigiar(self) -> None:
+        while not self._parar.wait(self._intervalo):
+            parado = time.monotonic() - self._batimento
+            if parado < self._limite + self._intervalo:
+                continue
+            with self._lock:
+                if self._episodio is None:
+                    self._episodio = self._capturar()
+
+    def _capturar(self) -> dict:
+        frame = sys._current_frames().get(self._thread_loop_id)
+        pilha = traceback.format_stack(frame)[-_MAX_LINHAS_PILHA:] if frame is not None else []
+        metodo = rota = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        scope = self._requisicoes.get(task) if task is not None else None
+        if scope is not None:
+            metodo = scope.get("method")
+            route = scope.get("route")
+            rota = getattr(route, "path", None) or scope.get("path")
+        return {
+            "detectado_em": datetime.now(timezone.utc).isoformat(),
+            "duracao_ms": None,
+            "metodo": metodo,
+            "rota": rota,
+            "pilha": pilha,
+        }
+
+
+watchdog = LoopWatchdog.from_env()
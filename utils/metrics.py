@@ -0,0 +1,147 @@
+"""Métricas Prometheus expostas em ``/metrics``.
+
+Com o gunicorn cada worker tem seus próprios contadores. Quando a variável
+``PROMETHEUS_MULTIPROC_DIR`` está definida (o ``gunicorn.conf.py`` define),
+o prometheus_client grava os valores em arquivos mmap nesse diretório e o
+``/metrics`` de qualquer worker agrega todos os processos.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+LOOP_LAG_INTERVALO = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+
+_BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por rota",
+    ["method", "route", "status"],
+    buckets=_BUCKETS_LATENCIA,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Conexões do pool em uso",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Conexões abertas além de pool_size (negativo: pool ainda não cheio)",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "pool_size configurado",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Tempo para obter uma conexão do pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10),
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Atraso do event loop em relação ao agendado",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PDF_RENDER = Histogram(
+    "pdf_render_seconds",
+    "Tempo de geração de PDFs",
+    ["relatorio"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+)
+UPLOAD_BYTES = Histogram(
+    "upload_size_bytes",
+    "Tamanho dos arquivos enviados",
+    ["destino"],
+    buckets=(10_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 20_000_000),
+)
+
+
+def observar_requisicao(metodo: str, rota: str, status_code: int, segundos: float) -> None:
+    REQUEST_LATENCY.labels(metodo, rota, str(status_code)).observe(segundos)
+
+
+def observar_upload(destino: str, tamanho: Optional[int]) -> None:
+    if tamanho is not None:
+        UPLOAD_BYTES.labels(destino).observe(tamanho)
+
+
+class _MedeEspera:
+    """Mede o tempo de espera por conexão (não há evento público para isso)."""
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - inicio)
+
+
+class QueuePoolMedido(_MedeEspera, AsyncAdaptedQueuePool):
+    pass
+
+
+class NullPoolMedido(_MedeEspera, NullPool):
+    """Sem pool local (PgBouncer): a espera medida é a abertura da conexão."""
+
+
+def instrumentar_pool(engine) -> None:
+    """Atualiza os gauges do pool a cada checkout/checkin. Idempotente."""
+    alvo = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+
+    def _atualizar(devolvendo: int = 0):
+        pool = alvo.pool
+        if hasattr(pool, "checkedout"):
+            DB_POOL_CHECKED_OUT.set(max(pool.checkedout() - devolvendo, 0))
+            DB_POOL_OVERFLOW.set(pool.overflow())
+            DB_POOL_SIZE.set(pool.size())
+
+    def _checkout(*_args):
+        _atualizar()
+
+    def _checkin(*_args):
+        # O evento dispara antes de a conexão voltar à fila do pool
+        _atualizar(devolvendo=1)
+
+    if getattr(alvo, "_metricas_pool", False):
+        return
+    alvo._metricas_pool = True
+    event.listen(alvo, "checkout", _checkout)
+    event.listen(alvo, "checkin", _checkin)
+    _atualizar()
+
+
+async def monitorar_event_loop(intervalo: float = LOOP_LAG_INTERVALO) -> None:
+    """Mede quanto o loop atrasa para acordar um sleep (iniciado no lifespan)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        inicio = loop.time()
+        await asyncio.sleep(intervalo)
+        EVENT_LOOP_LAG.observe(max(loop.time() - inicio - intervalo, 0.0))
+
+
+def gerar_metricas() -> tuple[bytes, str]:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
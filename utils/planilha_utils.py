@@ -0,0 +1,143 @@
+import csv
+import io
+import re
+import unicodedata
+from typing import IO, Iterator, Optional
+
+_SAMPLE_SIZE = 64 * 1024
+_DELIMITADORES = ";,\t|"
+
+
+class PlanilhaError(ValueError):
+    pass
+
+
+def normalizar_cabecalho(valor) -> str:
+    """'Período de Referência ' -> 'periodo_de_referencia'."""
+    texto = unicodedata.normalize("NFKD", str(valor or "")).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", texto.strip().lower()).strip("_")
+
+
+def parse_numero(valor) -> Optional[float]:
+    """Converte números no formato brasileiro ou internacional ('1.234,5', '75%', 80)."""
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        raise PlanilhaError("Valor numérico inválido")
+    if isinstance(valor, (int, float)):
+        return float(valor)
+
+    texto = str(valor).strip().replace("%", "").replace(" ", "")
+    if not texto:
+        return None
+    if "," in texto and "." in texto:
+        # O separador que aparece por último é o decimal
+        if texto.rfind(",") > texto.rfind("."):
+            texto = texto.replace(".", "").replace(",", ".")
+        else:
+            texto = texto.replace(",", "")
+    elif "," in texto:
+        texto = texto.replace(",", ".")
+    try:
+        return float(texto)
+    except ValueError as exc:
+        raise PlanilhaError(f"Valor numérico inválido: {valor}") from exc
+
+
+def _detectar_encoding(amostra: bytes) -> str:
+    try:
+        amostra.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # Amostra cortada no meio de um caractere multibyte ainda é UTF-8
+        if exc.start < len(amostra) - 3:
+            return "cp1252"
+    return "utf-8-sig"
+
+
+def iter_csv_rows(fileobj: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    """Percorre um CSV linha a linha devolvendo (número da linha, {cabeçalho: valor}).
+
+    O delimitador (``;``, ``,``, tab ou ``|``) e a codificação (UTF-8 ou
+    Windows-1252, comum em exportações do e-SUS) são detectados pelo início
+    do arquivo.
+    """
+    buffered = io.BufferedReader(_RawAdapter(fileobj), buffer_size=_SAMPLE_SIZE)
+    amostra = buffered.peek(_SAMPLE_SIZE)[:_SAMPLE_SIZE]
+    if not amostra.strip():
+        raise PlanilhaError("Arquivo vazio")
+
+    encoding = _detectar_encoding(amostra)
+    texto_amostra = amostra.decode(encoding, errors="ignore")
+    try:
+        primeiras_linhas = "\n".join(texto_amostra.splitlines()[:20])
+        delimitador = csv.Sniffer().sniff(primeiras_linhas, delimiters=_DELIMITADORES).delimiter
+    except csv.Error:
+        delimitador = ";"
+
+    texto = io.TextIOWrapper(buffered, encoding=encoding, newline="")
+    leitor = csv.reader(texto, delimiter=delimitador)
+    cabecalho = _proxima_linha(leitor)
+    if not cabecalho:
+        raise PlanilhaError("Arquivo sem cabeçalho")
+    chaves = [normalizar_cabecalho(c) for c in cabecalho]
+
+    while (linha := _proxima_linha(leitor)) is not None:
+        if not any(c.strip() for c in linha):
+            continue
+        yield leitor.line_num, dict(zip(chaves, linha))
+
+
+def _proxima_linha(leitor) -> Optional[list[str]]:
+    try:
+        return next(leitor, None)
+    except UnicodeDecodeError as exc:
+        # A codificação vem da amostra inicial; um byte inválido mais adiante
+        # (arquivo com trechos em UTF-8 e em Windows-1252) só aparece aqui.
+        # O texto é decodificado em blocos, então a linha exata não é conhecida.
+        raise PlanilhaError(
+            f"Codificação inválida após a linha {leitor.line_num}: salve a planilha inteira em UTF-8"
+        ) from exc
+
+
+def iter_xlsx_rows(fileobj: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    """Percorre a primeira aba de um XLSX em modo somente leitura (streaming)."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:  # pragma: no cover - dependência opcional
+        raise PlanilhaError("Importação de XLSX indisponível: instale o pacote openpyxl") from exc
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:
+        raise PlanilhaError("Arquivo XLSX inválido") from exc
+
+    try:
+        planilha = workbook.worksheets[0]
+        linhas = planilha.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if not cabecalho:
+            raise PlanilhaError("Arquivo sem cabeçalho")
+        chaves = [normalizar_cabecalho(c) for c in cabecalho]
+
+        for numero, linha in enumerate(linhas, start=2):
+            if not any(c not in (None, "") for c in linha):
+                continue
+            yield numero, dict(zip(chaves, linha))
+    finally:
+        workbook.close()
+
+
+class _RawAdapter(io.RawIOBase):
+    """Permite envolver arquivos binários genéricos (ex.: SpooledTemporaryFile) em BufferedReader."""
+
+    def __init__(self, fileobj: IO[bytes]):
+        self._file = fileobj
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        dados = self._file.read(len(buffer))
+        n = len(dados)
+        buffer[:n] = dados
+        return n
@@ -0,0 +1,6 @@
+"""Interruptor dos limites por IP (slowapi) usados no main.py e nas rotas de auth."""
+
+import os
+
+# RATE_LIMIT_ENABLED=false desliga os limites por IP (testes de carga locais)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() not in ("0", "false", "no")
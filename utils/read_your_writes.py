@@ -0,0 +1,55 @@
+"""Leitura das próprias escritas quando há réplica de leitura.
+
+Depois de uma escrita bem-sucedida, o cliente recebe um cookie com o
+instante até o qual suas leituras devem ir ao primário; assim ele não vê
+dados desatualizados enquanto a réplica ainda não aplicou a alteração.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Callable
+
+from fastapi import Request
+
+COOKIE_LEITURA_PRIMARIO = "leitura_primaria_ate"
+JANELA_SEGUNDOS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+_METODOS_ESCRITA = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def leitura_no_primario(request: Request) -> bool:
+    valor = request.cookies.get(COOKIE_LEITURA_PRIMARIO)
+    try:
+        return valor is not None and float(valor) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """Marca o cliente com o cookie após escritas (middleware ASGI puro)."""
+
+    def __init__(self, app, ativo: Callable[[], bool] = lambda: True, janela: int = JANELA_SEGUNDOS):
+        self.app = app
+        self.ativo = ativo
+        self.janela = janela
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") not in _METODOS_ESCRITA or not self.ativo():
+            await self.app(scope, receive, send)
+            return
+
+        async def send_com_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                ate = time.time() + self.janela
+                cookie = (
+                    f"{COOKIE_LEITURA_PRIMARIO}={ate:.3f}; Max-Age={self.janela}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_com_cookie)